@@ -0,0 +1,43 @@
+"""Add pg_trgm GIN indexes for CRM search
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# (index name, table, column) - trigram GIN indexes serve ILIKE '%q%'
+# substring matches and similarity() ranking for search/typeahead
+TRIGRAM_INDEXES = [
+    ('ix_customers_name_trgm', 'customers', 'name'),
+    ('ix_customers_company_trgm', 'customers', 'company'),
+    ('ix_customers_email_trgm', 'customers', 'email'),
+    ('ix_projects_name_trgm', 'projects', 'name'),
+    ('ix_quotes_title_trgm', 'quotes', 'title'),
+    ('ix_quotes_quote_number_trgm', 'quotes', 'quote_number'),
+    ('ix_inventory_name_trgm', 'inventory_items', 'name'),
+    ('ix_inventory_sku_trgm', 'inventory_items', 'sku'),
+]
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            name, table, [column], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table)
+    # pg_trgm is left installed; other objects may depend on it
@@ -0,0 +1,71 @@
+"""Store quotes.canvas_state in the compact binary canvas format
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+# Rows converted per round trip; canvas states can be several MB each
+BATCH_SIZE = 100
+
+
+def _convert(convert, target_type):
+    """Fill a temporary column from canvas_state, then swap it in."""
+    conn = op.get_bind()
+    op.add_column('quotes', sa.Column('canvas_state_new', target_type, nullable=True))
+
+    ids = [row[0] for row in conn.execute(sa.text('SELECT id FROM quotes WHERE canvas_state IS NOT NULL'))]
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        rows = conn.execute(
+            sa.text('SELECT id, canvas_state FROM quotes WHERE id IN :ids').bindparams(
+                sa.bindparam('ids', expanding=True)),
+            {'ids': batch})
+        conn.execute(convert, [{'id': row[0], 'value': row[1]} for row in rows])
+
+    op.drop_column('quotes', 'canvas_state')
+    op.alter_column('quotes', 'canvas_state_new', new_column_name='canvas_state')
+
+
+def upgrade():
+    from services.canvas_codec import encode_canvas
+
+    class Encoded(sa.types.TypeDecorator):
+        impl = sa.LargeBinary
+        cache_ok = True
+
+        def process_bind_param(self, value, dialect):
+            return encode_canvas(value)
+
+    _convert(
+        sa.text('UPDATE quotes SET canvas_state_new = :value WHERE id = :id').bindparams(
+            sa.bindparam('value', type_=Encoded())),
+        sa.LargeBinary())
+
+
+def downgrade():
+    from services.canvas_codec import decode_canvas
+
+    class Decoded(sa.types.TypeDecorator):
+        impl = sa.Text
+        cache_ok = True
+
+        def process_bind_param(self, value, dialect):
+            return json.dumps(decode_canvas(bytes(value)))
+
+    _convert(
+        sa.text('UPDATE quotes SET canvas_state_new = CAST(:value AS JSONB) WHERE id = :id').bindparams(
+            sa.bindparam('value', type_=Decoded())),
+        postgresql.JSONB())
@@ -43,6 +43,8 @@ from app.api.crm_resources import crm_resources_bp
 from app.api.crm_google import crm_google_bp
 from app.api.crm_integration import crm_integration_bp
 from app.api.crm_v2 import crm_v2_bp
+from app.api.jobs import jobs_bp
+from app.api.assets import assets_bp
 
 
 def validate_storage_policy():
@@ -120,9 +122,15 @@ def register_blueprints(app, app_functions=None):
     app.register_blueprint(crm_google_bp)
     app.register_blueprint(crm_integration_bp)
     app.register_blueprint(crm_v2_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(assets_bp)
 
+    # Build shared PDF styles once, before the first quote request
+    from app.utils.pdf_templates import warm_pdf_templates
+    warm_pdf_templates()
 
-__all__ = ['register_blueprints', 'validate_storage_policy', 'app', 'pages_bp', 'auth_bp', 'admin_bp', 'misc_bp', 'learning_bp', 'simpro_bp', 'kanban_bp', 'pdf_editor_bp', 'ai_mapping_bp', 'board_builder_bp', 'canvas_bp', 'electrical_cad_bp', 'quote_automation_bp', 'crm_bp', 'dashboard_bp', 'ai_chat_bp', 'scheduler_bp', 'crm_extended_bp', 'crm_resources_bp', 'crm_google_bp', 'crm_integration_bp', 'crm_v2_bp']
+
+__all__ = ['register_blueprints', 'validate_storage_policy', 'app', 'pages_bp', 'auth_bp', 'admin_bp', 'misc_bp', 'learning_bp', 'simpro_bp', 'kanban_bp', 'pdf_editor_bp', 'ai_mapping_bp', 'board_builder_bp', 'canvas_bp', 'electrical_cad_bp', 'quote_automation_bp', 'crm_bp', 'dashboard_bp', 'ai_chat_bp', 'scheduler_bp', 'crm_extended_bp', 'crm_resources_bp', 'crm_google_bp', 'crm_integration_bp', 'crm_v2_bp', 'jobs_bp', 'assets_bp']
 
 
 # ==============================================================================
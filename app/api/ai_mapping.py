@@ -20,6 +20,7 @@ import traceback
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file, current_app
 from werkzeug.utils import secure_filename
+from app.api.jobs import submit_analysis_job, wants_sync
 import requests
 import logging
 
@@ -40,11 +41,16 @@ def get_app_functions():
 
 @ai_mapping_bp.route('/api/ai-mapping/analyze', methods=['POST'])
 def ai_mapping_analyze():
-    """Analyze floor plan with AI learning"""
+    """
+    Analyze floor plan with AI learning.
+
+    Runs on the analysis job queue and answers 202 with a job_id to poll at
+    /api/jobs/<job_id>; pass wait=true to block for the result instead.
+    """
     try:
         funcs = get_app_functions()
-        ai_map_floorplan = funcs.get('ai_map_floorplan')
-        generate_marked_up_image = funcs.get('generate_marked_up_image')
+        if not funcs.get('ai_map_floorplan'):
+            return jsonify({'success': False, 'error': 'AI mapping function not available'}), 500
         
         if 'floorplan' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'}), 400
@@ -55,39 +61,19 @@ def ai_mapping_analyze():
         
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
+        # Timestamps alone collide for uploads in the same second
+        run_id = f"{timestamp}_{uuid.uuid4().hex[:8]}"
+        unique_filename = f"{run_id}_{filename}"
         file_path = os.path.join(current_app.config['AI_MAPPING_FOLDER'], unique_filename)
         file.save(file_path)
         
-        is_pdf = filename.lower().endswith('.pdf')
-        
-        # Analyze with AI (includes learning context)
-        if ai_map_floorplan:
-            mapping_result = ai_map_floorplan(file_path, is_pdf)
-        else:
-            return jsonify({'success': False, 'error': 'AI mapping function not available'}), 500
-        
-        if 'error' in mapping_result:
-            return jsonify({'success': False, 'error': mapping_result['error']})
-        
-        # Generate marked-up image
-        output_filename = f"marked_{timestamp}_{os.path.splitext(filename)[0]}.png"
-        output_path = os.path.join(current_app.config['AI_MAPPING_FOLDER'], output_filename)
-        
-        if generate_marked_up_image:
-            generate_marked_up_image(file_path, mapping_result, output_path)
+        # refresh=true skips the analysis cache and re-runs the model
+        use_cache = request.values.get('refresh', '').lower() not in ('1', 'true', 'on')
         
-        # Create analysis record
-        analysis_id = str(uuid.uuid4())
-        
-        return jsonify({
-            'success': True,
-            'analysis_id': analysis_id,
-            'mapping': mapping_result,
-            'original_file': unique_filename,
-            'marked_up_file': output_filename,
-            'timestamp': timestamp
-        })
+        job_args = (file_path, filename, unique_filename, timestamp, use_cache, run_id)
+        if wants_sync():
+            return jsonify(_map_saved_floorplan(*job_args))
+        return submit_analysis_job('ai_mapping', _map_saved_floorplan, *job_args)
         
     except Exception as e:
         return jsonify({
@@ -97,6 +83,53 @@ def ai_mapping_analyze():
         }), 500
 
 
+def _map_saved_floorplan(file_path, filename, unique_filename, timestamp, use_cache=True, run_id=None):
+    """Run AI mapping and markup for an uploaded floor plan"""
+    run_id = run_id or timestamp
+    funcs = get_app_functions()
+    # Plan sets: every PDF page is mapped and merged, tagged by page
+    ai_map_floorplan = funcs.get('ai_map_floorplan_all_pages') or funcs.get('ai_map_floorplan')
+    generate_marked_up_image = funcs.get('generate_marked_up_image')
+    
+    is_pdf = filename.lower().endswith('.pdf')
+    
+    # Analyze with AI (includes learning context)
+    mapping_result = ai_map_floorplan(file_path, is_pdf, use_cache=use_cache)
+    
+    if 'error' in mapping_result:
+        return {'success': False, 'error': mapping_result['error']}
+    
+    # Generate marked-up image
+    output_filename = f"marked_{run_id}_{os.path.splitext(filename)[0]}.png"
+    output_path = os.path.join(current_app.config['AI_MAPPING_FOLDER'], output_filename)
+    
+    if generate_marked_up_image:
+        generate_marked_up_image(file_path, mapping_result, output_path)
+    
+    # One marked-up image per sheet of a plan set
+    marked_up_pages = [output_filename]
+    for page_num in range(1, mapping_result.get('page_count', 1)):
+        page_filename = f"marked_{run_id}_{os.path.splitext(filename)[0]}_p{page_num + 1}.png"
+        if generate_marked_up_image:
+            generate_marked_up_image(file_path, mapping_result,
+                                     os.path.join(current_app.config['AI_MAPPING_FOLDER'], page_filename),
+                                     page_num=page_num)
+        marked_up_pages.append(page_filename)
+    
+    # Create analysis record
+    analysis_id = str(uuid.uuid4())
+    
+    return {
+        'success': True,
+        'analysis_id': analysis_id,
+        'mapping': mapping_result,
+        'original_file': unique_filename,
+        'marked_up_file': output_filename,
+        'marked_up_pages': marked_up_pages,
+        'timestamp': timestamp
+    }
+
+
 @ai_mapping_bp.route('/api/ai-mapping/save-correction', methods=['POST'])
 def save_correction():
     """Save user corrections as learning data"""
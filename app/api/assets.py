@@ -0,0 +1,158 @@
+"""
+Content-Addressed Assets Blueprint
+
+Serves files published to the asset store (services/asset_store.py):
+- /assets/<sha256><ext>: Immutable asset (strong ETag, Range, X-Sendfile/X-Accel-Redirect)
+- /assets/pyramids/<id>: Build status of a floorplan pyramid (services/floorplan_pyramid.py)
+- /assets/pyramids/<id>/<file>: Pyramid thumbnail, medium and Deep Zoom tiles (the full
+  image is the floorplan's own asset)
+
+Floorplans and documents are published here, and responses that used
+to inline or stream them carry the asset URL instead.
+"""
+
+import mimetypes
+import os
+
+from flask import Blueprint, request, jsonify, send_file, send_from_directory, current_app
+from werkzeug.utils import secure_filename
+import logging
+
+from services.asset_store import AssetStore, get_asset_store
+from services.floorplan_pyramid import PYRAMID_ID, get_floorplan_pyramids
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+assets_bp = Blueprint('assets_bp', __name__)
+
+# Asset URLs never change meaning, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+
+def asset_store():
+    """The asset store for this app (ASSET_STORE_FOLDER, else ASSET_STORE_DIR)"""
+    return get_asset_store(current_app.config.get('ASSET_STORE_FOLDER'))
+
+
+def publish_asset(path):
+    """Asset URL for a file (copied into the store on first use), or None"""
+    return asset_store().publish(path)
+
+
+def floorplan_pyramids():
+    """Pyramid builder writing under the asset store's pyramids folder, full images in the store"""
+    store = asset_store()
+    return get_floorplan_pyramids(os.path.join(store.root, 'pyramids'), assets=store)
+
+
+def _pyramid_urls(pyramid_id, full_url, tiles):
+    base = f'/assets/pyramids/{pyramid_id}'
+    urls = {
+        'status_url': base,
+        'thumbnail_url': f'{base}/thumbnail.jpg',
+        'medium_url': f'{base}/medium.jpg',
+        'full_url': full_url,
+    }
+    if tiles:
+        urls['tiles_url'] = f'{base}/tiles.dzi'
+    return urls
+
+
+def submit_pyramid(image_path):
+    """
+    Queue the thumbnail/medium/tile pyramid for an uploaded floorplan raster.
+
+    Returns the build status with the URLs each level will have once it is
+    ready (and the page size, if it is already built), or None if the build
+    could not be queued.
+    """
+    try:
+        builder = floorplan_pyramids()
+        status = builder.submit(image_path)
+    except Exception as e:
+        logger.error(f"Error queueing floorplan pyramid for {image_path}: {e}")
+        return None
+    manifest = status.pop('manifest', None)
+    if manifest:
+        status.update(width=manifest['width'], height=manifest['height'])
+    full_url = AssetStore.url_for(status.pop('full_asset'))
+    return dict(status, **_pyramid_urls(status['id'], full_url, builder.tiles))
+
+
+def _immutable(response, private=False):
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@assets_bp.route('/assets/<name>')
+def serve_asset(name):
+    """Serve an asset; ?filename= makes it a (private) document download with that name"""
+    store = asset_store()
+    path = store.path_for(name)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Asset not found'}), 404
+    store.touch(name)
+
+    digest = name.split('.')[0]
+    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    download_name = secure_filename(request.args.get('filename', ''))
+
+    if store.sendfile:
+        # The front proxy streams the file and answers Range requests itself
+        response = current_app.response_class(mimetype=mimetype)
+        if store.sendfile == 'x-accel-redirect':
+            response.headers['X-Accel-Redirect'] = store.accel_prefix + store.relative_path(name).replace('\\', '/')
+        else:
+            response.headers['X-Sendfile'] = path
+        if download_name:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.set_etag(digest)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=digest,
+                             as_attachment=bool(download_name), download_name=download_name or None)
+
+    # Documents are only for the quote's users, so shared caches must not keep them
+    return _immutable(response, private=bool(download_name))
+
+
+@assets_bp.route('/assets/pyramids/<pyramid_id>')
+def pyramid_status(pyramid_id):
+    """Build status of a floorplan pyramid, with its level URLs once ready"""
+    if not PYRAMID_ID.match(pyramid_id):
+        return jsonify({'success': False, 'error': 'Pyramid not found'}), 404
+    status = floorplan_pyramids().status(pyramid_id)
+    if status['status'] == 'missing':
+        return jsonify({'success': False, 'error': 'Pyramid not found'}), 404
+
+    result = {'success': True, **status}
+    manifest = status.get('manifest')
+    if manifest:
+        # The full image lives in the asset store: keep it from eviction while
+        # the pyramid is in use, and only hand out its URL if it is still there
+        store = asset_store()
+        full_asset = manifest['levels']['full']['asset']
+        full_url = None
+        if store.path_for(full_asset):
+            store.touch(full_asset)
+            full_url = AssetStore.url_for(full_asset)
+        result.update(_pyramid_urls(pyramid_id, full_url, bool(manifest.get('tiles'))))
+    response = jsonify(result)
+    response.cache_control.no_cache = True
+    return response
+
+
+@assets_bp.route('/assets/pyramids/<pyramid_id>/<path:filename>')
+def serve_pyramid_file(pyramid_id, filename):
+    """Serve a file of a finished pyramid (its id is content-addressed, so it never changes)"""
+    builder = floorplan_pyramids()
+    if not PYRAMID_ID.match(pyramid_id) or builder.manifest(pyramid_id) is None:
+        return jsonify({'success': False, 'error': 'Pyramid not found'}), 404
+    builder.touch(pyramid_id)
+    return _immutable(send_from_directory(os.path.abspath(builder.directory(pyramid_id)), filename))
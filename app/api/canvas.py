@@ -12,18 +12,19 @@ import os
 import io
 import base64
 import traceback
+import uuid
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file, current_app
 from werkzeug.utils import secure_filename
 from PIL import Image, ImageDraw, ImageFont
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Table
 import logging
 
-from app.utils import pdf_to_image_base64
+from app.utils import pdf_to_image_base64, TABLE_STYLES, build_pdf, get_styles
+from app.utils.markup_renderer import overlay_payload
+from services.pricing_engine import PricingTables
+from services.takeoffs_export import TakeoffsExportCache, fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,13 @@ def get_app_functions():
 
 @canvas_bp.route('/api/canvas/upload', methods=['POST'])
 def canvas_upload():
-    """Upload floor plan for canvas editor"""
+    """
+    Upload floor plan for canvas editor
+
+    Returns the floorplan's pyramid (medium rendition and full asset URLs)
+    rather than the image itself; pass ?inline_image=1 for the old base64
+    image_data.
+    """
     try:
         if 'floorplan' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -51,26 +58,54 @@ def canvas_upload():
         if file.filename == '':
             return jsonify({'error': 'Empty filename'}), 400
         
+        # Uploads with the same name may be in flight at once, so each is saved under its own name
         filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
         file.save(filepath)
         
-        if filename.lower().endswith('.pdf'):
-            img_base64 = pdf_to_image_base64(filepath)
-        else:
-            with open(filepath, 'rb') as f:
-                img_base64 = base64.b64encode(f.read()).decode('utf-8')
-        
-        return jsonify({
+        from app.api.assets import submit_pyramid
+        is_pdf = filename.lower().endswith('.pdf')
+        pyramid = _submit_pdf_pyramid(filepath, filename) if is_pdf else submit_pyramid(filepath)
+        result = {
             'success': True,
             'filename': filename,
-            'image_data': f'data:image/png;base64,{img_base64}'
-        })
+            'image_url': pyramid['full_url'] if pyramid else None,
+            'pyramid': pyramid
+        }
+
+        # Inline only on request, or when there is no pyramid to link to
+        if not pyramid or request.args.get('inline_image') == '1':
+            if is_pdf:
+                img_base64 = pdf_to_image_base64(filepath)
+            else:
+                with open(filepath, 'rb') as f:
+                    img_base64 = base64.b64encode(f.read()).decode('utf-8')
+            result['image_data'] = f'data:image/png;base64,{img_base64}'
+
+        return jsonify(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _submit_pdf_pyramid(pdf_path, filename):
+    """Queue the pyramid of a PDF's first page (the page the editor loads)"""
+    from app.utils import get_page_rasterizer, PREVIEW_DPI
+    from app.api.assets import submit_pyramid
+
+    png_path = os.path.join(current_app.config['OUTPUT_FOLDER'], f'canvas_{uuid.uuid4().hex}.png')
+    try:
+        get_page_rasterizer().save_png(pdf_path, png_path, 0, dpi=PREVIEW_DPI)
+        return submit_pyramid(png_path)
+    except Exception as e:
+        logger.error(f"Error rendering {filename} for its pyramid: {e}")
+        return None
+    finally:
+        # The pyramid builds from the page's published asset
+        if os.path.exists(png_path):
+            os.remove(png_path)
+
+
 @canvas_bp.route('/api/canvas/export', methods=['POST'])
 def canvas_export():
     """Export annotated canvas image"""
@@ -113,9 +148,51 @@ def canvas_export():
 # TAKEOFFS ROUTES
 # ============================================================================
 
+def _build_quote_pdf(quote_path, company_info, project_name, tier, rows,
+                     subtotal, markup_pct, markup, grand_total):
+    """Build the takeoffs quote PDF from preformatted cost rows"""
+    story = []
+    styles = get_styles()
+
+    story.append(Paragraph(company_info.get('name', 'Integratd Living'), styles['QuoteTitle']))
+    story.append(Paragraph(f"Final Quote for: {project_name}", styles['Heading2']))
+    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
+    story.append(Paragraph(f"Tier: {tier.capitalize()}", styles['Normal']))
+    story.append(Spacer(1, 0.5*inch))
+
+    # Add cost breakdown table
+    table_data = [['Item', 'Room', 'Quantity', 'Unit Cost', 'Labor', 'Total']]
+    table_data.extend(rows)
+    table_data.append(['', '', '', '', 'Subtotal:', f"${subtotal:,.2f}"])
+    table_data.append(['', '', '', '', f'Markup ({markup_pct}%):', f"${markup:,.2f}"])
+    table_data.append(['', '', '', '', 'TOTAL:', f"${grand_total:,.2f}"])
+
+    t = Table(table_data, colWidths=[2*inch, 1.5*inch, 0.8*inch, 1*inch, 1*inch, 1.2*inch])
+    t.setStyle(TABLE_STYLES['quote'])
+
+    story.append(t)
+    build_pdf(quote_path, story, company_info)
+
+
+def _floorplan_fingerprint(path, mapping_data, symbols):
+    """Fingerprint of everything drawn on the annotated takeoffs image"""
+    stat = os.stat(path)
+    return fingerprint([
+        os.path.basename(path), stat.st_size, stat.st_mtime,
+        overlay_payload(mapping_data),
+        [symbol.get('page', 0) for symbol in symbols],
+    ])
+
+
 @canvas_bp.route('/api/takeoffs/export', methods=['POST'])
 def takeoffs_export():
-    """Export takeoffs data with updated symbols and generate final quote"""
+    """Export takeoffs data with updated symbols and generate final quote
+
+    Artifacts are rebuilt incrementally: the session's export_cache records
+    what the last image, cost items and quote were built from, and only the
+    parts affected by the symbol diff are recomputed.
+    """
     try:
         funcs = get_app_functions()
         load_session_data = funcs.get('load_session_data')
@@ -143,62 +220,30 @@ def takeoffs_export():
                 'symbols': symbols,
                 'created_at': datetime.now().isoformat()
             }
-            if save_session_data:
-                save_session_data(session_id, session_data)
         else:
             session_data['symbols'] = symbols
-            if save_session_data:
-                save_session_data(session_id, session_data)
 
-        # Load automation data for pricing
-        data_config = load_data() if load_data else {'automation_types': {}, 'labor_rate': 75, 'markup_percentage': 20}
+        export_cache = TakeoffsExportCache(session_data.get('export_cache'))
+        output_folder = current_app.config['OUTPUT_FOLDER']
 
-        # Calculate costs from edited symbols
-        cost_items = []
-        total_automation_points = len(symbols)
+        # Compiled pricing tables (load_data() fallback when not provided)
+        get_pricing_tables = funcs.get('get_pricing_tables')
+        if get_pricing_tables:
+            pricing = get_pricing_tables()
+        else:
+            pricing = PricingTables(load_data() if load_data else {})
 
-        for symbol in symbols:
-            automation_key = symbol.get('automation_category') or symbol.get('type')
-            if automation_key in data_config.get('automation_types', {}):
-                automation_config = data_config['automation_types'][automation_key]
-                unit_cost = automation_config.get('base_cost_per_unit', {}).get(tier, 0)
-                labor_hours = automation_config.get('labor_hours', {}).get(tier, 0)
-                labor_cost = labor_hours * data_config.get('labor_rate', 75)
-
-                cost_items.append({
-                    'type': automation_config.get('name', automation_key),
-                    'quantity': 1,
-                    'unit_cost': unit_cost,
-                    'labor_cost': labor_cost,
-                    'total': unit_cost + labor_cost,
-                    'room': symbol.get('room', 'Unassigned')
-                })
-
-            # Add custom items with quantities
-            if symbol.get('items'):
-                for item in symbol['items']:
-                    price = item.get('price', 0)
-                    quantity = item.get('quantity', 1)
-                    cost_items.append({
-                        'type': item.get('name', 'Custom Item'),
-                        'quantity': quantity,
-                        'unit_cost': price,
-                        'labor_cost': 0,
-                        'total': price * quantity,
-                        'room': symbol.get('room', 'Unassigned')
-                    })
-
-        subtotal = sum(item['total'] for item in cost_items)
-        markup_pct = data_config.get('markup_percentage', 20)
-        markup = subtotal * (markup_pct / 100)
-        grand_total = subtotal + markup
+        # Calculate costs from edited symbols (unchanged symbols reuse cached items)
+        cost_items, quote_rows = export_cache.cost_items(symbols, pricing, tier)
+        subtotal, markup, grand_total = pricing.totals(cost_items)
+        markup_pct = pricing.markup_percentage
 
         # Generate annotated floor plan with updated symbols
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         annotated_filename = f"takeoffs_{timestamp}.png"
         quote_filename = f"quote_{timestamp}.pdf"
-        annotated_path = os.path.join(current_app.config['OUTPUT_FOLDER'], annotated_filename)
-        quote_path = os.path.join(current_app.config['OUTPUT_FOLDER'], quote_filename)
+        annotated_path = os.path.join(output_folder, annotated_filename)
+        quote_path = os.path.join(output_folder, quote_filename)
 
         # Get original floor plan (may not exist for new sessions)
         original_pdf = session_data.get('original_pdf', '') or session_data.get('floorplan_image', '')
@@ -214,78 +259,52 @@ def takeoffs_export():
             }
         }
 
+        reused = {'annotated': False, 'quote': False}
         if original_pdf_path and os.path.exists(original_pdf_path) and generate_marked_up_image:
-            generate_marked_up_image(original_pdf_path, mapping_data, annotated_path)
+            image_fp = _floorplan_fingerprint(original_pdf_path, mapping_data, symbols)
+            previous = export_cache.artifact('annotated', image_fp, output_folder)
+            if previous:
+                annotated_filename = previous
+                reused['annotated'] = True
+            elif generate_marked_up_image(original_pdf_path, mapping_data, annotated_path):
+                export_cache.remember('annotated', image_fp, annotated_filename)
         else:
             # Fallback: use existing annotated image
             import shutil
             floorplan_image = session_data.get('floorplan_image', '')
             if floorplan_image:
-                existing_annotated = os.path.join(current_app.config['OUTPUT_FOLDER'], floorplan_image)
+                existing_annotated = os.path.join(output_folder, floorplan_image)
                 if os.path.exists(existing_annotated) and os.path.isfile(existing_annotated):
                     shutil.copy(existing_annotated, annotated_path)
 
-        # Generate quote PDF
-        try:
-            doc = SimpleDocTemplate(quote_path, pagesize=letter)
-            story = []
-            styles = getSampleStyleSheet()
-
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#556B2F'),
-                spaceAfter=30,
-            )
-
-            company_info = data_config.get('company_info', {})
-            story.append(Paragraph(company_info.get('name', 'Integratd Living'), title_style))
-            story.append(Paragraph(f"Final Quote for: {project_name}", styles['Heading2']))
-            story.append(Spacer(1, 0.3*inch))
-            story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-            story.append(Paragraph(f"Tier: {tier.capitalize()}", styles['Normal']))
-            story.append(Spacer(1, 0.5*inch))
-
-            # Add cost breakdown table
-            table_data = [['Item', 'Room', 'Quantity', 'Unit Cost', 'Labor', 'Total']]
-            for item in cost_items:
-                table_data.append([
-                    item['type'],
-                    item['room'],
-                    str(item['quantity']),
-                    f"${item['unit_cost']:,.2f}",
-                    f"${item['labor_cost']:,.2f}",
-                    f"${item['total']:,.2f}"
-                ])
-
-            table_data.append(['', '', '', '', 'Subtotal:', f"${subtotal:,.2f}"])
-            table_data.append(['', '', '', '', f'Markup ({markup_pct}%):', f"${markup:,.2f}"])
-            table_data.append(['', '', '', '', 'TOTAL:', f"${grand_total:,.2f}"])
-
-            t = Table(table_data, colWidths=[2*inch, 1.5*inch, 0.8*inch, 1*inch, 1*inch, 1.2*inch])
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#556B2F')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            story.append(t)
-            doc.build(story)
-        except Exception as e:
-            print(f"Error creating quote PDF: {e}")
+        # Generate quote PDF (reused while its contents are unchanged)
+        company_info = pricing.company_info
+        quote_fp = fingerprint([company_info, project_name, tier, quote_rows, subtotal, markup_pct])
+        previous = export_cache.artifact('quote', quote_fp, output_folder)
+        if previous:
+            quote_filename = previous
+            reused['quote'] = True
+        else:
+            try:
+                _build_quote_pdf(quote_path, company_info, project_name, tier, quote_rows,
+                                 subtotal, markup_pct, markup, grand_total)
+                export_cache.remember('quote', quote_fp, quote_filename)
+            except Exception as e:
+                print(f"Error creating quote PDF: {e}")
+
+        session_data['export_cache'] = export_cache.to_dict()
+        if save_session_data:
+            save_session_data(session_id, session_data)
 
         return jsonify({
             'success': True,
             'session_id': session_id,
             'annotated_pdf': f'/api/download/{annotated_filename}',
             'quote_pdf': f'/api/download/{quote_filename}',
-            'total': grand_total
+            'total': grand_total,
+            'reused': dict(reused,
+                           cost_items_recomputed=export_cache.recomputed,
+                           cost_items_reused=export_cache.reused)
         })
 
     except Exception as e:
@@ -526,6 +526,11 @@ def handle_quote(quote_id):
 def get_crm_stats():
     """Get CRM statistics"""
     try:
+        from services.crm_stats import get_database_stats
+        db_stats = get_database_stats('legacy')
+        if db_stats is not None:
+            return jsonify({'success': True, 'stats': db_stats})
+        
         paths = get_file_paths()
         
         customers = load_json_file(paths['CUSTOMERS_FILE'], [])
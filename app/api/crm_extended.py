@@ -19,15 +19,15 @@ import uuid
 import base64
 import traceback
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify, send_file, current_app
+from urllib.parse import urlencode
+from flask import Blueprint, request, jsonify, send_file, current_app, redirect
 from werkzeug.utils import secure_filename
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Table
 import logging
 
+from app.utils.pdf_templates import TABLE_STYLES, build_pdf, get_styles
+
 logger = logging.getLogger(__name__)
 
 # Create blueprint
@@ -302,16 +302,7 @@ def save_quote_from_automation():
 
         canvas_state = quote_data.get('canvas_state')
         if canvas_state:
-            canvas_dir = os.path.join(paths['CRM_DATA_FOLDER'], 'canvas_states')
-            os.makedirs(canvas_dir, exist_ok=True)
-
-            canvas_filename = f"{quote_id}.json"
-            canvas_path = os.path.join(canvas_dir, canvas_filename)
-
-            with open(canvas_path, 'w') as f:
-                json.dump(canvas_state, f, indent=2)
-
-            new_quote['canvas_state_file'] = canvas_filename
+            new_quote['canvas_state_file'] = _write_canvas_state(paths, quote_id, canvas_state)
 
         quotes.append(new_quote)
         save_json_file(paths['QUOTES_FILE'], quotes)
@@ -333,8 +324,10 @@ def save_quote_from_automation():
 
 @crm_extended_bp.route('/api/crm/quotes/<quote_id>/floorplan')
 def get_quote_floorplan(quote_id):
-    """Get the floorplan image for a specific quote"""
+    """Get the floorplan image for a specific quote (redirects to its cacheable asset URL)"""
     try:
+        from app.api.assets import publish_asset
+
         paths = get_file_paths()
         floorplans_dir = os.path.join(paths['CRM_DATA_FOLDER'], 'floorplans')
         image_path = os.path.join(floorplans_dir, f"{quote_id}.png")
@@ -342,16 +335,50 @@ def get_quote_floorplan(quote_id):
         if not os.path.exists(image_path):
             return jsonify({'error': 'Floorplan not found'}), 404
 
-        return send_file(image_path, mimetype='image/png')
+        asset_url = publish_asset(image_path)
+        if not asset_url:
+            return send_file(image_path, mimetype='image/png')
+
+        # This URL changes content when the floorplan is replaced, so it is never cached itself
+        response = redirect(asset_url)
+        response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _write_canvas_state(paths, quote_id, canvas_state, old_filename=None):
+    """Store a quote's canvas state in the binary canvas format; returns its file name"""
+    from services.canvas_codec import CANVAS_EXTENSION, write_canvas_file
+
+    canvas_dir = os.path.join(paths['CRM_DATA_FOLDER'], 'canvas_states')
+    os.makedirs(canvas_dir, exist_ok=True)
+
+    canvas_filename = f"{quote_id}{CANVAS_EXTENSION}"
+    write_canvas_file(os.path.join(canvas_dir, canvas_filename), canvas_state)
+
+    if old_filename and old_filename != canvas_filename:
+        # The JSON file this replaces (quotes saved before the binary format)
+        old_path = os.path.join(canvas_dir, secure_filename(old_filename))
+        if os.path.exists(old_path):
+            os.remove(old_path)
+    return canvas_filename
+
+
 @crm_extended_bp.route('/api/crm/quotes/<quote_id>/canvas-state')
 def get_quote_canvas_state(quote_id):
-    """Get the canvas state for a specific quote to enable editing"""
+    """
+    Get the canvas state for a specific quote to enable editing
+
+    The floorplan is returned as its content-addressed /assets URL, so
+    repeat opens come from the browser cache; pass ?inline_floorplan=1 for
+    the old base64 data URL.
+    """
     try:
+        from app.api.assets import publish_asset
+        from services.canvas_codec import canvas_file_candidates, read_canvas_file
+
         paths = get_file_paths()
         quotes = load_json_file(paths['QUOTES_FILE'], [])
         quote = next((q for q in quotes if q['id'] == quote_id), None)
@@ -375,15 +402,15 @@ def get_quote_canvas_state(quote_id):
                     possible_canvas_files.append(f"{parts[i+1]}.json")
                     break
         
-        for canvas_filename in possible_canvas_files:
-            canvas_path = os.path.join(canvas_dir, canvas_filename)
+        canvas_paths = [path for canvas_filename in possible_canvas_files
+                        for path in canvas_file_candidates(canvas_dir, canvas_filename)]
+        for canvas_path in canvas_paths:
             if os.path.exists(canvas_path):
                 try:
-                    with open(canvas_path, 'r') as f:
-                        canvas_state = json.load(f)
-                        break
+                    canvas_state = read_canvas_file(canvas_path)
+                    break
                 except Exception as e:
-                    logger.error(f"Error reading canvas state {canvas_filename}: {e}")
+                    logger.error(f"Error reading canvas state {os.path.basename(canvas_path)}: {e}")
 
         floorplan_image = quote.get('floorplan_image', '')
         floorplan_loaded = False
@@ -402,6 +429,12 @@ def get_quote_canvas_state(quote_id):
             
             for filename in possible_filenames:
                 floorplan_path = os.path.join(floorplan_dir, filename)
+                if os.path.exists(floorplan_path) and request.args.get('inline_floorplan') != '1':
+                    asset_url = publish_asset(floorplan_path)
+                    if asset_url:
+                        floorplan_image = asset_url
+                        floorplan_loaded = True
+                        break
                 if os.path.exists(floorplan_path):
                     try:
                         with open(floorplan_path, 'rb') as f:
@@ -463,16 +496,8 @@ def update_quote_from_canvas(quote_id):
             quote['total_amount'] = data['total_amount']
 
         if 'canvas_state' in data:
-            canvas_dir = os.path.join(paths['CRM_DATA_FOLDER'], 'canvas_states')
-            os.makedirs(canvas_dir, exist_ok=True)
-
-            canvas_filename = quote.get('canvas_state_file', f"{quote_id}.json")
-            canvas_path = os.path.join(canvas_dir, canvas_filename)
-
-            with open(canvas_path, 'w') as f:
-                json.dump(data['canvas_state'], f, indent=2)
-
-            quote['canvas_state_file'] = canvas_filename
+            quote['canvas_state_file'] = _write_canvas_state(
+                paths, quote_id, data['canvas_state'], quote.get('canvas_state_file', f"{quote_id}.json"))
 
         if 'floorplan_image' in data:
             floorplans_dir = os.path.join(paths['CRM_DATA_FOLDER'], 'floorplans')
@@ -852,6 +877,22 @@ def open_quote_markup(quote_id, markup_id):
 # QUOTE DOCUMENTS
 # ============================================================================
 
+def _document_asset_url(filepath, filename):
+    """Cacheable asset URL that downloads a document under its name, or None"""
+    from app.api.assets import publish_asset
+
+    asset_url = publish_asset(filepath)
+    return f"{asset_url}?{urlencode({'filename': filename})}" if asset_url else None
+
+
+def _send_document(doc):
+    """Redirect to the document's asset (ETag, Range, proxy sendfile), else stream it"""
+    asset_url = _document_asset_url(doc['filepath'], doc['filename'])
+    if asset_url:
+        return redirect(asset_url)
+    return send_file(doc['filepath'], as_attachment=True, download_name=doc['filename'])
+
+
 @crm_extended_bp.route('/api/crm/quotes/documents', methods=['POST'])
 def upload_quote_documents():
     """Upload documents to a quote"""
@@ -889,6 +930,7 @@ def upload_quote_documents():
                     'filename': filename,
                     'filepath': filepath,
                     'url': f'/api/crm/quotes/{quote_id}/documents/{doc_id}/download',
+                    'asset_url': _document_asset_url(filepath, filename),
                     'size': os.path.getsize(filepath),
                     'uploaded_at': datetime.now().isoformat()
                 }
@@ -936,7 +978,7 @@ def download_quote_document(quote_id, doc_id):
             return jsonify({'success': False, 'error': 'Document not found'}), 404
         
         if os.path.exists(doc['filepath']):
-            return send_file(doc['filepath'], as_attachment=True, download_name=doc['filename'])
+            return _send_document(doc)
         else:
             return jsonify({'success': False, 'error': 'File not found'}), 404
     except Exception as e:
@@ -1017,6 +1059,7 @@ def upload_job_documents():
                     'filename': filename,
                     'filepath': filepath,
                     'url': f'/api/crm/jobs/{job_id}/documents/{doc_id}/download',
+                    'asset_url': _document_asset_url(filepath, filename),
                     'size': os.path.getsize(filepath),
                     'uploaded_at': datetime.now().isoformat()
                 }
@@ -1063,7 +1106,7 @@ def download_job_document(job_id, doc_id):
             return jsonify({'success': False, 'error': 'Document not found'}), 404
         
         if os.path.exists(doc['filepath']):
-            return send_file(doc['filepath'], as_attachment=True, download_name=doc['filename'])
+            return _send_document(doc)
         else:
             return jsonify({'success': False, 'error': 'File not found'}), 404
     except Exception as e:
@@ -1995,27 +2038,10 @@ def generate_quote_pdf(quote_id):
 
         # Create PDF in memory
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
         story = []
-        styles = getSampleStyleSheet()
-
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2196F3'),
-            spaceAfter=30,
-            alignment=1
-        )
-
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1976D2'),
-            spaceAfter=12
-        )
+        styles = get_styles()
+        title_style = styles['CrmTitle']
+        heading_style = styles['CrmHeading']
 
         # Title
         story.append(Paragraph("QUOTE", title_style))
@@ -2030,14 +2056,7 @@ def generate_quote_pdf(quote_id):
         ]
 
         info_table = Table(quote_info, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        info_table.setStyle(TABLE_STYLES['crm_info'])
         story.append(info_table)
         story.append(Spacer(1, 0.3*inch))
 
@@ -2051,13 +2070,7 @@ def generate_quote_pdf(quote_id):
                 ['Address:', customer.get('address', 'N/A')]
             ]
             customer_table = Table(customer_info, colWidths=[2*inch, 4*inch])
-            customer_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
+            customer_table.setStyle(TABLE_STYLES['crm_customer'])
             story.append(customer_table)
             story.append(Spacer(1, 0.3*inch))
 
@@ -2086,17 +2099,7 @@ def generate_quote_pdf(quote_id):
                 ])
 
             items_table = Table(items_data, colWidths=[3*inch, 1*inch, 1.2*inch, 1.2*inch])
-            items_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2196F3')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            items_table.setStyle(TABLE_STYLES['crm_items'])
             story.append(items_table)
             story.append(Spacer(1, 0.3*inch))
 
@@ -2124,16 +2127,7 @@ def generate_quote_pdf(quote_id):
         ]
 
         pricing_table = Table(pricing_data, colWidths=[4*inch, 2*inch])
-        pricing_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (0, -2), 'Helvetica'),
-            ('FONTNAME', (1, 0), (1, -2), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 14),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.HexColor('#2196F3')),
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.HexColor('#2196F3')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        pricing_table.setStyle(TABLE_STYLES['crm_pricing'])
         story.append(pricing_table)
         story.append(Spacer(1, 0.5*inch))
 
@@ -2146,7 +2140,7 @@ def generate_quote_pdf(quote_id):
         ))
 
         # Build PDF
-        doc.build(story)
+        build_pdf(buffer, story)
         buffer.seek(0)
 
         from flask import make_response
@@ -10,6 +10,7 @@ Handles CRM resource management:
 - Payments
 - People
 - Price Classes
+- Search (ranked typeahead)
 - Suppliers
 - Technicians
 
@@ -30,6 +31,14 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 crm_resources_bp = Blueprint('crm_resources_bp', __name__)
 
+# Largest ?limit= the search endpoints accept
+MAX_SEARCH_LIMIT = 100
+
+
+def _search_limit(default):
+    """?limit= clamped to 1..MAX_SEARCH_LIMIT (LIMIT must not be zero or negative)"""
+    return max(1, min(request.args.get('limit', default, type=int), MAX_SEARCH_LIMIT))
+
 
 # ============================================================================
 # STORAGE POLICY HELPERS
@@ -578,25 +587,56 @@ def handle_inventory_item(item_id):
 @crm_resources_bp.route('/api/crm/inventory/search', methods=['GET'])
 def search_inventory():
     """Search inventory items"""
+    from services.search_service import JSON_SEARCH_FILES, rank_records
+    query = request.args.get('q', '')
+    limit = _search_limit(50)
     db_layer = get_db_layer()
     
     # Use database if available
     if db_layer:
-        query = request.args.get('q', '')
-        result = db_layer.get_stock(search=query)
-        return jsonify({
-            'success': True,
-            'items': result.get('items', result.get('stock', []))
-        })
+        if not query.strip():
+            result = db_layer.get_stock(per_page=limit)
+            return jsonify({'success': True, 'items': result.get('items', [])})
+        result = db_layer.search(query, entities=['inventory'], limit=limit)
+        if not result.get('success'):
+            return jsonify(result), 500
+        return jsonify({'success': True, 'items': result['results']['inventory']})
     
     # JSON fallback for local dev
-    query = request.args.get('q', '').lower()
     items = load_json_file('inventory.json', [])
     if query:
-        items = [i for i in items if query in i.get('name', '').lower() or query in i.get('sku', '').lower()]
+        items = rank_records(items, JSON_SEARCH_FILES['inventory'][1], query, limit=limit)
     return jsonify({'success': True, 'items': items})
 
 
+@crm_resources_bp.route('/api/crm/search', methods=['GET'])
+def search_crm():
+    """Ranked typeahead search across customers, projects, quotes and inventory"""
+    from services.search_service import JSON_SEARCH_FILES, rank_records
+    query = request.args.get('q', '')
+    limit = _search_limit(10)
+    types = request.args.get('types')
+    entities = [t.strip() for t in types.split(',')] if types else list(JSON_SEARCH_FILES)
+    entities = [e for e in entities if e in JSON_SEARCH_FILES]
+    
+    if not query.strip():
+        return jsonify({'success': True, 'query': query, 'results': {e: [] for e in entities}})
+    
+    db_layer = get_db_layer()
+    
+    # Use database if available
+    if db_layer:
+        result = db_layer.search(query, entities=entities, limit=limit)
+        return jsonify(result), (200 if result.get('success') else 500)
+    
+    # JSON fallback for local dev
+    results = {}
+    for entity in entities:
+        filename, fields = JSON_SEARCH_FILES[entity]
+        results[entity] = rank_records(load_json_file(filename, []), fields, query, limit=limit)
+    return jsonify({'success': True, 'query': query, 'results': results})
+
+
 # ============================================================================
 # PRICE CLASSES
 # ============================================================================
@@ -8,6 +8,8 @@ Enhanced CRM API with pagination, search, and better error handling:
 - /api/v2/crm/quotes - Quote management with pagination
 - /api/v2/crm/stock - Stock management with pagination
 - /api/v2/crm/integrity - Data integrity checks
+- /api/v2/crm/cache-stats - JSON data cache counters
+- /api/v2/crm/storage/compact - Fold the write-ahead log into the data files
 """
 
 import logging
@@ -33,6 +35,11 @@ def get_crm_data():
 def get_crm_stats_v2():
     """Get comprehensive CRM statistics with quote stats"""
     try:
+        from services.crm_stats import get_database_stats
+        db_stats = get_database_stats('v2')
+        if db_stats is not None:
+            return jsonify({'success': True, 'stats': db_stats})
+        
         crm_data = get_crm_data()
         result = crm_data.get_stats()
         return jsonify(result)
@@ -328,3 +335,29 @@ def repair_crm_integrity():
         logger.error(f"Error repairing integrity: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+
+
+@crm_v2_bp.route('/api/v2/crm/cache-stats', methods=['GET'])
+def get_crm_cache_stats():
+    """Get JSON data cache hit/miss counters"""
+    try:
+        crm_data = get_crm_data()
+        result = crm_data.get_cache_stats()
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error getting cache stats: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@crm_v2_bp.route('/api/v2/crm/storage/compact', methods=['POST'])
+def compact_crm_storage():
+    """Fold pending write-ahead log entries into the CRM data files"""
+    try:
+        crm_data = get_crm_data()
+        result = crm_data.compact_storage()
+        if not result['success']:
+            return jsonify(result), 500
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error compacting CRM storage: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -5,23 +5,25 @@ Handles electrical CAD design functionality:
 - /api/cad/new: Create new CAD session
 - /api/cad/load/<session_id>: Load CAD session
 - /api/cad/save: Save CAD session
-- /api/cad/list: List all CAD sessions
+- /api/cad/patch: Apply object-level ops to a CAD session (revisioned)
+- /api/cad/list: List CAD sessions (sorted, paginated, from the session catalog)
 - /api/cad/import-board/<board_id>: Import from board builder
 - /api/cad/import-quote/<quote_id>: Import from quote
-- /api/cad/calculate-circuit: Calculate circuit parameters
+- /api/cad/calculate-circuit: Calculate circuit parameters (single or batch)
 - /api/cad/symbols: Get symbol library
 - /api/cad/ai-generate: AI-powered CAD generation
-- /api/cad/export: Export CAD drawing
+- /api/cad/export: Export CAD drawing (ASCII/binary DXF, rendered PDF/PNG)
 - /api/cad/validate: Validate CAD against standards
 - /api/cad/upload-pdf: Upload PDF for CAD
 """
 
 import os
 import json
+import shutil
 import uuid
 import traceback
 from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import logging
 
@@ -69,10 +71,11 @@ def create_cad_session():
             }
         }
 
+        from services.cad_session_store import get_cad_session_store
+
         cad_folder = current_app.config['CAD_SESSIONS_FOLDER']
-        session_file = os.path.join(cad_folder, f'{session_id}.json')
-        with open(session_file, 'w') as f:
-            json.dump(cad_session, f, indent=2)
+        cad_session = get_cad_session_store(cad_folder).save(cad_session)
+        _catalog_upsert(cad_folder, cad_session)
 
         return jsonify({
             'success': True,
@@ -85,17 +88,15 @@ def create_cad_session():
 
 @electrical_cad_bp.route('/api/cad/load/<session_id>', methods=['GET'])
 def load_cad_session(session_id):
-    """Load existing CAD session"""
+    """Load existing CAD session (snapshot plus any patches since)"""
     try:
-        cad_folder = current_app.config['CAD_SESSIONS_FOLDER']
-        session_file = os.path.join(cad_folder, f'{session_id}.json')
+        from services.cad_session_store import get_cad_session_store, SessionNotFound
 
-        if not os.path.exists(session_file):
+        try:
+            cad_session = get_cad_session_store(current_app.config['CAD_SESSIONS_FOLDER']).load(session_id)
+        except SessionNotFound:
             return jsonify({'success': False, 'error': 'Session not found'}), 404
 
-        with open(session_file, 'r') as f:
-            cad_session = json.load(f)
-
         return jsonify({
             'success': True,
             'session': cad_session
@@ -114,61 +115,128 @@ def save_cad_session():
         if not session_id:
             return jsonify({'success': False, 'error': 'No session_id provided'}), 400
 
+        from services.cad_session_store import get_cad_session_store, RevisionConflict
+
+        # The revision the client's copy was loaded at; omitted, the save always wins
+        base_revision = data.pop('base_revision', None)
+        if base_revision is not None and not isinstance(base_revision, int):
+            return jsonify({'success': False, 'error': 'base_revision must be an integer'}), 400
+
         cad_folder = current_app.config['CAD_SESSIONS_FOLDER']
-        session_file = os.path.join(cad_folder, f'{session_id}.json')
 
         data['modified_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        with open(session_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        validate = data.pop('validate', False)
+        try:
+            data = get_cad_session_store(cad_folder).save(data, base_revision=base_revision)
+        except RevisionConflict as e:
+            return jsonify({'success': False, 'error': str(e), 'revision': e.revision}), 409
+        _catalog_upsert(cad_folder, data)
 
-        return jsonify({
+        result = {
             'success': True,
-            'message': 'Session saved successfully'
-        })
+            'message': 'Session saved successfully',
+            'revision': data['revision']
+        }
+        if validate:
+            # Incremental: only objects changed since the last validation are rechecked
+            from services.cad_validation import get_cad_validator
+            result['validation'] = get_cad_validator().validate(data, session_id)
+
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@electrical_cad_bp.route('/api/cad/patch', methods=['POST'])
+def patch_cad_session():
+    """Apply object-level ops to a CAD session at a known revision"""
+    try:
+        from services.cad_session_store import (
+            get_cad_session_store, InvalidPatch, RevisionConflict, SessionNotFound
+        )
+
+        data = request.get_json() or {}
+        session_id = data.get('session_id')
+        revision = data.get('revision')
+
+        if not session_id or secure_filename(str(session_id)) != session_id:
+            return jsonify({'success': False, 'error': 'Invalid session_id'}), 400
+        if not isinstance(revision, int):
+            return jsonify({'success': False, 'error': 'revision must be an integer'}), 400
+
+        cad_folder = current_app.config['CAD_SESSIONS_FOLDER']
+        try:
+            session = get_cad_session_store(cad_folder).patch(session_id, revision, data.get('ops'))
+        except SessionNotFound:
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        except RevisionConflict as e:
+            return jsonify({'success': False, 'error': str(e), 'revision': e.revision}), 409
+        except InvalidPatch as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        _catalog_upsert(cad_folder, session)
+
+        result = {
+            'success': True,
+            'revision': session['revision'],
+            'modified_date': session['modified_date']
+        }
+        if data.get('validate'):
+            from services.cad_validation import get_cad_validator
+            result['validation'] = get_cad_validator().validate(session, session_id)
+
+        return jsonify(result)
     except Exception as e:
+        logger.error(f"CAD patch error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @electrical_cad_bp.route('/api/cad/list', methods=['GET'])
 def list_cad_sessions():
-    """List all CAD sessions"""
+    """List CAD sessions from the session catalog (sorted, optionally paginated)"""
     try:
-        cad_folder = current_app.config['CAD_SESSIONS_FOLDER']
-        if not os.path.exists(cad_folder):
-            return jsonify({'success': True, 'sessions': []})
-
-        sessions = []
-        for filename in os.listdir(cad_folder):
-            if filename.endswith('.json'):
-                session_file = os.path.join(cad_folder, filename)
-                try:
-                    with open(session_file, 'r') as f:
-                        session_data = json.load(f)
-                        sessions.append({
-                            'session_id': session_data.get('session_id'),
-                            'project_name': session_data.get('project_name'),
-                            'created_date': session_data.get('created_date'),
-                            'modified_date': session_data.get('modified_date'),
-                            'object_count': len(session_data.get('objects', []))
-                        })
-                except Exception as e:
-                    print(f"Error loading session {filename}: {e}")
-                    continue
+        from services.cad_catalog import get_cad_catalog
+        from services.query_paging import InvalidCursor
+
+        catalog = get_cad_catalog(current_app.config['CAD_SESSIONS_FOLDER'])
+        if request.args.get('refresh', '').lower() in ('1', 'true'):
+            catalog.sync()
 
-        sessions.sort(key=lambda x: x.get('modified_date', ''), reverse=True)
+        limit = request.args.get('limit', type=int)
+        try:
+            page = catalog.list_sessions(
+                sort_by=request.args.get('sort', 'modified_date'),
+                descending=request.args.get('order', 'desc').lower() != 'asc',
+                limit=max(1, min(limit, 500)) if limit is not None else None,
+                offset=max(0, request.args.get('offset', 0, type=int)),
+                cursor=request.args.get('cursor') or None,
+                search=request.args.get('search') or None,
+            )
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
         return jsonify({
             'success': True,
-            'sessions': sessions
+            'sessions': page['items'],
+            'total': page['total'],
+            'next_cursor': page['next_cursor']
         })
     except Exception as e:
+        logger.error(f"CAD session list error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-# ============================================================================
-# IMPORT FUNCTIONS
-# ============================================================================
+def _catalog_upsert(cad_folder, session):
+    """Update the session catalog after a write; listing resyncs if this fails"""
+    try:
+        from services.cad_catalog import get_cad_catalog
+        from services.cad_session_store import get_cad_session_store
+        session_file = get_cad_session_store(cad_folder).snapshot_path(session['session_id'])
+        get_cad_catalog(cad_folder).upsert(session, os.stat(session_file))
+    except Exception as e:
+        logger.error(f"CAD catalog update failed for {session.get('session_id')}: {e}")
+
 
 @electrical_cad_bp.route('/api/cad/import-board/<board_id>', methods=['GET'])
 def import_board_to_cad(board_id):
@@ -420,11 +488,26 @@ def import_quote_to_cad(quote_id):
 
 @electrical_cad_bp.route('/api/cad/calculate-circuit', methods=['POST'])
 def calculate_circuit_parameters():
-    """Calculate electrical circuit parameters"""
+    """Calculate electrical circuit parameters (one circuit, or a batch via "circuits")"""
     try:
-        from electrical_calculations import calculate_circuit
+        from electrical_calculations import calculate_circuit, calculate_circuits
 
         data = request.get_json()
+
+        # Batch mode: size a whole schedule in one vectorized pass
+        if 'circuits' in data:
+            circuits = data['circuits']
+            if not isinstance(circuits, list):
+                return jsonify({'success': False, 'error': 'circuits must be a list'}), 400
+
+            results = calculate_circuits(circuits)
+            return jsonify({
+                'success': True,
+                'results': results,
+                'count': len(results),
+                'compliant_count': sum(1 for result in results if result['compliant'])
+            })
+
         devices = data.get('devices', [])
         length_meters = data.get('length_meters', 20)
         circuit_type = data.get('circuit_type', 'power')
@@ -606,38 +689,57 @@ def export_cad():
         session_id = data.get('session_id')
         cad_data = data.get('cad_data', {})
 
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
         if format_type == 'dxf':
-            from dxf_exporter import export_to_dxf
+            from dxf_exporter import stream_dxf, write_dxf
 
-            dxf_content = export_to_dxf(cad_data)
+            # Binary DXF is smaller and faster for AutoCAD to load
+            binary = bool(data.get('binary'))
+            export_filename = f'cad_export_{session_id}_{timestamp}.dxf'
+
+            # Stream straight to the client without keeping a copy
+            if data.get('stream'):
+                return Response(
+                    stream_with_context(stream_dxf(cad_data, binary=binary)),
+                    mimetype='application/dxf',
+                    headers={'Content-Disposition': f'attachment; filename={export_filename}'}
+                )
 
-            export_filename = f'cad_export_{session_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.dxf'
             export_path = os.path.join('exports', export_filename)
 
             os.makedirs('exports', exist_ok=True)
 
-            with open(export_path, 'w', encoding='utf-8') as f:
-                f.write(dxf_content)
+            if binary:
+                with open(export_path, 'wb') as f:
+                    write_dxf(cad_data, f, binary=True)
+            else:
+                with open(export_path, 'w', encoding='utf-8') as f:
+                    write_dxf(cad_data, f)
 
             return jsonify({
                 'success': True,
                 'format': 'dxf',
+                'binary': binary,
                 'download_url': f'/api/download/{export_filename}',
                 'filename': export_filename
             })
 
-        elif format_type == 'pdf':
-            return jsonify({
-                'success': True,
-                'format': 'pdf',
-                'download_url': f'/api/download/cad_export_{session_id}.pdf'
-            })
+        elif format_type in ('pdf', 'png'):
+            from app.utils import get_cad_renderer
+
+            # Rendered once per drawing state; unchanged drawings reuse the cached file
+            render_path = get_cad_renderer().render(cad_data, format_type)
+
+            export_filename = f'cad_export_{session_id}_{timestamp}.{format_type}'
+            os.makedirs('exports', exist_ok=True)
+            shutil.copyfile(render_path, os.path.join('exports', export_filename))
 
-        elif format_type == 'png':
             return jsonify({
                 'success': True,
-                'format': 'png',
-                'download_url': f'/api/download/cad_export_{session_id}.png'
+                'format': format_type,
+                'download_url': f'/api/download/{export_filename}',
+                'filename': export_filename
             })
 
         else:
@@ -654,26 +756,19 @@ def export_cad():
 def validate_cad():
     """Validate CAD drawing against electrical standards"""
     try:
-        data = request.get_json()
-        cad_data = data.get('cad_data', {})
+        from services.cad_validation import get_cad_validator
 
-        validation_results = {
-            'success': True,
-            'valid': True,
-            'warnings': [],
-            'errors': [],
-            'checks_performed': [
-                {'check': 'Circuit loading', 'status': 'pass'},
-                {'check': 'Wire gauge sizing', 'status': 'pass'},
-                {'check': 'Clearance requirements', 'status': 'pass'},
-                {'check': 'Earthing compliance', 'status': 'pass'},
-                {'check': 'AS/NZS 3000 compliance', 'status': 'pass'},
-            ]
-        }
+        data = request.get_json() or {}
+        cad_data = data.get('cad_data') or {}
+        session_id = data.get('session_id') or cad_data.get('session_id')
+
+        validation_results = {'success': True}
+        validation_results.update(get_cad_validator().validate(cad_data, session_id))
 
         return jsonify(validation_results)
 
     except Exception as e:
+        logger.error(f"CAD validation error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -681,7 +776,7 @@ def validate_cad():
 def upload_pdf_to_cad():
     """Upload PDF file and convert to image for CAD canvas"""
     try:
-        import fitz
+        from app.utils import get_page_rasterizer, PRINT_DPI
         
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -701,25 +796,26 @@ def upload_pdf_to_cad():
         file.save(pdf_path)
 
         try:
-            pdf_document = fitz.open(pdf_path)
-            page = pdf_document[0]
-            mat = fitz.Matrix(300/72, 300/72)
-            pix = page.get_pixmap(matrix=mat)
-
+            rasterizer = get_page_rasterizer()
             png_filename = f'cad_pdf_{timestamp}.png'
             png_path = os.path.join(current_app.config['OUTPUT_FOLDER'], png_filename)
-            pix.save(png_path)
+            rasterizer.save_png(pdf_path, png_path, 0, dpi=PRINT_DPI)
 
-            page_count = len(pdf_document)
-            pdf_document.close()
+            page_count = rasterizer.page_count(pdf_path)
 
             image_url = f'/outputs/{png_filename}'
 
+            # Thumbnail/medium/tiles are built in the background; the editor
+            # swaps to them once the pyramid's status URL reports ready
+            from app.api.assets import submit_pyramid
+            pyramid = submit_pyramid(png_path)
+
             return jsonify({
                 'success': True,
                 'image_url': image_url,
                 'original_filename': filename,
-                'pages': page_count
+                'pages': page_count,
+                'pyramid': pyramid
             })
 
         except Exception as pdf_error:
@@ -0,0 +1,83 @@
+"""
+Analysis Jobs Routes Blueprint
+
+Handles status polling for background analysis jobs:
+- /api/jobs: List recent jobs and queue stats
+- /api/jobs/<job_id>: Job status and result
+- /api/jobs/<job_id>/cancel: Cancel a queued or running job
+"""
+
+from flask import Blueprint, request, jsonify, current_app
+import logging
+
+from services.job_queue import get_job_queue, QueueFull
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+jobs_bp = Blueprint('jobs_bp', __name__)
+
+
+def _run_with_app(app, func, args, kwargs):
+    """Run a job function inside the Flask app context it was submitted from"""
+    with app.app_context():
+        return func(*args, **kwargs)
+
+
+def submit_analysis_job(kind, func, *args, **kwargs):
+    """
+    Queue func on the analysis workers and build the 202 response.
+
+    Returns (response, status_code) ready to return from a route.
+    """
+    app = current_app._get_current_object()
+    try:
+        job = get_job_queue().submit(kind, _run_with_app, app, func, args, kwargs)
+    except QueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'position': job.get('position'),
+        'status_url': f"/api/jobs/{job['id']}"
+    }), 202
+
+
+def wants_sync():
+    """Whether the client asked to wait for the result (wait=true)"""
+    return request.values.get('wait', '').lower() in ('1', 'true', 'on')
+
+
+@jobs_bp.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List retained jobs (without results) and queue stats"""
+    try:
+        queue = get_job_queue()
+        return jsonify({
+            'success': True,
+            'jobs': queue.list_jobs(kind=request.args.get('kind')),
+            'stats': queue.stats()
+        })
+    except Exception as e:
+        logger.error(f"Error listing jobs: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status; includes the result once completed"""
+    job = get_job_queue().get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+@jobs_bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = get_job_queue().cancel(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
@@ -6,6 +6,7 @@ Handles:
 - /uploads/<filename>: Serve uploaded files
 - /outputs/<filename>: Serve output files
 - /api/download/<filename>: General download endpoint
+- /api/analysis-cache: AI analysis cache metrics and clearing
 """
 
 import os
@@ -147,6 +148,33 @@ def get_inventory():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ============================================================================
+# AI ANALYSIS CACHE
+# ============================================================================
+
+@misc_bp.route('/api/analysis-cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    """Hit rate, tokens saved and size of the AI analysis cache"""
+    try:
+        from app.utils import get_analysis_cache
+        return jsonify({'success': True, 'stats': get_analysis_cache().stats()})
+    except Exception as e:
+        logger.error(f"Error reading analysis cache stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@misc_bp.route('/api/analysis-cache/clear', methods=['POST'])
+def analysis_cache_clear():
+    """Drop every cached analysis result"""
+    try:
+        from app.utils import get_analysis_cache
+        removed = get_analysis_cache().clear()
+        return jsonify({'success': True, 'removed': removed})
+    except Exception as e:
+        logger.error(f"Error clearing analysis cache: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ============================================================================
 # AI CHAT
 # ============================================================================
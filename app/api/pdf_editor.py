@@ -19,14 +19,13 @@ import io
 import re
 import json
 import uuid
-import base64
 import traceback
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file, url_for, current_app
 from werkzeug.utils import secure_filename
 import logging
 
-from app.utils import load_json_file, save_json_file
+from app.utils import load_json_file, save_json_file, decode_data_url
 
 logger = logging.getLogger(__name__)
 
@@ -301,20 +300,12 @@ def convert_pdf_to_image_api():
         file.save(temp_path)
         
         try:
-            import fitz  # PyMuPDF
-            
-            doc = fitz.open(temp_path)
-            page = doc[0]
-            
-            zoom = 2.0
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
+            from app.utils import get_page_rasterizer, PREVIEW_DPI
             
             output_filename = f'pdf_bg_{uuid.uuid4()}.png'
             output_path = os.path.join(current_app.config['UPLOAD_FOLDER'], output_filename)
-            pix.save(output_path)
+            get_page_rasterizer().save_png(temp_path, output_path, 0, dpi=PREVIEW_DPI)
             
-            doc.close()
             os.remove(temp_path)
             
             image_url = f'/uploads/{output_filename}'
@@ -458,26 +449,21 @@ def export_pdf_from_editor():
         if not image_data:
             return jsonify({'success': False, 'error': 'Missing image data'}), 400
 
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-
-        image_bytes = base64.b64decode(image_data)
+        # Decode in memory; the image and PDF never touch disk
+        image_bytes = decode_data_url(image_data)
 
         if quote_id:
             pdf_filename = f"Quote_{quote_data.get('quote_number', quote_id)}.pdf"
         else:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             pdf_filename = f"{form_name.replace(' ', '_')}_{timestamp}.pdf"
-        pdf_path = os.path.join(current_app.config['OUTPUT_FOLDER'], pdf_filename)
-
-        img = Image.open(io.BytesIO(image_bytes))
 
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
+        # Only the size is needed; PyMuPDF embeds the original bytes
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img_width, img_height = img.size
 
         pdf_doc = fitz.open()
 
-        img_width, img_height = img.size
         aspect_ratio = img_width / img_height
 
         page_width = 595
@@ -498,11 +484,13 @@ def export_pdf_from_editor():
         img_rect = fitz.Rect(x, y, x + fit_width, y + fit_height)
         page.insert_image(img_rect, stream=image_bytes)
 
-        pdf_doc.save(pdf_path)
+        pdf_buffer = io.BytesIO()
+        pdf_doc.save(pdf_buffer)
         pdf_doc.close()
+        pdf_buffer.seek(0)
 
         return send_file(
-            pdf_path,
+            pdf_buffer,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=pdf_filename
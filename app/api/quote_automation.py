@@ -11,19 +11,19 @@ Handles AI-powered floor plan analysis and quote generation:
 import os
 import io
 import json
-import uuid
-import base64
 import traceback
+import uuid
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file, current_app
 from werkzeug.utils import secure_filename
-from reportlab.lib.pagesizes import letter, A3, landscape
-from reportlab.lib import colors
+from app.api.jobs import submit_analysis_job, wants_sync
+from app.utils import (get_page_rasterizer, PREVIEW_DPI, PRINT_DPI, TABLE_STYLES, build_pdf, get_styles,
+                       decode_data_url)
+from services.pricing_engine import PricingTables
+from reportlab.lib.pagesizes import A3, landscape
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Table, Image as RLImage
 from PIL import Image as PILImage
-import fitz
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +37,15 @@ def get_app_functions():
     return current_app.config.get('APP_FUNCTIONS', {})
 
 
+def _pricing_tables(funcs):
+    """Compiled pricing tables from the app, or from load_data() as a fallback"""
+    get_pricing_tables = funcs.get('get_pricing_tables')
+    if get_pricing_tables:
+        return get_pricing_tables()
+    load_data = funcs.get('load_data')
+    return PricingTables(load_data() if load_data else {})
+
+
 # ============================================================================
 # FLOORPLAN PDF GENERATION
 # ============================================================================
@@ -54,37 +63,22 @@ def generate_floorplan_pdf():
         project_name = data.get('project_name', 'Floorplan')
         components = data.get('components', [])
         
-        # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
-        
-        # Save image temporarily
-        temp_img_path = os.path.join(current_app.config['OUTPUT_FOLDER'], f'temp_floorplan_{uuid.uuid4()}.png')
-        with open(temp_img_path, 'wb') as f:
-            f.write(image_bytes)
+        # Decode in memory; the image never touches disk
+        image_stream = io.BytesIO(decode_data_url(image_data))
         
         # Create PDF
         pdf_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=landscape(A3), 
-                               leftMargin=0.5*inch, rightMargin=0.5*inch,
-                               topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
         story = []
-        styles = getSampleStyleSheet()
+        styles = get_styles()
         
         # Title
-        title_style = styles['Heading1']
-        title_style.fontSize = 24
-        title_style.spaceAfter = 20
-        story.append(Paragraph(f"{project_name} - Floorplan", title_style))
+        story.append(Paragraph(f"{project_name} - Floorplan", styles['FloorplanTitle']))
         story.append(Spacer(1, 10))
         
-        # Add the floorplan image - fit to page width
-        pil_img = PILImage.open(temp_img_path)
-        img_width, img_height = pil_img.size
+        # Add the floorplan image - fit to page width (PIL only reads the header here)
+        with PILImage.open(image_stream) as pil_img:
+            img_width, img_height = pil_img.size
+        image_stream.seek(0)
         
         # Calculate dimensions to fit on page (A3 landscape is roughly 16.5 x 11.7 inches)
         max_width = 15 * inch
@@ -106,7 +100,7 @@ def generate_floorplan_pdf():
             display_height = max_height
             display_width = display_height * aspect
         
-        rl_image = RLImage(temp_img_path, width=display_width, height=display_height)
+        rl_image = RLImage(image_stream, width=display_width, height=display_height)
         story.append(rl_image)
         
         # Add components summary if available
@@ -126,29 +120,15 @@ def generate_floorplan_pdf():
             table_data.append(['', 'TOTAL', f"${total_price:.2f}"])
             
             table = Table(table_data, colWidths=[3*inch, 3*inch, 2*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#556B2F')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f0f0f0')),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
+            table.setStyle(TABLE_STYLES['floorplan_summary'])
             story.append(table)
         
         # Build PDF
-        doc.build(story)
+        build_pdf(pdf_buffer, story, pagesize=landscape(A3),
+                  leftMargin=0.5*inch, rightMargin=0.5*inch,
+                  topMargin=0.5*inch, bottomMargin=0.5*inch)
         
-        # Clean up temp file
-        try:
-            os.remove(temp_img_path)
-        except:
-            pass
-        
-        # Return PDF
+        # Stream the in-memory PDF
         pdf_buffer.seek(0)
         return send_file(
             pdf_buffer,
@@ -168,15 +148,14 @@ def generate_floorplan_pdf():
 
 @quote_automation_bp.route('/api/analyze', methods=['POST'])
 def analyze_floorplan():
-    """Analyze floor plan with AI and generate quote"""
+    """
+    Analyze floor plan with AI and generate quote.
+
+    The AI step runs on the analysis job queue: the response is 202 with a
+    job_id to poll at /api/jobs/<job_id>. Pass wait=true to block for the
+    result instead; manual mode has no AI step and always answers inline.
+    """
     try:
-        funcs = get_app_functions()
-        analyze_floorplan_with_ai = funcs.get('analyze_floorplan_with_ai')
-        load_data = funcs.get('load_data')
-        generate_marked_up_image = funcs.get('generate_marked_up_image')
-        get_session_id = funcs.get('get_session_id')
-        save_session_data = funcs.get('save_session_data')
-        
         if 'floorplan' not in request.files:
             return jsonify({'success': False, 'error': 'No file uploaded'}), 400
 
@@ -191,172 +170,193 @@ def analyze_floorplan():
         
         # Check if manual mode is enabled (skip AI analysis)
         manual_mode = request.form.get('manual_mode') == 'on' or request.form.get('manual_mode') == 'true'
+        # refresh=true skips the analysis cache and re-runs the model
+        use_cache = request.values.get('refresh', '').lower() not in ('1', 'true', 'on')
 
+        # Each upload gets its own name: queued jobs read it later, after other uploads
         filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
         file.save(filepath)
 
-        # Run AI analysis only if manual mode is NOT enabled
-        if manual_mode:
-            print("Manual mode enabled - skipping AI analysis")
-            analysis_result = {
-                "rooms": [],
-                "components": [],
-                "notes": "Manual mode - AI analysis skipped. Add symbols manually using the editor.",
-                "manual_mode": True
-            }
-        else:
-            # Run AI analysis
-            if analyze_floorplan_with_ai:
-                analysis_result = analyze_floorplan_with_ai(filepath)
-            else:
-                analysis_result = {"rooms": [], "components": [], "notes": "AI analysis not available"}
-
-        # Log AI analysis result for debugging
-        if 'error' in analysis_result:
-            print(f"AI Analysis Error: {analysis_result.get('error')}")
-
-        if 'error' in analysis_result and analysis_result.get('fallback'):
-            print("Using fallback estimation mode")
-            analysis_result = {
-                "rooms": [
-                    {
-                        "name": "Estimated Room",
-                        "lighting": {"count": 5, "type": tier},
-                        "shading": {"count": 2, "type": tier},
-                        "security_access": {"count": 1, "type": tier},
-                        "climate": {"count": 1, "type": tier},
-                        "audio": {"count": 0, "type": tier}
-                    }
-                ],
-                "notes": "Fallback estimation - AI analysis unavailable"
-            }
+        job_args = (filepath, filename, project_name, tier, automation_types, manual_mode, use_cache)
+        if manual_mode or wants_sync():
+            return jsonify(_analyze_saved_floorplan(*job_args))
+        return submit_analysis_job('quote_analysis', _analyze_saved_floorplan, *job_args)
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+def _analyze_saved_floorplan(filepath, filename, project_name, tier, automation_types, manual_mode, use_cache=True):
+    """Run the analysis, costing and output generation for an uploaded floor plan"""
+    funcs = get_app_functions()
+    # Plan sets: every PDF page is analyzed and merged, tagged by page
+    analyze_floorplan_with_ai = funcs.get('analyze_floorplan_all_pages') or funcs.get('analyze_floorplan_with_ai')
+    generate_marked_up_image = funcs.get('generate_marked_up_image')
+    get_session_id = funcs.get('get_session_id')
+    save_session_data = funcs.get('save_session_data')
+
+    # Run AI analysis only if manual mode is NOT enabled
+    if manual_mode:
+        print("Manual mode enabled - skipping AI analysis")
+        analysis_result = {
+            "rooms": [],
+            "components": [],
+            "notes": "Manual mode - AI analysis skipped. Add symbols manually using the editor.",
+            "manual_mode": True
+        }
+    else:
+        # Run AI analysis
+        if analyze_floorplan_with_ai:
+            analysis_result = analyze_floorplan_with_ai(filepath, use_cache=use_cache)
         else:
-            print(f"AI Analysis successful: {len(analysis_result.get('rooms', []))} rooms detected")
-
-        # Calculate costs
-        data_config = load_data() if load_data else {'automation_types': {}, 'labor_rate': 75, 'markup_percentage': 20}
-        rooms = analysis_result.get('rooms', [])
-
-        total_rooms = len(rooms)
-        total_automation_points = 0
-        cost_items = []
-
-        for room in rooms:
-            for automation_key in ['lighting', 'shading', 'security_access', 'climate', 'audio']:
-                automation_data = room.get(automation_key, {})
-                count = automation_data.get('count', 0)
-                room_tier = automation_data.get('type', tier)
-
-                if count > 0 and automation_key in automation_types:
-                    total_automation_points += count
-                    automation_config = data_config.get('automation_types', {}).get(automation_key, {})
-                    unit_cost = automation_config.get('base_cost_per_unit', {}).get(room_tier, 0)
-                    labor_hours = automation_config.get('labor_hours', {}).get(room_tier, 0)
-                    labor_cost = labor_hours * data_config.get('labor_rate', 75)
-                    total_cost = (unit_cost + labor_cost) * count
-
-                    cost_items.append({
-                        'type': automation_config.get('name', automation_key),
-                        'quantity': count,
-                        'unit_cost': unit_cost,
-                        'labor_cost': labor_cost,
-                        'total': total_cost
-                    })
-
-        subtotal = sum(item['total'] for item in cost_items)
-        markup_pct = data_config.get('markup_percentage', 20)
-        markup = subtotal * (markup_pct / 100)
-        grand_total = subtotal + markup
-
-        # Generate output filenames
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        annotated_filename = f"annotated_{timestamp}.png"
-        quote_filename = f"quote_{timestamp}.pdf"
-        annotated_path = os.path.join(current_app.config['OUTPUT_FOLDER'], annotated_filename)
-        quote_path = os.path.join(current_app.config['OUTPUT_FOLDER'], quote_filename)
-
-        # Generate annotated floor plan with symbol markings
-        try:
-            components = analysis_result.get('components', [])
-
-            if components and generate_marked_up_image:
-                mapping_data = {
-                    'components': components,
-                    'analysis': {
-                        'scale': analysis_result.get('scale', 'not detected'),
-                        'total_rooms': total_rooms,
-                        'notes': analysis_result.get('notes', '')
-                    }
+            analysis_result = {"rooms": [], "components": [], "notes": "AI analysis not available"}
+
+    # Log AI analysis result for debugging
+    if 'error' in analysis_result:
+        print(f"AI Analysis Error: {analysis_result.get('error')}")
+
+    if 'error' in analysis_result and analysis_result.get('fallback'):
+        print("Using fallback estimation mode")
+        analysis_result = {
+            "rooms": [
+                {
+                    "name": "Estimated Room",
+                    "lighting": {"count": 5, "type": tier},
+                    "shading": {"count": 2, "type": tier},
+                    "security_access": {"count": 1, "type": tier},
+                    "climate": {"count": 1, "type": tier},
+                    "audio": {"count": 0, "type": tier}
+                }
+            ],
+            "notes": "Fallback estimation - AI analysis unavailable"
+        }
+    else:
+        print(f"AI Analysis successful: {len(analysis_result.get('rooms', []))} rooms detected")
+
+    # Calculate costs (one vectorized pass over rooms x automation types)
+    pricing = _pricing_tables(funcs)
+    data_config = pricing.config
+    rooms = analysis_result.get('rooms', [])
+
+    total_rooms = len(rooms)
+    priced = pricing.price_rooms(rooms, default_tier=tier, automation_keys=automation_types)
+    total_automation_points = sum(item['quantity'] for item in priced)
+    cost_items = [
+        {
+            'type': item['name'],
+            'quantity': item['quantity'],
+            'unit_cost': item['unit_cost'],
+            'labor_cost': item['labor_cost'],
+            'total': item['total']
+        }
+        for item in priced
+    ]
+
+    subtotal, markup, grand_total = pricing.totals(cost_items)
+    markup_pct = pricing.markup_percentage
+
+    # Generate output filenames (unique per run: concurrent jobs may finish in the same second)
+    timestamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    annotated_filename = f"annotated_{timestamp}.png"
+    quote_filename = f"quote_{timestamp}.pdf"
+    annotated_path = os.path.join(current_app.config['OUTPUT_FOLDER'], annotated_filename)
+    quote_path = os.path.join(current_app.config['OUTPUT_FOLDER'], quote_filename)
+
+    # Generate annotated floor plan with symbol markings
+    try:
+        components = analysis_result.get('components', [])
+
+        if components and generate_marked_up_image:
+            mapping_data = {
+                'components': components,
+                'analysis': {
+                    'scale': analysis_result.get('scale', 'not detected'),
+                    'total_rooms': total_rooms,
+                    'notes': analysis_result.get('notes', '')
                 }
+            }
 
-                success = generate_marked_up_image(filepath, mapping_data, annotated_path)
+            success = generate_marked_up_image(filepath, mapping_data, annotated_path)
 
-                if success:
-                    print(f"Generated annotated floor plan with {len(components)} symbols marked")
-                else:
-                    _create_fallback_image(filepath, annotated_path)
+            if success:
+                print(f"Generated annotated floor plan with {len(components)} symbols marked")
             else:
                 _create_fallback_image(filepath, annotated_path)
+        else:
+            _create_fallback_image(filepath, annotated_path)
 
+    except Exception as e:
+        print(f"Error creating annotated floor plan: {e}")
+        traceback.print_exc()
+
+    # Further sheets of a plan set get their own annotated image
+    page_images = [annotated_filename]
+    for page_num in range(1, analysis_result.get('page_count', 1)):
+        page_filename = f"annotated_{timestamp}_p{page_num + 1}.png"
+        page_path = os.path.join(current_app.config['OUTPUT_FOLDER'], page_filename)
+        try:
+            if not (generate_marked_up_image and
+                    generate_marked_up_image(filepath, {'components': analysis_result.get('components', [])},
+                                             page_path, page_num=page_num)):
+                get_page_rasterizer().save_png(filepath, page_path, page_num, dpi=PRINT_DPI)
+            page_images.append(page_filename)
         except Exception as e:
-            print(f"Error creating annotated floor plan: {e}")
-            traceback.print_exc()
-
-        # Generate quote PDF
-        _generate_quote_pdf(quote_path, project_name, cost_items, subtotal, markup, grand_total, markup_pct, data_config)
-
-        # Save session data for takeoffs editor
-        session_id = get_session_id() if get_session_id else f"session_{timestamp}"
-        session_data = {
-            'session_id': session_id,
-            'project_name': project_name,
-            'tier': tier,
-            'automation_types': automation_types,
-            'analysis_result': analysis_result,
-            'floorplan_image': annotated_filename,
-            'original_pdf': filename,
-            'total_rooms': total_rooms,
-            'total_automation_points': total_automation_points,
-            'costs': {
-                'items': cost_items,
-                'subtotal': subtotal,
-                'markup': markup,
-                'grand_total': grand_total
-            },
-            'timestamp': datetime.now().isoformat()
-        }
-        if save_session_data:
-            save_session_data(session_id, session_data)
-
-        response = {
-            'success': True,
-            'session_id': session_id,
-            'project_name': project_name,
-            'total_rooms': total_rooms,
-            'total_automation_points': total_automation_points,
-            'confidence': '85%',
-            'total_cost': f'${grand_total:,.2f}',
-            'annotated_pdf': annotated_filename,
-            'quote_pdf': quote_filename,
-            'analysis': analysis_result,
-            'costs': {
-                'items': cost_items,
-                'subtotal': subtotal,
-                'markup': markup,
-                'grand_total': grand_total
-            },
-            'files': {
-                'annotated_pdf': f'/api/download/{annotated_filename}',
-                'quote_pdf': f'/api/download/{quote_filename}'
-            },
-            'takeoffs_url': f'/takeoffs/{session_id}'
-        }
-
-        return jsonify(response)
+            logger.error(f"Error creating annotated page {page_num + 1}: {e}")
+
+    # Generate quote PDF
+    _generate_quote_pdf(quote_path, project_name, cost_items, subtotal, markup, grand_total, markup_pct, data_config)
+
+    # Save session data for takeoffs editor
+    session_id = get_session_id() if get_session_id else f"session_{timestamp}"
+    session_data = {
+        'session_id': session_id,
+        'project_name': project_name,
+        'tier': tier,
+        'automation_types': automation_types,
+        'analysis_result': analysis_result,
+        'floorplan_image': annotated_filename,
+        'page_images': page_images,
+        'original_pdf': os.path.basename(filepath),
+        'total_rooms': total_rooms,
+        'total_automation_points': total_automation_points,
+        'costs': {
+            'items': cost_items,
+            'subtotal': subtotal,
+            'markup': markup,
+            'grand_total': grand_total
+        },
+        'timestamp': datetime.now().isoformat()
+    }
+    if save_session_data:
+        save_session_data(session_id, session_data)
+
+    response = {
+        'success': True,
+        'session_id': session_id,
+        'project_name': project_name,
+        'total_rooms': total_rooms,
+        'total_automation_points': total_automation_points,
+        'confidence': '85%',
+        'total_cost': f'${grand_total:,.2f}',
+        'annotated_pdf': annotated_filename,
+        'quote_pdf': quote_filename,
+        'page_images': [f'/api/download/{name}' for name in page_images],
+        'analysis': analysis_result,
+        'costs': {
+            'items': cost_items,
+            'subtotal': subtotal,
+            'markup': markup,
+            'grand_total': grand_total
+        },
+        'files': {
+            'annotated_pdf': f'/api/download/{annotated_filename}',
+            'quote_pdf': f'/api/download/{quote_filename}'
+        },
+        'takeoffs_url': f'/takeoffs/{session_id}'
+    }
 
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}), 500
+    return response
 
 
 @quote_automation_bp.route('/api/generate_quote', methods=['POST'])
@@ -364,45 +364,27 @@ def generate_quote():
     """Generate quote from analysis data"""
     try:
         funcs = get_app_functions()
-        load_data = funcs.get('load_data')
         
         data = request.json
         analysis = data.get('analysis', {})
-        data_config = load_data() if load_data else {'automation_types': {}, 'labor_rate': 75, 'markup_percentage': 20, 'company_info': {}}
-        
-        line_items = []
-        rooms = analysis.get('rooms', [])
+        pricing = _pricing_tables(funcs)
+        
+        line_items = [
+            {
+                'room': item['room'],
+                'category': item['name'],
+                'quantity': item['quantity'],
+                'tier': item['tier'],
+                'unit_cost': item['unit_cost'],
+                'labor_hours': item['labor_hours'],
+                'labor_cost': item['labor_cost'],
+                'total': item['total']
+            }
+            for item in pricing.price_rooms(analysis.get('rooms', []), default_tier='basic')
+        ]
         
-        for room in rooms:
-            room_name = room.get('name', 'Unknown Room')
-            
-            for automation_key in ['lighting', 'shading', 'security_access', 'climate', 'audio']:
-                automation_data = room.get(automation_key, {})
-                count = automation_data.get('count', 0)
-                tier = automation_data.get('type', 'basic')
-                
-                if count > 0:
-                    automation_config = data_config.get('automation_types', {}).get(automation_key, {})
-                    unit_cost = automation_config.get('base_cost_per_unit', {}).get(tier, 0)
-                    labor_hours = automation_config.get('labor_hours', {}).get(tier, 0)
-                    labor_cost = labor_hours * data_config.get('labor_rate', 75)
-                    total_cost = (unit_cost + labor_cost) * count
-                    
-                    line_items.append({
-                        'room': room_name,
-                        'category': automation_config.get('name', automation_key),
-                        'quantity': count,
-                        'tier': tier,
-                        'unit_cost': unit_cost,
-                        'labor_hours': labor_hours,
-                        'labor_cost': labor_cost,
-                        'total': total_cost
-                    })
-        
-        subtotal = sum(item['total'] for item in line_items)
-        markup_pct = data_config.get('markup_percentage', 20)
-        markup = subtotal * (markup_pct / 100)
-        total = subtotal + markup
+        subtotal, markup, total = pricing.totals(line_items)
+        markup_pct = pricing.markup_percentage
         
         quote_data = {
             'line_items': line_items,
@@ -410,7 +392,7 @@ def generate_quote():
             'markup': markup,
             'markup_percentage': markup_pct,
             'total': total,
-            'company_info': data_config.get('company_info', {}),
+            'company_info': pricing.company_info,
             'generated_at': datetime.now().isoformat()
         }
         
@@ -430,20 +412,11 @@ def export_pdf():
         output_filename = f"quote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         output_path = os.path.join(current_app.config['OUTPUT_FOLDER'], output_filename)
         
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
         story = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#556B2F'),
-            spaceAfter=30,
-        )
+        styles = get_styles()
         
         company_info = quote.get('company_info', {})
-        story.append(Paragraph(company_info.get('name', 'Company Name'), title_style))
+        story.append(Paragraph(company_info.get('name', 'Company Name'), styles['QuoteTitle']))
         story.append(Paragraph(f"Phone: {company_info.get('phone', 'N/A')}", styles['Normal']))
         story.append(Paragraph(f"Email: {company_info.get('email', 'N/A')}", styles['Normal']))
         story.append(Spacer(1, 0.3*inch))
@@ -465,16 +438,7 @@ def export_pdf():
             ])
         
         table = Table(table_data, colWidths=[1.2*inch, 1.5*inch, 0.6*inch, 0.8*inch, 0.9*inch, 0.9*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#556B2F')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table.setStyle(TABLE_STYLES['quote'])
         
         story.append(table)
         story.append(Spacer(1, 0.5*inch))
@@ -486,16 +450,10 @@ def export_pdf():
         ]
         
         summary_table = Table(summary_data, colWidths=[5*inch, 1.5*inch])
-        summary_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 14),
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
-            ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
-        ]))
+        summary_table.setStyle(TABLE_STYLES['quote_summary'])
         
         story.append(summary_table)
-        doc.build(story)
+        build_pdf(output_path, story, company_info)
         
         return send_file(output_path, as_attachment=True, download_name=output_filename)
     
@@ -511,12 +469,7 @@ def _create_fallback_image(filepath, output_path):
     """Create a fallback image when AI marking fails"""
     try:
         if filepath.endswith('.pdf'):
-            doc = fitz.open(filepath)
-            page = doc[0]
-            mat = fitz.Matrix(300/72, 300/72)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            pix.save(output_path)
-            doc.close()
+            get_page_rasterizer().save_png(filepath, output_path, 0, dpi=PRINT_DPI)
         else:
             img = PILImage.open(filepath)
             img.save(output_path, 'PNG')
@@ -527,20 +480,11 @@ def _create_fallback_image(filepath, output_path):
 def _generate_quote_pdf(quote_path, project_name, cost_items, subtotal, markup, grand_total, markup_pct, data_config):
     """Generate quote PDF"""
     try:
-        doc = SimpleDocTemplate(quote_path, pagesize=letter)
         story = []
-        styles = getSampleStyleSheet()
-
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#556B2F'),
-            spaceAfter=30,
-        )
+        styles = get_styles()
 
         company_info = data_config.get('company_info', {})
-        story.append(Paragraph(company_info.get('name', 'Integratd Living'), title_style))
+        story.append(Paragraph(company_info.get('name', 'Integratd Living'), styles['QuoteTitle']))
         story.append(Paragraph(f"Quote for: {project_name}", styles['Heading2']))
         story.append(Spacer(1, 0.3*inch))
         story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
@@ -562,19 +506,10 @@ def _generate_quote_pdf(quote_path, project_name, cost_items, subtotal, markup,
         table_data.append(['', '', '', 'TOTAL:', f"${grand_total:,.2f}"])
 
         t = Table(table_data, colWidths=[3*inch, 1*inch, 1*inch, 1*inch, 1.5*inch])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#556B2F')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        t.setStyle(TABLE_STYLES['quote'])
 
         story.append(t)
-        doc.build(story)
+        build_pdf(quote_path, story, company_info)
     except Exception as e:
         print(f"Error creating quote PDF: {e}")
 
@@ -588,7 +523,6 @@ def generate_final_quote():
     """Generate final PDF quote from canvas symbols"""
     try:
         funcs = get_app_functions()
-        load_data = funcs.get('load_data')
         
         data = request.json
         project_id = data.get('project_id')
@@ -602,55 +536,35 @@ def generate_final_quote():
             sym_type = sym.get('type')
             counts[sym_type] = counts.get(sym_type, 0) + 1
 
-        # Load pricing
-        data_config = load_data() if load_data else {}
-
-        # Generate quote
-        line_items = []
-        automation_types = data_config.get('automation_types', {})
-        labor_rate = data_config.get('labor_rate', 85)
-        
-        for automation_type, count in counts.items():
-            if count > 0:
-                automation_config = automation_types.get(automation_type, {})
-                unit_cost = automation_config.get('base_cost_per_unit', {}).get(tier, 0)
-                labor_hours = automation_config.get('labor_hours', {}).get(tier, 0)
-                labor_cost = labor_hours * labor_rate
-                total_cost = (unit_cost + labor_cost) * count
-
-                line_items.append({
-                    'category': automation_config.get('name', automation_type),
-                    'quantity': count,
-                    'tier': tier,
-                    'unit_cost': unit_cost,
-                    'labor_hours': labor_hours,
-                    'labor_cost': labor_cost,
-                    'total': total_cost
-                })
-
-        subtotal = sum(item['total'] for item in line_items)
-        markup_pct = data_config.get('markup_percentage', 20)
-        markup = subtotal * (markup_pct / 100)
-        total = subtotal + markup
+        # Price symbol counts from the compiled pricing tables
+        pricing = _pricing_tables(funcs)
+        data_config = pricing.config
+
+        line_items = [
+            {
+                'category': item['name'],
+                'quantity': item['quantity'],
+                'tier': item['tier'],
+                'unit_cost': item['unit_cost'],
+                'labor_hours': item['labor_hours'],
+                'labor_cost': item['labor_cost'],
+                'total': item['total']
+            }
+            for item in pricing.price_counts(counts, tier)
+        ]
+
+        subtotal, markup, total = pricing.totals(line_items)
+        markup_pct = pricing.markup_percentage
 
         # Generate PDF
         output_filename = f"quote_{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         output_path = os.path.join(current_app.config['OUTPUT_FOLDER'], output_filename)
 
-        doc = SimpleDocTemplate(output_path, pagesize=letter)
         story = []
-        styles = getSampleStyleSheet()
-
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#556B2F'),
-            spaceAfter=30,
-        )
+        styles = get_styles()
 
         company_info = data_config.get('company_info', {})
-        story.append(Paragraph(company_info.get('name', 'Company Name'), title_style))
+        story.append(Paragraph(company_info.get('name', 'Company Name'), styles['QuoteTitle']))
         story.append(Paragraph(f"Project: {project_name}", styles['Normal']))
         story.append(Spacer(1, 0.3*inch))
 
@@ -670,16 +584,7 @@ def generate_final_quote():
             ])
 
         table = Table(table_data, colWidths=[2*inch, 0.8*inch, 0.8*inch, 1*inch, 1*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#556B2F')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table.setStyle(TABLE_STYLES['quote'])
 
         story.append(table)
         story.append(Spacer(1, 0.5*inch))
@@ -688,7 +593,7 @@ def generate_final_quote():
         story.append(Paragraph(f"Markup ({markup_pct}%): ${markup:.2f}", styles['Normal']))
         story.append(Paragraph(f"<b>Total: ${total:.2f}</b>", styles['Heading2']))
 
-        doc.build(story)
+        build_pdf(output_path, story, company_info)
 
         return jsonify({'success': True, 'filename': output_filename})
 
@@ -730,12 +635,7 @@ def generate_annotated_floorplan():
 
         # Open floor plan image
         if floor_plan_path.endswith('.pdf'):
-            doc = fitz.open(floor_plan_path)
-            page = doc[0]
-            mat = fitz.Matrix(2.0, 2.0)
-            pix = page.get_pixmap(matrix=mat)
-            img = PILImage.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            doc.close()
+            img = get_page_rasterizer().render_image(floor_plan_path, 0, dpi=PREVIEW_DPI)
         else:
             img = PILImage.open(floor_plan_path)
 
@@ -12,6 +12,39 @@ from app.utils.helpers import (
 from app.utils.image_utils import (
     pdf_to_image_base64,
     image_to_base64,
+    decode_data_url,
+)
+
+from app.utils.pdf_raster import (
+    PageRasterizer,
+    get_page_rasterizer,
+    PREVIEW_DPI,
+    PRINT_DPI,
+)
+
+from app.utils.markup_renderer import (
+    MarkupRenderer,
+    get_markup_renderer,
+)
+
+from app.utils.cad_renderer import (
+    CadRenderer,
+    get_cad_renderer,
+)
+
+from app.utils.pdf_templates import (
+    TABLE_STYLES,
+    build_pdf,
+    get_styles,
+    page_decorator,
+    warm_pdf_templates,
+)
+
+from app.utils.vision_payload import (
+    prepare_images,
+    prepare_file_images,
+    tile_prompt,
+    merge_tile_results,
 )
 
 from app.utils.ai_tools import (
@@ -20,12 +53,37 @@ from app.utils.ai_tools import (
     SEARCH_TOOL_SCHEMA,
 )
 
+from app.utils.analysis_cache import (
+    AnalysisCache,
+    get_analysis_cache,
+)
+
 __all__ = [
     'load_json_file',
     'save_json_file',
     'pdf_to_image_base64',
     'image_to_base64',
+    'decode_data_url',
+    'PageRasterizer',
+    'get_page_rasterizer',
+    'PREVIEW_DPI',
+    'PRINT_DPI',
+    'MarkupRenderer',
+    'get_markup_renderer',
+    'CadRenderer',
+    'get_cad_renderer',
+    'TABLE_STYLES',
+    'build_pdf',
+    'get_styles',
+    'page_decorator',
+    'warm_pdf_templates',
+    'prepare_images',
+    'prepare_file_images',
+    'tile_prompt',
+    'merge_tile_results',
     'web_search',
     'execute_tool',
     'SEARCH_TOOL_SCHEMA',
+    'AnalysisCache',
+    'get_analysis_cache',
 ]
@@ -0,0 +1,206 @@
+"""
+Persistent result cache for AI floorplan analysis.
+
+The agentic analysis loop is slow and costs API tokens, and the same
+floorplan is often uploaded more than once. Results are cached on disk
+under a key built from:
+- a hash of the rendered page image sent to the model
+- a hash of the full prompt (which embeds the learning context, so new
+  learning examples or prompt edits produce new keys)
+- the model name and analysis kind
+
+Entries expire after a TTL and the least recently used entries are
+evicted when the cache exceeds its entry or byte budget. Error results
+are never cached.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """Disk-backed, content-addressed cache of analysis results."""
+
+    def __init__(self, cache_dir: str, ttl_seconds: float = 30 * 24 * 3600,
+                 max_entries: int = 500, max_bytes: int = 200 * 1024 * 1024,
+                 enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._expired = 0
+        self._bypassed = 0
+        self._tokens_saved = 0
+
+    @staticmethod
+    def make_key(kind: str, image_data: str, prompt: str, model: str) -> str:
+        """Cache key for one analysis request."""
+        digest = hashlib.sha256()
+        for part in (kind, model, hashlib.sha256(image_data.encode('utf-8')).hexdigest(),
+                     hashlib.sha256(prompt.encode('utf-8')).hexdigest()):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                self._misses += 1
+                return None
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Dropping unreadable analysis cache entry {key[:12]}: {e}")
+                self._remove(path)
+                self._misses += 1
+                return None
+
+            if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+                self._remove(path)
+                self._expired += 1
+                self._misses += 1
+                return None
+
+            # Touch the file so eviction sees it as recently used
+            os.utime(path, None)
+            self._hits += 1
+            self._tokens_saved += entry.get('tokens', 0)
+        return copy.deepcopy(entry['result'])
+
+    def put(self, key: str, result: Dict[str, Any], tokens: int = 0, **meta) -> bool:
+        """Store a successful result; error results are skipped."""
+        if not self.enabled or not isinstance(result, dict) or 'error' in result:
+            return False
+        entry = {
+            'created_at': time.time(),
+            'tokens': tokens,
+            'meta': meta,
+            'result': result,
+        }
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, default=str)
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.error(f"Error writing analysis cache entry: {e}")
+                self._remove(temp_path)
+                return False
+            self._stores += 1
+            self._evict_locked()
+        return True
+
+    def record_bypass(self):
+        """Count a request that skipped the cache lookup."""
+        with self._lock:
+            self._bypassed += 1
+
+    def _entries_locked(self):
+        """(mtime, size, path) for every entry, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def _evict_locked(self):
+        """Drop expired entries, then least recently used ones over budget."""
+        entries = self._entries_locked()
+        now = time.time()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes
+                           or now - entries[0][0] > self.ttl_seconds):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+            self._evictions += 1
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> int:
+        """Remove every entry; returns how many were removed."""
+        with self._lock:
+            entries = self._entries_locked()
+            for _, _, path in entries:
+                self._remove(path)
+            return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            entries = self._entries_locked()
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'expired': self._expired,
+                'bypassed': self._bypassed,
+                'tokens_saved': self._tokens_saved,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'ttl_seconds': self.ttl_seconds,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache(cache_dir: str = None) -> AnalysisCache:
+    """Get or create the analysis cache configured from ANALYSIS_CACHE_* env vars"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache(
+            cache_dir or os.environ.get('ANALYSIS_CACHE_DIR', os.path.join('data', 'analysis_cache')),
+            ttl_seconds=float(os.environ.get('ANALYSIS_CACHE_TTL_HOURS', '720')) * 3600,
+            max_entries=int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', '500')),
+            max_bytes=int(float(os.environ.get('ANALYSIS_CACHE_MAX_MB', '200')) * 1024 * 1024),
+            enabled=os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() != 'false',
+        )
+    return _analysis_cache
@@ -0,0 +1,342 @@
+"""
+Server-side PDF and PNG rendering of CAD sessions.
+
+/api/cad/export used to answer pdf and png requests with download URLs
+for files that were never created. Both formats are now drawn from the
+session's canvas objects, through the same entity conversion as the DXF
+exporter (dxf_exporter.py), so all three exports show the same geometry:
+
+- PNG is rasterized with PIL, fitted to CAD_RENDER_MAX_EDGE pixels; each
+  symbol block is rasterized once per (scale, rotation, colour) as a stamp
+  and pasted at every instance
+- PDF is vector output; each block becomes one form XObject drawn at
+  every instance, mirroring the DXF BLOCK/INSERT structure
+- finished renders are cached on disk, keyed by a hash of the drawn data,
+  so exporting an unchanged drawing again reuses the file
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+from dxf_exporter import DXFExporter, export_data
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when drawing changes so stale cached renders are not reused
+RENDERER_VERSION = 1
+
+RENDER_FORMATS = ('png', 'pdf')
+
+DEFAULT_COLOR = '#000000'
+PNG_MARGIN = 20
+
+
+@lru_cache(maxsize=64)
+def _font(size: int):
+    """TrueType font at a pixel size, loaded once per size."""
+    try:
+        return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _layer_colors(layers) -> Dict[str, str]:
+    """{layer name: hex colour} for the session's layers."""
+    return {layer.get('name', 'LAYER'): layer.get('color', DEFAULT_COLOR) for layer in layers or []}
+
+
+def _affine(sx: float, sy: float, angle: float):
+    """Point transform for an INSERT's scale and (clockwise, y-down) rotation."""
+    cos_a, sin_a = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+
+    def transform(x, y):
+        x, y = x * sx, y * sy
+        return x * cos_a - y * sin_a, x * sin_a + y * cos_a
+    return transform
+
+
+def _draw_entities(draw, entities, transform, length_scale: float, color: str, line_width: int):
+    """Draw DXF entity dicts onto a PIL canvas through a point transform."""
+    for entity in entities:
+        entity_type = entity['type']
+        if entity_type == 'LINE':
+            draw.line([transform(entity['x1'], entity['y1']), transform(entity['x2'], entity['y2'])],
+                      fill=color, width=line_width)
+        elif entity_type == 'CIRCLE':
+            cx, cy = transform(entity['cx'], entity['cy'])
+            radius = entity['radius'] * length_scale
+            draw.ellipse([cx - radius, cy - radius, cx + radius, cy + radius],
+                         outline=color, width=line_width)
+        elif entity_type == 'LWPOLYLINE':
+            points = [transform(x, y) for x, y in entity['vertices']]
+            if entity.get('closed') and points:
+                points.append(points[0])
+            if len(points) > 1:
+                draw.line(points, fill=color, width=line_width)
+        elif entity_type == 'TEXT':
+            size = max(1, int(round(entity['height'] * length_scale)))
+            draw.text(transform(entity['x'], entity['y']), entity['text'], fill=color, font=_font(size))
+
+
+class CadRenderer:
+    """Renders CAD sessions to PNG/PDF and caches the results on disk."""
+
+    def __init__(self, render_dir: str, max_renders: int = 100, max_edge: int = 4000):
+        self.render_dir = render_dir
+        self.max_renders = max_renders
+        self.max_edge = max_edge
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def render_key(self, cad_data: Dict, fmt: str) -> str:
+        """Cache key for a session rendered in a format."""
+        data = export_data(cad_data)
+        payload = json.dumps([RENDERER_VERSION, fmt, self.max_edge, data['layers'], data['objects']],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _prepare(self, cad_data: Dict):
+        """(exporter with blocks defined, canvas objects, extents, layer colours)."""
+        data = export_data(cad_data)
+        exporter = DXFExporter()
+        exporter.layers = data['layers']
+        extents = exporter.scan(data['objects'])
+        return exporter, data['objects'], extents, _layer_colors(data['layers'])
+
+    def draw_png(self, cad_data: Dict):
+        """Rasterize a session onto a white RGB image."""
+        exporter, objects, extents, colors = self._prepare(cad_data)
+        (min_x, min_y), (max_x, max_y) = extents.bounds()
+        span = max(max_x - min_x, max_y - min_y, 1e-9)
+        scale = (self.max_edge - 2 * PNG_MARGIN) / span
+        width = int(math.ceil((max_x - min_x) * scale)) + 2 * PNG_MARGIN
+        height = int(math.ceil((max_y - min_y) * scale)) + 2 * PNG_MARGIN
+        line_width = max(1, min(3, int(round(scale))))
+
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+
+        def to_pixels(x, y):
+            return (x - min_x) * scale + PNG_MARGIN, (y - min_y) * scale + PNG_MARGIN
+
+        stamps = {}
+        for entity in exporter.iter_entities(objects):
+            color = colors.get(entity.get('layer'), DEFAULT_COLOR)
+            if entity['type'] != 'INSERT':
+                _draw_entities(draw, (entity,), to_pixels, scale, color, line_width)
+                continue
+
+            key = (entity['block_name'], entity['scale_x'], entity['scale_y'],
+                   entity.get('rotation') or 0, color)
+            stamp = stamps.get(key)
+            if stamp is None:
+                stamp = stamps[key] = self._block_stamp(
+                    exporter.blocks.get(entity['block_name'], []), entity, scale, color, line_width)
+            if stamp is not None:
+                block_image, (offset_x, offset_y) = stamp
+                x, y = to_pixels(entity['x'], entity['y'])
+                image.paste(block_image, (int(round(x - offset_x)), int(round(y - offset_y))), block_image)
+        return image
+
+    @staticmethod
+    def _block_stamp(entities, insert: Dict, scale: float, color: str, line_width: int):
+        """(RGBA image of a block as inserted, pixel offset of its base point), or None."""
+        if not entities:
+            return None
+        place = _affine(insert['scale_x'], insert['scale_y'], insert.get('rotation') or 0)
+        length_scale = scale * math.sqrt(abs(insert['scale_x'] * insert['scale_y']))
+
+        def local(x, y):
+            px, py = place(x, y)
+            return px * scale, py * scale
+
+        def to_stamp(x, y):
+            px, py = local(x, y)
+            return px - left, py - top
+
+        # Bound the transformed geometry, padded for stroke width and circle radii
+        points = []
+        reach = line_width
+        for entity in entities:
+            if entity['type'] == 'LINE':
+                points += [local(entity['x1'], entity['y1']), local(entity['x2'], entity['y2'])]
+            elif entity['type'] == 'CIRCLE':
+                points.append(local(entity['cx'], entity['cy']))
+                reach = max(reach, entity['radius'] * length_scale + line_width)
+            elif entity['type'] == 'LWPOLYLINE':
+                points += [local(x, y) for x, y in entity['vertices']]
+            elif entity['type'] == 'TEXT':
+                points.append(local(entity['x'], entity['y']))
+                size = entity['height'] * length_scale
+                reach = max(reach, size * (len(entity['text']) * 0.6 + 1))
+        if not points:
+            return None
+        left = min(x for x, _ in points) - reach
+        top = min(y for _, y in points) - reach
+        width = int(math.ceil(max(x for x, _ in points) + reach - left)) + 1
+        height = int(math.ceil(max(y for _, y in points) + reach - top)) + 1
+
+        stamp = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        _draw_entities(ImageDraw.Draw(stamp), entities, to_stamp, length_scale, color, line_width)
+        return stamp, (-left, -top)
+
+    def draw_pdf(self, cad_data: Dict, target):
+        """Draw a session as vector PDF into target (path or file object)."""
+        from reportlab.lib.colors import HexColor
+        from reportlab.lib.pagesizes import A3, landscape
+        from reportlab.pdfgen import canvas as pdf_canvas
+
+        exporter, objects, extents, colors = self._prepare(cad_data)
+        (min_x, min_y), (max_x, max_y) = extents.bounds()
+        page_width, page_height = landscape(A3)
+        margin = 36
+        scale = min((page_width - 2 * margin) / max(max_x - min_x, 1e-9),
+                    (page_height - 2 * margin) / max(max_y - min_y, 1e-9))
+
+        c = pdf_canvas.Canvas(target, pagesize=(page_width, page_height))
+        c.setTitle('CAD Export')
+
+        # One form XObject per block, drawn in block units; colour comes from the caller
+        for block_name, entities in exporter.blocks.items():
+            block = exporter.block_extents[block_name]
+            if block.empty:
+                continue
+            c.beginForm(block_name, lowerx=block.min_x - 1, lowery=block.min_y - 1,
+                        upperx=block.max_x + 1, uppery=block.max_y + 1)
+            for entity in entities:
+                self._pdf_entity(c, entity)
+            c.endForm()
+
+        # Canvas units with y pointing down, as in Fabric.js
+        c.translate(margin, page_height - margin)
+        c.scale(scale, -scale)
+        c.translate(-min_x, -min_y)
+        c.setLineWidth(1.0 / scale)
+
+        for entity in exporter.iter_entities(objects):
+            color = HexColor(colors.get(entity.get('layer'), DEFAULT_COLOR))
+            c.setStrokeColor(color)
+            c.setFillColor(color)
+            if entity['type'] != 'INSERT':
+                self._pdf_entity(c, entity)
+                continue
+            block = exporter.block_extents.get(entity['block_name'])
+            if block is None or block.empty:
+                continue
+            c.saveState()
+            c.translate(entity['x'], entity['y'])
+            if entity.get('rotation'):
+                c.rotate(entity['rotation'])
+            c.scale(entity['scale_x'], entity['scale_y'])
+            c.doForm(entity['block_name'])
+            c.restoreState()
+
+        c.showPage()
+        c.save()
+
+    @staticmethod
+    def _pdf_entity(c, entity: Dict):
+        """Draw one entity in the current PDF user space."""
+        entity_type = entity['type']
+        if entity_type == 'LINE':
+            c.line(entity['x1'], entity['y1'], entity['x2'], entity['y2'])
+        elif entity_type == 'CIRCLE':
+            c.circle(entity['cx'], entity['cy'], entity['radius'], stroke=1, fill=0)
+        elif entity_type == 'LWPOLYLINE':
+            vertices = entity['vertices']
+            if len(vertices) < 2:
+                return
+            path = c.beginPath()
+            path.moveTo(*vertices[0])
+            for x, y in vertices[1:]:
+                path.lineTo(x, y)
+            if entity.get('closed'):
+                path.close()
+            c.drawPath(path, stroke=1, fill=0)
+        elif entity_type == 'TEXT':
+            # Undo the y flip locally so glyphs stand upright below the top-left point
+            c.saveState()
+            c.translate(entity['x'], entity['y'])
+            if entity.get('rotation'):
+                c.rotate(entity['rotation'])
+            c.scale(1, -1)
+            c.setFont('Helvetica', entity['height'])
+            c.drawString(0, -entity['height'] * 0.8, entity['text'])
+            c.restoreState()
+
+    def draw(self, cad_data: Dict, fmt: str, path: str):
+        """Render a session straight to a file."""
+        if fmt == 'png':
+            self.draw_png(cad_data).save(path, format='PNG', optimize=False)
+        elif fmt == 'pdf':
+            self.draw_pdf(cad_data, path)
+        else:
+            raise ValueError(f"Unsupported render format: {fmt}")
+
+    def render(self, cad_data: Dict, fmt: str) -> str:
+        """Path of the cached render of a session, drawing it only when not cached."""
+        if fmt not in RENDER_FORMATS:
+            raise ValueError(f"Unsupported render format: {fmt}")
+        path = os.path.join(self.render_dir, f"{self.render_key(cad_data, fmt)}.{fmt}")
+        if os.path.isfile(path):
+            os.utime(path, None)
+            self.hits += 1
+            return path
+
+        os.makedirs(self.render_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        self.draw(cad_data, fmt, temp_path)
+        os.replace(temp_path, path)
+        self.renders += 1
+        self._evict()
+        return path
+
+    def stats(self) -> Dict:
+        """Render cache counters."""
+        return {'hits': self.hits, 'renders': self.renders, 'render_dir': self.render_dir}
+
+    def _evict(self):
+        """Keep at most max_renders cached files, dropping the oldest."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.render_dir):
+                if name.endswith(RENDER_FORMATS):
+                    path = os.path.join(self.render_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+            entries.sort()
+            for _, path in entries[:max(0, len(entries) - self.max_renders)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+_cad_renderer: Optional[CadRenderer] = None
+
+
+def get_cad_renderer() -> CadRenderer:
+    """Get or create the shared renderer configured from CAD_RENDER_* env vars"""
+    global _cad_renderer
+    if _cad_renderer is None:
+        _cad_renderer = CadRenderer(
+            os.environ.get('CAD_RENDER_DIR', os.path.join('data', 'cad_render_cache')),
+            max_renders=int(os.environ.get('CAD_RENDER_MAX', '100')),
+            max_edge=int(os.environ.get('CAD_RENDER_MAX_EDGE', '4000')),
+        )
+    return _cad_renderer
@@ -4,6 +4,9 @@ Image processing utilities for PDF conversion and image handling.
 
 import io
 import base64
+import binascii
+
+from app.utils.pdf_raster import get_page_rasterizer, PREVIEW_DPI
 
 try:
     import fitz  # PyMuPDF
@@ -35,21 +38,10 @@ def pdf_to_image_base64(pdf_path, page_num=0):
     if not FITZ_AVAILABLE:
         raise ImportError("PyMuPDF (fitz) is required for PDF conversion")
     
-    doc = fitz.open(pdf_path)
-    page = doc[page_num]
-    
-    # Render at high resolution
-    mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-    pix = page.get_pixmap(matrix=mat)
-    
-    # Convert to PNG bytes
-    img_bytes = pix.tobytes("png")
-    
-    # Convert to base64
-    img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+    # Render at 2x zoom through the shared render cache
+    img_bytes = get_page_rasterizer().render_png(pdf_path, page_num, dpi=PREVIEW_DPI)
     
-    doc.close()
-    return img_base64
+    return base64.b64encode(img_bytes).decode('utf-8')
 
 
 def image_to_base64(image_path):
@@ -73,3 +65,21 @@ def image_to_base64(image_path):
         img.save(buffered, format="PNG")
         return base64.b64encode(buffered.getvalue()).decode('utf-8')
 
+
+
+def decode_data_url(data):
+    """
+    Decode a base64 image, with or without a "data:...;base64," prefix.
+    
+    The payload is decoded straight from a memoryview past the prefix
+    instead of splitting the (often multi-megabyte) string first.
+    
+    Args:
+        data: Base64 string or data URL
+    
+    Returns:
+        Decoded bytes
+    """
+    encoded = data.encode('ascii') if isinstance(data, str) else data
+    start = bytes(memoryview(encoded)[:256]).find(b',') + 1
+    return binascii.a2b_base64(memoryview(encoded)[start:])
@@ -0,0 +1,270 @@
+"""
+Batched renderer for marked-up floorplans.
+
+generate_marked_up_image used to draw each component straight onto the
+300 DPI page, picking its style through an if/elif chain. Rendering is now
+split into two layers:
+
+- the base raster comes from the shared PDF render cache (pdf_raster.py)
+- the markup is drawn onto a transparent RGBA overlay and cached on disk,
+  keyed by a hash of the drawn data and the page size
+
+Component styles are resolved once per (type, category) pair, and each
+style's ring is rasterized once as a stamp and pasted at every position
+of that style. Re-rendering after an edit only redraws the overlay; an
+unchanged mapping reuses the cached overlay outright.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when drawing changes so stale cached overlays are not reused
+RENDERER_VERSION = 1
+
+# name -> (color, radius)
+COMPONENT_STYLES = {
+    'lighting': ('#FFD700', 15),   # Gold
+    'switch': ('#4169E1', 12),     # Royal blue
+    'shading': ('#8B4513', 14),    # Saddle brown
+    'security': ('#DC143C', 16),   # Crimson
+    'climate': ('#00CED1', 14),    # Dark turquoise
+    'audio': ('#9370DB', 14),      # Medium purple
+    'outlet': ('#32CD32', 12),     # Lime green
+    'panel': ('#FF4500', 20),      # Orange red
+    'default': ('#808080', 10),    # Gray
+}
+
+# Style rules in priority order: (field, value, style name)
+STYLE_RULES = [
+    ('type', 'light', 'lighting'),
+    ('category', 'lighting', 'lighting'),
+    ('type', 'switch', 'switch'),
+    ('category', 'shading', 'shading'),
+    ('category', 'security_access', 'security'),
+    ('category', 'security', 'security'),
+    ('category', 'climate', 'climate'),
+    ('category', 'audio', 'audio'),
+    ('type', 'outlet', 'outlet'),
+    ('type', 'panel', 'panel'),
+]
+
+# connection type -> (color, width)
+CONNECTION_STYLES = {
+    'power': ('red', 3),
+    'control': ('blue', 2),
+}
+DEFAULT_CONNECTION_STYLE = ('green', 2)
+
+LEGEND_ITEMS = [
+    ('💡 Lighting', '#FFD700'),
+    ('🔘 Switch', '#4169E1'),
+    ('🪟 Shading', '#8B4513'),
+    ('🔐 Security', '#DC143C'),
+    ('🌡️ Climate', '#00CED1'),
+    ('🔊 Audio', '#9370DB'),
+]
+
+RING_WIDTH = 3
+
+
+@lru_cache(maxsize=256)
+def style_for(comp_type: str, category: str) -> str:
+    """Style name for a component type / automation category pair."""
+    for field, value, style in STYLE_RULES:
+        if (comp_type if field == 'type' else category) == value:
+            return style
+    return 'default'
+
+
+@lru_cache(maxsize=1)
+def _fonts():
+    """(label font, small font), loaded once per process."""
+    try:
+        return (ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 20),
+                ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14))
+    except OSError:
+        return ImageFont.load_default(), ImageFont.load_default()
+
+
+@lru_cache(maxsize=32)
+def _ring_stamp(color: str, radius: int):
+    """Transparent image holding one style's ring, drawn once."""
+    size = 2 * radius + 1
+    stamp = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(stamp).ellipse([0, 0, size - 1, size - 1], outline=color, width=RING_WIDTH)
+    return stamp
+
+
+def overlay_payload(mapping_data: Dict) -> Dict:
+    """The parts of a mapping that affect the overlay."""
+    return {
+        'components': [
+            {k: comp.get(k) for k in ('id', 'label', 'type', 'automation_category', 'location')}
+            for comp in mapping_data.get('components', []) or []
+        ],
+        'connections': [
+            {k: conn.get(k) for k in ('from', 'to', 'type', 'circuit')}
+            for conn in mapping_data.get('connections', []) or []
+        ],
+        'scale': (mapping_data.get('analysis') or {}).get('scale', 'not detected'),
+    }
+
+
+class MarkupRenderer:
+    """Draws mapping overlays in style batches and caches them on disk."""
+
+    def __init__(self, overlay_dir: Optional[str] = None, max_overlays: int = 100):
+        self.overlay_dir = overlay_dir
+        self.max_overlays = max_overlays
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def overlay_key(self, mapping_data: Dict, size: Tuple[int, int]) -> str:
+        """Cache key for the overlay of a mapping on a page of this size."""
+        payload = json.dumps([RENDERER_VERSION, list(size), overlay_payload(mapping_data)],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def draw_overlay(self, mapping_data: Dict, size: Tuple[int, int]):
+        """Render the markup for one page onto a new transparent layer."""
+        width, height = size
+        overlay = Image.new('RGBA', size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        font, small_font = _fonts()
+
+        # Resolve positions and group components by style
+        positions: Dict[str, Tuple[int, int]] = {}
+        batches: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
+        for comp in mapping_data.get('components', []) or []:
+            comp_id = comp.get('id', '')
+            location = comp.get('location') or {}
+            x = int(location.get('x', 0.5) * width)
+            y = int(location.get('y', 0.5) * height)
+            positions[comp_id] = (x, y)
+            comp_type = comp.get('type', 'unknown')
+            style = style_for(comp_type, comp.get('automation_category', comp_type))
+            batches[style].append((x, y, str(comp.get('label', comp_id))))
+
+        for style, items in batches.items():
+            color, radius = COMPONENT_STYLES[style]
+            stamp = _ring_stamp(color, radius)
+            for x, y, _ in items:
+                overlay.paste(stamp, (x - radius, y - radius), stamp)
+            for x, y, label in items:
+                draw.text((x + radius + 5, y - radius), label, fill=color, font=font)
+
+        for conn in mapping_data.get('connections', []) or []:
+            from_pos = positions.get(conn.get('from'))
+            to_pos = positions.get(conn.get('to'))
+            if from_pos is None or to_pos is None:
+                continue
+            line_color, line_width = CONNECTION_STYLES.get(conn.get('type', 'power'), DEFAULT_CONNECTION_STYLE)
+            draw.line([from_pos, to_pos], fill=line_color, width=line_width)
+            circuit = conn.get('circuit', '')
+            if circuit:
+                mid = ((from_pos[0] + to_pos[0]) // 2, (from_pos[1] + to_pos[1]) // 2)
+                draw.text(mid, str(circuit), fill='purple', font=small_font)
+
+        self._draw_legend(draw, mapping_data, height, font, small_font)
+        return overlay
+
+    @staticmethod
+    def _draw_legend(draw, mapping_data: Dict, height: int, font, small_font):
+        """Legend box and scale in the bottom-left corner."""
+        legend_y = height - 140
+        draw.rectangle([10, legend_y - 10, 300, height - 10], fill='white', outline='black', width=2)
+
+        scale_info = (mapping_data.get('analysis') or {}).get('scale', 'not detected')
+        if scale_info and scale_info != 'not detected':
+            draw.text((20, legend_y - 5), f"Scale: {scale_info}", fill='black', font=font)
+            legend_y += 20
+
+        for idx, (text, color) in enumerate(LEGEND_ITEMS):
+            y_pos = legend_y + (idx * 18)
+            draw.ellipse([20, y_pos, 30, y_pos + 10], outline=color, fill=None, width=2)
+            draw.text((40, y_pos - 2), text, fill='black', font=small_font)
+
+    def render_overlay(self, mapping_data: Dict, size: Tuple[int, int]):
+        """Cached overlay for a mapping, drawing it only when not cached."""
+        if not self.overlay_dir:
+            self.renders += 1
+            return self.draw_overlay(mapping_data, size)
+
+        path = os.path.join(self.overlay_dir, f"{self.overlay_key(mapping_data, size)}.png")
+        try:
+            with Image.open(path) as cached:
+                overlay = cached.convert('RGBA')
+            os.utime(path, None)
+            self.hits += 1
+            return overlay
+        except (OSError, ValueError):
+            pass
+
+        overlay = self.draw_overlay(mapping_data, size)
+        self.renders += 1
+        try:
+            os.makedirs(self.overlay_dir, exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            overlay.save(temp_path, format='PNG')
+            os.replace(temp_path, path)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not cache markup overlay: {e}")
+        return overlay
+
+    def compose(self, base, mapping_data: Dict):
+        """Base page with the mapping overlay composited on top (RGB)."""
+        page = base.convert('RGBA')
+        page.alpha_composite(self.render_overlay(mapping_data, page.size))
+        return page.convert('RGB')
+
+    def stats(self) -> Dict:
+        """Overlay cache counters."""
+        return {'hits': self.hits, 'renders': self.renders, 'overlay_dir': self.overlay_dir}
+
+    def _evict(self):
+        """Keep at most max_overlays cached overlays, dropping the oldest."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.overlay_dir):
+                if name.endswith('.png'):
+                    path = os.path.join(self.overlay_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+            entries.sort()
+            for _, path in entries[:max(0, len(entries) - self.max_overlays)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+_markup_renderer: Optional[MarkupRenderer] = None
+
+
+def get_markup_renderer() -> MarkupRenderer:
+    """Get or create the shared renderer configured from MARKUP_OVERLAY_* env vars"""
+    global _markup_renderer
+    if _markup_renderer is None:
+        _markup_renderer = MarkupRenderer(
+            os.environ.get('MARKUP_OVERLAY_DIR', os.path.join('data', 'overlay_cache')),
+            max_overlays=int(os.environ.get('MARKUP_OVERLAY_MAX', '100')),
+        )
+    return _markup_renderer
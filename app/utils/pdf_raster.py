@@ -0,0 +1,340 @@
+"""
+Shared PDF page rasterization with an on-disk render cache.
+
+The analyze -> markup -> takeoffs pipeline used to re-open and re-render
+the same floorplan at several zooms. Every caller now goes through one
+PageRasterizer, which stores rendered PNGs keyed by (file hash, page, DPI).
+
+Renders at or below MASTER_DPI are derived from a single master render of
+the page, so the pixels for a given (file, page, DPI) are identical no
+matter which caller asked first. That keeps the AI analysis cache key
+(which hashes the page image) stable across uploads.
+
+PyMuPDF is not thread-safe, so fitz calls are serialized; the background
+analysis workers and request threads share this module.
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Highest DPI any caller needs (markup and CAD backgrounds); lower DPIs
+# are downscaled from this render
+MASTER_DPI = 300
+
+# Common zooms expressed as DPI (PDF user space is 72 points per inch)
+PREVIEW_DPI = 144   # 2x zoom - AI analysis, editor backgrounds
+PRINT_DPI = 300
+
+_fitz_lock = threading.Lock()
+
+
+def _render_page_file(pdf_path: str, page_num: int, dpi: int, path: str) -> str:
+    """Render one page to path; runs in a worker process with its own fitz."""
+    zoom = dpi / 72
+    doc = fitz.open(pdf_path)
+    try:
+        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        pix.save(temp_path, output="png")
+    finally:
+        doc.close()
+    os.replace(temp_path, path)
+    return path
+
+
+class PageRasterizer:
+    """Renders PDF pages to PNG, caching results on disk with LRU eviction."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 500 * 1024 * 1024,
+                 master_dpi: int = MASTER_DPI):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.master_dpi = master_dpi
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # Renders handed to a caller and not yet read; eviction skips them
+        self._pins: Dict[str, int] = {}
+        self._over_budget = False
+        self._hashes: Dict[Tuple[str, float, int], str] = {}
+        self._hits = 0
+        self._renders = 0
+        self._derived = 0
+        self._evictions = 0
+
+    # ------------------------------------------------------------------
+    # Keys and paths
+    # ------------------------------------------------------------------
+
+    def file_hash(self, pdf_path: str) -> str:
+        """Content hash of a file, memoized by path, mtime and size."""
+        st = os.stat(pdf_path)
+        memo_key = (os.path.abspath(pdf_path), st.st_mtime, st.st_size)
+        cached = self._hashes.get(memo_key)
+        if cached:
+            return cached
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        with self._lock:
+            if len(self._hashes) > 1024:
+                self._hashes.clear()
+            self._hashes[memo_key] = file_hash
+        return file_hash
+
+    def _path(self, file_hash: str, page_num: int, dpi: int) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}_p{page_num}_{dpi}.png")
+
+    def _key_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(path, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _render(self, pdf_path: str, page_num: int, dpi: int, path: str):
+        """Render one page with PyMuPDF straight to the cache."""
+        if not FITZ_AVAILABLE:
+            raise ImportError("PyMuPDF (fitz) is required for PDF conversion")
+        zoom = dpi / 72
+        with _fitz_lock:
+            doc = fitz.open(pdf_path)
+            try:
+                pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                png_bytes = pix.tobytes("png")
+            finally:
+                doc.close()
+        self._write(path, png_bytes)
+        with self._lock:
+            self._renders += 1
+
+    def _derive(self, pdf_path: str, page_num: int, dpi: int, path: str):
+        """Downscale the cached master render to a lower DPI."""
+        if not PIL_AVAILABLE:
+            raise ImportError("PIL/Pillow is required for image conversion")
+        scale = dpi / self.master_dpi
+        with self._cached(pdf_path, page_num, self.master_dpi) as master_path, Image.open(master_path) as master:
+            size = (max(1, round(master.width * scale)), max(1, round(master.height * scale)))
+            resized = master.convert('RGB').resize(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format='PNG')
+        self._write(path, buffer.getvalue())
+        with self._lock:
+            self._derived += 1
+
+    def _write(self, path: str, data: bytes):
+        """Write a render into the cache, pinned for the _ensure() call that made it."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            os.replace(temp_path, path)
+            self._pins[path] = self._pins.get(path, 0) + 1
+        self._evict()
+
+    def _unpin(self, path: str):
+        with self._lock:
+            count = self._pins.pop(path, 0) - 1
+            if count > 0:
+                self._pins[path] = count
+            # Finish an eviction that pinned renders held up
+            retry = self._over_budget and not self._pins
+        if retry:
+            self._evict()
+
+    def _ensure(self, pdf_path: str, page_num: int, dpi: int) -> str:
+        """
+        Path of the cached render, rendering or deriving it if needed.
+
+        The path is pinned so eviction can't remove it before the caller
+        reads it; use _cached(), which unpins it afterwards.
+        """
+        dpi = int(round(dpi))
+        file_hash = self.file_hash(pdf_path)
+        path = self._path(file_hash, page_num, dpi)
+        with self._key_lock(path):
+            with self._lock:
+                if os.path.exists(path):
+                    os.utime(path, None)
+                    self._pins[path] = self._pins.get(path, 0) + 1
+                    self._hits += 1
+                    return path
+            if dpi >= self.master_dpi:
+                self._render(pdf_path, page_num, dpi, path)
+            else:
+                self._derive(pdf_path, page_num, dpi, path)
+        return path
+
+    @contextmanager
+    def _cached(self, pdf_path: str, page_num: int, dpi: int):
+        """Path of the cached render, safe from eviction inside the with block."""
+        path = self._ensure(pdf_path, page_num, dpi)
+        try:
+            yield path
+        finally:
+            self._unpin(path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def render_png(self, pdf_path: str, page_num: int = 0, dpi: int = PREVIEW_DPI) -> bytes:
+        """PNG bytes for one page."""
+        with self._cached(pdf_path, page_num, dpi) as path, open(path, 'rb') as f:
+            return f.read()
+
+    def render_image(self, pdf_path: str, page_num: int = 0, dpi: int = PREVIEW_DPI):
+        """RGB PIL image for one page (a fresh copy the caller may draw on)."""
+        if not PIL_AVAILABLE:
+            raise ImportError("PIL/Pillow is required for image conversion")
+        with self._cached(pdf_path, page_num, dpi) as path, Image.open(path) as img:
+            return img.convert('RGB')
+
+    def save_png(self, pdf_path: str, output_path: str, page_num: int = 0,
+                 dpi: int = PREVIEW_DPI) -> str:
+        """Copy a cached page render to output_path."""
+        with self._cached(pdf_path, page_num, dpi) as path:
+            shutil.copyfile(path, output_path)
+        return output_path
+
+    def prerender(self, pdf_path: str, dpi: int = PREVIEW_DPI, max_workers: int = None,
+                  max_pages: int = None) -> int:
+        """
+        Render every page (up to max_pages) into the cache, masters in a
+        process pool when there are at least two pages per worker.
+
+        Returns the number of pages rendered. Spawning the pool costs over a
+        second, so fewer pages are rendered in-process. Pool workers are
+        spawned rather than forked: this runs inside a threaded server, and a
+        forked child could inherit a lock (_fitz_lock, a job queue's) held by
+        another thread and deadlock. Pages the pool fails to render, for any
+        reason, are rendered in-process.
+        """
+        page_count = self.page_count(pdf_path)
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        file_hash = self.file_hash(pdf_path)
+        master_dpi = max(int(round(dpi)), self.master_dpi)
+        missing = [page for page in range(page_count)
+                   if not os.path.exists(self._path(file_hash, page, master_dpi))]
+
+        workers = max_workers or os.cpu_count() or 1
+        if workers > 1 and len(missing) >= 2 * workers:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            try:
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    list(pool.map(_render_page_file, [pdf_path] * len(missing), missing,
+                                  [master_dpi] * len(missing),
+                                  [self._path(file_hash, page, master_dpi) for page in missing]))
+                with self._lock:
+                    self._renders += len(missing)
+                self._evict()
+            except Exception as e:
+                logger.error(f"Process pool rendering failed, rendering inline: {e}")
+
+        for page in range(page_count):
+            with self._cached(pdf_path, page, dpi):
+                pass
+        return page_count
+
+    def page_count(self, pdf_path: str) -> int:
+        """Number of pages in the PDF."""
+        if not FITZ_AVAILABLE:
+            raise ImportError("PyMuPDF (fitz) is required for PDF conversion")
+        with _fitz_lock:
+            doc = fitz.open(pdf_path)
+            try:
+                return len(doc)
+            finally:
+                doc.close()
+
+    def _evict(self):
+        """Remove least recently used renders until under max_bytes (pinned ones are kept)."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.png'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            # The newest render is kept even if it alone is over max_bytes
+            for _, size, path in sorted(entries)[:-1]:
+                if total <= self.max_bytes:
+                    break
+                if path in self._pins:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self._evictions += 1
+            self._over_budget = total > self.max_bytes
+
+    def stats(self) -> Dict:
+        """Hit and render counters plus cache size."""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.cache_dir) if n.endswith('.png')]
+            except FileNotFoundError:
+                names = []
+            size = 0
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            return {
+                'entries': len(names),
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'renders': self._renders,
+                'derived': self._derived,
+                'evictions': self._evictions,
+            }
+
+
+_rasterizer: Optional[PageRasterizer] = None
+
+
+def get_page_rasterizer() -> PageRasterizer:
+    """Get or create the shared rasterizer configured from RASTER_CACHE_* env vars"""
+    global _rasterizer
+    if _rasterizer is None:
+        _rasterizer = PageRasterizer(
+            os.environ.get('RASTER_CACHE_DIR', os.path.join('data', 'raster_cache')),
+            max_bytes=int(float(os.environ.get('RASTER_CACHE_MAX_MB', '500')) * 1024 * 1024),
+        )
+    return _rasterizer
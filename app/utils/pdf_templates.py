@@ -0,0 +1,203 @@
+"""
+Shared ReportLab styles and page templates for generated PDFs.
+
+Every quote route used to rebuild getSampleStyleSheet(), its custom
+ParagraphStyles and TableStyles on each request (and the floorplan PDF
+mutated the shared Heading1 style in place). They are now built once
+per process:
+
+- get_styles() returns the sample stylesheet extended with the custom
+  paragraph styles used by the quote PDFs (read-only, never mutate it)
+- TABLE_STYLES holds the TableStyles, which ReportLab only reads, so one
+  instance is shared by every table
+- page_decorator() caches the branded footer callback per company_info
+- warm_pdf_templates() builds all of the above and loads the standard
+  font metrics at startup so the first request does not pay for them
+"""
+
+import logging
+from functools import lru_cache
+from typing import Dict, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import SimpleDocTemplate, TableStyle
+
+logger = logging.getLogger(__name__)
+
+BRAND_COLOR = colors.HexColor('#556B2F')
+CRM_COLOR = colors.HexColor('#2196F3')
+
+# Fonts used by the templates (standard Type 1 fonts, metrics loaded once)
+TEMPLATE_FONTS = ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Times-Roman')
+
+TABLE_STYLES = {
+    # Olive header row, beige body, full grid (automation quotes)
+    'quote': TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]),
+    # Right-aligned totals with a bold ruled last row
+    'quote_summary': TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
+        ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
+    ]),
+    # Floorplan components summary with a shaded total row
+    'floorplan_summary': TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f0f0f0')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]),
+    # CRM quote label/value blocks
+    'crm_info': TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]),
+    'crm_customer': TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]),
+    'crm_items': TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), CRM_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]),
+    'crm_pricing': TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (0, -2), 'Helvetica'),
+        ('FONTNAME', (1, 0), (1, -2), 'Helvetica'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('TEXTCOLOR', (0, -1), (-1, -1), CRM_COLOR),
+        ('LINEABOVE', (0, -1), (-1, -1), 2, CRM_COLOR),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]),
+}
+
+
+@lru_cache(maxsize=1)
+def get_styles():
+    """Sample stylesheet plus the custom quote styles, built once."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'QuoteTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=BRAND_COLOR,
+        spaceAfter=30,
+    ))
+    styles.add(ParagraphStyle(
+        'FloorplanTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=20,
+    ))
+    styles.add(ParagraphStyle(
+        'CrmTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=CRM_COLOR,
+        spaceAfter=30,
+        alignment=1
+    ))
+    styles.add(ParagraphStyle(
+        'CrmHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#1976D2'),
+        spaceAfter=12
+    ))
+    styles.add(ParagraphStyle(
+        'PageFooter',
+        parent=styles['Normal'],
+        fontName='Helvetica',
+        fontSize=8,
+        textColor=colors.HexColor('#666666'),
+    ))
+    return styles
+
+
+def _footer_text(company_info: Dict) -> str:
+    parts = [company_info.get(key) for key in ('name', 'phone', 'email', 'address')]
+    return '  |  '.join(str(part) for part in parts if part)
+
+
+@lru_cache(maxsize=32)
+def _cached_decorator(footer_text: str):
+    footer_style = get_styles()['PageFooter']
+
+    def decorate(canvas, doc):
+        """Branded footer rule, company line and page number."""
+        canvas.saveState()
+        width = doc.pagesize[0]
+        y = 0.45 * inch
+        canvas.setStrokeColor(BRAND_COLOR)
+        canvas.setLineWidth(0.5)
+        canvas.line(doc.leftMargin, y + 10, width - doc.rightMargin, y + 10)
+        canvas.setFont(footer_style.fontName, footer_style.fontSize)
+        canvas.setFillColor(footer_style.textColor)
+        if footer_text:
+            canvas.drawString(doc.leftMargin, y, footer_text)
+        canvas.drawRightString(width - doc.rightMargin, y, f"Page {doc.page}")
+        canvas.restoreState()
+
+    return decorate
+
+
+def page_decorator(company_info: Optional[Dict]):
+    """Footer callback for company_info, cached per distinct company details."""
+    return _cached_decorator(_footer_text(company_info or {}))
+
+
+def build_pdf(target, story, company_info: Optional[Dict] = None, pagesize=letter, **doc_kwargs):
+    """
+    Build story into target (a path or file-like object).
+
+    With company_info, every page gets the cached branded footer.
+    """
+    doc = SimpleDocTemplate(target, pagesize=pagesize, **doc_kwargs)
+    if company_info is None:
+        doc.build(story)
+    else:
+        decorate = page_decorator(company_info)
+        doc.build(story, onFirstPage=decorate, onLaterPages=decorate)
+    return doc
+
+
+def warm_pdf_templates():
+    """Build the shared styles and load template font metrics up front."""
+    get_styles()
+    for font_name in TEMPLATE_FONTS:
+        pdfmetrics.getFont(font_name)
+    logger.debug("PDF templates warmed")
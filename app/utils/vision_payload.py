@@ -0,0 +1,361 @@
+"""
+Vision payload preparation for floorplan analysis.
+
+Page renders and uploaded images used to be sent to the model as
+full-size lossless PNGs, producing multi-megabyte requests. This stage:
+
+- downscales to a target long edge (VISION_MAX_LONG_EDGE); the model
+  downsamples larger images anyway, so extra pixels only cost bytes
+- encodes as palette PNG, grayscale PNG or JPEG (VISION_IMAGE_ENCODING,
+  'auto' picks the smaller of palette PNG and JPEG)
+- optionally splits very large sheets into overlapping tiles
+  (VISION_TILING=auto) so small symbols stay legible, and maps tile
+  results back to page-normalized coordinates
+
+Every prepared image reports its encoded size and an estimated image
+token count (width * height / 750).
+"""
+
+import base64
+import io
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+from app.utils.pdf_raster import get_page_rasterizer, PREVIEW_DPI
+
+VISION_MAX_LONG_EDGE = int(os.environ.get('VISION_MAX_LONG_EDGE', '1568'))
+VISION_IMAGE_ENCODING = os.environ.get('VISION_IMAGE_ENCODING', 'auto')
+VISION_JPEG_QUALITY = int(os.environ.get('VISION_JPEG_QUALITY', '85'))
+VISION_TILING = os.environ.get('VISION_TILING', 'off')
+VISION_MAX_TILES = int(os.environ.get('VISION_MAX_TILES', '4'))
+VISION_TILE_OVERLAP = float(os.environ.get('VISION_TILE_OVERLAP', '0.08'))
+
+# Approximate vision token cost per pixel
+PIXELS_PER_TOKEN = 750
+
+# Palette size for quantized PNGs; enough for linework plus markup colors
+PNG_PALETTE_COLORS = 64
+
+# (x0, y0, x1, y1) in page-normalized coordinates
+Box = Tuple[float, float, float, float]
+FULL_PAGE: Box = (0.0, 0.0, 1.0, 1.0)
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Approximate input tokens the model charges for an image."""
+    return int(math.ceil(width * height / PIXELS_PER_TOKEN))
+
+
+def downscale(img, max_long_edge: int = None):
+    """Resize so the long edge is at most max_long_edge (never upscales)."""
+    max_long_edge = max_long_edge or VISION_MAX_LONG_EDGE
+    long_edge = max(img.size)
+    if long_edge <= max_long_edge:
+        return img
+    scale = max_long_edge / long_edge
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS)
+
+
+def encode_image(img, encoding: str = None) -> Tuple[bytes, str]:
+    """Encode an image for the API; returns (bytes, media_type)."""
+    encoding = encoding or VISION_IMAGE_ENCODING
+    rgb = img.convert('RGB')
+
+    def as_png(image):
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue(), 'image/png'
+
+    def as_jpeg():
+        buffer = io.BytesIO()
+        rgb.save(buffer, format='JPEG', quality=VISION_JPEG_QUALITY, optimize=True)
+        return buffer.getvalue(), 'image/jpeg'
+
+    if encoding == 'gray':
+        return as_png(rgb.convert('L'))
+    if encoding == 'jpeg':
+        return as_jpeg()
+    palette = as_png(rgb.quantize(colors=PNG_PALETTE_COLORS))
+    if encoding == 'png':
+        return palette
+    return min(palette, as_jpeg(), key=lambda encoded: len(encoded[0]))
+
+
+def plan_tiles(width: int, height: int, max_long_edge: int = None, max_tiles: int = None,
+               overlap: float = None) -> List[Tuple[Box, Box]]:
+    """
+    Split a page into a grid of overlapping tiles.
+
+    Returns (tile box, core box) pairs in normalized coordinates; the core
+    boxes partition the page and decide which tile owns a detection in an
+    overlap. A page whose long edge is within 2x max_long_edge is one tile.
+    """
+    max_long_edge = max_long_edge or VISION_MAX_LONG_EDGE
+    max_tiles = max_tiles or VISION_MAX_TILES
+    overlap = VISION_TILE_OVERLAP if overlap is None else overlap
+
+    cols = max(1, math.ceil(width / (2 * max_long_edge)))
+    rows = max(1, math.ceil(height / (2 * max_long_edge)))
+    while cols * rows > max_tiles:
+        if cols >= rows and cols > 1:
+            cols -= 1
+        elif rows > 1:
+            rows -= 1
+        else:
+            break
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            core = (col / cols, row / rows, (col + 1) / cols, (row + 1) / rows)
+            tile = (max(0.0, core[0] - overlap / 2), max(0.0, core[1] - overlap / 2),
+                    min(1.0, core[2] + overlap / 2), min(1.0, core[3] + overlap / 2))
+            if cols * rows == 1:
+                tile = core = FULL_PAGE
+            tiles.append((tile, core))
+    return tiles
+
+
+def prepare_images(img, tiling: str = None, max_long_edge: int = None,
+                   encoding: str = None) -> List[Dict]:
+    """
+    Prepare one page image (or its tiles) for the vision API.
+
+    Each entry has data (base64), media_type, box and core (normalized
+    page regions), width, height, bytes and image_tokens.
+    """
+    if not PIL_AVAILABLE:
+        raise ImportError("PIL/Pillow is required for image conversion")
+    tiling = tiling or VISION_TILING
+    max_long_edge = max_long_edge or VISION_MAX_LONG_EDGE
+
+    if tiling == 'auto':
+        tiles = plan_tiles(img.width, img.height, max_long_edge)
+    else:
+        tiles = [(FULL_PAGE, FULL_PAGE)]
+
+    prepared = []
+    for box, core in tiles:
+        crop = img
+        if box != FULL_PAGE:
+            crop = img.crop((round(box[0] * img.width), round(box[1] * img.height),
+                             round(box[2] * img.width), round(box[3] * img.height)))
+        scaled = downscale(crop, max_long_edge)
+        data, media_type = encode_image(scaled, encoding)
+        prepared.append({
+            'data': base64.b64encode(data).decode('utf-8'),
+            'media_type': media_type,
+            'box': box,
+            'core': core,
+            'width': scaled.width,
+            'height': scaled.height,
+            'bytes': len(data),
+            'image_tokens': estimate_image_tokens(scaled.width, scaled.height),
+        })
+    return prepared
+
+
+def prepare_file_images(file_path: str, page_num: int = 0, is_pdf: bool = None,
+                        **kwargs) -> List[Dict]:
+    """prepare_images() for a PDF page (via the render cache) or an image file."""
+    if is_pdf is None:
+        is_pdf = file_path.lower().endswith('.pdf')
+    if is_pdf:
+        img = get_page_rasterizer().render_image(file_path, page_num, dpi=PREVIEW_DPI)
+    else:
+        with Image.open(file_path) as source:
+            img = source.convert('RGB')
+    return prepare_images(img, **kwargs)
+
+
+def tile_prompt(image: Dict, index: int, count: int) -> str:
+    """Prompt addendum telling the model it is looking at one tile."""
+    x0, y0, x1, y1 = image['box']
+    return (f"\n\nNOTE: This image is tile {index + 1} of {count} of a larger sheet, covering "
+            f"x {x0:.2f}-{x1:.2f} and y {y0:.2f}-{y1:.2f} of the full page. Report all "
+            f"coordinates as 0-1 fractions of THIS TILE image; they are mapped back to the "
+            f"page automatically. Neighbouring tiles overlap slightly.")
+
+
+# ----------------------------------------------------------------------
+# Tile result remapping
+# ----------------------------------------------------------------------
+
+def _to_page(box: Box, x, y):
+    """Map tile-normalized x, y to page-normalized coordinates."""
+    x0, y0, x1, y1 = box
+    if isinstance(x, (int, float)):
+        x = x0 + x * (x1 - x0)
+    if isinstance(y, (int, float)):
+        y = y0 + y * (y1 - y0)
+    return x, y
+
+
+def remap_result(result: Dict, box: Box) -> Dict:
+    """Copy of a tile result with coordinates in page-normalized space."""
+    if box == FULL_PAGE:
+        return result
+    result = dict(result)
+
+    components = []
+    for comp in result.get('components', []) or []:
+        comp = dict(comp)
+        location = comp.get('location')
+        if isinstance(location, dict):
+            x, y = _to_page(box, location.get('x'), location.get('y'))
+            comp['location'] = dict(location, x=x, y=y)
+        components.append(comp)
+    result['components'] = components
+
+    rooms = []
+    for room in result.get('rooms', []) or []:
+        room = dict(room)
+        bounds = room.get('visual_boundaries')
+        if isinstance(bounds, dict):
+            x_start, y_start = _to_page(box, bounds.get('x_start'), bounds.get('y_start'))
+            x_end, y_end = _to_page(box, bounds.get('x_end'), bounds.get('y_end'))
+            room['visual_boundaries'] = dict(bounds, x_start=x_start, x_end=x_end,
+                                             y_start=y_start, y_end=y_end)
+        center = room.get('center')
+        if isinstance(center, dict):
+            x, y = _to_page(box, center.get('x'), center.get('y'))
+            room['center'] = dict(center, x=x, y=y)
+        rooms.append(room)
+    result['rooms'] = rooms
+    return result
+
+
+def _in_core(core: Box, location) -> bool:
+    """Whether a page-normalized location falls in a tile's core region."""
+    if not isinstance(location, dict):
+        return True
+    x, y = location.get('x'), location.get('y')
+    if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        return True
+    x0, y0, x1, y1 = core
+    # Cores are half-open except on the page's far edges
+    return (x0 <= x < x1 or (x1 >= 1.0 and x == x1)) and (y0 <= y < y1 or (y1 >= 1.0 and y == y1))
+
+
+def _room_box(room: Dict) -> Optional[Box]:
+    """A room's page-normalized bounds, or None if it has no usable ones."""
+    bounds = room.get('visual_boundaries')
+    if not isinstance(bounds, dict):
+        return None
+    box = tuple(bounds.get(k) for k in ('x_start', 'y_start', 'x_end', 'y_end'))
+    return box if all(isinstance(v, (int, float)) for v in box) else None
+
+
+def _room_point(room: Dict) -> Optional[Tuple[float, float]]:
+    """A room's page-normalized centre, or None."""
+    center = room.get('center')
+    if not isinstance(center, dict):
+        return None
+    x, y = center.get('x'), center.get('y')
+    return (x, y) if isinstance(x, (int, float)) and isinstance(y, (int, float)) else None
+
+
+def _same_room(existing: Dict, room: Dict) -> bool:
+    """Whether two same-named rooms from different tiles overlap (bounds, or centre in bounds)."""
+    a, b = _room_box(existing), _room_box(room)
+    if a and b:
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+    for box, point in ((a, _room_point(room)), (b, _room_point(existing))):
+        if box and point:
+            return box[0] <= point[0] <= box[2] and box[1] <= point[1] <= box[3]
+    # Without bounds, centres must be within one tile overlap of each other
+    p, q = _room_point(existing), _room_point(room)
+    return bool(p and q) and max(abs(p[0] - q[0]), abs(p[1] - q[1])) <= VISION_TILE_OVERLAP
+
+
+def _merge_room(existing: Dict, room: Dict):
+    """Combine a room seen by two tiles: union bounds, keep the higher counts."""
+    a, b = existing.get('visual_boundaries'), room.get('visual_boundaries')
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key, pick in (('x_start', min), ('y_start', min), ('x_end', max), ('y_end', max)):
+            values = [v for v in (a.get(key), b.get(key)) if isinstance(v, (int, float))]
+            if values:
+                a[key] = pick(values)
+        if all(isinstance(a.get(k), (int, float)) for k in ('x_start', 'x_end', 'y_start', 'y_end')):
+            existing['center'] = {'x': (a['x_start'] + a['x_end']) / 2,
+                                  'y': (a['y_start'] + a['y_end']) / 2}
+    for key, value in room.items():
+        current = existing.get(key)
+        if isinstance(value, dict) and isinstance(current, dict) and 'count' in value:
+            if (value.get('count') or 0) > (current.get('count') or 0):
+                existing[key] = dict(value)
+        elif key not in existing:
+            existing[key] = value
+
+
+def merge_tile_results(tile_results: List[Tuple[Dict, Dict]]) -> Dict:
+    """
+    Merge (prepared image, result) pairs for the tiles of one page.
+
+    Coordinates are remapped to the page; components in an overlap are
+    kept only by the tile whose core contains them; same-named rooms from
+    different tiles are merged only where they overlap across the seam.
+    A single full-page image passes through.
+    """
+    if len(tile_results) == 1:
+        image, result = tile_results[0]
+        return remap_result(result, image['box'])
+
+    succeeded = [(image, result) for image, result in tile_results if 'error' not in result]
+    if not succeeded:
+        return tile_results[0][1]
+
+    merged: Dict = {'rooms': [], 'components': [], 'connections': [], 'circuits': []}
+    rooms_by_name: Dict[str, List[Tuple[int, Dict]]] = {}
+    tiles = []
+    for index, (image, result) in enumerate(tile_results):
+        if 'error' in result:
+            tiles.append({'tile': index, 'box': image['box'], 'error': result['error']})
+            continue
+        result = remap_result(result, image['box'])
+        prefix = f"T{index + 1}-" if index else ''
+        kept = set()
+        for comp in result.get('components', []):
+            if not _in_core(image['core'], comp.get('location')):
+                continue
+            comp = dict(comp)
+            if comp.get('id'):
+                kept.add(comp['id'])
+                comp['id'] = f"{prefix}{comp['id']}"
+            merged['components'].append(comp)
+        for conn in result.get('connections', []) or []:
+            if conn.get('from') in kept and conn.get('to') in kept:
+                merged['connections'].append(dict(conn, **{'from': f"{prefix}{conn['from']}",
+                                                           'to': f"{prefix}{conn['to']}"}))
+        for circuit in result.get('circuits', []) or []:
+            members = [c for c in circuit.get('components', []) or [] if c in kept]
+            if members:
+                merged['circuits'].append(dict(circuit, components=[f"{prefix}{c}" for c in members]))
+        for room in result.get('rooms', []):
+            name = str(room.get('name', '')).strip().lower()
+            candidates = rooms_by_name.setdefault(name, []) if name else []
+            match = next((existing for seen, existing in candidates
+                          if seen != index and _same_room(existing, room)), None)
+            if match is not None:
+                _merge_room(match, room)
+            else:
+                room = dict(room)
+                if isinstance(room.get('visual_boundaries'), dict):
+                    room['visual_boundaries'] = dict(room['visual_boundaries'])
+                merged['rooms'].append(room)
+                candidates.append((index, room))
+        for key, value in result.items():
+            if key not in ('rooms', 'components', 'connections', 'circuits'):
+                merged.setdefault(key, value)
+        tiles.append({'tile': index, 'box': image['box']})
+
+    merged['tiles'] = tiles
+    return merged
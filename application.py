@@ -106,8 +106,26 @@ from app.utils import (
     web_search,
     execute_tool,
     SEARCH_TOOL_SCHEMA,
+    get_analysis_cache,
+    get_page_rasterizer,
+    PRINT_DPI,
+    get_markup_renderer,
+    prepare_file_images,
+    tile_prompt,
+    merge_tile_results,
 )
 
+from services.job_queue import job_cancelled
+from services.floorplan_pages import analyze_pages
+from services.pricing_engine import PricingEngine
+
+# Plan sets: pages analyzed at once, and the most pages analyzed per upload
+ANALYSIS_PAGE_CONCURRENCY = int(os.environ.get('ANALYSIS_PAGE_CONCURRENCY', '4'))
+ANALYSIS_MAX_PAGES = int(os.environ.get('ANALYSIS_MAX_PAGES', '30'))
+
+# Model used by the floorplan analysis loops (part of the result cache key)
+ANALYSIS_MODEL = "claude-sonnet-4-20250514"
+
 # Try to import anthropic, but don't fail if not available
 try:
     import anthropic
@@ -248,15 +266,20 @@ DEFAULT_DATA = {
 # DATA MANAGEMENT FUNCTIONS
 # ============================================================================
 
+# Pricing config is read once and recompiled when automation_data.json changes
+pricing_engine = PricingEngine(DATA_FILE, DEFAULT_DATA)
+
 def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    return copy.deepcopy(DEFAULT_DATA)
+    return pricing_engine.config()
 
 def save_data(data):
     with open(DATA_FILE, 'w') as f:
         json.dump(data, f, indent=2)
+    pricing_engine.invalidate()
+
+def get_pricing_tables():
+    """Compiled pricing tables (see services/pricing_engine.py)"""
+    return pricing_engine.tables()
 
 def load_learning_index():
     """Load the learning index that tracks all training examples"""
@@ -637,12 +660,182 @@ def get_session_id():
     """Generate unique session ID"""
     return str(uuid.uuid4())
 
+# ============================================================================
+# SHARED AGENTIC VISION LOOP
+# ============================================================================
+
+def _agentic_vision_loop(client, image, prompt, search_label):
+    """
+    Run one image + prompt through the tool-using analysis loop.
+
+    Returns (result, usage) where usage totals input/output tokens across
+    every model call in the loop.
+    """
+    usage = {'input_tokens': 0, 'output_tokens': 0, 'model_calls': 0}
+
+    # AGENTIC LOOP - AI can search, think, search more, then respond
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": image['media_type'],
+                        "data": image['data'],
+                    },
+                },
+                {
+                    "type": "text",
+                    "text": prompt
+                }
+            ],
+        }
+    ]
+
+    max_iterations = 10  # Prevent infinite loops
+    iteration = 0
+
+    while iteration < max_iterations:
+        if job_cancelled():
+            return {"error": "Analysis cancelled"}, usage
+        iteration += 1
+
+        message = client.messages.create(
+            model=ANALYSIS_MODEL,
+            max_tokens=16000,
+            thinking={
+                "type": "enabled",
+                "budget_tokens": 8000
+            },
+            tools=[SEARCH_TOOL_SCHEMA],  # Give AI access to web search
+            messages=messages
+        )
+        usage['model_calls'] += 1
+        message_usage = getattr(message, 'usage', None)
+        if message_usage is not None:
+            usage['input_tokens'] += getattr(message_usage, 'input_tokens', 0) or 0
+            usage['output_tokens'] += getattr(message_usage, 'output_tokens', 0) or 0
+
+        # Check if AI wants to use tools
+        if message.stop_reason == "tool_use":
+            tool_uses = [block for block in message.content if hasattr(block, 'type') and block.type == "tool_use"]
+
+            # Add AI's message to conversation
+            messages.append({
+                "role": "assistant",
+                "content": message.content
+            })
+
+            # Execute all tool calls
+            tool_results = []
+            for tool_use in tool_uses:
+                print(f"🔍 {search_label}: {tool_use.input.get('query', 'unknown')}")
+
+                result = execute_tool(tool_use.name, tool_use.input)
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": result
+                })
+
+            # Send tool results back to AI
+            messages.append({
+                "role": "user",
+                "content": tool_results
+            })
+
+            # AI will continue thinking with the new information
+            continue
+
+        elif message.stop_reason == "end_turn":
+            # AI is done - extract the final response
+            response_text = ""
+            for block in message.content:
+                if hasattr(block, 'type') and block.type == "text":
+                    response_text = block.text
+                    break
+
+            if not response_text:
+                return {"error": "No text response from AI after tool use"}, usage
+
+            try:
+                start_idx = response_text.find('{')
+                end_idx = response_text.rfind('}') + 1
+                if start_idx != -1 and end_idx > start_idx:
+                    return json.loads(response_text[start_idx:end_idx]), usage
+                else:
+                    return {"error": "No JSON found in response", "raw_response": response_text}, usage
+            except json.JSONDecodeError as e:
+                return {"error": f"JSON parse error: {str(e)}", "raw_response": response_text}, usage
+
+        else:
+            # Unexpected stop reason
+            return {"error": f"Unexpected stop reason: {message.stop_reason}"}, usage
+
+    return {"error": "Max iterations reached in agentic loop"}, usage
+
+def _run_vision_analysis(kind, api_key, images, prompt, use_cache=True, search_label="AI searching"):
+    """
+    Analyze prepared page images (one per tile) and merge tiles back to
+    page coordinates.
+
+    Results are cached by images + prompt + model. The returned result
+    carries request_stats: bytes sent, estimated image tokens and the
+    tokens actually used.
+    """
+    stats = {
+        'images': len(images),
+        'bytes_sent': sum(image['bytes'] for image in images),
+        'image_tokens_estimate': sum(image['image_tokens'] for image in images),
+        'input_tokens': 0,
+        'output_tokens': 0,
+        'model_calls': 0,
+        'cache_hit': False,
+    }
+
+    cache = get_analysis_cache()
+    cache_key = cache.make_key(kind, ''.join(image['data'] for image in images), prompt, ANALYSIS_MODEL)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Analysis cache hit ({kind})")
+            cached['request_stats'] = dict(stats, bytes_sent=0, cache_hit=True)
+            return cached
+    else:
+        cache.record_bypass()
+
+    client = anthropic.Anthropic(api_key=api_key)
+    tile_results = []
+    for index, image in enumerate(images):
+        image_prompt = prompt + (tile_prompt(image, index, len(images)) if len(images) > 1 else "")
+        result, usage = _agentic_vision_loop(client, image, image_prompt, search_label)
+        for key in ('input_tokens', 'output_tokens', 'model_calls'):
+            stats[key] += usage[key]
+        tile_results.append((image, result))
+        if result.get('error') == "Analysis cancelled":
+            break
+
+    result = merge_tile_results(tile_results)
+    if 'error' not in result:
+        cache.put(cache_key, result, tokens=stats['input_tokens'] + stats['output_tokens'])
+    logger.info(f"Vision analysis ({kind}): {stats['images']} image(s), {stats['bytes_sent']} bytes, "
+                f"{stats['input_tokens']} input / {stats['output_tokens']} output tokens")
+    result['request_stats'] = stats
+    return result
+
 # ============================================================================
 # AI ANALYSIS WITH VISION
 # ============================================================================
 
-def analyze_floorplan_with_ai(pdf_path):
-    """Enhanced AI analysis for quoting - uses learning from corrections"""
+def analyze_floorplan_with_ai(pdf_path, use_cache=True, page_num=0):
+    """Enhanced AI analysis for quoting - uses learning from corrections
+
+    Analyzes one page (page_num, 0-indexed). Results are cached by page
+    image + prompt + model; pass use_cache=False to force a fresh analysis
+    (the new result still refreshes the cache).
+    """
     
     if not ANTHROPIC_AVAILABLE:
         return {
@@ -660,9 +853,8 @@ def analyze_floorplan_with_ai(pdf_path):
         }
     
     try:
-        img_base64 = pdf_to_image_base64(pdf_path)
+        images = prepare_file_images(pdf_path, page_num)
         learning_context = get_learning_context()
-        client = anthropic.Anthropic(api_key=api_key)
         
         prompt = f"""You are an AI with VISION analyzing a floor plan image. You can SEE the image - use your eyes!
 
@@ -825,108 +1017,8 @@ CRITICAL REQUIREMENTS:
 
 Use your VISION. Look at the image. See the rooms. Place components where you SEE them or where they SHOULD be based on what you SEE."""
 
-        # AGENTIC LOOP - AI can search, think, search more, then respond
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/png",
-                            "data": img_base64,
-                        },
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ],
-            }
-        ]
-
-        max_iterations = 10  # Prevent infinite loops
-        iteration = 0
-
-        while iteration < max_iterations:
-            iteration += 1
-
-            message = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=16000,
-                thinking={
-                    "type": "enabled",
-                    "budget_tokens": 8000
-                },
-                tools=[SEARCH_TOOL_SCHEMA],  # Give AI access to web search
-                messages=messages
-            )
-
-            # Check if AI wants to use tools
-            if message.stop_reason == "tool_use":
-                # AI wants to search for information
-                tool_uses = [block for block in message.content if hasattr(block, 'type') and block.type == "tool_use"]
-
-                # Add AI's message to conversation
-                messages.append({
-                    "role": "assistant",
-                    "content": message.content
-                })
-
-                # Execute all tool calls
-                tool_results = []
-                for tool_use in tool_uses:
-                    tool_name = tool_use.name
-                    tool_input = tool_use.input
-                    tool_id = tool_use.id
-
-                    print(f"🔍 AI searching: {tool_input.get('query', 'unknown')}")
-
-                    result = execute_tool(tool_name, tool_input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "content": result
-                    })
-
-                # Send tool results back to AI
-                messages.append({
-                    "role": "user",
-                    "content": tool_results
-                })
-
-                # AI will continue thinking with the new information
-                continue
-
-            elif message.stop_reason == "end_turn":
-                # AI is done - extract the final response
-                response_text = ""
-                for block in message.content:
-                    if hasattr(block, 'type') and block.type == "text":
-                        response_text = block.text
-                        break
-
-                if not response_text:
-                    return {"error": "No text response from AI after tool use"}
-
-                try:
-                    start_idx = response_text.find('{')
-                    end_idx = response_text.rfind('}') + 1
-                    if start_idx != -1 and end_idx > start_idx:
-                        json_str = response_text[start_idx:end_idx]
-                        result = json.loads(json_str)
-                        return result
-                    else:
-                        return {"error": "No JSON found in response", "raw_response": response_text}
-                except json.JSONDecodeError as e:
-                    return {"error": f"JSON parse error: {str(e)}", "raw_response": response_text}
-
-            else:
-                # Unexpected stop reason
-                return {"error": f"Unexpected stop reason: {message.stop_reason}"}
-
-        return {"error": "Max iterations reached in agentic loop"}
+        return _run_vision_analysis('quote_analysis', api_key, images, prompt, use_cache,
+                                    search_label="AI searching")
             
     except Exception as e:
         return {"error": str(e), "fallback": True}
@@ -935,8 +1027,12 @@ Use your VISION. Look at the image. See the rooms. Place components where you SE
 # ENHANCED AI MAPPING WITH LEARNING
 # ============================================================================
 
-def ai_map_floorplan(file_path, is_pdf=True):
-    """Enhanced AI with scale detection and accurate component mapping"""
+def ai_map_floorplan(file_path, is_pdf=True, use_cache=True, page_num=0):
+    """Enhanced AI with scale detection and accurate component mapping
+
+    Maps one PDF page (page_num). Results are cached like
+    analyze_floorplan_with_ai; use_cache=False forces a fresh run.
+    """
     
     if not ANTHROPIC_AVAILABLE:
         return {
@@ -952,19 +1048,12 @@ def ai_map_floorplan(file_path, is_pdf=True):
         }
     
     try:
-        # Convert to base64
-        if is_pdf:
-            img_base64 = pdf_to_image_base64(file_path)
-            media_type = "image/png"
-        else:
-            img_base64 = image_to_base64(file_path)
-            media_type = "image/png"
+        # Downscaled (and optionally tiled) page image for the vision model
+        images = prepare_file_images(file_path, page_num, is_pdf=is_pdf)
         
         # Get learning context from past corrections
         learning_context = get_mapping_learning_context()
         
-        client = anthropic.Anthropic(api_key=api_key)
-        
         prompt = f"""You are an autonomous AI agent acting as a licensed professional electrician analyzing a floor plan. You have access to web search to look up ANY codes, standards, or professional knowledge you need in real-time.
 
 {learning_context}
@@ -1182,255 +1271,58 @@ ABSOLUTE REQUIREMENTS:
 
 This electrical plan will be used for actual installation. Accuracy is critical. Search for codes. Think. Verify. Be precise."""
 
-        # AGENTIC LOOP - AI can search codes, verify standards, then analyze
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": media_type,
-                            "data": img_base64,
-                        },
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ],
-            }
-        ]
-
-        max_iterations = 10
-        iteration = 0
-
-        while iteration < max_iterations:
-            iteration += 1
-
-            message = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=16000,
-                thinking={
-                    "type": "enabled",
-                    "budget_tokens": 8000
-                },
-                tools=[SEARCH_TOOL_SCHEMA],  # Give AI access to web search
-                messages=messages
-            )
-
-            # Check if AI wants to use tools
-            if message.stop_reason == "tool_use":
-                # AI wants to search for codes/standards
-                tool_uses = [block for block in message.content if hasattr(block, 'type') and block.type == "tool_use"]
-
-                # Add AI's message to conversation
-                messages.append({
-                    "role": "assistant",
-                    "content": message.content
-                })
-
-                # Execute all tool calls
-                tool_results = []
-                for tool_use in tool_uses:
-                    tool_name = tool_use.name
-                    tool_input = tool_use.input
-                    tool_id = tool_use.id
-
-                    print(f"🔍 AI searching electrical codes: {tool_input.get('query', 'unknown')}")
-
-                    result = execute_tool(tool_name, tool_input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "content": result
-                    })
-
-                # Send tool results back to AI
-                messages.append({
-                    "role": "user",
-                    "content": tool_results
-                })
-
-                # AI will continue with the new knowledge
-                continue
-
-            elif message.stop_reason == "end_turn":
-                # AI is done - extract final response
-                response_text = ""
-                for block in message.content:
-                    if hasattr(block, 'type') and block.type == "text":
-                        response_text = block.text
-                        break
-
-                if not response_text:
-                    return {"error": "No text response from AI after tool use"}
-
-                try:
-                    start_idx = response_text.find('{')
-                    end_idx = response_text.rfind('}') + 1
-                    if start_idx != -1 and end_idx > start_idx:
-                        json_str = response_text[start_idx:end_idx]
-                        result = json.loads(json_str)
-                        return result
-                    else:
-                        return {"error": "No JSON found in response", "raw_response": response_text}
-                except json.JSONDecodeError as e:
-                    return {"error": f"JSON parse error: {str(e)}", "raw_response": response_text}
-
-            else:
-                # Unexpected stop reason
-                return {"error": f"Unexpected stop reason: {message.stop_reason}"}
-
-        return {"error": "Max iterations reached in agentic loop"}
+        return _run_vision_analysis('mapping', api_key, images, prompt, use_cache,
+                                    search_label="AI searching electrical codes")
             
     except Exception as e:
         return {"error": str(e), "traceback": traceback.format_exc()}
 
-def generate_marked_up_image(original_image_path, mapping_data, output_path):
-    """Generate marked-up floor plan with components and connections"""
+# ============================================================================
+# MULTI-PAGE PLAN SETS
+# ============================================================================
+
+def _analyze_all_pages(pdf_path, analyze_page):
+    """Rasterize every page up front, then analyze pages concurrently and merge"""
+    try:
+        page_count = get_page_rasterizer().prerender(pdf_path, max_pages=ANALYSIS_MAX_PAGES)
+    except Exception as e:
+        return {"error": str(e), "fallback": True}
+    return analyze_pages(analyze_page, page_count, max_workers=ANALYSIS_PAGE_CONCURRENCY)
+
+def analyze_floorplan_all_pages(pdf_path, use_cache=True):
+    """Quote analysis across every page of a plan set (see services/floorplan_pages.py)"""
+    return _analyze_all_pages(
+        pdf_path, lambda page_num: analyze_floorplan_with_ai(pdf_path, use_cache, page_num))
+
+def ai_map_floorplan_all_pages(file_path, is_pdf=True, use_cache=True):
+    """AI mapping across every page of a PDF plan set; images have one page"""
+    if not is_pdf:
+        return ai_map_floorplan(file_path, is_pdf, use_cache)
+    return _analyze_all_pages(
+        file_path, lambda page_num: ai_map_floorplan(file_path, is_pdf, use_cache, page_num))
+
+def generate_marked_up_image(original_image_path, mapping_data, output_path, page_num=0):
+    """Generate marked-up floor plan with components and connections
+
+    Only components and connections tagged with page_num are drawn
+    (untagged single-page results count as page 0). The markup is a cached
+    overlay composited onto the cached page raster (see markup_renderer.py).
+    """
     
     try:
+        mapping_data = dict(mapping_data)
+        for key in ('components', 'connections'):
+            mapping_data[key] = [item for item in mapping_data.get(key, [])
+                                 if item.get('page', 0) == page_num]
+        
         if original_image_path.endswith('.pdf'):
-            doc = fitz.open(original_image_path)
-            page = doc[0]
-            # Use 300 DPI for high quality output (300/72 = 4.17x zoom)
-            mat = fitz.Matrix(300/72, 300/72)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            doc.close()
+            # Use 300 DPI for high quality output (shared render cache)
+            img = get_page_rasterizer().render_image(original_image_path, page_num, dpi=PRINT_DPI)
         else:
             img = Image.open(original_image_path)
         
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 20)
-            small_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-        except:
-            font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        width, height = img.size
-        
-        components = mapping_data.get('components', [])
-        component_positions = {}
-        
-        for comp in components:
-            comp_id = comp.get('id', '')
-            label = comp.get('label', comp_id)
-            location = comp.get('location', {})
-            
-            x = int(location.get('x', 0.5) * width)
-            y = int(location.get('y', 0.5) * height)
-            
-            component_positions[comp_id] = (x, y)
-            
-            comp_type = comp.get('type', 'unknown')
-            automation_category = comp.get('automation_category', comp_type)
-
-            # Map automation categories to visual styles
-            if comp_type == 'light' or automation_category == 'lighting':
-                color = '#FFD700'  # Gold for lighting
-                radius = 15
-                symbol = '💡'
-            elif comp_type == 'switch':
-                color = '#4169E1'  # Royal blue for switches
-                radius = 12
-                symbol = '🔘'
-            elif automation_category == 'shading':
-                color = '#8B4513'  # Saddle brown for shading
-                radius = 14
-                symbol = '🪟'
-            elif automation_category == 'security_access' or automation_category == 'security':
-                color = '#DC143C'  # Crimson for security
-                radius = 16
-                symbol = '🔐'
-            elif automation_category == 'climate':
-                color = '#00CED1'  # Dark turquoise for climate
-                radius = 14
-                symbol = '🌡️'
-            elif automation_category == 'audio':
-                color = '#9370DB'  # Medium purple for audio
-                radius = 14
-                symbol = '🔊'
-            elif comp_type == 'outlet':
-                color = '#32CD32'  # Lime green for outlets
-                radius = 12
-                symbol = '⚡'
-            elif comp_type == 'panel':
-                color = '#FF4500'  # Orange red for panels
-                radius = 20
-                symbol = '⚙️'
-            else:
-                color = '#808080'  # Gray for unknown
-                radius = 10
-                symbol = '•'
-            
-            # Draw circle with color
-            draw.ellipse([x-radius, y-radius, x+radius, y+radius],
-                        outline=color, fill=None, width=3)
-
-            # Draw label with emoji for clarity
-            label_text = f"{label}"
-            draw.text((x+radius+5, y-radius), label_text, fill=color, font=font)
-        
-        connections = mapping_data.get('connections', [])
-        for conn in connections:
-            from_id = conn.get('from')
-            to_id = conn.get('to')
-            
-            if from_id in component_positions and to_id in component_positions:
-                from_pos = component_positions[from_id]
-                to_pos = component_positions[to_id]
-                
-                conn_type = conn.get('type', 'power')
-                if conn_type == 'power':
-                    line_color = 'red'
-                    width = 3
-                elif conn_type == 'control':
-                    line_color = 'blue'
-                    width = 2
-                else:
-                    line_color = 'green'
-                    width = 2
-                
-                draw.line([from_pos, to_pos], fill=line_color, width=width)
-                
-                mid_x = (from_pos[0] + to_pos[0]) // 2
-                mid_y = (from_pos[1] + to_pos[1]) // 2
-                circuit = conn.get('circuit', '')
-                if circuit:
-                    draw.text((mid_x, mid_y), str(circuit), fill='purple', font=small_font)
-
-        # Add legend and scale information at bottom for clarity
-        legend_y = height - 140
-        legend_items = [
-            ('💡 Lighting', '#FFD700'),
-            ('🔘 Switch', '#4169E1'),
-            ('🪟 Shading', '#8B4513'),
-            ('🔐 Security', '#DC143C'),
-            ('🌡️ Climate', '#00CED1'),
-            ('🔊 Audio', '#9370DB'),
-        ]
-
-        # Draw semi-transparent background for legend
-        draw.rectangle([10, legend_y-10, 300, height-10], fill='white', outline='black', width=2)
-
-        # Add scale information at top of legend if available
-        scale_info = mapping_data.get('analysis', {}).get('scale', 'not detected')
-        if scale_info and scale_info != 'not detected':
-            draw.text((20, legend_y-5), f"Scale: {scale_info}", fill='black', font=font)
-            legend_y += 20
-
-        # Draw legend items
-        for idx, (text, color) in enumerate(legend_items):
-            y_pos = legend_y + (idx * 18)
-            draw.ellipse([20, y_pos, 30, y_pos+10], outline=color, fill=None, width=2)
-            draw.text((40, y_pos-2), text, fill='black', font=small_font)
-
-        img.save(output_path, 'PNG')
+        marked_up = get_markup_renderer().compose(img, mapping_data)
+        marked_up.save(output_path, 'PNG')
         return True
         
     except Exception as e:
@@ -1758,6 +1650,7 @@ from app import register_blueprints
 app_functions = {
     'load_data': load_data,
     'save_data': save_data,
+    'get_pricing_tables': get_pricing_tables,
     'load_session_data': load_session_data,
     'load_page_config': load_page_config,
     'save_page_config': save_page_config,
@@ -1767,6 +1660,8 @@ app_functions = {
     'import_all_simpro_data': import_all_simpro_data,
     'categorize_with_ai': categorize_with_ai,
     'ai_map_floorplan': ai_map_floorplan,
+    'analyze_floorplan_all_pages': analyze_floorplan_all_pages,
+    'ai_map_floorplan_all_pages': ai_map_floorplan_all_pages,
     'generate_marked_up_image': generate_marked_up_image,
     'load_mapping_learning_index': load_mapping_learning_index,
     'save_mapping_learning_index': save_mapping_learning_index,
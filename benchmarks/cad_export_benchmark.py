@@ -0,0 +1,109 @@
+"""
+CAD export benchmark - export time and file size per format.
+
+Exports synthetic CAD sessions (symbol-heavy electrical layouts with
+wiring and labels) as ASCII DXF, binary DXF, vector PDF and PNG, and
+reports wall time and output size for each. PDF/PNG are timed twice:
+the first render and a repeat export served from the render cache.
+
+Usage:
+    python benchmarks/cad_export_benchmark.py
+    python benchmarks/cad_export_benchmark.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cad_renderer import CadRenderer
+from dxf_exporter import write_dxf
+
+SYMBOLS = {
+    'power-outlet-single': [
+        {'type': 'circle', 'left': -8, 'top': -8, 'radius': 8},
+        {'type': 'line', 'x1': 0, 'y1': -6, 'x2': 0, 'y2': -3},
+        {'type': 'line', 'x1': 0, 'y1': 3, 'x2': 0, 'y2': 6},
+    ],
+    'light-downlight': [
+        {'type': 'circle', 'left': -7, 'top': -7, 'radius': 7},
+        {'type': 'line', 'x1': -5, 'y1': -5, 'x2': 5, 'y2': 5},
+        {'type': 'line', 'x1': -5, 'y1': 5, 'x2': 5, 'y2': -5},
+    ],
+    'switch-single': [
+        {'type': 'circle', 'left': -4, 'top': -4, 'radius': 4},
+        {'type': 'line', 'x1': 3, 'y1': -3, 'x2': 9, 'y2': -9},
+    ],
+}
+
+LAYERS = [
+    {'name': 'WALLS-ARCHITECTURAL', 'color': '#2C3E50'},
+    {'name': 'POWER-WIRING-RED', 'color': '#E74C3C'},
+    {'name': 'DEVICES-SYMBOLS', 'color': '#F39C12'},
+    {'name': 'TEXT-LABELS', 'color': '#34495E'},
+]
+
+
+def make_session(size: int):
+    """CAD session with `size` devices, a wire and a label per device, and room walls."""
+    rng = random.Random(size)
+    side = int(size ** 0.5) + 1
+    objects = []
+    for i in range(0, side, 10):
+        objects.append({'type': 'rect', 'left': i * 60, 'top': i * 60, 'width': 600, 'height': 600,
+                        'layer': 'WALLS-ARCHITECTURAL'})
+    for i in range(size):
+        x, y = (i % side) * 60 + rng.random() * 10, (i // side) * 60 + rng.random() * 10
+        symbol_id = rng.choice(list(SYMBOLS))
+        objects.append({'type': 'group', 'customType': 'symbol', 'symbolId': symbol_id,
+                        'left': x, 'top': y, 'width': 20, 'height': 20, 'angle': rng.choice([0, 0, 90]),
+                        'layer': 'DEVICES-SYMBOLS', 'objects': SYMBOLS[symbol_id]})
+        objects.append({'type': 'line', 'x1': x + 10, 'y1': y + 10, 'x2': x + 70, 'y2': y + 10,
+                        'layer': 'POWER-WIRING-RED'})
+        objects.append({'type': 'text', 'left': x, 'top': y + 24, 'text': f'C{i % 48 + 1}',
+                        'fontSize': 8, 'layer': 'TEXT-LABELS'})
+    return {'canvas_state': {'objects': objects}, 'layers': LAYERS}
+
+
+def timed(fn):
+    """(result, wall time in milliseconds)."""
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def export_dxf(session, binary: bool) -> int:
+    """DXF size in bytes, written to memory the same way the route writes files."""
+    buffer = io.BytesIO() if binary else io.StringIO()
+    write_dxf(session, buffer, binary=binary)
+    return len(buffer.getvalue()) if binary else len(buffer.getvalue().encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--max-edge', type=int, default=4000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        renderer = CadRenderer(tmp, max_edge=args.max_edge)
+
+        print(f"{'devices':>8} {'format':>11} {'ms':>9} {'cached ms':>10} {'size KB':>10}")
+        for size in args.sizes:
+            session = make_session(size)
+            for name, binary in (('dxf ascii', False), ('dxf binary', True)):
+                nbytes, ms = timed(lambda: export_dxf(session, binary))
+                print(f"{size:>8} {name:>11} {ms:>9.1f} {'-':>10} {nbytes / 1024:>10.1f}")
+            for fmt in ('pdf', 'png'):
+                path, ms = timed(lambda: renderer.render(session, fmt))
+                _, cached_ms = timed(lambda: renderer.render(session, fmt))
+                print(f"{size:>8} {fmt:>11} {ms:>9.1f} {cached_ms:>10.1f} {os.path.getsize(path) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
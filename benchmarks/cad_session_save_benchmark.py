@@ -0,0 +1,91 @@
+"""
+CAD session save benchmark - per-save time and bytes written against drawing size.
+
+Compares the old save (the whole session rewritten with indent=2) with a
+patch through CadSessionStore that moves a handful of objects: the op
+log append, and the same patch on a save that also takes a snapshot.
+
+Usage:
+    python benchmarks/cad_session_save_benchmark.py
+    python benchmarks/cad_session_save_benchmark.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cad_session_store import CadSessionStore
+
+
+def make_session(size: int):
+    """Session with `size` objects: symbols with their wiring."""
+    rng = random.Random(size)
+    objects = []
+    for i in range(size):
+        x, y = rng.uniform(0, 5000), rng.uniform(0, 5000)
+        if i % 2:
+            objects.append({'id': f'o{i}', 'type': 'line', 'x1': x, 'y1': y, 'x2': x + 60, 'y2': y,
+                            'layer': 'POWER-WIRING-RED', 'stroke': '#E74C3C', 'strokeWidth': 2})
+        else:
+            objects.append({'id': f'o{i}', 'type': 'group', 'customType': 'symbol', 'symbolId': 'light-downlight',
+                            'left': x, 'top': y, 'width': 20, 'height': 20, 'layer': 'DEVICES-SYMBOLS',
+                            'objects': [{'type': 'circle', 'left': -7, 'top': -7, 'radius': 7}]})
+    return {'session_id': 'bench', 'project_name': 'Benchmark', 'objects': objects,
+            'canvas_state': {'version': '5.3.0', 'objects': objects}}
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--edits', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'full ms':>9} {'full KB':>9} {'patch ms':>9} {'patch KB':>9} {'snapshot ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            session = make_session(size)
+            path = os.path.join(tmp, 'full.json')
+
+            def full_save():
+                with open(path, 'w') as f:
+                    json.dump(session, f, indent=2)
+            full_ms = timed(full_save, args.repeat)
+            full_kb = os.path.getsize(path) / 1024
+
+            store = CadSessionStore(tmp, snapshot_every=10 ** 9)
+            revision = [store.save(json.loads(json.dumps(session)))['revision']]
+            rng = random.Random(0)
+
+            def patch():
+                ops = [{'op': 'update', 'id': f'o{rng.randrange(size)}', 'changes': {'left': rng.uniform(0, 5000)}}
+                       for _ in range(args.edits)]
+                revision[0] = store.patch('bench', revision[0], ops)['revision']
+            patch_ms = timed(patch, args.repeat)
+            patch_kb = os.path.getsize(store.log_path('bench')) / 1024 / args.repeat
+
+            store.snapshot_every = 1
+            snapshot_ms = timed(patch, args.repeat)
+            assert store.load('bench') == CadSessionStore(tmp).load('bench')
+
+            print(f"{size:>8} {full_ms:>9.1f} {full_kb:>9.1f} {patch_ms:>9.2f} {patch_kb:>9.2f} {snapshot_ms:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
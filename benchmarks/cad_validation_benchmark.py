@@ -0,0 +1,86 @@
+"""
+CAD validation benchmark - validation time against drawing size.
+
+Validates synthetic electrical layouts (rows of wired devices with
+earth runs and a switchboard) from scratch, then times the save-loop
+case: one device moved and the drawing revalidated through the session's
+incremental state. Incremental results are checked against a fresh
+validation of the edited drawing.
+
+Usage:
+    python benchmarks/cad_validation_benchmark.py
+    python benchmarks/cad_validation_benchmark.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cad_validation import CadValidator
+
+SYMBOLS = ['power-outlet-double', 'light-downlight', 'light-ceiling', 'exhaust-fan', 'smoke-detector']
+
+
+def make_objects(size: int):
+    """About `size` objects: devices 120px apart, chained per row of 8, one earth run per row."""
+    rng = random.Random(size)
+    side = max(8, int((size / 2) ** 0.5))
+    objects = [{'type': 'group', 'customType': 'symbol', 'symbolId': 'switchboard',
+                'left': -300, 'top': 0, 'width': 60, 'height': 80}]
+    count = 0
+    while len(objects) < size:
+        x, y = (count % side) * 120, (count // side) * 120
+        objects.append({'type': 'group', 'customType': 'symbol', 'symbolId': rng.choice(SYMBOLS),
+                        'left': x, 'top': y, 'width': 20, 'height': 20, 'room': rng.choice(['bedroom', 'kitchen'])})
+        if count % 8:
+            objects.append({'type': 'line', 'x1': x - 110, 'y1': y + 10, 'x2': x, 'y2': y + 10,
+                            'layer': 'POWER-WIRING-RED'})
+        else:
+            objects.append({'type': 'line', 'x1': x, 'y1': y + 15, 'x2': x + 10, 'y2': y + 15,
+                            'layer': 'GROUND-WIRING-GREEN'})
+        count += 1
+    return objects
+
+
+def timed(fn):
+    """(result, wall time in milliseconds)."""
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def codes(result):
+    return sorted(issue['code'] for issue in result['errors'] + result['warnings'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--edits', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'full ms':>10} {'edit ms':>10} {'rechecked':>10} {'issues':>8}")
+    for size in args.sizes:
+        objects = make_objects(size)
+        validator = CadValidator()
+        _, full_ms = timed(lambda: validator.validate({'objects': objects}, 'bench'))
+
+        rng = random.Random(0)
+        edit_ms = []
+        for _ in range(args.edits):
+            obj = objects[rng.randrange(1, len(objects))]
+            obj['left' if 'left' in obj else 'x2'] += rng.uniform(-30, 30)
+            result, ms = timed(lambda: validator.validate({'objects': objects}, 'bench'))
+            edit_ms.append(ms)
+        assert codes(result) == codes(CadValidator().validate({'objects': objects}))
+
+        print(f"{size:>8} {full_ms:>10.1f} {min(edit_ms):>10.1f} {result['objects_revalidated']:>10} "
+              f"{len(result['errors']) + len(result['warnings']):>8}")
+
+
+if __name__ == '__main__':
+    main()
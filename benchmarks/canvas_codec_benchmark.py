@@ -0,0 +1,86 @@
+"""
+Canvas codec benchmark - stored size and encode/decode time against drawing size.
+
+Compares the old storage (JSON with indent=2), compact JSON, compact JSON
+through zlib, and services/canvas_codec.py on a canvas state of symbols
+and wiring, like a CAD session snapshot.
+
+Usage:
+    python benchmarks/canvas_codec_benchmark.py
+    python benchmarks/canvas_codec_benchmark.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.canvas_codec import decode_canvas, encode_canvas
+
+LAYERS = ('POWER-WIRING-RED', 'LIGHTING-WIRING-BLUE', 'GROUND-WIRING-GREEN')
+SYMBOLS = ('light-downlight', 'power-gpo-double', 'switch-1gang', 'data-cat6')
+
+
+def make_canvas(size: int):
+    """Canvas state with `size` objects as the editor saves them."""
+    rng = random.Random(size)
+    objects = []
+    for i in range(size):
+        x, y = round(rng.uniform(0, 5000), 2), round(rng.uniform(0, 5000), 2)
+        if i % 2:
+            layer = rng.choice(LAYERS)
+            objects.append({'id': f'o{i}', 'type': 'line', 'version': '5.3.0', 'originX': 'left', 'originY': 'top',
+                            'left': x, 'top': y, 'x1': x, 'y1': y, 'x2': x + rng.uniform(-300, 300), 'y2': y,
+                            'stroke': '#E74C3C', 'strokeWidth': 2, 'fill': 'rgb(0,0,0)', 'opacity': 1,
+                            'visible': True, 'layer': layer, 'selectable': True})
+        else:
+            objects.append({'id': f'o{i}', 'type': 'group', 'version': '5.3.0', 'originX': 'left',
+                            'originY': 'top', 'left': x, 'top': y, 'width': 20, 'height': 20, 'scaleX': 1,
+                            'scaleY': 1, 'angle': rng.choice((0, 90, 180, 270)), 'opacity': 1, 'visible': True,
+                            'customType': 'symbol', 'symbolId': rng.choice(SYMBOLS), 'layer': 'DEVICES-SYMBOLS',
+                            'objects': [{'type': 'circle', 'left': -7, 'top': -7, 'radius': 7, 'fill': '#ffffff',
+                                         'stroke': '#000000', 'strokeWidth': 1}]})
+    return {'version': '5.3.0', 'background': '#ffffff', 'objects': objects}
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'json KB':>9} {'compact KB':>11} {'zlib KB':>9} {'codec KB':>9} {'ratio':>6} "
+          f"{'json load ms':>13} {'encode ms':>10} {'decode ms':>10}")
+    for size in args.sizes:
+        canvas = make_canvas(size)
+        indented = json.dumps(canvas, indent=2).encode()
+        compact = json.dumps(canvas, separators=(',', ':')).encode()
+        compressed = zlib.compress(compact, 6)
+        encoded = encode_canvas(canvas)
+        assert decode_canvas(encoded) == canvas
+
+        load_ms = timed(lambda: json.loads(indented), args.repeat)
+        encode_ms = timed(lambda: encode_canvas(canvas), args.repeat)
+        decode_ms = timed(lambda: decode_canvas(encoded), args.repeat)
+        print(f"{size:>8} {len(indented) / 1024:>9.1f} {len(compact) / 1024:>11.1f} {len(compressed) / 1024:>9.1f} "
+              f"{len(encoded) / 1024:>9.1f} {len(indented) / len(encoded):>5.1f}x "
+              f"{load_ms:>13.1f} {encode_ms:>10.1f} {decode_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Circuit schedule benchmark - cable and breaker sizing time against circuit count.
+
+Compares the per-circuit path (size_cable scanning every cable size and
+computing voltage drop one by one, then size_circuit_breaker scanning the
+ratings) with the batch path in electrical_calculations.py (sorted tables,
+searchsorted for capacity, broadcast voltage drop), both as raw arrays
+and as full schedule result dicts.
+
+Usage:
+    python benchmarks/circuit_schedule_benchmark.py
+    python benchmarks/circuit_schedule_benchmark.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from electrical_calculations import ElectricalCalculator
+
+
+def make_circuits(size: int):
+    """(design loads, run lengths) for `size` circuits."""
+    rng = random.Random(size)
+    return [rng.uniform(0.5, 120) for _ in range(size)], [rng.uniform(2, 120) for _ in range(size)]
+
+
+def size_loop(calc: ElectricalCalculator, loads, lengths):
+    """The old schedule path: one size_cable and size_circuit_breaker call per circuit."""
+    results = []
+    for load, length in zip(loads, lengths):
+        cable = calc.size_cable(load, length)
+        results.append((cable, calc.size_circuit_breaker(load, cable.get('size', '2.5'))))
+    return results
+
+
+def size_arrays(calc: ElectricalCalculator, loads, lengths):
+    """The batch selection alone, returning arrays."""
+    cables = calc.select_cables(loads, lengths)
+    return calc.select_breakers(loads, cables['max_current'])
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    calc = ElectricalCalculator()
+    print(f"{'circuits':>10} {'loop ms':>10} {'arrays ms':>10} {'dicts ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        loads, lengths = make_circuits(size)
+        assert size_loop(calc, loads, lengths) == calc.size_circuits(loads, lengths)
+
+        loop_ms = timed(lambda: size_loop(calc, loads, lengths), args.repeat)
+        array_ms = timed(lambda: size_arrays(calc, loads, lengths), args.repeat)
+        dict_ms = timed(lambda: calc.size_circuits(loads, lengths), args.repeat)
+        print(f"{size:>10} {loop_ms:>10.2f} {array_ms:>10.2f} {dict_ms:>10.2f} {loop_ms / dict_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
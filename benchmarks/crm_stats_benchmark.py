@@ -0,0 +1,139 @@
+"""
+CRM stats benchmark - request time against table size.
+
+Compares the old stats path (load every customer/project/quote/job/item
+through the repositories, then count and sum in Python) with the single
+aggregate query in services/crm_stats.py.
+
+Usage:
+    python benchmarks/crm_stats_benchmark.py
+    python benchmarks/crm_stats_benchmark.py --sizes 1000 10000 50000
+    python benchmarks/crm_stats_benchmark.py --database-url postgresql://...
+
+Without --database-url the benchmark runs on in-memory SQLite, which is
+enough to show the scaling difference; use a scratch PostgreSQL database
+for absolute numbers. Rows are inserted under a throwaway organization.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import Base
+from database import models
+from services.crm_repository import CRMRepository
+from services.crm_stats import CRMStatsService
+from services.inventory_repository import InventoryRepository
+
+TABLES = [models.Organization, models.Customer, models.Project, models.Job, models.Technician,
+          models.Quote, models.QuoteLineItem, models.InventoryItem, models.KanbanTask,
+          models.CalendarEvent, models.EventLog]
+
+
+@compiles(JSONB, 'sqlite')
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+def seed(session, org_id: str, size: int):
+    """Insert `size` customers and proportional projects, quotes, jobs and items."""
+    rng = random.Random(size)
+    now = datetime.utcnow()
+    session.bulk_insert_mappings(models.Customer, [
+        {'id': str(uuid.uuid4()), 'organization_id': org_id, 'name': f'Customer {i}',
+         'is_active': rng.random() > 0.1, 'created_at': now}
+        for i in range(size)
+    ])
+    session.bulk_insert_mappings(models.Project, [
+        {'id': str(uuid.uuid4()), 'organization_id': org_id, 'name': f'Project {i}',
+         'status': rng.choice(['pending', 'in_progress', 'completed', 'on_hold']),
+         'estimated_value': rng.uniform(1000, 50000), 'actual_value': rng.uniform(0, 50000),
+         'created_at': now}
+        for i in range(size)
+    ])
+    session.bulk_insert_mappings(models.Quote, [
+        {'id': str(uuid.uuid4()), 'organization_id': org_id, 'title': f'Quote {i}',
+         'status': rng.choice(['draft', 'sent', 'accepted', 'rejected']),
+         'total_amount': rng.uniform(500, 20000), 'created_at': now}
+        for i in range(size * 2)
+    ])
+    session.bulk_insert_mappings(models.Job, [
+        {'id': str(uuid.uuid4()), 'organization_id': org_id, 'title': f'Job {i}',
+         'status': rng.choice(['pending', 'in_progress', 'completed']), 'created_at': now}
+        for i in range(size)
+    ])
+    session.bulk_insert_mappings(models.InventoryItem, [
+        {'id': str(uuid.uuid4()), 'organization_id': org_id, 'name': f'Item {i}',
+         'quantity': rng.randint(0, 100), 'reorder_level': 5, 'is_active': True,
+         'unit_price': rng.uniform(1, 200), 'cost_price': rng.uniform(1, 150), 'created_at': now}
+        for i in range(size // 2)
+    ])
+    session.commit()
+
+
+def load_all_stats(session, org_id: str) -> dict:
+    """The old CRMDatabaseLayer.get_stats: materialize every row, aggregate in Python."""
+    crm = CRMRepository(session, org_id)
+    inventory = InventoryRepository(session, org_id)
+    customers = crm.list_customers()
+    projects = crm.list_projects()
+    quotes = crm.list_quotes()
+    jobs = crm.list_jobs()
+    items = inventory.list_items()
+    return {
+        'customers': len(customers),
+        'projects': len([p for p in projects if p.get('status') == 'in_progress']),
+        'quotes': sum(q.get('total_amount', 0) for q in quotes if q.get('status') == 'accepted'),
+        'jobs': len(jobs),
+        'stock': len([i for i in items if i.get('quantity', 0) <= i.get('reorder_level', 5)]),
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    print(f"{'customers':>10} {'load-all ms':>12} {'aggregate ms':>13} {'speedup':>8}")
+    for size in args.sizes:
+        engine = create_engine(args.database_url or 'sqlite://')
+        Base.metadata.create_all(engine, tables=[m.__table__ for m in TABLES])
+        session = sessionmaker(bind=engine)()
+        org_id = str(uuid.uuid4())
+        session.add(models.Organization(id=org_id, name='Benchmark', slug=f'bench-{org_id[:8]}'))
+        seed(session, org_id, size)
+
+        stats = CRMStatsService(session, org_id)
+        old_ms = timed(lambda: (load_all_stats(session, org_id), session.expunge_all()), args.repeat)
+        new_ms = timed(stats.dashboard_stats, args.repeat)
+        print(f"{size:>10} {old_ms:>12.1f} {new_ms:>13.1f} {old_ms / new_ms:>7.1f}x")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Floorplan pyramid benchmark - bytes and decode time per rendition against page size.
+
+Builds the pyramid of a synthetic floorplan raster (a 300 DPI render is
+about 3500x2500 for A4, 9900x7000 for A1) and compares what a viewer
+downloads and decodes for the full PNG against the medium and thumbnail
+renditions.
+
+Usage:
+    python benchmarks/floorplan_pyramid_benchmark.py
+    python benchmarks/floorplan_pyramid_benchmark.py --sizes 2480 4960 9920
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from services.floorplan_pyramid import FloorplanPyramids
+
+
+def make_floorplan(path: str, width: int):
+    """Scanned-looking plan (paper grain, shaded rooms, walls) with an A-series aspect ratio."""
+    height = int(width / 1.414)
+    rng = random.Random(width)
+    grain = Image.effect_noise((width, height), 12).convert('RGB')
+    image = Image.blend(Image.new('RGB', (width, height), 'white'), grain, 0.15)
+    draw = ImageDraw.Draw(image)
+    for _ in range(width // 100):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.rectangle([x, y, x + rng.randrange(100, 600), y + rng.randrange(100, 600)],
+                       fill=(rng.randrange(200, 250),) * 3, outline=(30, 30, 30), width=4)
+    for _ in range(width // 4):
+        x, y = rng.randrange(width), rng.randrange(height)
+        if rng.random() < 0.5:
+            draw.line([x, y, min(width, x + rng.randrange(400)), y], fill=(30, 30, 30), width=3)
+        else:
+            draw.line([x, y, x, min(height, y + rng.randrange(400))], fill=(30, 30, 30), width=3)
+    image.save(path)
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def decode(path: str):
+    with Image.open(path) as image:
+        image.load()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2480, 4960, 9920])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'width':>6} {'build ms':>9} {'full KB':>9} {'full ms':>8} {'medium KB':>10} {'medium ms':>10} "
+          f"{'thumb KB':>9} {'thumb ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width in args.sizes:
+            source = os.path.join(tmp, f'plan_{width}.png')
+            make_floorplan(source, width)
+            builder = FloorplanPyramids(os.path.join(tmp, f'pyramids_{width}'))
+
+            start = time.perf_counter()
+            manifest = builder.build(source)
+            build_ms = (time.perf_counter() - start) * 1000
+            assert builder.build(source) == manifest and builder.builds == 1
+
+            directory = builder.directory(manifest['id'])
+            row = [f"{width:>6}", f"{build_ms:>9.0f}"]
+            for level, widths in (('full', (9, 8)), ('medium', (10, 10)), ('thumbnail', (9, 9))):
+                path = os.path.join(directory, manifest['levels'][level]['file'])
+                row.append(f"{os.path.getsize(path) / 1024:>{widths[0]}.0f}")
+                row.append(f"{timed(lambda: decode(path), args.repeat):>{widths[1]}.1f}")
+            print(' '.join(row))
+
+
+if __name__ == '__main__':
+    main()
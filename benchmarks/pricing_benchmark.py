@@ -0,0 +1,120 @@
+"""
+Pricing benchmark - takeoffs pricing time against symbol count.
+
+Compares the old per-request path (re-read automation_data.json through
+load_data(), then price each symbol in a Python loop) with the compiled
+tables in services/pricing_engine.py (config cached, catalog priced once
+per tier with NumPy, one lookup per symbol).
+
+Usage:
+    python benchmarks/pricing_benchmark.py
+    python benchmarks/pricing_benchmark.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pricing_engine import PricingEngine
+
+CONFIG = {
+    'automation_types': {
+        key: {'name': key.replace('_', ' ').title(),
+              'base_cost_per_unit': {'basic': base, 'premium': base * 1.6, 'deluxe': base * 2.5},
+              'labor_hours': {'basic': hours, 'premium': hours * 1.4, 'deluxe': hours * 1.8}}
+        for key, base, hours in [('lighting', 150.0, 2.0), ('shading', 300.0, 3.0),
+                                 ('security_access', 500.0, 4.5), ('climate', 400.0, 5.0),
+                                 ('audio', 350.0, 3.5)]
+    },
+    'labor_rate': 75.0,
+    'markup_percentage': 20.0,
+}
+
+
+def make_symbols(size: int):
+    """`size` takeoffs symbols, some unpriced and a few with custom items."""
+    rng = random.Random(size)
+    keys = list(CONFIG['automation_types']) + ['unknown']
+    symbols = []
+    for i in range(size):
+        symbol = {'id': f'S{i}', 'automation_category': rng.choice(keys),
+                  'room': f'Room {i % 40}', 'x': rng.random(), 'y': rng.random()}
+        if i % 20 == 0:
+            symbol['items'] = [{'name': 'Cable', 'price': 4.5, 'quantity': rng.randint(1, 10)}]
+        symbols.append(symbol)
+    return symbols
+
+
+def price_loop(data_file: str, symbols, tier: str):
+    """The old takeoffs path: load_data() from disk, then a per-symbol loop."""
+    with open(data_file, 'r') as f:
+        data_config = json.load(f)
+    cost_items = []
+    for symbol in symbols:
+        automation_key = symbol.get('automation_category') or symbol.get('type')
+        if automation_key in data_config.get('automation_types', {}):
+            automation_config = data_config['automation_types'][automation_key]
+            unit_cost = automation_config.get('base_cost_per_unit', {}).get(tier, 0)
+            labor_hours = automation_config.get('labor_hours', {}).get(tier, 0)
+            labor_cost = labor_hours * data_config.get('labor_rate', 75)
+            cost_items.append({'type': automation_config.get('name', automation_key), 'quantity': 1,
+                               'unit_cost': unit_cost, 'labor_cost': labor_cost,
+                               'total': unit_cost + labor_cost, 'room': symbol.get('room', 'Unassigned')})
+        for item in symbol.get('items') or []:
+            price = item.get('price', 0)
+            quantity = item.get('quantity', 1)
+            cost_items.append({'type': item.get('name', 'Custom Item'), 'quantity': quantity,
+                               'unit_cost': price, 'labor_cost': 0, 'total': price * quantity,
+                               'room': symbol.get('room', 'Unassigned')})
+    return sum(item['total'] for item in cost_items)
+
+
+def price_engine(engine: PricingEngine, symbols, tier: str):
+    """The compiled path: cached tables, one vectorized pass."""
+    pricing = engine.tables()
+    items, _ = pricing.price_symbols(symbols, tier)
+    return pricing.totals(items)[0]
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'automation_data.json')
+        with open(data_file, 'w') as f:
+            json.dump(CONFIG, f, indent=2)
+        engine = PricingEngine(data_file)
+
+        print(f"{'symbols':>10} {'loop ms':>10} {'engine ms':>10} {'speedup':>8}")
+        for size in args.sizes:
+            symbols = make_symbols(size)
+            old_total = price_loop(data_file, symbols, 'premium')
+            new_total = price_engine(engine, symbols, 'premium')
+            assert abs(old_total - new_total) < 1e-6 * max(1.0, old_total), (old_total, new_total)
+
+            old_ms = timed(lambda: price_loop(data_file, symbols, 'premium'), args.repeat)
+            new_ms = timed(lambda: price_engine(engine, symbols, 'premium'), args.repeat)
+            print(f"{size:>10} {old_ms:>10.2f} {new_ms:>10.2f} {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,15 @@ CRM Data Layer - Robust data operations with validation, integrity, and paginati
 Provides a clean interface for all CRM data operations
 """
 import os
-import json
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable
 import logging
 import threading
 import re
 
+from crm_storage import JSONFileStorage, get_storage_engine
+
 logger = logging.getLogger(__name__)
 
 # File lock for thread-safe operations
@@ -23,6 +24,204 @@ def get_file_lock(filepath: str) -> threading.Lock:
     return _file_locks[filepath]
 
 
+class JSONFileCache:
+    """
+    Process-wide cache of parsed JSON files.
+
+    Entries are keyed by absolute path and validated against the
+    (mtime, size, inode) signature of the file and any companion files it
+    depends on (e.g. a write-ahead log), so edits made by another worker or
+    by hand are picked up the next time the file is loaded.
+    Cached objects are shared - callers must copy records before mutating them.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _signature(paths: Tuple[str, ...]) -> Optional[Tuple]:
+        """Return the (mtime_ns, size, inode) signatures of files, or None if none exist"""
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        return tuple(signature) if any(signature) else None
+
+    def get(self, filepath: str, watch: Tuple[str, ...] = ()) -> Tuple[bool, Any]:
+        """Return (hit, data) for a file, dropping the entry if it or a watched file changed"""
+        key = os.path.abspath(filepath)
+        signature = self._signature((key,) + tuple(watch))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and signature is not None and entry[0] == signature:
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, filepath: str, data: Any, watch: Tuple[str, ...] = ()) -> None:
+        """Store parsed data for a file under its current signature"""
+        key = os.path.abspath(filepath)
+        signature = self._signature((key,) + tuple(watch))
+        if signature is None:
+            return
+        with self._lock:
+            self._entries[key] = (signature, data)
+
+    def invalidate(self, filepath: str = None) -> None:
+        """Drop one cached file, or every entry when no path is given"""
+        with self._lock:
+            if filepath is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(os.path.abspath(filepath), None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_json_cache = JSONFileCache()
+
+def get_json_cache() -> JSONFileCache:
+    """Get the process-wide JSON file cache"""
+    return _json_cache
+
+
+def _field_key(field: str) -> Callable[[Dict], Any]:
+    """Build an index key function that reads a scalar field from a record"""
+    def key(record: Dict) -> Any:
+        value = record.get(field)
+        return value if isinstance(value, (str, int, float)) else None
+    return key
+
+
+def _email_key(record: Dict) -> Optional[str]:
+    """Index key for case-insensitive email lookups"""
+    email = record.get('email')
+    return email.lower() if isinstance(email, str) and email else None
+
+
+class RecordIndex:
+    """
+    Dict indexes over one collection of records.
+
+    - Primary: id -> record, insertion ordered so records() keeps file order
+    - Secondary: key name -> value -> ordered set of ids (customer_id, status, ...)
+
+    Indexes are updated in place by put()/remove(), so single-record
+    operations never rescan the collection. Records whose id is missing or
+    already taken are kept aside in ``shadowed`` so a save never drops them
+    and check_data_integrity() can still report them.
+    """
+
+    def __init__(self, records: List[Dict], keys: Dict[str, Callable[[Dict], Any]] = None):
+        self.keys = keys or {}
+        self.by_id: Dict[str, Dict] = {}
+        self.secondary: Dict[str, Dict[Any, Dict[str, None]]] = {name: {} for name in self.keys}
+        self.shadowed: List[Dict] = []
+        for record in records:
+            record_id = record.get('id') if isinstance(record, dict) else None
+            if record_id is None or record_id in self.by_id:
+                self.shadowed.append(record)
+            else:
+                self.put(record)
+
+    def __len__(self) -> int:
+        return len(self.by_id) + len(self.shadowed)
+
+    def __contains__(self, record_id: Any) -> bool:
+        return record_id in self.by_id
+
+    def get(self, record_id: Any) -> Optional[Dict]:
+        """Get a record by id"""
+        if record_id is None:
+            return None
+        return self.by_id.get(record_id)
+
+    def records(self) -> List[Dict]:
+        """Snapshot of all records in file order"""
+        records = list(self.by_id.values())
+        if self.shadowed:
+            records.extend(self.shadowed)
+        return records
+
+    def ids_for(self, key: str, value: Any) -> List[str]:
+        """Snapshot of ids whose secondary key equals value"""
+        return list(self.secondary[key].get(value, ()))
+
+    def records_for(self, key: str, *values: Any) -> List[Dict]:
+        """Records whose secondary key matches any of the given values"""
+        by_id = self.by_id
+        records = []
+        for value in values:
+            for record_id in self.ids_for(key, value):
+                record = by_id.get(record_id)
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def count(self, key: str, *values: Any) -> int:
+        """Count records whose secondary key matches any of the given values"""
+        buckets = self.secondary[key]
+        return sum(len(buckets.get(value, ())) for value in values)
+
+    def duplicate_ids(self) -> List[str]:
+        """Ids that appear on more than one record"""
+        return list({r['id'] for r in self.shadowed if isinstance(r, dict) and r.get('id') is not None})
+
+    def put(self, record: Dict) -> None:
+        """Insert or replace a record, keeping secondary indexes in step"""
+        record_id = record['id']
+        previous = self.by_id.get(record_id)
+        if previous is not None:
+            self._unlink(previous)
+        self.by_id[record_id] = record
+        self._link(record)
+
+    def remove(self, record_id: Any) -> Optional[Dict]:
+        """Remove a record by id and return it"""
+        record = self.by_id.pop(record_id, None)
+        if record is not None:
+            self._unlink(record)
+        return record
+
+    def _link(self, record: Dict) -> None:
+        for name, key in self.keys.items():
+            value = key(record)
+            if value is not None:
+                self.secondary[name].setdefault(value, {})[record['id']] = None
+
+    def _unlink(self, record: Dict) -> None:
+        for name, key in self.keys.items():
+            value = key(record)
+            bucket = self.secondary[name].get(value)
+            if bucket is not None:
+                bucket.pop(record['id'], None)
+                if not bucket:
+                    del self.secondary[name][value]
+
+
 class CRMDataLayer:
     """
     Centralized data layer for CRM operations with:
@@ -33,62 +232,131 @@ class CRMDataLayer:
     - Data integrity
     """
     
-    def __init__(self, data_folder: str):
+    def __init__(self, data_folder: str, storage: JSONFileStorage = None):
         self.data_folder = data_folder
+        self.storage = storage or JSONFileStorage()
         self.customers_file = os.path.join(data_folder, 'customers.json')
         self.projects_file = os.path.join(data_folder, 'projects.json')
         self.quotes_file = os.path.join(data_folder, 'quotes.json')
         self.stock_file = os.path.join(data_folder, 'stock.json')
         
+        # Secondary index keys per collection (the id index is always built)
+        self._index_keys = {
+            self.customers_file: {'status': _field_key('status'), 'email': _email_key},
+            self.projects_file: {'customer_id': _field_key('customer_id'), 'status': _field_key('status')},
+            self.quotes_file: {'customer_id': _field_key('customer_id'), 'status': _field_key('status')},
+            self.stock_file: {'category': _field_key('category')},
+        }
+        
         # Ensure data folder exists
         os.makedirs(data_folder, exist_ok=True)
     
     # ==================== FILE OPERATIONS ====================
     
+    def _watch(self, filepath: str) -> Tuple[str, ...]:
+        """Companion files the storage engine keeps next to a collection file"""
+        return self.storage.paths(filepath)[1:]
+    
+    def _load_index_locked(self, filepath: str) -> RecordIndex:
+        """Get the cached index for a collection file (caller holds the lock)"""
+        hit, cached = _json_cache.get(filepath, self._watch(filepath))
+        if hit:
+            return cached
+        try:
+            records = self.storage.load(filepath)
+        except Exception as e:
+            logger.error(f"Error loading {filepath}: {e}")
+            records = []
+        index = RecordIndex(records, self._index_keys.get(filepath))
+        _json_cache.put(filepath, index, self._watch(filepath))
+        return index
+    
+    def _load_index(self, filepath: str) -> RecordIndex:
+        """
+        Get the shared index for a collection file.
+
+        Served from the process-wide cache until the file changes on disk.
+        The index and its records are shared - use _put_records() and
+        _delete_records() to change them, never mutate them in place.
+        """
+        lock = get_file_lock(filepath)
+        with lock:
+            return self._load_index_locked(filepath)
+    
     def _load_json(self, filepath: str, default: Any = None) -> Any:
         """Thread-safe JSON file loading with error handling"""
         if default is None:
             default = []
         
-        lock = get_file_lock(filepath)
-        with lock:
-            try:
-                if os.path.exists(filepath):
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read().strip()
-                        if not content:
-                            return default
-                        return json.loads(content)
-                return default
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error in {filepath}: {e}")
-                # Backup corrupted file
-                if os.path.exists(filepath):
-                    backup_path = f"{filepath}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    os.rename(filepath, backup_path)
-                    logger.warning(f"Corrupted file backed up to {backup_path}")
-                return default
-            except Exception as e:
-                logger.error(f"Error loading {filepath}: {e}")
-                return default
+        records = self._load_index(filepath).records()
+        return records if records else default
+    
+    def _write_index_locked(self, filepath: str, index: RecordIndex, ops: List = None) -> bool:
+        """
+        Persist an index through the storage engine and cache it (caller holds the lock).
+
+        With ops, only those mutations are handed to the engine - the log engine
+        appends them, the file engine rewrites the collection. Without ops the
+        whole collection is written.
+        """
+        try:
+            if ops is None:
+                self.storage.save(filepath, index.records())
+            else:
+                self.storage.apply(filepath, ops, index.records)
+            # Write-through so the next read doesn't re-parse what we just wrote
+            _json_cache.put(filepath, index, self._watch(filepath))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving {filepath}: {e}")
+            # The in-memory index may be ahead of the file now - reload next time
+            _json_cache.invalidate(filepath)
+            return False
     
     def _save_json(self, filepath: str, data: Any) -> bool:
         """Thread-safe JSON file saving with atomic write"""
         lock = get_file_lock(filepath)
         with lock:
-            try:
-                # Write to temp file first, then rename (atomic operation)
-                temp_path = f"{filepath}.tmp"
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
-                os.replace(temp_path, filepath)
-                return True
-            except Exception as e:
-                logger.error(f"Error saving {filepath}: {e}")
-                # Clean up temp file if it exists
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                return False
+            return self._write_index_locked(filepath, RecordIndex(data, self._index_keys.get(filepath)))
+    
+    def _put_records(self, filepath: str, records: List[Dict]) -> bool:
+        """Insert or replace records by id, updating indexes incrementally"""
+        lock = get_file_lock(filepath)
+        with lock:
+            index = self._load_index_locked(filepath)
+            for record in records:
+                index.put(record)
+            return self._write_index_locked(filepath, index, [('put', r) for r in records])
+    
+    def _delete_records(self, filepath: str, record_ids: List[str]) -> bool:
+        """Remove records by id, updating indexes incrementally"""
+        lock = get_file_lock(filepath)
+        with lock:
+            index = self._load_index_locked(filepath)
+            for record_id in record_ids:
+                index.remove(record_id)
+            return self._write_index_locked(filepath, index, [('delete', i) for i in record_ids])
+    
+    def compact_storage(self) -> Dict:
+        """Fold any pending write-ahead log entries into the collection files"""
+        compacted = {}
+        for filepath in self._index_keys:
+            lock = get_file_lock(filepath)
+            with lock:
+                index = self._load_index_locked(filepath)
+                try:
+                    self.storage.compact(filepath, index.records())
+                    _json_cache.put(filepath, index, self._watch(filepath))
+                    compacted[os.path.basename(filepath)] = len(index)
+                except Exception as e:
+                    logger.error(f"Error compacting {filepath}: {e}")
+                    _json_cache.invalidate(filepath)
+                    return {'success': False, 'error': f"Failed to compact {os.path.basename(filepath)}"}
+        return {'success': True, 'engine': self.storage.name, 'compacted': compacted}
+    
+    def get_cache_stats(self) -> Dict:
+        """Get JSON cache hit/miss statistics"""
+        return {'success': True, 'cache': _json_cache.stats()}
     
     # ==================== VALIDATION ====================
     
@@ -217,11 +485,10 @@ class CRMDataLayer:
                       sort_by: str = 'created_at',
                       sort_order: str = 'desc') -> Dict:
         """Get customers with filtering, pagination, and search"""
-        customers = self._load_json(self.customers_file, [])
+        index = self._load_index(self.customers_file)
         
         # Filter by status
-        if status:
-            customers = [c for c in customers if c.get('status') == status]
+        customers = index.records_for('status', status) if status else index.records()
         
         # Search
         if search:
@@ -255,18 +522,14 @@ class CRMDataLayer:
     
     def get_customer(self, customer_id: str) -> Dict:
         """Get a single customer with related data"""
-        customers = self._load_json(self.customers_file, [])
-        customer = next((c for c in customers if c['id'] == customer_id), None)
+        customer = self._load_index(self.customers_file).get(customer_id)
         
         if not customer:
             return {'success': False, 'error': 'Customer not found'}
         
         # Get related projects and quotes
-        projects = self._load_json(self.projects_file, [])
-        quotes = self._load_json(self.quotes_file, [])
-        
-        customer_projects = [p for p in projects if p.get('customer_id') == customer_id]
-        customer_quotes = [q for q in quotes if q.get('customer_id') == customer_id]
+        customer_projects = self._load_index(self.projects_file).records_for('customer_id', customer_id)
+        customer_quotes = self._load_index(self.quotes_file).records_for('customer_id', customer_id)
         
         return {
             'success': True,
@@ -287,13 +550,12 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        customers = self._load_json(self.customers_file, [])
+        customers = self._load_index(self.customers_file)
         
         # Check for duplicate email
         email = data.get('email', '').strip()
         if email:
-            existing = next((c for c in customers if c.get('email', '').lower() == email.lower()), None)
-            if existing:
+            if customers.ids_for('email', email.lower()):
                 return {'success': False, 'error': 'A customer with this email already exists'}
         
         customer = {
@@ -310,9 +572,7 @@ class CRMDataLayer:
             'updated_at': datetime.now().isoformat()
         }
         
-        customers.append(customer)
-        
-        if self._save_json(self.customers_file, customers):
+        if self._put_records(self.customers_file, [customer]):
             return {'success': True, 'customer': customer}
         return {'success': False, 'error': 'Failed to save customer'}
     
@@ -322,46 +582,40 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        customers = self._load_json(self.customers_file, [])
-        idx = next((i for i, c in enumerate(customers) if c['id'] == customer_id), None)
+        customers = self._load_index(self.customers_file)
+        existing = customers.get(customer_id)
         
-        if idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Customer not found'}
         
         # Check for duplicate email (excluding current customer)
         email = data.get('email', '').strip()
         if email:
-            existing = next((c for c in customers if c.get('email', '').lower() == email.lower() and c['id'] != customer_id), None)
-            if existing:
+            if any(i != customer_id for i in customers.ids_for('email', email.lower())):
                 return {'success': False, 'error': 'Another customer with this email already exists'}
         
-        customer = customers[idx]
+        customer = dict(existing)
         updatable_fields = ['name', 'email', 'phone', 'address', 'company', 'notes', 'status', 'tags']
         for field in updatable_fields:
             if field in data:
                 customer[field] = data[field].strip() if isinstance(data[field], str) else data[field]
         
         customer['updated_at'] = datetime.now().isoformat()
-        customers[idx] = customer
         
-        if self._save_json(self.customers_file, customers):
+        if self._put_records(self.customers_file, [customer]):
             return {'success': True, 'customer': customer}
         return {'success': False, 'error': 'Failed to save customer'}
     
     def delete_customer(self, customer_id: str, cascade: bool = False) -> Dict:
         """Delete a customer with optional cascade"""
-        customers = self._load_json(self.customers_file, [])
-        idx = next((i for i, c in enumerate(customers) if c['id'] == customer_id), None)
+        customer = self._load_index(self.customers_file).get(customer_id)
         
-        if idx is None:
+        if customer is None:
             return {'success': False, 'error': 'Customer not found'}
         
         # Check for related records
-        projects = self._load_json(self.projects_file, [])
-        quotes = self._load_json(self.quotes_file, [])
-        
-        related_projects = [p for p in projects if p.get('customer_id') == customer_id]
-        related_quotes = [q for q in quotes if q.get('customer_id') == customer_id]
+        related_projects = self._load_index(self.projects_file).records_for('customer_id', customer_id)
+        related_quotes = self._load_index(self.quotes_file).records_for('customer_id', customer_id)
         
         if (related_projects or related_quotes) and not cascade:
             return {
@@ -376,22 +630,16 @@ class CRMDataLayer:
         # Cascade delete or unlink
         if cascade:
             # Remove customer_id from related records
-            for p in projects:
-                if p.get('customer_id') == customer_id:
-                    p['customer_id'] = None
-                    p['updated_at'] = datetime.now().isoformat()
-            for q in quotes:
-                if q.get('customer_id') == customer_id:
-                    q['customer_id'] = None
-                    q['updated_at'] = datetime.now().isoformat()
-            
-            self._save_json(self.projects_file, projects)
-            self._save_json(self.quotes_file, quotes)
-        
-        deleted_customer = customers.pop(idx)
-        
-        if self._save_json(self.customers_file, customers):
-            return {'success': True, 'deleted': deleted_customer}
+            now = datetime.now().isoformat()
+            if related_projects:
+                self._put_records(self.projects_file, [{**p, 'customer_id': None, 'updated_at': now}
+                                                       for p in related_projects])
+            if related_quotes:
+                self._put_records(self.quotes_file, [{**q, 'customer_id': None, 'updated_at': now}
+                                                     for q in related_quotes])
+        
+        if self._delete_records(self.customers_file, [customer_id]):
+            return {'success': True, 'deleted': customer}
         return {'success': False, 'error': 'Failed to delete customer'}
     
     # ==================== PROJECTS ====================
@@ -405,15 +653,17 @@ class CRMDataLayer:
                      sort_by: str = 'created_at',
                      sort_order: str = 'desc') -> Dict:
         """Get projects with filtering, pagination, and search"""
-        projects = self._load_json(self.projects_file, [])
+        index = self._load_index(self.projects_file)
         
-        # Filter by customer
+        # Filter by customer and status
         if customer_id:
-            projects = [p for p in projects if p.get('customer_id') == customer_id]
-        
-        # Filter by status
-        if status:
-            projects = [p for p in projects if p.get('status') == status]
+            projects = index.records_for('customer_id', customer_id)
+            if status:
+                projects = [p for p in projects if p.get('status') == status]
+        elif status:
+            projects = index.records_for('status', status)
+        else:
+            projects = index.records()
         
         # Search
         if search:
@@ -433,10 +683,9 @@ class CRMDataLayer:
         paginated = projects[start:end]
         
         # Enrich with customer names
-        customers = self._load_json(self.customers_file, [])
-        customer_map = {c['id']: c['name'] for c in customers}
-        for p in paginated:
-            p['customer_name'] = customer_map.get(p.get('customer_id'), 'Unknown')
+        customers = self._load_index(self.customers_file)
+        paginated = [{**p, 'customer_name': (customers.get(p.get('customer_id')) or {}).get('name', 'Unknown')}
+                     for p in paginated]
         
         return {
             'success': True,
@@ -451,19 +700,16 @@ class CRMDataLayer:
     
     def get_project(self, project_id: str) -> Dict:
         """Get a single project with all related data"""
-        projects = self._load_json(self.projects_file, [])
-        project = next((p for p in projects if p['id'] == project_id), None)
+        project = self._load_index(self.projects_file).get(project_id)
         
         if not project:
             return {'success': False, 'error': 'Project not found'}
         
         # Get customer
-        customers = self._load_json(self.customers_file, [])
-        customer = next((c for c in customers if c['id'] == project.get('customer_id')), None)
+        customer = self._load_index(self.customers_file).get(project.get('customer_id'))
         
         # Get source quote if exists
-        quotes = self._load_json(self.quotes_file, [])
-        source_quote = next((q for q in quotes if q['id'] == project.get('source_quote_id')), None)
+        source_quote = self._load_index(self.quotes_file).get(project.get('source_quote_id'))
         
         return {
             'success': True,
@@ -481,12 +727,9 @@ class CRMDataLayer:
         # Verify customer exists if provided
         customer_id = data.get('customer_id')
         if customer_id:
-            customers = self._load_json(self.customers_file, [])
-            if not any(c['id'] == customer_id for c in customers):
+            if customer_id not in self._load_index(self.customers_file):
                 return {'success': False, 'error': 'Customer not found'}
         
-        projects = self._load_json(self.projects_file, [])
-        
         project = {
             'id': str(uuid.uuid4()),
             'customer_id': customer_id,
@@ -512,9 +755,7 @@ class CRMDataLayer:
             'updated_at': datetime.now().isoformat()
         }
         
-        projects.append(project)
-        
-        if self._save_json(self.projects_file, projects):
+        if self._put_records(self.projects_file, [project]):
             return {'success': True, 'project': project}
         return {'success': False, 'error': 'Failed to save project'}
     
@@ -524,19 +765,17 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        projects = self._load_json(self.projects_file, [])
-        idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
+        existing = self._load_index(self.projects_file).get(project_id)
         
-        if idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Project not found'}
         
         # Verify customer exists if being updated
         if 'customer_id' in data and data['customer_id']:
-            customers = self._load_json(self.customers_file, [])
-            if not any(c['id'] == data['customer_id'] for c in customers):
+            if data['customer_id'] not in self._load_index(self.customers_file):
                 return {'success': False, 'error': 'Customer not found'}
         
-        project = projects[idx]
+        project = dict(existing)
         updatable_fields = [
             'title', 'description', 'status', 'priority', 'quote_amount', 
             'actual_amount', 'due_date', 'start_date', 'address', 'notes', 
@@ -555,23 +794,19 @@ class CRMDataLayer:
                     project[field] = value
         
         project['updated_at'] = datetime.now().isoformat()
-        projects[idx] = project
         
-        if self._save_json(self.projects_file, projects):
+        if self._put_records(self.projects_file, [project]):
             return {'success': True, 'project': project}
         return {'success': False, 'error': 'Failed to save project'}
     
     def delete_project(self, project_id: str) -> Dict:
         """Delete a project"""
-        projects = self._load_json(self.projects_file, [])
-        idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
+        deleted_project = self._load_index(self.projects_file).get(project_id)
         
-        if idx is None:
+        if deleted_project is None:
             return {'success': False, 'error': 'Project not found'}
         
-        deleted_project = projects.pop(idx)
-        
-        if self._save_json(self.projects_file, projects):
+        if self._delete_records(self.projects_file, [project_id]):
             return {'success': True, 'deleted': deleted_project}
         return {'success': False, 'error': 'Failed to delete project'}
     
@@ -586,15 +821,17 @@ class CRMDataLayer:
                    sort_by: str = 'created_at',
                    sort_order: str = 'desc') -> Dict:
         """Get quotes with filtering, pagination, and search"""
-        quotes = self._load_json(self.quotes_file, [])
+        index = self._load_index(self.quotes_file)
         
-        # Filter by customer
+        # Filter by customer and status
         if customer_id:
-            quotes = [q for q in quotes if q.get('customer_id') == customer_id]
-        
-        # Filter by status
-        if status:
-            quotes = [q for q in quotes if q.get('status') == status]
+            quotes = index.records_for('customer_id', customer_id)
+            if status:
+                quotes = [q for q in quotes if q.get('status') == status]
+        elif status:
+            quotes = index.records_for('status', status)
+        else:
+            quotes = index.records()
         
         # Search
         if search:
@@ -615,10 +852,9 @@ class CRMDataLayer:
         paginated = quotes[start:end]
         
         # Enrich with customer names
-        customers = self._load_json(self.customers_file, [])
-        customer_map = {c['id']: c['name'] for c in customers}
-        for q in paginated:
-            q['customer_name'] = customer_map.get(q.get('customer_id'), 'Unknown')
+        customers = self._load_index(self.customers_file)
+        paginated = [{**q, 'customer_name': (customers.get(q.get('customer_id')) or {}).get('name', 'Unknown')}
+                     for q in paginated]
         
         return {
             'success': True,
@@ -633,19 +869,16 @@ class CRMDataLayer:
     
     def get_quote(self, quote_id: str) -> Dict:
         """Get a single quote with all related data"""
-        quotes = self._load_json(self.quotes_file, [])
-        quote = next((q for q in quotes if q['id'] == quote_id), None)
+        quote = self._load_index(self.quotes_file).get(quote_id)
         
         if not quote:
             return {'success': False, 'error': 'Quote not found'}
         
         # Get customer
-        customers = self._load_json(self.customers_file, [])
-        customer = next((c for c in customers if c['id'] == quote.get('customer_id')), None)
+        customer = self._load_index(self.customers_file).get(quote.get('customer_id'))
         
         # Get converted project if exists
-        projects = self._load_json(self.projects_file, [])
-        converted_project = next((p for p in projects if p['id'] == quote.get('converted_to_project_id')), None)
+        converted_project = self._load_index(self.projects_file).get(quote.get('converted_to_project_id'))
         
         return {
             'success': True,
@@ -663,12 +896,9 @@ class CRMDataLayer:
         # Verify customer exists if provided
         customer_id = data.get('customer_id')
         if customer_id:
-            customers = self._load_json(self.customers_file, [])
-            if not any(c['id'] == customer_id for c in customers):
+            if customer_id not in self._load_index(self.customers_file):
                 return {'success': False, 'error': 'Customer not found'}
         
-        quotes = self._load_json(self.quotes_file, [])
-        
         quote = {
             'id': str(uuid.uuid4()),
             'quote_number': data.get('quote_number', f"Q-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
@@ -705,9 +935,7 @@ class CRMDataLayer:
             'updated_at': datetime.now().isoformat()
         }
         
-        quotes.append(quote)
-        
-        if self._save_json(self.quotes_file, quotes):
+        if self._put_records(self.quotes_file, [quote]):
             return {'success': True, 'quote': quote}
         return {'success': False, 'error': 'Failed to save quote'}
     
@@ -717,13 +945,12 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        quotes = self._load_json(self.quotes_file, [])
-        idx = next((i for i, q in enumerate(quotes) if q['id'] == quote_id), None)
+        existing = self._load_index(self.quotes_file).get(quote_id)
         
-        if idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Quote not found'}
         
-        quote = quotes[idx]
+        quote = dict(existing)
         updatable_fields = [
             'title', 'description', 'status', 'quote_amount', 'labor_cost',
             'materials_cost', 'markup_percentage', 'valid_until', 'notes',
@@ -744,43 +971,36 @@ class CRMDataLayer:
                     quote[field] = value
         
         quote['updated_at'] = datetime.now().isoformat()
-        quotes[idx] = quote
         
-        if self._save_json(self.quotes_file, quotes):
+        if self._put_records(self.quotes_file, [quote]):
             return {'success': True, 'quote': quote}
         return {'success': False, 'error': 'Failed to save quote'}
     
     def delete_quote(self, quote_id: str) -> Dict:
         """Delete a quote"""
-        quotes = self._load_json(self.quotes_file, [])
-        idx = next((i for i, q in enumerate(quotes) if q['id'] == quote_id), None)
+        deleted_quote = self._load_index(self.quotes_file).get(quote_id)
         
-        if idx is None:
+        if deleted_quote is None:
             return {'success': False, 'error': 'Quote not found'}
         
-        deleted_quote = quotes.pop(idx)
-        
-        if self._save_json(self.quotes_file, quotes):
+        if self._delete_records(self.quotes_file, [quote_id]):
             return {'success': True, 'deleted': deleted_quote}
         return {'success': False, 'error': 'Failed to delete quote'}
     
     def convert_quote_to_project(self, quote_id: str) -> Dict:
         """Convert an accepted quote into a project"""
-        quotes = self._load_json(self.quotes_file, [])
-        quote_idx = next((i for i, q in enumerate(quotes) if q['id'] == quote_id), None)
+        existing = self._load_index(self.quotes_file).get(quote_id)
         
-        if quote_idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Quote not found'}
         
-        quote = quotes[quote_idx]
+        quote = dict(existing)
         
         # Check if already converted
         if quote.get('converted_to_project_id'):
             return {'success': False, 'error': 'Quote has already been converted to a project'}
         
         # Create project from quote
-        projects = self._load_json(self.projects_file, [])
-        
         project = {
             'id': str(uuid.uuid4()),
             'customer_id': quote.get('customer_id'),
@@ -807,16 +1027,13 @@ class CRMDataLayer:
             'updated_at': datetime.now().isoformat()
         }
         
-        projects.append(project)
-        
         # Update quote status
         quote['status'] = 'accepted'
         quote['converted_to_project_id'] = project['id']
         quote['converted_at'] = datetime.now().isoformat()
         quote['updated_at'] = datetime.now().isoformat()
-        quotes[quote_idx] = quote
         
-        if self._save_json(self.projects_file, projects) and self._save_json(self.quotes_file, quotes):
+        if self._put_records(self.projects_file, [project]) and self._put_records(self.quotes_file, [quote]):
             return {
                 'success': True,
                 'project': project,
@@ -836,11 +1053,10 @@ class CRMDataLayer:
                   sort_by: str = 'name',
                   sort_order: str = 'asc') -> Dict:
         """Get stock items with filtering, pagination, and search"""
-        stock = self._load_json(self.stock_file, [])
+        index = self._load_index(self.stock_file)
         
         # Filter by category
-        if category:
-            stock = [s for s in stock if s.get('category') == category]
+        stock = index.records_for('category', category) if category else index.records()
         
         # Filter low stock
         if low_stock_only:
@@ -886,8 +1102,7 @@ class CRMDataLayer:
     
     def get_stock_item(self, item_id: str) -> Dict:
         """Get a single stock item"""
-        stock = self._load_json(self.stock_file, [])
-        item = next((s for s in stock if s['id'] == item_id), None)
+        item = self._load_index(self.stock_file).get(item_id)
         
         if not item:
             return {'success': False, 'error': 'Stock item not found'}
@@ -900,8 +1115,6 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        stock = self._load_json(self.stock_file, [])
-        
         item = {
             'id': str(uuid.uuid4()),
             'name': data.get('name', '').strip(),
@@ -922,9 +1135,7 @@ class CRMDataLayer:
             'updated_at': datetime.now().isoformat()
         }
         
-        stock.append(item)
-        
-        if self._save_json(self.stock_file, stock):
+        if self._put_records(self.stock_file, [item]):
             return {'success': True, 'item': item}
         return {'success': False, 'error': 'Failed to save stock item'}
     
@@ -934,13 +1145,12 @@ class CRMDataLayer:
         if not valid:
             return {'success': False, 'error': error}
         
-        stock = self._load_json(self.stock_file, [])
-        idx = next((i for i, s in enumerate(stock) if s['id'] == item_id), None)
+        existing = self._load_index(self.stock_file).get(item_id)
         
-        if idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Stock item not found'}
         
-        item = stock[idx]
+        item = dict(existing)
         updatable_fields = [
             'name', 'sku', 'description', 'category', 'type', 'quantity',
             'unit_price', 'cost', 'reorder_level', 'supplier', 'location',
@@ -960,35 +1170,30 @@ class CRMDataLayer:
                     item[field] = value
         
         item['updated_at'] = datetime.now().isoformat()
-        stock[idx] = item
         
-        if self._save_json(self.stock_file, stock):
+        if self._put_records(self.stock_file, [item]):
             return {'success': True, 'item': item}
         return {'success': False, 'error': 'Failed to save stock item'}
     
     def delete_stock_item(self, item_id: str) -> Dict:
         """Delete a stock item"""
-        stock = self._load_json(self.stock_file, [])
-        idx = next((i for i, s in enumerate(stock) if s['id'] == item_id), None)
+        deleted_item = self._load_index(self.stock_file).get(item_id)
         
-        if idx is None:
+        if deleted_item is None:
             return {'success': False, 'error': 'Stock item not found'}
         
-        deleted_item = stock.pop(idx)
-        
-        if self._save_json(self.stock_file, stock):
+        if self._delete_records(self.stock_file, [item_id]):
             return {'success': True, 'deleted': deleted_item}
         return {'success': False, 'error': 'Failed to delete stock item'}
     
     def adjust_stock_quantity(self, item_id: str, adjustment: int, reason: str = '') -> Dict:
         """Adjust stock quantity (positive or negative)"""
-        stock = self._load_json(self.stock_file, [])
-        idx = next((i for i, s in enumerate(stock) if s['id'] == item_id), None)
+        existing = self._load_index(self.stock_file).get(item_id)
         
-        if idx is None:
+        if existing is None:
             return {'success': False, 'error': 'Stock item not found'}
         
-        item = stock[idx]
+        item = dict(existing)
         new_quantity = item.get('quantity', 0) + adjustment
         
         if new_quantity < 0:
@@ -998,17 +1203,13 @@ class CRMDataLayer:
         item['updated_at'] = datetime.now().isoformat()
         
         # Log adjustment
-        if 'adjustments' not in item:
-            item['adjustments'] = []
-        item['adjustments'].append({
+        item['adjustments'] = item.get('adjustments', []) + [{
             'amount': adjustment,
             'reason': reason,
             'timestamp': datetime.now().isoformat()
-        })
+        }]
         
-        stock[idx] = item
-        
-        if self._save_json(self.stock_file, stock):
+        if self._put_records(self.stock_file, [item]):
             return {'success': True, 'item': item, 'new_quantity': new_quantity}
         return {'success': False, 'error': 'Failed to save stock adjustment'}
     
@@ -1016,32 +1217,32 @@ class CRMDataLayer:
     
     def get_stats(self) -> Dict:
         """Get comprehensive CRM statistics"""
-        customers = self._load_json(self.customers_file, [])
-        projects = self._load_json(self.projects_file, [])
-        quotes = self._load_json(self.quotes_file, [])
+        customers = self._load_index(self.customers_file)
+        projects = self._load_index(self.projects_file)
+        quotes = self._load_index(self.quotes_file)
         stock = self._load_json(self.stock_file, [])
         
         # Customer stats
         total_customers = len(customers)
-        active_customers = len([c for c in customers if c.get('status') == 'active'])
+        active_customers = customers.count('status', 'active')
         
         # Project stats
         total_projects = len(projects)
-        active_projects = len([p for p in projects if p.get('status') in ['pending', 'in_progress', 'planning']])
-        completed_projects = len([p for p in projects if p.get('status') == 'completed'])
-        on_hold_projects = len([p for p in projects if p.get('status') == 'on_hold'])
+        active_projects = projects.count('status', 'pending', 'in_progress', 'planning')
+        completed_projects = projects.count('status', 'completed')
+        on_hold_projects = projects.count('status', 'on_hold')
         
         # Revenue stats
-        total_revenue = sum(p.get('actual_amount', 0) for p in projects if p.get('status') == 'completed')
-        pending_revenue = sum(p.get('quote_amount', 0) for p in projects if p.get('status') in ['pending', 'in_progress', 'planning'])
+        total_revenue = sum(p.get('actual_amount', 0) for p in projects.records_for('status', 'completed'))
+        pending_revenue = sum(p.get('quote_amount', 0) for p in projects.records_for('status', 'pending', 'in_progress', 'planning'))
         
         # Quote stats
         total_quotes = len(quotes)
-        draft_quotes = len([q for q in quotes if q.get('status') == 'draft'])
-        sent_quotes = len([q for q in quotes if q.get('status') == 'sent'])
-        accepted_quotes = len([q for q in quotes if q.get('status') == 'accepted'])
-        rejected_quotes = len([q for q in quotes if q.get('status') == 'rejected'])
-        quote_value = sum(q.get('quote_amount', 0) for q in quotes if q.get('status') in ['draft', 'sent'])
+        draft_quotes = quotes.count('status', 'draft')
+        sent_quotes = quotes.count('status', 'sent')
+        accepted_quotes = quotes.count('status', 'accepted')
+        rejected_quotes = quotes.count('status', 'rejected')
+        quote_value = sum(q.get('quote_amount', 0) for q in quotes.records_for('status', 'draft', 'sent'))
         
         # Stock stats
         total_stock_value = sum(s.get('quantity', 0) * s.get('unit_price', 0) for s in stock)
@@ -1091,14 +1292,17 @@ class CRMDataLayer:
         """Check data integrity across all CRM files"""
         issues = []
         
-        customers = self._load_json(self.customers_file, [])
-        projects = self._load_json(self.projects_file, [])
-        quotes = self._load_json(self.quotes_file, [])
-        stock = self._load_json(self.stock_file, [])
-        
-        customer_ids = {c['id'] for c in customers}
-        project_ids = {p['id'] for p in projects}
-        quote_ids = {q['id'] for q in quotes}
+        indexes = {
+            'customers': self._load_index(self.customers_file),
+            'projects': self._load_index(self.projects_file),
+            'quotes': self._load_index(self.quotes_file),
+            'stock': self._load_index(self.stock_file)
+        }
+        customer_ids = indexes['customers']
+        project_ids = indexes['projects']
+        quote_ids = indexes['quotes']
+        projects = project_ids.records()
+        quotes = quote_ids.records()
         
         # Check project customer references
         for project in projects:
@@ -1148,14 +1352,13 @@ class CRMDataLayer:
                 })
         
         # Check for duplicate IDs
-        for name, items in [('customers', customers), ('projects', projects), ('quotes', quotes), ('stock', stock)]:
-            ids = [item['id'] for item in items]
-            duplicates = [id for id in ids if ids.count(id) > 1]
+        for name, index in indexes.items():
+            duplicates = index.duplicate_ids()
             if duplicates:
                 issues.append({
                     'type': 'duplicate_id',
                     'entity': name,
-                    'ids': list(set(duplicates)),
+                    'ids': duplicates,
                     'message': f"Duplicate IDs found in {name}"
                 })
         
@@ -1163,12 +1366,7 @@ class CRMDataLayer:
             'success': True,
             'healthy': len(issues) == 0,
             'issues': issues,
-            'counts': {
-                'customers': len(customers),
-                'projects': len(projects),
-                'quotes': len(quotes),
-                'stock': len(stock)
-            }
+            'counts': {name: len(index) for name, index in indexes.items()}
         }
     
     def repair_data_integrity(self) -> Dict:
@@ -1185,16 +1383,14 @@ class CRMDataLayer:
         for issue in integrity['issues']:
             if issue['type'] == 'orphan_reference':
                 if issue['entity'] == 'project':
-                    for p in projects:
+                    for i, p in enumerate(projects):
                         if p['id'] == issue['id']:
-                            p[issue['field']] = None
-                            p['updated_at'] = datetime.now().isoformat()
+                            projects[i] = {**p, issue['field']: None, 'updated_at': datetime.now().isoformat()}
                             repaired.append(f"Cleared {issue['field']} in project {issue['id']}")
                 elif issue['entity'] == 'quote':
-                    for q in quotes:
+                    for i, q in enumerate(quotes):
                         if q['id'] == issue['id']:
-                            q[issue['field']] = None
-                            q['updated_at'] = datetime.now().isoformat()
+                            quotes[i] = {**q, issue['field']: None, 'updated_at': datetime.now().isoformat()}
                             repaired.append(f"Cleared {issue['field']} in quote {issue['id']}")
         
         self._save_json(self.projects_file, projects)
@@ -1216,6 +1412,6 @@ def get_crm_data_layer(data_folder: str = None) -> CRMDataLayer:
     if _crm_data_layer is None:
         if data_folder is None:
             raise ValueError("data_folder must be provided on first call")
-        _crm_data_layer = CRMDataLayer(data_folder)
+        _crm_data_layer = CRMDataLayer(data_folder, storage=get_storage_engine())
     return _crm_data_layer
 
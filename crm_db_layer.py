@@ -18,6 +18,8 @@ try:
     from services.crm_repository import CRMRepository
     from services.inventory_repository import InventoryRepository
     from services.users_repository import UsersRepository
+    from services.crm_stats import CRMStatsService
+    from services.search_service import SearchService
     DB_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Database modules not available: {e}")
@@ -74,64 +76,41 @@ class CRMDatabaseLayer:
             self.organization_id = None
             logger.warning("Database not configured - CRM operations will fail")
     
-    # ==================== SORTING HELPER ====================
+    # ==================== PAGINATION HELPER ====================
     
-    def _sort_items(self, items: List[Dict], sort_by: str = 'created_at', 
-                   sort_order: str = 'desc') -> List[Dict]:
-        """Sort a list of items by a given field."""
-        if not items or not sort_by:
-            return items
-        
-        reverse = sort_order.lower() == 'desc'
-        
-        def get_sort_key(item):
-            value = item.get(sort_by)
-            if value is None:
-                return '' if reverse else 'zzz'  # Sort nulls last
-            if isinstance(value, str):
-                return value.lower()
-            return value
-        
-        try:
-            return sorted(items, key=get_sort_key, reverse=reverse)
-        except (TypeError, ValueError):
-            return items  # Return unsorted if comparison fails
-    
-    # ==================== CUSTOMERS ====================
-    
-    @db_operation
-    def get_customers(self, search: str = None, status: str = None,
-                     page: int = 1, per_page: int = 50,
-                     sort_by: str = 'created_at', sort_order: str = 'desc') -> Dict:
-        """Get paginated list of customers."""
-        customers = self._crm_repo.list_customers(active_only=(status != 'inactive'))
-        
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            customers = [c for c in customers if 
-                        search_lower in (c.get('name') or '').lower() or
-                        search_lower in (c.get('company') or '').lower() or
-                        search_lower in (c.get('email') or '').lower()]
-        
-        # Apply sorting
-        customers = self._sort_items(customers, sort_by, sort_order)
-        
-        # Pagination
-        total = len(customers)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated = customers[start:end]
-        
+    def _page_response(self, key: str, result: Dict, page: int, per_page: int) -> Dict:
+        """Shape a repository page (items/total/next_cursor) as a list response."""
+        total = result['total']
         return {
             'success': True,
-            'customers': paginated,
+            key: result['items'],
             'total': total,
             'page': page,
             'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
+            'pages': (total + per_page - 1) // per_page if total is not None else None,
+            'next_cursor': result['next_cursor']
         }
     
+    # ==================== CUSTOMERS ====================
+    
+    @db_operation
+    def get_customers(self, search: str = None, status: str = None,
+                     page: int = 1, per_page: int = 50,
+                     sort_by: str = 'created_at', sort_order: str = 'desc',
+                     cursor: str = None) -> Dict:
+        """Get paginated list of customers (pass cursor for keyset paging)."""
+        result = self._crm_repo.list_customers(
+            active_only=(status != 'inactive'),
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            cursor=cursor,
+            with_total=True
+        )
+        return self._page_response('customers', result, page, per_page)
+    
     @db_operation
     def get_customer(self, customer_id: str) -> Dict:
         """Get a single customer by ID."""
@@ -172,34 +151,21 @@ class CRMDatabaseLayer:
     @db_operation
     def get_projects(self, customer_id: str = None, status: str = None,
                     search: str = None, page: int = 1, per_page: int = 50,
-                    sort_by: str = 'created_at', sort_order: str = 'desc') -> Dict:
-        """Get paginated list of projects."""
-        projects = self._crm_repo.list_projects(customer_id=customer_id, status=status)
-        
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            projects = [p for p in projects if 
-                       search_lower in (p.get('name') or '').lower() or
-                       search_lower in (p.get('description') or '').lower()]
-        
-        # Apply sorting
-        projects = self._sort_items(projects, sort_by, sort_order)
-        
-        # Pagination
-        total = len(projects)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated = projects[start:end]
-        
-        return {
-            'success': True,
-            'projects': paginated,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        }
+                    sort_by: str = 'created_at', sort_order: str = 'desc',
+                    cursor: str = None) -> Dict:
+        """Get paginated list of projects (pass cursor for keyset paging)."""
+        result = self._crm_repo.list_projects(
+            customer_id=customer_id,
+            status=status,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            cursor=cursor,
+            with_total=True
+        )
+        return self._page_response('projects', result, page, per_page)
     
     @db_operation
     def get_project(self, project_id: str) -> Dict:
@@ -241,39 +207,22 @@ class CRMDatabaseLayer:
     def get_quotes(self, customer_id: str = None, status: str = None,
                   source: str = None, search: str = None, 
                   page: int = 1, per_page: int = 50,
-                  sort_by: str = 'created_at', sort_order: str = 'desc') -> Dict:
-        """Get paginated list of quotes."""
-        quotes = self._crm_repo.list_quotes(
+                  sort_by: str = 'created_at', sort_order: str = 'desc',
+                  cursor: str = None) -> Dict:
+        """Get paginated list of quotes (pass cursor for keyset paging)."""
+        result = self._crm_repo.list_quotes(
             customer_id=customer_id, 
             status=status,
-            source=source
+            source=source,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            cursor=cursor,
+            with_total=True
         )
-        
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            quotes = [q for q in quotes if 
-                     search_lower in (q.get('title') or '').lower() or
-                     search_lower in (q.get('description') or '').lower() or
-                     search_lower in (q.get('quote_number') or '').lower()]
-        
-        # Apply sorting
-        quotes = self._sort_items(quotes, sort_by, sort_order)
-        
-        # Pagination
-        total = len(quotes)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated = quotes[start:end]
-        
-        return {
-            'success': True,
-            'quotes': paginated,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        }
+        return self._page_response('quotes', result, page, per_page)
     
     @db_operation
     def get_quote(self, quote_id: str) -> Dict:
@@ -345,37 +294,25 @@ class CRMDatabaseLayer:
     def get_stock(self, category: str = None, search: str = None,
                  low_stock: bool = False, low_stock_only: bool = False,
                  page: int = 1, per_page: int = 50,
-                 sort_by: str = 'name', sort_order: str = 'asc') -> Dict:
-        """Get paginated list of stock items."""
+                 sort_by: str = 'name', sort_order: str = 'asc',
+                 cursor: str = None) -> Dict:
+        """Get paginated list of stock items (pass cursor for keyset paging)."""
         # Support both low_stock and low_stock_only parameter names
         is_low_stock = low_stock or low_stock_only
-        items = self._inv_repo.list_items(category=category, low_stock_only=is_low_stock)
-        
-        # Apply search filter
-        if search:
-            search_lower = search.lower()
-            items = [i for i in items if 
-                    search_lower in (i.get('name') or '').lower() or
-                    search_lower in (i.get('sku') or '').lower()]
-        
-        # Apply sorting
-        items = self._sort_items(items, sort_by, sort_order)
-        
-        # Pagination
-        total = len(items)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated = items[start:end]
-        
-        return {
-            'success': True,
-            'items': paginated,
-            'stock': paginated,  # Alias for compatibility
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        }
+        result = self._inv_repo.list_items(
+            category=category,
+            low_stock_only=is_low_stock,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            cursor=cursor,
+            with_total=True
+        )
+        response = self._page_response('items', result, page, per_page)
+        response['stock'] = response['items']  # Alias for compatibility
+        return response
     
     @db_operation
     def get_stock_item(self, item_id: str) -> Dict:
@@ -655,70 +592,23 @@ class CRMDatabaseLayer:
             return {'success': True, 'message': 'Price class deleted'}
         return {'success': False, 'error': 'Price class not found'}
     
+    # ==================== SEARCH ====================
+    
+    @db_operation
+    def search(self, query: str, entities: List[str] = None, limit: int = 10) -> Dict:
+        """Ranked search across customers, projects, quotes and inventory."""
+        results = SearchService(self._session, self.organization_id).search(
+            query, entities=entities, limit=limit
+        )
+        return {'success': True, 'query': query, 'results': results}
+    
     # ==================== STATISTICS ====================
     
     @db_operation
     def get_stats(self) -> Dict:
-        """Get comprehensive CRM statistics."""
-        customers = self._crm_repo.list_customers()
-        projects = self._crm_repo.list_projects()
-        quotes = self._crm_repo.list_quotes()
-        jobs = self._crm_repo.list_jobs()
-        
-        # Calculate stats
-        active_projects = [p for p in projects if p.get('status') == 'in_progress']
-        pending_quotes = [q for q in quotes if q.get('status') in ['draft', 'sent']]
-        total_revenue = sum(q.get('total_amount', 0) for q in quotes 
-                          if q.get('status') == 'accepted')
-        pending_revenue = sum(q.get('total_amount', 0) for q in pending_quotes)
-        
-        # Stock stats
-        stock_items = self._inv_repo.list_items()
-        stock_value = sum(i.get('quantity', 0) * (i.get('cost_price') or i.get('unit_price', 0))
-                         for i in stock_items)
-        low_stock = [i for i in stock_items 
-                    if i.get('quantity', 0) <= i.get('reorder_level', 5)]
-        
-        return {
-            'success': True,
-            'stats': {
-                'customers': {
-                    'total': len(customers),
-                    'active': len([c for c in customers if c.get('is_active', True)])
-                },
-                'projects': {
-                    'total': len(projects),
-                    'active': len(active_projects),
-                    'by_status': self._count_by_status(projects)
-                },
-                'quotes': {
-                    'total': len(quotes),
-                    'pending': len(pending_quotes),
-                    'by_status': self._count_by_status(quotes)
-                },
-                'jobs': {
-                    'total': len(jobs),
-                    'by_status': self._count_by_status(jobs)
-                },
-                'revenue': {
-                    'total': total_revenue,
-                    'pending': pending_revenue
-                },
-                'stock': {
-                    'total_items': len(stock_items),
-                    'total_value': stock_value,
-                    'low_stock_count': len(low_stock)
-                }
-            }
-        }
-    
-    def _count_by_status(self, items: List[Dict]) -> Dict[str, int]:
-        """Count items by status."""
-        counts = {}
-        for item in items:
-            status = item.get('status', 'unknown')
-            counts[status] = counts.get(status, 0) + 1
-        return counts
+        """Get comprehensive CRM statistics (one aggregate query)."""
+        stats = CRMStatsService(self._session, self.organization_id).dashboard_stats()
+        return {'success': True, 'stats': stats}
     
     # ==================== DATA INTEGRITY ====================
     
@@ -0,0 +1,235 @@
+"""
+CRM Storage Engines - how the JSON CRM backend persists record collections
+
+Two engines share one interface so CRMDataLayer can swap between them:
+- JSONFileStorage: every mutation rewrites the whole collection file (default)
+- AppendLogStorage: mutations are appended to a per-collection log and folded
+  into the collection file on compaction, so a write costs O(record)
+
+Select the engine with CRM_JSON_STORAGE=file|log.
+"""
+import os
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A mutation is ('put', record) or ('delete', record_id)
+Op = Tuple[str, Any]
+
+
+class JSONFileStorage:
+    """
+    Whole-file storage: the collection file is a JSON list of records and
+    every save rewrites it through a temp file and an atomic rename.
+
+    Callers hold the per-file lock around every method.
+    """
+
+    name = 'file'
+
+    def paths(self, filepath: str) -> Tuple[str, ...]:
+        """Files whose changes invalidate a cached copy of this collection"""
+        return (filepath,)
+
+    def load(self, filepath: str) -> List[Dict]:
+        """Load a collection, backing up the file if it is corrupted"""
+        log_path = f"{filepath}.log"
+        if self.name == 'file' and os.path.exists(log_path) and os.path.getsize(log_path):
+            logger.warning(f"{log_path} has unreplayed entries - set CRM_JSON_STORAGE=log to apply them")
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read().strip()
+                if not content:
+                    return []
+                records = json.loads(content)
+                if isinstance(records, list):
+                    return records
+                logger.error(f"Expected a list of records in {filepath}")
+            return []
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error in {filepath}: {e}")
+            # Backup corrupted file
+            if os.path.exists(filepath):
+                backup_path = f"{filepath}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                os.rename(filepath, backup_path)
+                logger.warning(f"Corrupted file backed up to {backup_path}")
+            return []
+
+    def save(self, filepath: str, records: List[Dict], fsync: bool = False) -> None:
+        """Atomically replace the collection file with the given records"""
+        temp_path = f"{filepath}.tmp"
+        try:
+            # Write to temp file first, then rename (atomic operation)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=2, default=str)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, filepath)
+        except Exception:
+            # Clean up temp file if it exists
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def apply(self, filepath: str, ops: List[Op], records: Callable[[], List[Dict]]) -> None:
+        """Persist a batch of mutations; records() returns the full post-mutation list"""
+        self.save(filepath, records())
+
+    def compact(self, filepath: str, records: List[Dict]) -> None:
+        """Nothing to compact - the file is always a full snapshot"""
+
+
+class AppendLogStorage(JSONFileStorage):
+    """
+    Append-only storage engine.
+
+    The collection file stays a plain JSON list and acts as the snapshot.
+    Each mutation is appended to ``<file>.log`` as one JSON line
+    ({"op": "put", "record": {...}} or {"op": "delete", "id": "..."}) and
+    fsynced. Loading replays the log over the snapshot; once the log holds
+    ``compact_after`` entries the current records are written as a new
+    snapshot and the log is truncated.
+
+    Recovery: a torn final line from a crash mid-append is cut off on the
+    next load. Puts and deletes are idempotent, so a crash between writing
+    the snapshot and truncating the log just replays operations that are
+    already in the snapshot.
+    """
+
+    name = 'log'
+
+    def __init__(self, compact_after: int = 1000, fsync: bool = True):
+        self.compact_after = compact_after
+        self.fsync = fsync
+        self._log_entries: Dict[str, int] = {}
+
+    @staticmethod
+    def log_path(filepath: str) -> str:
+        return f"{filepath}.log"
+
+    def paths(self, filepath: str) -> Tuple[str, ...]:
+        return (filepath, self.log_path(filepath))
+
+    def load(self, filepath: str) -> List[Dict]:
+        """Load the snapshot and replay the log over it"""
+        records = super().load(filepath)
+        entries = self._read_log(filepath)
+        self._log_entries[filepath] = len(entries)
+        if entries:
+            records = self._replay(records, entries)
+        return records
+
+    def apply(self, filepath: str, ops: List[Op], records: Callable[[], List[Dict]]) -> None:
+        """Append mutations to the log, compacting when it grows too long"""
+        lines = []
+        for op, value in ops:
+            if op == 'put':
+                lines.append(json.dumps({'op': 'put', 'record': value}, default=str, separators=(',', ':')))
+            else:
+                lines.append(json.dumps({'op': 'delete', 'id': value}, default=str, separators=(',', ':')))
+        if not lines:
+            return
+
+        with open(self.log_path(filepath), 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        self._log_entries[filepath] = self._log_entries.get(filepath, 0) + len(lines)
+        if self._log_entries[filepath] >= self.compact_after:
+            self.compact(filepath, records())
+
+    def save(self, filepath: str, records: List[Dict], fsync: bool = None) -> None:
+        """Full rewrites (bulk saves) go straight to a new snapshot"""
+        self.compact(filepath, records)
+
+    def compact(self, filepath: str, records: List[Dict]) -> None:
+        """Write the records as the new snapshot, then truncate the log"""
+        super().save(filepath, records, fsync=self.fsync)
+        log_path = self.log_path(filepath)
+        if os.path.exists(log_path):
+            with open(log_path, 'w', encoding='utf-8'):
+                pass
+        self._log_entries[filepath] = 0
+        logger.info(f"Compacted {os.path.basename(filepath)} ({len(records)} records)")
+
+    def _read_log(self, filepath: str) -> List[Dict]:
+        """Read log entries, truncating a torn tail left by a crash"""
+        log_path = self.log_path(filepath)
+        if not os.path.exists(log_path):
+            return []
+
+        with open(log_path, 'rb') as f:
+            data = f.read()
+
+        entries = []
+        offset = 0
+        good_end = 0
+        while offset < len(data):
+            newline = data.find(b'\n', offset)
+            if newline == -1:
+                # Unterminated tail - the append never completed
+                break
+            line = data[offset:newline].strip()
+            offset = newline + 1
+            if not line:
+                good_end = offset
+                continue
+            try:
+                entry = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                if data[offset:].strip():
+                    logger.error(f"Skipping corrupt entry in {log_path}: {e}")
+                    good_end = offset
+                    continue
+                break
+            entries.append(entry)
+            good_end = offset
+
+        if good_end < len(data):
+            logger.warning(f"Truncating {len(data) - good_end} bytes of torn log tail in {log_path}")
+            os.truncate(log_path, good_end)
+        return entries
+
+    @staticmethod
+    def _replay(records: List[Dict], entries: List[Dict]) -> List[Dict]:
+        """Apply log entries to a snapshot, keeping file order"""
+        records = list(records)
+        positions = {}
+        for i, record in enumerate(records):
+            if isinstance(record, dict) and record.get('id') is not None:
+                positions.setdefault(record['id'], i)
+
+        for entry in entries:
+            op = entry.get('op')
+            if op == 'put' and isinstance(entry.get('record'), dict):
+                record = entry['record']
+                position = positions.get(record.get('id'))
+                if position is None:
+                    positions[record.get('id')] = len(records)
+                    records.append(record)
+                else:
+                    records[position] = record
+            elif op == 'delete':
+                position = positions.pop(entry.get('id'), None)
+                if position is not None:
+                    records[position] = None
+
+        return [r for r in records if r is not None]
+
+
+def get_storage_engine(name: str = None) -> JSONFileStorage:
+    """Create the storage engine named by CRM_JSON_STORAGE (default: file)"""
+    name = (name or os.environ.get('CRM_JSON_STORAGE', 'file')).lower()
+    if name == 'log':
+        compact_after = int(os.environ.get('CRM_LOG_COMPACT_AFTER', '1000'))
+        return AppendLogStorage(compact_after=compact_after)
+    if name != 'file':
+        logger.warning(f"Unknown CRM_JSON_STORAGE '{name}', using whole-file storage")
+    return JSONFileStorage()
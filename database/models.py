@@ -7,8 +7,9 @@ import uuid
 from datetime import datetime
 from sqlalchemy import (
     Column, String, Text, Integer, Float, Boolean, DateTime, Date,
-    ForeignKey, JSON, Enum as SQLEnum, Index, UniqueConstraint
+    ForeignKey, JSON, Enum as SQLEnum, Index, UniqueConstraint, LargeBinary
 )
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from database.connection import Base
@@ -19,6 +20,30 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+class CanvasState(TypeDecorator):
+    """
+    Fabric.js canvas state stored in the compact binary canvas format.
+
+    Reads and writes plain dicts like the JSONB column it replaces (see
+    alembic revision 005); rows still holding JSON text decode as JSON.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # Imported here: the services package imports these models
+        from services.canvas_codec import encode_canvas
+        return encode_canvas(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        from services.canvas_codec import decode_canvas
+        return decode_canvas(bytes(value))
+
+
 # =============================================================================
 # ORGANIZATION (Multi-tenant foundation)
 # =============================================================================
@@ -555,7 +580,7 @@ class Quote(Base):
     notes = Column(Text)
     
     # Canvas/floorplan data
-    canvas_state = Column(JSONB)  # Fabric.js canvas state
+    canvas_state = Column(CanvasState)  # Fabric.js canvas state (binary, services/canvas_codec.py)
     floorplan_image = Column(Text)  # Base64 or path
     components = Column(JSONB, default=[])  # Placed symbols/components
     costs = Column(JSONB, default={})  # Cost breakdown
@@ -2,10 +2,135 @@
 DXF Exporter for CAD Designer
 Converts Fabric.js canvas objects to AutoCAD DXF format
 Compliant with DXF R12 format for maximum compatibility
+
+The file is generated, not assembled in memory: entities are converted
+lazily from the canvas objects and written out in ~64 KB chunks, so
+memory stays flat however many devices a drawing has. A first pass over
+the objects computes the real $EXTMIN/$EXTMAX and one BLOCK definition
+per symbol type; every symbol instance is then a short INSERT.
+
+The same tags can be written as R12 binary DXF (binary=True): numbers
+are packed little-endian instead of printed, which makes files smaller
+and much faster for AutoCAD to load.
 """
 
 import math
-from datetime import datetime
+import re
+import struct
+from functools import lru_cache
+
+# Chunk size for streamed output
+CHUNK_SIZE = 64 * 1024
+
+# Binary DXF starts with this sentinel; R12 group codes are then one byte each
+BINARY_SENTINEL = b'AutoCAD Binary DXF\r\n\x1a\x00'
+
+# Placeholder block size for symbols without child geometry
+DEFAULT_SYMBOL_SIZE = 20
+
+_BLOCK_NAME_RE = re.compile(r'[^A-Za-z0-9_\-$]')
+
+
+def _is_number(value):
+    """Whether a coordinate is usable (canvas JSON can hold null or strings)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+# Fabric.js properties the converters do arithmetic on
+_NUMERIC_KEYS = ('left', 'top', 'width', 'height', 'radius', 'x1', 'y1', 'x2', 'y2',
+                 'fontSize', 'angle', 'scaleX', 'scaleY')
+
+
+def _clean_object(obj):
+    """obj with numeric strings parsed and other malformed numbers dropped to their defaults"""
+    bad = [key for key in _NUMERIC_KEYS if key in obj and not _is_number(obj[key])]
+    if not bad:
+        return obj
+    obj = dict(obj)
+    for key in bad:
+        value = obj.pop(key)
+        if isinstance(value, str):
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+            if math.isfinite(number):
+                obj[key] = number
+    return obj
+
+
+def _shift(value, delta):
+    """value + delta, leaving malformed coordinates as they are"""
+    return value + delta if _is_number(value) else value
+
+
+def _binary_type(code):
+    """struct format of a binary DXF group code's value (None for strings)"""
+    if 10 <= code <= 59 or 110 <= code <= 149 or 210 <= code <= 239:
+        return 'd'
+    if 60 <= code <= 79 or 170 <= code <= 179:
+        return 'h'
+    if 90 <= code <= 99:
+        return 'i'
+    return None
+
+
+# group code -> packer for (code, value), so each numeric tag is one struct call
+_BINARY_PACKERS = {
+    code: struct.Struct('<B' + _binary_type(code)).pack
+    for code in range(255) if _binary_type(code)
+}
+
+
+def _ascii_tags(tags):
+    """Encode tags as ASCII DXF text"""
+    return ''.join([f"{code}\n{value}\n" for code, value in tags])
+
+
+@lru_cache(maxsize=4096)
+def _binary_string(code, value):
+    """Binary tag for a string value (entity names, layers and blocks repeat a lot)"""
+    return bytes([code]) + str(value).encode('cp1252', 'replace') + b'\x00'
+
+
+def _binary_tags(tags):
+    """Encode tags as R12 binary DXF (little-endian numbers, NUL-terminated strings)"""
+    out = bytearray()
+    for code, value in tags:
+        pack = _BINARY_PACKERS.get(code)
+        out += pack(code, value) if pack is not None else _binary_string(code, value)
+    return bytes(out)
+
+
+class Extents:
+    """Running bounding box of emitted geometry"""
+
+    def __init__(self):
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+
+    def add(self, x, y):
+        """Grow the box to include a point; points with malformed coordinates are skipped"""
+        if not (_is_number(x) and _is_number(y)):
+            return
+        if x < self.min_x:
+            self.min_x = x
+        if x > self.max_x:
+            self.max_x = x
+        if y < self.min_y:
+            self.min_y = y
+        if y > self.max_y:
+            self.max_y = y
+
+    @property
+    def empty(self):
+        return self.min_x > self.max_x
+
+    def bounds(self):
+        """((min_x, min_y), (max_x, max_y)), or a 0..1000 square when empty"""
+        if self.empty:
+            return (0.0, 0.0), (1000.0, 1000.0)
+        return (self.min_x, self.min_y), (self.max_x, self.max_y)
 
 
 class DXFExporter:
@@ -13,50 +138,107 @@ class DXFExporter:
 
     def __init__(self):
         self.layers = []
-        self.entities = []
-        self.blocks = []
-        self.handle_counter = 256  # Start handles from 256
+        self.blocks = {}  # block name -> block-local entities
+        self.block_extents = {}  # block name -> Extents
+        self.block_names = {}  # str(symbolId) -> block name, unique per id
 
-    def generate_dxf(self, cad_data):
+    def generate_dxf(self, cad_data, binary=False):
         """
         Generate DXF file from CAD session data
 
         Args:
             cad_data: Dictionary containing layers, objects, metadata
+            binary: Produce binary DXF bytes instead of ASCII text
+
+        Returns:
+            String (or bytes when binary) containing DXF file content
+        """
+        return (b'' if binary else '').join(self.iter_dxf(cad_data, binary=binary))
+
+    def write(self, cad_data, fp, binary=False):
+        """
+        Stream the DXF file into a writable file object (text, or bytes when binary)
 
         Returns:
-            String containing DXF file content
+            Number of characters (bytes when binary) written
+        """
+        written = 0
+        for chunk in self.iter_dxf(cad_data, binary=binary):
+            fp.write(chunk)
+            written += len(chunk)
+        return written
+
+    def scan(self, canvas_objects):
+        """
+        Define a block per symbol type and measure the drawing
+
+        Returns:
+            Extents of every entity, with inserts bounded by their blocks
+        """
+        self.blocks = {}
+        self.block_extents = {}
+        self.block_names = {}
+        extents = Extents()
+        for entity in self.iter_entities(canvas_objects):
+            self._extend(extents, entity)
+        return extents
+
+    def iter_dxf(self, cad_data, chunk_size=CHUNK_SIZE, binary=False):
+        """
+        Generate the DXF file in chunks of roughly chunk_size characters
+
+        Args:
+            cad_data: Dictionary containing layers, objects, metadata
+            chunk_size: Target chunk length
+            binary: Yield binary DXF bytes instead of ASCII text
         """
         self.layers = cad_data.get('layers', [])
         canvas_objects = cad_data.get('objects', [])
-        metadata = cad_data.get('metadata', {})
 
-        # Parse canvas objects and convert to DXF entities
-        for obj in canvas_objects:
-            self._convert_object_to_entity(obj)
-
-        # Build DXF file
-        dxf_content = self._build_dxf()
-        return dxf_content
+        # Pass 1: block definitions and drawing extents, nothing retained per entity
+        extents = self.scan(canvas_objects)
+
+        # Pass 2: stream the file, converting entities as they are written;
+        # tags are encoded in batches (a DXF tag averages ~8 characters)
+        encode = _binary_tags if binary else _ascii_tags
+        if binary:
+            yield BINARY_SENTINEL
+        batch_tags = max(1, chunk_size // 8)
+        buffer = []
+        for tags in self._iter_sections(canvas_objects, extents):
+            buffer += tags
+            if len(buffer) >= batch_tags:
+                yield encode(buffer)
+                buffer = []
+        if buffer:
+            yield encode(buffer)
+
+    def iter_entities(self, objects):
+        """Lazily convert Fabric.js objects to DXF entities"""
+        for obj in objects:
+            yield from self._convert_object_to_entity(obj)
 
     def _convert_object_to_entity(self, obj):
-        """Convert a Fabric.js object to DXF entity"""
+        """Convert a Fabric.js object to DXF entities"""
+        obj = _clean_object(obj)
+        if obj.get('customType') == 'symbol' or obj.get('type') == 'symbol':
+            yield self._add_symbol(obj)
+            return
+
         obj_type = obj.get('type', obj.get('customType', 'unknown'))
 
         if obj_type == 'line' or obj_type == 'wire':
-            self._add_line(obj)
+            yield self._add_line(obj)
         elif obj_type == 'rect' or obj_type == 'rectangle':
-            self._add_rectangle(obj)
+            yield self._add_rectangle(obj)
         elif obj_type == 'circle':
-            self._add_circle(obj)
+            yield self._add_circle(obj)
         elif obj_type == 'text' or obj_type == 'i-text':
-            self._add_text(obj)
+            yield self._add_text(obj)
         elif obj_type == 'group':
-            self._add_group(obj)
+            yield from self._add_group(obj)
         elif obj_type == 'dimension':
-            self._add_dimension(obj)
-        elif obj_type == 'symbol':
-            self._add_symbol(obj)
+            yield from self._add_dimension(obj)
 
     def _add_line(self, obj):
         """Add LINE entity"""
@@ -66,30 +248,25 @@ class DXFExporter:
         x2 = obj.get('x2', x1 + obj.get('width', 100))
         y2 = obj.get('y2', y1)
 
-        layer = obj.get('layer', '0')
-
-        entity = {
+        return {
             'type': 'LINE',
-            'layer': layer,
+            'layer': obj.get('layer', '0'),
             'x1': x1,
             'y1': y1,
             'x2': x2,
             'y2': y2
         }
-        self.entities.append(entity)
 
     def _add_rectangle(self, obj):
-        """Add rectangle as 4 LWPOLYLINE entities"""
+        """Add rectangle as a closed LWPOLYLINE entity"""
         left = obj.get('left', 0)
         top = obj.get('top', 0)
         width = obj.get('width', 100)
         height = obj.get('height', 100)
-        layer = obj.get('layer', '0')
 
-        # Create closed polyline for rectangle
-        entity = {
+        return {
             'type': 'LWPOLYLINE',
-            'layer': layer,
+            'layer': obj.get('layer', '0'),
             'closed': True,
             'vertices': [
                 (left, top),
@@ -98,195 +275,252 @@ class DXFExporter:
                 (left, top + height)
             ]
         }
-        self.entities.append(entity)
 
     def _add_circle(self, obj):
         """Add CIRCLE entity"""
-        # Fabric.js stores circles differently
+        # Fabric.js stores circles by their bounding box corner
         left = obj.get('left', 0)
         top = obj.get('top', 0)
         radius = obj.get('radius', 50)
-        layer = obj.get('layer', '0')
 
-        # Center point
-        cx = left + radius
-        cy = top + radius
-
-        entity = {
+        return {
             'type': 'CIRCLE',
-            'layer': layer,
-            'cx': cx,
-            'cy': cy,
+            'layer': obj.get('layer', '0'),
+            'cx': left + radius,
+            'cy': top + radius,
             'radius': radius
         }
-        self.entities.append(entity)
 
     def _add_text(self, obj):
         """Add TEXT entity"""
-        text_content = obj.get('text', '')
-        left = obj.get('left', 0)
-        top = obj.get('top', 0)
-        font_size = obj.get('fontSize', 12)
-        layer = obj.get('layer', '0')
-        angle = obj.get('angle', 0)
-
-        entity = {
+        return {
             'type': 'TEXT',
-            'layer': layer,
-            'x': left,
-            'y': top,
-            'height': font_size,
-            'text': text_content,
-            'rotation': angle
+            'layer': obj.get('layer', '0'),
+            'x': obj.get('left', 0),
+            'y': obj.get('top', 0),
+            'height': obj.get('fontSize', 12),
+            # DXF values are single lines
+            'text': str(obj.get('text', '')).replace('\r', ' ').replace('\n', ' '),
+            'rotation': obj.get('angle', 0)
         }
-        self.entities.append(entity)
 
     def _add_group(self, obj):
         """Add grouped objects"""
-        objects = obj.get('objects', [])
-        for sub_obj in objects:
-            self._convert_object_to_entity(sub_obj)
+        for sub_obj in obj.get('objects', []):
+            yield from self._convert_object_to_entity(sub_obj)
 
     def _add_dimension(self, obj):
         """Add DIMENSION entity"""
         # DXF dimensions are complex, for now add as lines and text
         # TODO: Implement proper DIMENSION entity
-        pass
+        return ()
 
     def _add_symbol(self, obj):
-        """Add symbol as a BLOCK reference (INSERT)"""
-        symbol_id = obj.get('symbolId', 'unknown')
-        left = obj.get('left', 0)
-        top = obj.get('top', 0)
-        layer = obj.get('layer', '0')
-
-        entity = {
+        """Add symbol as a BLOCK reference (INSERT), defining the block on first use"""
+        symbol_id = str(obj.get('symbolId') or 'unknown')
+        block_name = self.block_names.get(symbol_id)
+        if block_name is None:
+            # Ids that sanitize to the same name ('a b', 'a_b') get numbered blocks
+            base_name = block_name = _BLOCK_NAME_RE.sub('_', symbol_id)
+            suffix = 2
+            while block_name in self.blocks:
+                block_name = f'{base_name}_{suffix}'
+                suffix += 1
+            self.block_names[symbol_id] = block_name
+            self._define_block(block_name, obj)
+
+        return {
             'type': 'INSERT',
-            'layer': layer,
-            'block_name': symbol_id,
-            'x': left,
-            'y': top,
-            'scale_x': 1.0,
-            'scale_y': 1.0,
+            'layer': obj.get('layer', '0'),
+            'block_name': block_name,
+            'x': obj.get('left', 0),
+            'y': obj.get('top', 0),
+            'scale_x': obj.get('scaleX', 1.0),
+            'scale_y': obj.get('scaleY', 1.0),
             'rotation': obj.get('angle', 0)
         }
-        self.entities.append(entity)
 
-    def _build_dxf(self):
-        """Build complete DXF file"""
-        dxf = []
+    def _define_block(self, block_name, obj):
+        """Block geometry from the symbol's child objects, relative to its top-left corner"""
+        width = obj.get('width') or DEFAULT_SYMBOL_SIZE
+        height = obj.get('height') or DEFAULT_SYMBOL_SIZE
+        children = obj.get('objects') or []
+
+        if children:
+            # Fabric.js positions group children relative to the group centre
+            dx, dy = width / 2, height / 2
+            entities = [self._offset(entity, dx, dy)
+                        for child in children
+                        for entity in self._convert_object_to_entity(child)]
+        else:
+            # Symbols placed without geometry (e.g. AI generated) get an outlined marker
+            radius = min(width, height) / 2
+            entities = [
+                {'type': 'LWPOLYLINE', 'closed': True,
+                 'vertices': [(0, 0), (width, 0), (width, height), (0, height)]},
+                {'type': 'CIRCLE', 'cx': width / 2, 'cy': height / 2, 'radius': radius * 0.6},
+            ]
 
-        # HEADER SECTION
-        dxf.append("0\nSECTION\n2\nHEADER")
-        dxf.append("9\n$ACADVER\n1\nAC1009")  # AutoCAD R12
-        dxf.append("9\n$INSBASE\n10\n0.0\n20\n0.0\n30\n0.0")
-        dxf.append("9\n$EXTMIN\n10\n0.0\n20\n0.0\n30\n0.0")
-        dxf.append("9\n$EXTMAX\n10\n1000.0\n20\n1000.0\n30\n0.0")
-        dxf.append("0\nENDSEC")
+        # Block members inherit the INSERT's layer
+        for entity in entities:
+            entity['layer'] = '0'
 
-        # TABLES SECTION
-        dxf.append("0\nSECTION\n2\nTABLES")
+        extents = Extents()
+        for entity in entities:
+            self._extend(extents, entity)
+        self.blocks[block_name] = entities
+        self.block_extents[block_name] = extents
+
+    @staticmethod
+    def _offset(entity, dx, dy):
+        """Translate an entity in place"""
+        entity_type = entity['type']
+        if entity_type == 'LINE':
+            entity.update(x1=_shift(entity['x1'], dx), y1=_shift(entity['y1'], dy),
+                          x2=_shift(entity['x2'], dx), y2=_shift(entity['y2'], dy))
+        elif entity_type == 'CIRCLE':
+            entity.update(cx=_shift(entity['cx'], dx), cy=_shift(entity['cy'], dy))
+        elif entity_type == 'LWPOLYLINE':
+            entity['vertices'] = [(_shift(x, dx), _shift(y, dy)) for x, y in entity['vertices']]
+        elif entity_type in ('TEXT', 'INSERT'):
+            entity.update(x=_shift(entity['x'], dx), y=_shift(entity['y'], dy))
+        return entity
+
+    def _extend(self, extents, entity):
+        """Add an entity's bounding box to extents"""
+        try:
+            self._extend_entity(extents, entity)
+        except TypeError:
+            # Malformed coordinates (null, strings) are written out as before,
+            # they just don't count towards the drawing extents
+            pass
+
+    def _extend_entity(self, extents, entity):
+        entity_type = entity['type']
+        if entity_type == 'LINE':
+            extents.add(entity['x1'], entity['y1'])
+            extents.add(entity['x2'], entity['y2'])
+        elif entity_type == 'CIRCLE':
+            cx, cy, radius = entity['cx'], entity['cy'], entity['radius']
+            extents.add(cx - radius, cy - radius)
+            extents.add(cx + radius, cy + radius)
+        elif entity_type == 'LWPOLYLINE':
+            for x, y in entity['vertices']:
+                extents.add(x, y)
+        elif entity_type == 'TEXT':
+            # Approximate the text box with a 0.6 em average glyph width
+            x, y, height = entity['x'], entity['y'], entity['height']
+            extents.add(x, y)
+            extents.add(x + len(entity['text']) * height * 0.6, y + height)
+        elif entity_type == 'INSERT':
+            block = self.block_extents.get(entity['block_name'])
+            x, y = entity['x'], entity['y']
+            if block is None or block.empty:
+                extents.add(x, y)
+                return
+            sx, sy = entity['scale_x'], entity['scale_y']
+            if entity.get('rotation'):
+                # Bound the rotated block by its farthest corner from the base point
+                reach = max(math.hypot(bx * sx, by * sy)
+                            for bx in (block.min_x, block.max_x)
+                            for by in (block.min_y, block.max_y))
+                extents.add(x - reach, y - reach)
+                extents.add(x + reach, y + reach)
+            else:
+                extents.add(x + block.min_x * sx, y + block.min_y * sy)
+                extents.add(x + block.max_x * sx, y + block.max_y * sy)
+
+    def _iter_sections(self, canvas_objects, extents):
+        """DXF file as a sequence of (group code, value) tag lists"""
+        (min_x, min_y), (max_x, max_y) = extents.bounds()
 
-        # LAYER TABLE
-        dxf.append("0\nTABLE\n2\nLAYER\n70\n{}".format(len(self.layers) + 1))
+        # HEADER SECTION
+        yield [(0, 'SECTION'), (2, 'HEADER'),
+               (9, '$ACADVER'), (1, 'AC1009'),  # AutoCAD R12
+               (9, '$INSBASE'), (10, 0.0), (20, 0.0), (30, 0.0),
+               (9, '$EXTMIN'), (10, float(min_x)), (20, float(min_y)), (30, 0.0),
+               (9, '$EXTMAX'), (10, float(max_x)), (20, float(max_y)), (30, 0.0),
+               (0, 'ENDSEC')]
 
-        # Default layer
-        dxf.append("0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS")
+        # TABLES SECTION
+        yield [(0, 'SECTION'), (2, 'TABLES')]
 
-        # Add custom layers
+        # LAYER TABLE, default layer first
+        layer_tags = [(0, 'TABLE'), (2, 'LAYER'), (70, len(self.layers) + 1),
+                      (0, 'LAYER'), (2, '0'), (70, 0), (62, 7), (6, 'CONTINUOUS')]
         for layer in self.layers:
             layer_name = layer.get('name', 'LAYER')
             color = self._color_to_aci(layer.get('color', '#FFFFFF'))
-            dxf.append(f"0\nLAYER\n2\n{layer_name}\n70\n0\n62\n{color}\n6\nCONTINUOUS")
-
-        dxf.append("0\nENDTAB")
+            layer_tags += [(0, 'LAYER'), (2, layer_name), (70, 0), (62, color), (6, 'CONTINUOUS')]
+        layer_tags.append((0, 'ENDTAB'))
+        yield layer_tags
 
         # STYLE TABLE (for text)
-        dxf.append("0\nTABLE\n2\nSTYLE\n70\n1")
-        dxf.append("0\nSTYLE\n2\nSTANDARD\n70\n0\n40\n0.0\n41\n1.0\n50\n0.0\n71\n0\n42\n0.2\n3\ntxt\n4\n")
-        dxf.append("0\nENDTAB")
-
-        dxf.append("0\nENDSEC")
-
-        # BLOCKS SECTION
-        dxf.append("0\nSECTION\n2\nBLOCKS")
-        # TODO: Add symbol blocks here
-        dxf.append("0\nENDSEC")
+        yield [(0, 'TABLE'), (2, 'STYLE'), (70, 1),
+               (0, 'STYLE'), (2, 'STANDARD'), (70, 0), (40, 0.0), (41, 1.0), (50, 0.0),
+               (71, 0), (42, 0.2), (3, 'txt'), (4, ''),
+               (0, 'ENDTAB'), (0, 'ENDSEC')]
+
+        # BLOCKS SECTION, one definition per symbol type
+        yield [(0, 'SECTION'), (2, 'BLOCKS')]
+        for block_name, entities in self.blocks.items():
+            yield [(0, 'BLOCK'), (8, '0'), (2, block_name), (70, 0),
+                   (10, 0.0), (20, 0.0), (30, 0.0), (3, block_name)]
+            for entity in entities:
+                yield self._entity_tags(entity)
+            yield [(0, 'ENDBLK'), (8, '0')]
+        yield [(0, 'ENDSEC')]
 
         # ENTITIES SECTION
-        dxf.append("0\nSECTION\n2\nENTITIES")
-
-        for entity in self.entities:
-            dxf.append(self._entity_to_dxf(entity))
-
-        dxf.append("0\nENDSEC")
+        yield [(0, 'SECTION'), (2, 'ENTITIES')]
+        for entity in self.iter_entities(canvas_objects):
+            yield self._entity_tags(entity)
+        yield [(0, 'ENDSEC')]
 
         # EOF
-        dxf.append("0\nEOF")
+        yield [(0, 'EOF')]
 
-        return "\n".join(dxf)
-
-    def _entity_to_dxf(self, entity):
-        """Convert entity dictionary to DXF string"""
+    def _entity_tags(self, entity):
+        """Convert entity dictionary to DXF (group code, value) tags"""
         entity_type = entity['type']
         layer = entity.get('layer', '0')
 
         if entity_type == 'LINE':
-            return (
-                f"0\nLINE\n"
-                f"8\n{layer}\n"
-                f"10\n{entity['x1']}\n"
-                f"20\n{entity['y1']}\n"
-                f"30\n0.0\n"
-                f"11\n{entity['x2']}\n"
-                f"21\n{entity['y2']}\n"
-                f"31\n0.0"
-            )
+            return [(0, 'LINE'), (8, layer),
+                    (10, entity['x1']), (20, entity['y1']), (30, 0.0),
+                    (11, entity['x2']), (21, entity['y2']), (31, 0.0)]
 
         elif entity_type == 'CIRCLE':
-            return (
-                f"0\nCIRCLE\n"
-                f"8\n{layer}\n"
-                f"10\n{entity['cx']}\n"
-                f"20\n{entity['cy']}\n"
-                f"30\n0.0\n"
-                f"40\n{entity['radius']}"
-            )
+            return [(0, 'CIRCLE'), (8, layer),
+                    (10, entity['cx']), (20, entity['cy']), (30, 0.0),
+                    (40, entity['radius'])]
 
         elif entity_type == 'LWPOLYLINE':
             vertices = entity['vertices']
-            closed = entity.get('closed', False)
-            poly_dxf = f"0\nLWPOLYLINE\n8\n{layer}\n90\n{len(vertices)}\n70\n{'1' if closed else '0'}\n"
+            tags = [(0, 'LWPOLYLINE'), (8, layer), (90, len(vertices)),
+                    (70, 1 if entity.get('closed', False) else 0)]
             for x, y in vertices:
-                poly_dxf += f"10\n{x}\n20\n{y}\n"
-            return poly_dxf
+                tags.append((10, x))
+                tags.append((20, y))
+            return tags
 
         elif entity_type == 'TEXT':
-            return (
-                f"0\nTEXT\n"
-                f"8\n{layer}\n"
-                f"10\n{entity['x']}\n"
-                f"20\n{entity['y']}\n"
-                f"30\n0.0\n"
-                f"40\n{entity['height']}\n"
-                f"1\n{entity['text']}\n"
-                f"50\n{entity.get('rotation', 0)}"
-            )
+            return [(0, 'TEXT'), (8, layer),
+                    (10, entity['x']), (20, entity['y']), (30, 0.0),
+                    (40, entity['height']), (1, entity['text']),
+                    (50, entity.get('rotation', 0))]
 
         elif entity_type == 'INSERT':
-            return (
-                f"0\nINSERT\n"
-                f"8\n{layer}\n"
-                f"2\n{entity['block_name']}\n"
-                f"10\n{entity['x']}\n"
-                f"20\n{entity['y']}\n"
-                f"30\n0.0\n"
-                f"41\n{entity['scale_x']}\n"
-                f"42\n{entity['scale_y']}\n"
-                f"50\n{entity.get('rotation', 0)}"
-            )
-
-        return ""
+            tags = [(0, 'INSERT'), (8, layer), (2, entity['block_name']),
+                    (10, entity['x']), (20, entity['y']), (30, 0.0)]
+            # Scale and rotation are optional; omit the defaults to keep instances small
+            if entity['scale_x'] != 1 or entity['scale_y'] != 1:
+                tags += [(41, entity['scale_x']), (42, entity['scale_y'])]
+            if entity.get('rotation'):
+                tags.append((50, entity['rotation']))
+            return tags
+
+        return []
 
     def _color_to_aci(self, hex_color):
         """Convert hex color to AutoCAD Color Index (ACI)"""
@@ -302,27 +536,50 @@ class DXFExporter:
         return color_map.get(hex_color, 7)  # Default to white
 
 
-def export_to_dxf(cad_data):
+def export_data(cad_data):
+    """Exporter input from a CAD session payload"""
+    # Extract objects from canvas state
+    canvas_state = cad_data.get('canvas_state', {})
+    objects = canvas_state.get('objects', [])
+
+    return {
+        'layers': cad_data.get('layers', []),
+        'objects': objects,
+        'metadata': cad_data.get('metadata', {})
+    }
+
+
+def export_to_dxf(cad_data, binary=False):
     """
     Main export function
 
     Args:
         cad_data: Dictionary with canvas_state, layers, metadata
+        binary: Produce binary DXF bytes instead of ASCII text
 
     Returns:
-        DXF file content as string
+        DXF file content as string (bytes when binary)
     """
-    exporter = DXFExporter()
+    return DXFExporter().generate_dxf(export_data(cad_data), binary=binary)
 
-    # Extract objects from canvas state
-    canvas_state = cad_data.get('canvas_state', {})
-    objects = canvas_state.get('objects', [])
 
-    # Prepare data for exporter
-    export_data = {
-        'layers': cad_data.get('layers', []),
-        'objects': objects,
-        'metadata': cad_data.get('metadata', {})
-    }
+def stream_dxf(cad_data, chunk_size=CHUNK_SIZE, binary=False):
+    """
+    Generate the DXF file for a CAD session payload in chunks
 
-    return exporter.generate_dxf(export_data)
+    Args:
+        cad_data: Dictionary with canvas_state, layers, metadata
+        chunk_size: Target chunk length
+        binary: Yield binary DXF bytes instead of ASCII text
+    """
+    return DXFExporter().iter_dxf(export_data(cad_data), chunk_size, binary=binary)
+
+
+def write_dxf(cad_data, fp, binary=False):
+    """
+    Stream the DXF file for a CAD session payload into fp
+
+    Returns:
+        Number of characters (bytes when binary) written
+    """
+    return DXFExporter().write(export_data(cad_data), fp, binary=binary)
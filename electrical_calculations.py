@@ -8,9 +8,17 @@ Provides circuit calculations for:
 - Voltage drop calculations
 - Circuit breaker sizing
 - RCD requirements
+
+Whole-panel and whole-building schedules are sized in one vectorized
+pass: cable and breaker tables are sorted once, the smallest cable that
+carries each load is found with searchsorted, and voltage drop is checked
+for every circuit x cable size by broadcasting.
 """
 
 import math
+from functools import lru_cache
+
+import numpy as np
 
 
 class ElectricalCalculator:
@@ -58,6 +66,9 @@ class ElectricalCalculator:
     MAX_VOLTAGE_DROP_PERCENT = 5.0
     MAX_VOLTAGE_DROP_VOLTS = NOMINAL_VOLTAGE * (MAX_VOLTAGE_DROP_PERCENT / 100)
 
+    # Standard MCB ratings (AS/NZS 60898)
+    STANDARD_BREAKER_RATINGS = [6, 10, 16, 20, 25, 32, 40, 50, 63]
+
     def __init__(self):
         pass
 
@@ -199,8 +210,7 @@ class ElectricalCalculator:
         Returns:
             Dict with breaker_rating, type, compliant
         """
-        # Standard MCB ratings (AS/NZS 60898)
-        standard_ratings = [6, 10, 16, 20, 25, 32, 40, 50, 63]
+        standard_ratings = self.STANDARD_BREAKER_RATINGS
 
         # Get cable current capacity
         cable_capacity = self.CABLE_CURRENT_CAPACITY.get(cable_size, 0)
@@ -231,6 +241,118 @@ class ElectricalCalculator:
                 'error': 'No suitable breaker found'
             }
 
+    def select_cables(self, load_amps, length_meters):
+        """
+        Vectorized size_cable for N circuits
+
+        Args:
+            load_amps: Array of design load currents (A)
+            length_meters: Array of cable run lengths (m)
+
+        Returns:
+            Dict of arrays: index into cable_tables() sizes (-1 when no
+            cable carries the load), max_current, voltage_drop_volts,
+            voltage_drop_percent, compliant
+        """
+        sizes, capacity, resistance = cable_tables()
+        load = np.asarray(load_amps, dtype=float)
+        length = np.asarray(length_meters, dtype=float)
+        count = len(sizes)
+
+        # Smallest cable whose capacity carries the load (capacity ascends with size)
+        first = np.searchsorted(capacity, load, side='left')
+
+        # Voltage drop of every circuit on every size, same arithmetic as calculate_voltage_drop
+        drop = load[:, None] * ((resistance[None, :] * length[:, None] * 2) / 1000)
+        ok = (np.arange(count)[None, :] >= first[:, None]) & (drop <= self.MAX_VOLTAGE_DROP_VOLTS)
+
+        # Smallest compliant size, else the smallest that carries the load
+        compliant = ok.any(axis=1)
+        index = np.where(compliant, ok.argmax(axis=1), first)
+        found = index < count
+        chosen = np.minimum(index, count - 1)
+        voltage_drop = np.where(found, drop[np.arange(len(load)), chosen], 0.0)
+
+        return {
+            'index': np.where(found, index, -1),
+            'max_current': np.where(found, capacity[chosen], 0.0),
+            'voltage_drop_volts': voltage_drop,
+            'voltage_drop_percent': (voltage_drop / self.NOMINAL_VOLTAGE) * 100,
+            'compliant': compliant,
+        }
+
+    def select_breakers(self, design_load_amps, cable_capacity):
+        """
+        Vectorized size_circuit_breaker for N circuits
+
+        Args:
+            design_load_amps: Array of design load currents (A)
+            cable_capacity: Array of selected cable capacities (A, 0 for none)
+
+        Returns:
+            (ratings array, compliant array); ratings are 0 where no breaker fits
+        """
+        ratings = np.asarray(self.STANDARD_BREAKER_RATINGS)
+        index = np.searchsorted(ratings, np.asarray(design_load_amps, dtype=float), side='left')
+        chosen = ratings[np.minimum(index, len(ratings) - 1)]
+        compliant = (index < len(ratings)) & (chosen <= np.asarray(cable_capacity, dtype=float))
+        return np.where(compliant, chosen, 0), compliant
+
+    def size_circuits(self, design_load_amps, length_meters):
+        """
+        Cable and breaker selections for N circuits given as arrays
+
+        Returns:
+            List of (cable dict, breaker dict) shaped like size_cable and
+            size_circuit_breaker results
+        """
+        sizes = cable_tables()[0]
+        cables = self.select_cables(design_load_amps, length_meters)
+        ratings, breaker_ok = self.select_breakers(design_load_amps, cables['max_current'])
+
+        results = []
+        for index, max_current, drop, drop_percent, compliant, rating, breaker_compliant in zip(
+                cables['index'].tolist(), cables['max_current'].tolist(),
+                cables['voltage_drop_volts'].tolist(), cables['voltage_drop_percent'].tolist(),
+                cables['compliant'].tolist(), ratings.tolist(), breaker_ok.tolist()):
+            if index < 0:
+                cable = {
+                    'size': 'ERROR',
+                    'max_current': 0,
+                    'voltage_drop_volts': 0,
+                    'voltage_drop_percent': 0,
+                    'compliant': False,
+                    'error': 'No cable size suitable for this load'
+                }
+            else:
+                size = sizes[index]
+                cable = {
+                    'size': size,
+                    'max_current': self.CABLE_CURRENT_CAPACITY[size],
+                    'voltage_drop_volts': drop,
+                    'voltage_drop_percent': drop_percent,
+                    'compliant': compliant
+                }
+
+            if breaker_compliant:
+                breaker = {
+                    'rating': rating,
+                    'type': 'MCB',
+                    'curve': 'C',  # Type C for general use
+                    'compliant': True,
+                    'standard': 'AS/NZS 60898'
+                }
+            else:
+                breaker = {
+                    'rating': None,
+                    'type': 'MCB',
+                    'curve': 'C',
+                    'compliant': False,
+                    'error': 'No suitable breaker found'
+                }
+            results.append((cable, breaker))
+        return results
+
     def check_rcd_requirement(self, circuit_type, location):
         """
         Check if RCD (safety switch) is required
@@ -276,27 +398,18 @@ class ElectricalCalculator:
         Returns:
             List of circuit calculations with all parameters
         """
-        schedule = []
+        loads = [self.calculate_load(circuit.get('devices', [])) for circuit in circuits]
+        lengths = [circuit.get('length_meters', 20) for circuit in circuits]
 
-        for idx, circuit in enumerate(circuits):
+        # Size every cable and breaker in one vectorized pass
+        sized = self.size_circuits([load['design_load_amps'] for load in loads], lengths)
+
+        schedule = []
+        for idx, (circuit, load_calc, length, (cable, breaker)) in enumerate(zip(circuits, loads, lengths, sized)):
             circuit_no = circuit.get('circuit_number', idx + 1)
             description = circuit.get('description', f'Circuit {circuit_no}')
-            devices = circuit.get('devices', [])
-            length = circuit.get('length_meters', 20)
             location = circuit.get('location', 'general')
 
-            # Calculate load
-            load_calc = self.calculate_load(devices)
-
-            # Size cable
-            cable = self.size_cable(load_calc['design_load_amps'], length)
-
-            # Size breaker
-            breaker = self.size_circuit_breaker(
-                load_calc['design_load_amps'],
-                cable.get('size', '2.5')
-            )
-
             # Check RCD requirement
             rcd = self.check_rcd_requirement(description, location)
 
@@ -321,6 +434,20 @@ class ElectricalCalculator:
         return schedule
 
 
+@lru_cache(maxsize=1)
+def cable_tables():
+    """
+    Cable sizes sorted ascending with matching capacity and resistance arrays
+
+    Returns:
+        (sizes list, current capacity array, resistance per km array)
+    """
+    sizes = sorted(ElectricalCalculator.CABLE_CURRENT_CAPACITY, key=float)
+    capacity = np.array([ElectricalCalculator.CABLE_CURRENT_CAPACITY[size] for size in sizes], dtype=float)
+    resistance = np.array([ElectricalCalculator.CABLE_RESISTANCE.get(size, 0) for size in sizes], dtype=float)
+    return sizes, capacity, resistance
+
+
 # Convenience function for API use
 def calculate_circuit(devices, length_meters=20, circuit_type='power', location='general'):
     """
@@ -349,3 +476,32 @@ def calculate_circuit(devices, length_meters=20, circuit_type='power', location=
         'rcd': rcd,
         'compliant': cable.get('compliant', False) and breaker.get('compliant', False)
     }
+
+
+def calculate_circuits(circuits):
+    """
+    Calculate circuit parameters for many circuits at once
+
+    Args:
+        circuits: List of dicts with devices, length_meters, circuit_type, location
+
+    Returns:
+        List of dicts shaped like calculate_circuit results, in input order
+    """
+    calc = ElectricalCalculator()
+
+    loads = [calc.calculate_load(circuit.get('devices', [])) for circuit in circuits]
+    sized = calc.size_circuits([load['design_load_amps'] for load in loads],
+                               [circuit.get('length_meters', 20) for circuit in circuits])
+
+    results = []
+    for circuit, load, (cable, breaker) in zip(circuits, loads, sized):
+        rcd = calc.check_rcd_requirement(circuit.get('circuit_type', 'power'), circuit.get('location', 'general'))
+        results.append({
+            'load': load,
+            'cable': cable,
+            'breaker': breaker,
+            'rcd': rcd,
+            'compliant': cable.get('compliant', False) and breaker.get('compliant', False)
+        })
+    return results
@@ -1,5 +1,5 @@
 bind = "0.0.0.0:10000"
-workers = 1
+workers = 1  # AI analyses run on background threads (services/job_queue.py)
 timeout = 120
 graceful_timeout = 120
 keepalive = 5
@@ -24,92 +24,8 @@ class AIContextService:
     def get_business_summary(self) -> Dict[str, Any]:
         """Get a high-level summary of the business for AI context."""
         try:
-            from database.models import (
-                Customer, Project, Quote, Job, InventoryItem,
-                Payment, CalendarEvent, KanbanTask
-            )
-            
-            # Count active entities
-            customer_count = self.session.query(func.count(Customer.id)).filter(
-                Customer.organization_id == self.organization_id,
-                Customer.is_active == True
-            ).scalar() or 0
-            
-            project_count = self.session.query(func.count(Project.id)).filter(
-                Project.organization_id == self.organization_id
-            ).scalar() or 0
-            
-            active_project_count = self.session.query(func.count(Project.id)).filter(
-                Project.organization_id == self.organization_id,
-                Project.status == 'in_progress'
-            ).scalar() or 0
-            
-            quote_count = self.session.query(func.count(Quote.id)).filter(
-                Quote.organization_id == self.organization_id
-            ).scalar() or 0
-            
-            pending_quote_count = self.session.query(func.count(Quote.id)).filter(
-                Quote.organization_id == self.organization_id,
-                Quote.status.in_(['draft', 'sent'])
-            ).scalar() or 0
-            
-            # Calculate revenue from quotes
-            total_quote_value = self.session.query(func.sum(Quote.total_amount)).filter(
-                Quote.organization_id == self.organization_id,
-                Quote.status == 'accepted'
-            ).scalar() or 0
-            
-            pending_quote_value = self.session.query(func.sum(Quote.total_amount)).filter(
-                Quote.organization_id == self.organization_id,
-                Quote.status.in_(['draft', 'sent'])
-            ).scalar() or 0
-            
-            # Low stock items
-            low_stock_count = self.session.query(func.count(InventoryItem.id)).filter(
-                InventoryItem.organization_id == self.organization_id,
-                InventoryItem.quantity <= InventoryItem.reorder_level
-            ).scalar() or 0
-            
-            # Upcoming tasks
-            today = datetime.utcnow().date()
-            upcoming_tasks = self.session.query(func.count(KanbanTask.id)).filter(
-                KanbanTask.organization_id == self.organization_id,
-                KanbanTask.archived == False,
-                KanbanTask.column.in_(['todo', 'in_progress'])
-            ).scalar() or 0
-            
-            # Upcoming events
-            upcoming_events = self.session.query(func.count(CalendarEvent.id)).filter(
-                CalendarEvent.organization_id == self.organization_id,
-                CalendarEvent.start_time >= datetime.utcnow(),
-                CalendarEvent.start_time <= datetime.utcnow() + timedelta(days=7)
-            ).scalar() or 0
-            
-            return {
-                'summary_date': datetime.utcnow().isoformat(),
-                'customers': {
-                    'total': customer_count,
-                },
-                'projects': {
-                    'total': project_count,
-                    'active': active_project_count,
-                },
-                'quotes': {
-                    'total': quote_count,
-                    'pending': pending_quote_count,
-                    'total_value': float(total_quote_value),
-                    'pending_value': float(pending_quote_value),
-                },
-                'inventory': {
-                    'low_stock_items': low_stock_count,
-                },
-                'tasks': {
-                    'pending': upcoming_tasks,
-                },
-                'calendar': {
-                    'upcoming_events_7_days': upcoming_events,
-                }
-            }
+            from services.crm_stats import CRMStatsService
+            return CRMStatsService(self.session, self.organization_id).business_summary()
         except Exception as e:
             logger.error(f"Error getting business summary: {e}")
             return {}
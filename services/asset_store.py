@@ -0,0 +1,230 @@
+"""
+Asset Store - Content-addressed copies of floorplans and documents.
+
+Floorplans were inlined into canvas-state JSON as base64 data URLs (a
+third bigger than the PNG, and never cached by the browser), and
+documents were served from mutable URLs. Published files are now
+copied to <root>/<aa>/<sha256><ext>, where the name is the hash of the
+content:
+
+- an asset URL (/assets/<sha256><ext>) never changes meaning, so it is
+  served with a strong ETag (the hash) and Cache-Control: immutable, and
+  a browser that has opened a quote once never downloads its floorplan
+  again
+- publishing the same content twice stores it once
+- files are copied rather than linked because the originals are
+  rewritten in place (a hard link would change under a cached URL)
+- hashing a published file is remembered by (path, mtime, size), so
+  resolving the URL of an unchanged floorplan on every canvas open costs
+  a stat
+- the /assets route can hand the file to the front proxy with
+  X-Sendfile (Apache, lighttpd) or X-Accel-Redirect (nginx) so workers
+  don't stream bytes; Range requests are then served by the proxy
+- the store is bounded (max_bytes): publishing and serving an asset
+  bumps its mtime, and when the store outgrows its cap the least recently
+  used assets are deleted. The originals stay where they are, so an
+  evicted asset is copied back the next time its file is published
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = '/assets/'
+ASSET_NAME = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]{1,8})?$')
+SENDFILE_MODES = ('', 'x-sendfile', 'x-accel-redirect')
+CHUNK_SIZE = 1024 * 1024
+# Eviction frees down to this share of max_bytes, so it doesn't run on every put
+GC_TARGET = 0.9
+SHARD_NAME = re.compile(r'^[0-9a-f]{2}$')
+
+# Global store instances by root folder
+_stores: Dict[str, 'AssetStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    return extension if re.match(r'^\.[a-z0-9]{1,8}$', extension) else ''
+
+
+class AssetStore:
+    """Content-addressed file store for one root folder."""
+
+    def __init__(self, root: str, sendfile: str = '', accel_prefix: str = '/_assets/',
+                 max_remembered: int = 4096, max_bytes: int = 0, min_age: float = 600):
+        if sendfile not in SENDFILE_MODES:
+            raise ValueError(f"Unknown sendfile mode {sendfile!r}")
+        self.root = root
+        self.sendfile = sendfile
+        self.accel_prefix = accel_prefix.rstrip('/') + '/'
+        self.max_remembered = max(1, max_remembered)
+        self.max_bytes = max(0, max_bytes)
+        self.min_age = min_age
+        self._size: Optional[int] = None
+        self._hashes: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.evicted = 0
+        os.makedirs(root, exist_ok=True)
+
+    def relative_path(self, name: str) -> Optional[str]:
+        """Path of an asset under root ('aa/<name>'), or None for a malformed name."""
+        match = ASSET_NAME.match(name or '')
+        if not match:
+            return None
+        return os.path.join(match.group(1)[:2], name)
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Absolute path of a stored asset, or None if it is not in the store."""
+        relative = self.relative_path(name)
+        if relative is None:
+            return None
+        path = os.path.join(self.root, relative)
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def url_for(name: str) -> str:
+        return URL_PREFIX + name
+
+    def touch(self, name: str):
+        """Mark an asset as just used, so eviction keeps it longest."""
+        path = self.path_for(name)
+        if path is None:
+            return
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _store(self, name: str, write):
+        path = os.path.join(self.root, self.relative_path(name))
+        if os.path.exists(path):
+            self.touch(name)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._added(name, os.path.getsize(path))
+
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not SHARD_NAME.match(shard.name) or not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if ASSET_NAME.match(entry.name):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, entry
+
+    def _added(self, name: str, size: int):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._size = self._collect(keep=name)
+
+    def _collect(self, keep: str = '') -> int:
+        entries = sorted(self._entries(), key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * GC_TARGET
+        cutoff = time.time() - self.min_age
+        for mtime, size, entry in entries:
+            # Recently published URLs may not have been fetched yet
+            if total <= target or mtime > cutoff:
+                break
+            if entry.name == keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evicted += 1
+        return total
+
+    def collect(self) -> int:
+        """Evict least recently used assets down to the size cap; returns bytes kept."""
+        with self._lock:
+            self._size = self._collect() if self.max_bytes else sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def put_bytes(self, data: bytes, filename: str = '') -> str:
+        """Store content; returns its asset name (<sha256><ext of filename>)."""
+        name = hashlib.sha256(data).hexdigest() + _extension(filename)
+
+        def write(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        self._store(name, write)
+        return name
+
+    def put_file(self, path: str) -> str:
+        """Store a copy of a file; unchanged files are not re-hashed or re-copied."""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            name = self._hashes.get(key)
+            if name is not None:
+                self._hashes.move_to_end(key)
+        if name is not None and self.path_for(name):
+            self.touch(name)
+            return name
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        name = digest.hexdigest() + _extension(path)
+        self._store(name, lambda tmp_path: shutil.copyfile(path, tmp_path))
+        self.hashed += 1
+
+        with self._lock:
+            self._hashes[key] = name
+            while len(self._hashes) > self.max_remembered:
+                self._hashes.popitem(last=False)
+        return name
+
+    def publish(self, path: str) -> Optional[str]:
+        """URL of a file's asset copy, or None if it can't be published."""
+        try:
+            return self.url_for(self.put_file(path))
+        except OSError as e:
+            logger.error(f"Error publishing asset {path}: {e}")
+            return None
+
+
+def get_asset_store(root: Optional[str] = None) -> AssetStore:
+    """Get or create the asset store for a folder, configured from ASSET_* env vars"""
+    root = root or os.environ.get('ASSET_STORE_DIR', os.path.join('data', 'assets'))
+    key = os.path.abspath(root)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = AssetStore(
+                root,
+                sendfile=os.environ.get('ASSET_SENDFILE', '').lower(),
+                accel_prefix=os.environ.get('ASSET_ACCEL_PREFIX', '/_assets/'),
+                max_bytes=int(float(os.environ.get('ASSET_STORE_MAX_MB', '2048')) * 1024 * 1024),
+            )
+            _stores[key] = store
+    return store
@@ -0,0 +1,227 @@
+"""
+CAD Catalog - Session summaries behind /api/cad/list.
+
+Listing used to json.load every file in CAD_SESSIONS_FOLDER just to read
+the project name, dates and object count, so its cost grew with the size
+of every drawing. Summaries now live in a small SQLite index next to the
+session files:
+
+- /api/cad/new and /api/cad/save upsert the summary of the session they
+  just wrote, along with the file's mtime and size
+- listing is a sorted, paginated query over the index (offset pages with
+  a total, or keyset cursors shaped like services/query_paging.py)
+- files changed outside the API are picked up by sync(), which stats the
+  folder and only re-reads files whose mtime or size no longer match; it
+  runs when a catalog is first opened and on ?refresh=1
+- snapshots may be binary (<id>.cvb) or JSON (<id>.json); when both are
+  present (mid-migration) the binary one is listed
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from services.canvas_codec import CANVAS_EXTENSION, read_canvas_file
+from services.query_paging import decode_cursor, encode_cursor, escape_like
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = 'catalog.sqlite3'
+
+# Session file extensions, preferred first
+SESSION_EXTENSIONS = (CANVAS_EXTENSION, '.json')
+
+SORT_COLUMNS = ('modified_date', 'created_date', 'project_name', 'object_count')
+
+SUMMARY_FIELDS = ('session_id', 'project_name', 'description', 'created_date', 'modified_date', 'object_count')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    project_name TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    created_date TEXT NOT NULL DEFAULT '',
+    modified_date TEXT NOT NULL DEFAULT '',
+    object_count INTEGER NOT NULL DEFAULT 0,
+    file_mtime_ns INTEGER NOT NULL DEFAULT 0,
+    file_size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_modified ON sessions (modified_date, session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_date, session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_name ON sessions (project_name, session_id);
+"""
+
+# Catalogs by sessions folder
+_catalogs: Dict[str, 'CadCatalog'] = {}
+_catalogs_lock = threading.Lock()
+
+
+def session_summary(session: Dict) -> Dict:
+    """Summary fields of a session body."""
+    objects = session.get('objects')
+    if not objects:
+        objects = (session.get('canvas_state') or {}).get('objects')
+    return {
+        'session_id': session.get('session_id'),
+        'project_name': session.get('project_name') or '',
+        'description': session.get('description') or '',
+        'created_date': session.get('created_date') or '',
+        'modified_date': session.get('modified_date') or '',
+        'object_count': len(objects) if isinstance(objects, list) else 0,
+    }
+
+
+class CadCatalog:
+    """SQLite index of CAD session summaries for one sessions folder."""
+
+    def __init__(self, sessions_dir: str, db_path: Optional[str] = None):
+        self.sessions_dir = sessions_dir
+        self.db_path = db_path or os.path.join(sessions_dir, CATALOG_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection committed on success and always closed."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _session_path(self, session_id: str) -> Optional[str]:
+        for extension in SESSION_EXTENSIONS:
+            path = os.path.join(self.sessions_dir, session_id + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def upsert(self, session: Dict, stat: Optional[os.stat_result] = None):
+        """Record the summary of a session that was just written."""
+        summary = session_summary(session)
+        if not summary['session_id']:
+            return
+        if stat is None:
+            path = self._session_path(summary['session_id'])
+            try:
+                stat = os.stat(path) if path else None
+            except OSError:
+                stat = None
+        with self._connect() as conn:
+            self._write(conn, summary, stat)
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, summary: Dict, stat: Optional[os.stat_result]):
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (session_id, project_name, description, created_date, '
+            'modified_date, object_count, file_mtime_ns, file_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [summary[field] for field in SUMMARY_FIELDS]
+            + [stat.st_mtime_ns if stat else 0, stat.st_size if stat else 0])
+
+    def remove(self, session_id: str):
+        """Drop a session from the catalog."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def sync(self) -> Dict:
+        """Reconcile with the folder, re-reading only files whose mtime or size changed."""
+        with self._connect() as conn:
+            known = {row['session_id']: (row['file_mtime_ns'], row['file_size'])
+                     for row in conn.execute('SELECT session_id, file_mtime_ns, file_size FROM sessions')}
+            files = {}
+            if os.path.isdir(self.sessions_dir):
+                for entry in os.scandir(self.sessions_dir):
+                    stem, extension = os.path.splitext(entry.name)
+                    if extension not in SESSION_EXTENSIONS or not entry.is_file():
+                        continue
+                    if stem not in files or extension == SESSION_EXTENSIONS[0]:
+                        files[stem] = entry
+
+            seen = set(files)
+            read = 0
+            for session_id, entry in files.items():
+                stat = entry.stat()
+                if known.get(session_id) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                try:
+                    session = read_canvas_file(entry.path)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error loading session {entry.name}: {e}")
+                    continue
+                # Sessions are loaded by file name, so that is the id to list
+                self._write(conn, dict(session_summary(session), session_id=session_id), stat)
+                read += 1
+
+            stale = [session_id for session_id in known if session_id not in seen]
+            conn.executemany('DELETE FROM sessions WHERE session_id = ?', [(s,) for s in stale])
+        return {'read': read, 'removed': len(stale), 'sessions': len(seen)}
+
+    def list_sessions(self, sort_by: str = 'modified_date', descending: bool = True,
+                      limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                      search: Optional[str] = None) -> Dict:
+        """
+        Sorted page of session summaries
+
+        Returns {'items': [...], 'total': int or None, 'next_cursor': str or None};
+        total is None when paging by cursor, like query_paging.fetch_page.
+        """
+        column = sort_by if sort_by in SORT_COLUMNS else 'modified_date'
+        direction = 'DESC' if descending else 'ASC'
+        where, params = [], []
+        if search:
+            where.append("(project_name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params += [f'%{escape_like(search)}%'] * 2
+        count_where, count_params = list(where), list(params)
+
+        if cursor:
+            value, session_id = decode_cursor(cursor)
+            op = '<' if descending else '>'
+            where.append(f'({column} {op} ? OR ({column} = ? AND session_id {op} ?))')
+            params += [value, value, session_id]
+            offset = 0
+
+        sql = f"SELECT {', '.join(SUMMARY_FIELDS)} FROM sessions"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {column} {direction}, session_id {direction}'
+        if limit is not None:
+            # One extra row tells us whether there is a next page
+            sql += ' LIMIT ? OFFSET ?'
+            params += [limit + 1, max(0, offset)]
+        elif offset:
+            sql += ' LIMIT -1 OFFSET ?'
+            params.append(offset)
+
+        with self._connect() as conn:
+            items: List[Dict] = [dict(row) for row in conn.execute(sql, params)]
+            total = None
+            if not cursor:
+                count_sql = 'SELECT COUNT(*) FROM sessions'
+                if count_where:
+                    count_sql += ' WHERE ' + ' AND '.join(count_where)
+                total = conn.execute(count_sql, count_params).fetchone()[0]
+
+        next_cursor = None
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1][column], items[-1]['session_id'])
+        return {'items': items, 'total': total, 'next_cursor': next_cursor}
+
+
+def get_cad_catalog(sessions_dir: str) -> CadCatalog:
+    """Get or open the catalog for a sessions folder, syncing it on first open"""
+    key = os.path.abspath(sessions_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = CadCatalog(sessions_dir, os.environ.get('CAD_CATALOG_PATH') or None)
+            catalog.sync()
+            _catalogs[key] = catalog
+    return catalog
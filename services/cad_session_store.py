@@ -0,0 +1,443 @@
+"""
+CAD Session Store - Revisioned CAD sessions saved as an op log plus snapshots.
+
+/api/cad/save rewrote the whole session file (pretty-printed) on every
+save, so autosave cost grew with the drawing. Sessions now carry a
+revision and accept patches from /api/cad/patch:
+
+- a patch is a list of object-level ops against a base revision:
+    {"op": "add", "object": {...}, "index": optional position}
+    {"op": "update", "id": ..., "changes": {...}, "unset": [keys]}
+    {"op": "delete", "id": ...}
+    {"op": "set", "field": "project_name" | "metadata" | "layers" | ..., "value": ...}
+    {"op": "reorder", "ids": [every object id, in the new z-order]}
+  objects are addressed by their "id", which the store assigns on load
+  to objects that have none
+- optimistic concurrency: a patch whose base revision is not the current
+  one is rejected with the current revision, and a patch is applied all
+  or nothing
+- each accepted patch is appended to <session_id>.ops.jsonl as one line;
+  every snapshot_every patches (or once the log passes max_log_bytes)
+  the session is written compactly (objects stored once, not again in
+  canvas_state) to <session_id>.cvb with services/canvas_codec.py (or to
+  <session_id>.json with encoding='json') and the log is truncated.
+  Loading replays the log over the snapshot; a snapshot found in the
+  other format is rewritten in the configured one on first load
+- sessions are kept in memory between requests (LRU); the snapshot mtime
+  and log size are checked under an flock on the log, so another worker
+  writing the same session forces a reload instead of a lost update
+
+Full saves through /api/cad/save still work: they replace the snapshot,
+bump the revision and clear the log. A full save that names the revision
+it was based on is rejected like a patch if the session has moved on.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from services.canvas_codec import CANVAS_EXTENSION, read_canvas_file, write_canvas_file
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to the in-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Top-level fields a "set" op may not touch
+RESERVED_FIELDS = ('session_id', 'revision', 'objects', 'canvas_state')
+
+SNAPSHOT_EXTENSIONS = {'binary': CANVAS_EXTENSION, 'json': '.json'}
+
+# Global store instances by sessions folder
+_stores: Dict[str, 'CadSessionStore'] = {}
+_stores_lock = threading.Lock()
+
+
+class SessionNotFound(Exception):
+    """Raised when a session has no snapshot on disk."""
+
+
+class RevisionConflict(Exception):
+    """Raised when a patch was made against an older revision."""
+
+    def __init__(self, revision: int):
+        super().__init__(f"Session is at revision {revision}")
+        self.revision = revision
+
+
+class InvalidPatch(ValueError):
+    """Raised when an op is malformed or refers to a missing object."""
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+def ensure_object_ids(objects: List[Dict]) -> bool:
+    """Give every object a unique id; True if any was assigned."""
+    seen = set()
+    changed = False
+    for obj in objects:
+        if not isinstance(obj, dict):
+            continue
+        object_id = obj.get('id')
+        if object_id is None or object_id in seen:
+            obj['id'] = object_id = f"obj_{uuid.uuid4().hex[:12]}"
+            changed = True
+        seen.add(object_id)
+    return changed
+
+
+class SessionModel:
+    """A session dict with an id index over its objects."""
+
+    def __init__(self, session: Dict):
+        self.session = session
+        objects = session.get('objects')
+        if not isinstance(objects, list):
+            objects = (session.get('canvas_state') or {}).get('objects')
+        session['objects'] = objects if isinstance(objects, list) else []
+        session['revision'] = int(session.get('revision') or 0)
+        self.ids_assigned = ensure_object_ids(session['objects'])
+        self._link_canvas_state()
+        self._reindex()
+
+    @property
+    def revision(self) -> int:
+        return self.session['revision']
+
+    def _reindex(self):
+        self.index = {obj.get('id'): i for i, obj in enumerate(self.session['objects']) if isinstance(obj, dict)}
+
+    def _link_canvas_state(self):
+        # The editor loads canvas_state, so its objects are the session's objects
+        canvas_state = self.session.get('canvas_state')
+        if isinstance(canvas_state, dict):
+            canvas_state['objects'] = self.session['objects']
+
+    def check(self, ops: List[Dict]):
+        """Validate a patch against the current objects without applying it."""
+        if not isinstance(ops, list):
+            raise InvalidPatch('ops must be a list')
+        # Overlay on the index, so checking costs the size of the patch
+        added, deleted = set(), set()
+
+        def present(object_id):
+            return object_id in added or (object_id in self.index and object_id not in deleted)
+
+        for number, op in enumerate(ops):
+            kind = op.get('op') if isinstance(op, dict) else None
+            if kind == 'add':
+                obj = op.get('object')
+                if not isinstance(obj, dict) or not isinstance(obj.get('id'), (str, int)):
+                    raise InvalidPatch(f"op {number}: add needs an object with an id")
+                if present(obj['id']):
+                    raise InvalidPatch(f"op {number}: object {obj['id']} already exists")
+                added.add(obj['id'])
+                deleted.discard(obj['id'])
+            elif kind in ('update', 'delete'):
+                if not isinstance(op.get('id'), (str, int)) or not present(op['id']):
+                    raise InvalidPatch(f"op {number}: object {op.get('id')} not found")
+                if kind == 'delete':
+                    added.discard(op['id'])
+                    deleted.add(op['id'])
+                elif not isinstance(op.get('changes', {}), dict) or not isinstance(op.get('unset', []), list):
+                    raise InvalidPatch(f"op {number}: update needs a changes dict and an unset list")
+                elif 'id' in op.get('changes', {}):
+                    raise InvalidPatch(f"op {number}: object ids cannot be changed")
+            elif kind == 'set':
+                if not isinstance(op.get('field'), str) or op['field'] in RESERVED_FIELDS:
+                    raise InvalidPatch(f"op {number}: field {op.get('field')!r} cannot be set")
+            elif kind == 'reorder':
+                ids = op.get('ids')
+                present_ids = (set(self.index) - deleted) | added
+                if (not isinstance(ids, list) or len(ids) != len(present_ids)
+                        or not all(isinstance(i, (str, int)) for i in ids) or set(ids) != present_ids):
+                    raise InvalidPatch(f"op {number}: reorder needs every object id exactly once")
+            else:
+                raise InvalidPatch(f"op {number}: unknown op {kind!r}")
+
+    def apply(self, ops: List[Dict], revision: int, modified_date: str):
+        """Apply checked ops and move to revision."""
+        objects = self.session['objects']
+        # Deletes leave holes so index positions stay valid; inserts shift them
+        holes = shifted = False
+        for op in ops:
+            kind = op['op']
+            position = op.get('index') if kind == 'add' else None
+            if (shifted and kind in ('update', 'delete', 'reorder')
+                    or holes and (isinstance(position, int) or kind == 'reorder')):
+                self._compact()
+                holes = shifted = False
+
+            if kind == 'add':
+                obj = dict(op['object'])
+                if isinstance(position, int) and 0 <= position < len(objects):
+                    objects.insert(position, obj)
+                    shifted = True
+                else:
+                    objects.append(obj)
+                    self.index[obj['id']] = len(objects) - 1
+            elif kind == 'update':
+                i = self.index[op['id']]
+                obj = dict(objects[i])
+                obj.update(op.get('changes') or {})
+                for key in op.get('unset') or ():
+                    if key != 'id':
+                        obj.pop(key, None)
+                objects[i] = obj
+            elif kind == 'delete':
+                objects[self.index.pop(op['id'])] = None
+                holes = True
+            elif kind == 'reorder':
+                objects[:] = [objects[self.index[object_id]] for object_id in op['ids']]
+                self._reindex()
+            else:
+                self.session[op['field']] = op.get('value')
+        if holes or shifted:
+            self._compact()
+        self.session['revision'] = revision
+        self.session['modified_date'] = modified_date
+
+    def view(self) -> Dict:
+        """Shallow copy safe to serialize after the lock is released."""
+        view = dict(self.session, objects=list(self.session['objects']))
+        if isinstance(view.get('canvas_state'), dict):
+            view['canvas_state'] = dict(view['canvas_state'], objects=view['objects'])
+        return view
+
+    def _compact(self):
+        self.session['objects'][:] = [obj for obj in self.session['objects'] if obj is not None]
+        self._reindex()
+
+
+class _Entry:
+    """A cached session model and the file state it was built from."""
+
+    def __init__(self, model: SessionModel, snapshot_mtime: int, log_size: int, log_patches: int):
+        self.model = model
+        self.snapshot_mtime = snapshot_mtime
+        self.log_size = log_size
+        self.log_patches = log_patches
+
+
+class CadSessionStore:
+    """Snapshot + op log persistence for one CAD sessions folder."""
+
+    def __init__(self, sessions_dir: str, snapshot_every: int = 50,
+                 max_log_bytes: int = 4 * 1024 * 1024, max_cached: int = 16,
+                 encoding: str = 'binary'):
+        if encoding not in SNAPSHOT_EXTENSIONS:
+            raise ValueError(f"Unknown snapshot encoding {encoding!r}")
+        self.sessions_dir = sessions_dir
+        self.encoding = encoding
+        self.snapshot_every = max(1, snapshot_every)
+        self.max_log_bytes = max_log_bytes
+        self.max_cached = max(1, max_cached)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.snapshots = 0
+        self.replays = 0
+        os.makedirs(sessions_dir, exist_ok=True)
+
+    def snapshot_path(self, session_id: str) -> str:
+        """Where the session's snapshot is written in the configured encoding."""
+        return os.path.join(self.sessions_dir, session_id + SNAPSHOT_EXTENSIONS[self.encoding])
+
+    def _snapshot_paths(self, session_id: str) -> List[str]:
+        # The configured format first, then snapshots left in the other one
+        return [self.snapshot_path(session_id)] + [
+            os.path.join(self.sessions_dir, session_id + extension)
+            for encoding, extension in SNAPSHOT_EXTENSIONS.items() if encoding != self.encoding]
+
+    def _stat_snapshot(self, session_id: str):
+        """(path, mtime_ns) of the session's snapshot in either format."""
+        for path in self._snapshot_paths(session_id):
+            try:
+                return path, os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+        raise SessionNotFound(session_id)
+
+    def log_path(self, session_id: str) -> str:
+        return os.path.join(self.sessions_dir, f'{session_id}.ops.jsonl')
+
+    @contextmanager
+    def _locked(self, session_id: str):
+        """In-process lock plus an flock on the session's op log for other workers."""
+        with self._lock:
+            lock = self._locks.setdefault(session_id, threading.Lock())
+        with lock:
+            with open(self.log_path(session_id), 'a+b') as log:
+                if fcntl is not None:
+                    fcntl.flock(log.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield log
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(log.fileno(), fcntl.LOCK_UN)
+
+    def _cache(self, session_id: str, entry: Optional[_Entry]):
+        with self._lock:
+            self._entries.pop(session_id, None)
+            if entry is not None:
+                self._entries[session_id] = entry
+                while len(self._entries) > self.max_cached:
+                    self._entries.popitem(last=False)
+
+    def _entry(self, session_id: str, log) -> _Entry:
+        """The cached model if it still matches the files, else snapshot + log replay."""
+        try:
+            path, snapshot_mtime = self._stat_snapshot(session_id)
+        except SessionNotFound:
+            self._cache(session_id, None)
+            raise
+        log_size = os.fstat(log.fileno()).st_size
+
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+        if entry is not None and (entry.snapshot_mtime, entry.log_size) == (snapshot_mtime, log_size):
+            return entry
+
+        model = SessionModel(read_canvas_file(path))
+        log.seek(0)
+        patches = 0
+        for line in log.read(log_size).splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn final line from an interrupted append
+                logger.error(f"Skipping unreadable op log line for {session_id}")
+                continue
+            if record.get('rev', 0) <= model.revision:
+                continue
+            model.apply(record['ops'], record['rev'], record.get('ts') or _now())
+            patches += 1
+        self.replays += 1
+
+        entry = _Entry(model, snapshot_mtime, log_size, patches)
+        if model.ids_assigned and not patches or path != self.snapshot_path(session_id):
+            # Persist assigned ids so later patches can address these objects,
+            # and move snapshots in the other encoding over to this one
+            self._write_snapshot(session_id, entry, log)
+        self._cache(session_id, entry)
+        return entry
+
+    def _write_snapshot(self, session_id: str, entry: _Entry, log):
+        """Write the session compactly and atomically, then clear the log."""
+        path = self.snapshot_path(session_id)
+        session = entry.model.session
+        canvas_state = session.get('canvas_state')
+        if isinstance(canvas_state, dict):
+            # canvas_state.objects is relinked to objects on load, so it is stored once
+            session = dict(session, canvas_state={k: v for k, v in canvas_state.items() if k != 'objects'})
+        if self.encoding == 'binary':
+            write_canvas_file(path, session)
+        else:
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(_dumps(session))
+            os.replace(tmp_path, path)
+        for stale in self._snapshot_paths(session_id)[1:]:
+            if os.path.exists(stale):
+                os.remove(stale)
+        log.truncate(0)
+        entry.snapshot_mtime = os.stat(path).st_mtime_ns
+        entry.log_size = 0
+        entry.log_patches = 0
+        self.snapshots += 1
+
+    def _require(self, session_id: str):
+        # Checked before locking so unknown ids don't leave empty op logs behind
+        self._stat_snapshot(session_id)
+
+    def load(self, session_id: str) -> Dict:
+        """Current session (snapshot with the op log applied)."""
+        self._require(session_id)
+        with self._locked(session_id) as log:
+            return self._entry(session_id, log).model.view()
+
+    def save(self, session: Dict, base_revision: Optional[int] = None) -> Dict:
+        """
+        Replace a session wholesale (new sessions and full saves).
+
+        With base_revision, the save is rejected with RevisionConflict if the
+        session is no longer at that revision.
+        """
+        session_id = session['session_id']
+        with self._locked(session_id) as log:
+            try:
+                current = self._entry(session_id, log).model.revision
+            except SessionNotFound:
+                current = -1
+            if base_revision is not None and base_revision != current:
+                raise RevisionConflict(current)
+            revision = current + 1
+            session['revision'] = revision
+            entry = _Entry(SessionModel(session), 0, 0, 0)
+            self._write_snapshot(session_id, entry, log)
+            self._cache(session_id, entry)
+            return entry.model.view()
+
+    def patch(self, session_id: str, revision: int, ops: List[Dict]) -> Dict:
+        """Apply ops made against revision; returns a view of the updated session."""
+        self._require(session_id)
+        with self._locked(session_id) as log:
+            entry = self._entry(session_id, log)
+            model = entry.model
+            if revision != model.revision:
+                raise RevisionConflict(model.revision)
+            model.check(ops)
+
+            record = {'rev': model.revision + 1, 'ts': _now(), 'ops': ops}
+            line = (_dumps(record) + '\n').encode('utf-8')
+            log.seek(0, os.SEEK_END)
+            log.write(line)
+            log.flush()
+            model.apply(ops, record['rev'], record['ts'])
+            entry.log_size += len(line)
+            entry.log_patches += 1
+
+            if entry.log_patches >= self.snapshot_every or entry.log_size >= self.max_log_bytes:
+                self._write_snapshot(session_id, entry, log)
+            return model.view()
+
+    def forget(self, session_ids: Optional[Iterable[str]] = None):
+        """Drop cached models (all of them by default)."""
+        with self._lock:
+            if session_ids is None:
+                self._entries.clear()
+            for session_id in session_ids or ():
+                self._entries.pop(session_id, None)
+
+
+def get_cad_session_store(sessions_dir: str) -> CadSessionStore:
+    """Get or create the session store for a folder, configured from CAD_SESSION_* env vars"""
+    key = os.path.abspath(sessions_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = CadSessionStore(
+                sessions_dir,
+                snapshot_every=int(os.environ.get('CAD_SESSION_SNAPSHOT_EVERY', '50')),
+                max_log_bytes=int(float(os.environ.get('CAD_SESSION_MAX_LOG_MB', '4')) * 1024 * 1024),
+                max_cached=int(os.environ.get('CAD_SESSION_CACHE_SIZE', '16')),
+                encoding=os.environ.get('CAD_SESSION_ENCODING', 'binary'),
+            )
+            _stores[key] = store
+    return store
@@ -0,0 +1,503 @@
+"""
+CAD Validation - AS/NZS 3000 checks behind /api/cad/validate.
+
+The route used to return hard-coded passes. Drawings are now parsed into
+devices (symbols) and wires (lines on a *-WIRING-* layer) held in a
+uniform grid, and checked the same way static/validation-engine.js
+does, but in near-linear time:
+
+- clearance: overlapping devices (W001) and devices inside the 1 m
+  switchboard working space (W005), found through grid neighbours
+  instead of comparing every pair
+- connectivity: devices with no wire attached (W007) and wire ends that
+  land on nothing (W008); wires joined end to end or ending on a device
+  form one circuit, with switchboards acting as supply points
+- circuit loading: every circuit is sized in one batch through
+  ElectricalCalculator.size_circuits (E004 overload, W004 voltage drop,
+  W002/W003 point counts)
+- RCD protection per circuit via check_rcd_requirement (E003), and the
+  drawing-wide earth conductor check (E002)
+
+Validation state is kept per session. A call diffs the parsed objects
+against the previous call and only re-runs the local (clearance and
+connectivity) checks for objects that changed and their grid
+neighbours; circuits are regrouped by a linear walk over the cached
+links and sized in one vectorized pass.
+"""
+
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from electrical_calculations import ElectricalCalculator
+
+# Same drawing scale and thresholds as static/validation-engine.js
+PIXELS_PER_METER = 100
+OVERLAP_DISTANCE = 20
+SWITCHBOARD_CLEARANCE = 100
+SNAP_TOLERANCE = 5
+CELL_SIZE = 50
+DEFAULT_SYMBOL_SIZE = 20
+MAX_OUTLETS_PER_CIRCUIT = 10
+MAX_LIGHTS_PER_CIRCUIT = 15
+
+SWITCHBOARD_IDS = ('switchboard',)
+RCD_IDS = ('rcd', 'rcbo')
+
+# Nominal load allowance per point (watts) when the object carries none
+DEVICE_LOADS = {
+    'power-outlet-single': 1000,
+    'power-outlet-double': 2000,
+    'light-ceiling': 115,
+    'light-downlight': 70,
+    'loxone-miniserver': 70,
+    'smoke-detector': 5,
+    'exhaust-fan': 185,
+}
+
+DEVICE = 'device'
+WIRE = 'wire'
+SWITCHBOARD = 'switchboard'
+EARTH = 'earth'
+
+CHECKS = (
+    ('Clearance requirements', ('W001', 'W005')),
+    ('Wire connectivity', ('W007', 'W008', 'W009')),
+    ('Circuit loading', ('E004', 'W002', 'W003')),
+    ('Wire gauge sizing', ('W004',)),
+    ('RCD protection', ('E003',)),
+    ('Earthing compliance', ('E002',)),
+)
+
+# Global validator instance
+_cad_validator = None
+
+
+def drawing_objects(cad_data: Dict) -> List[Dict]:
+    """Objects of a CAD session, saved either flat or as canvas_state."""
+    objects = cad_data.get('objects')
+    if not objects:
+        objects = (cad_data.get('canvas_state') or {}).get('objects')
+    return objects if isinstance(objects, list) else []
+
+
+def _number(value, default=0.0) -> float:
+    if value.__class__ is float or value.__class__ is int:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_object(obj) -> Optional[Tuple]:
+    """
+    Hashable record of the fields validation reads, or None for objects it ignores
+
+    Devices: (DEVICE, symbol id, x0, y0, x1, y1, load watts, location, rcd flag)
+    Wires: (WIRE, x1, y1, x2, y2, layer)
+    """
+    if not isinstance(obj, dict):
+        return None
+    if obj.get('customType') == 'symbol':
+        left, top = _number(obj.get('left')), _number(obj.get('top'))
+        width = _number(obj.get('width'), 0) or DEFAULT_SYMBOL_SIZE
+        height = _number(obj.get('height'), 0) or DEFAULT_SYMBOL_SIZE
+        width *= _number(obj.get('scaleX'), 1.0)
+        height *= _number(obj.get('scaleY'), 1.0)
+        symbol_id = str(obj.get('symbolId') or 'unknown')
+        electrical = obj.get('electrical') if isinstance(obj.get('electrical'), dict) else {}
+        load = obj.get('load', electrical.get('load', DEVICE_LOADS.get(symbol_id, 0)))
+        location = str(obj.get('room') or obj.get('location') or 'general')
+        return (DEVICE, symbol_id, left, top, left + width, top + height,
+                _number(load), location, bool(obj.get('rcd')))
+
+    layer = str(obj.get('layer') or '')
+    if obj.get('customType') == 'wire' or (obj.get('type') == 'line' and 'WIRING' in layer.upper()):
+        x1 = _number(obj.get('x1', obj.get('left')))
+        y1 = _number(obj.get('y1', obj.get('top')))
+        return (WIRE, x1, y1, _number(obj.get('x2'), x1 + _number(obj.get('width'), 100)),
+                _number(obj.get('y2'), y1), layer)
+    return None
+
+
+def _centre(record: Tuple) -> Tuple[float, float]:
+    return (record[2] + record[4]) / 2, (record[3] + record[5]) / 2
+
+
+def _points(record: Tuple) -> Tuple[Tuple[float, float], ...]:
+    """Grid anchor points: a device's centre, a wire's two ends."""
+    if record[0] == DEVICE:
+        return (_centre(record),)
+    return ((record[1], record[2]), (record[3], record[4]))
+
+
+def _is_switchboard(record: Tuple) -> bool:
+    return record[0] == DEVICE and record[1] in SWITCHBOARD_IDS
+
+
+def _issue(code: str, severity: str, message: str, **extra) -> Dict:
+    """Issue shaped like validation-engine.js results."""
+    issue = {'code': code, 'severity': severity, 'message': message}
+    issue.update(extra)
+    return issue
+
+
+class UniformGrid:
+    """Buckets keys by the cells of their anchor points."""
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set] = {}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def insert(self, key, points: Iterable[Tuple[float, float]]):
+        for x, y in points:
+            self.cells.setdefault(self._cell(x, y), set()).add(key)
+
+    def remove(self, key, points: Iterable[Tuple[float, float]]):
+        for x, y in points:
+            cell = self._cell(x, y)
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.cells[cell]
+
+    def near(self, x: float, y: float, radius: float) -> Set:
+        """Keys with an anchor point in any cell within radius of (x, y)."""
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+
+class ValidationState:
+    """Parsed objects, grid, and cached local and circuit results for one drawing."""
+
+    def __init__(self, cell_size: float = CELL_SIZE, calc: Optional[ElectricalCalculator] = None):
+        self.calc = calc or ElectricalCalculator()
+        self.records: Dict[Tuple, Tuple] = {}
+        self.grid = UniformGrid(cell_size)
+        self.links: Dict[Tuple, Set[Tuple]] = {}
+        # Local issues per object, only for objects that have any
+        self.issues: Dict[Tuple, List[Dict]] = {}
+        self.circuit_of: Dict[Tuple, int] = {}
+        self.circuits: Dict[int, Dict] = {}
+        self.kinds: Counter = Counter()
+        self.max_half = DEFAULT_SYMBOL_SIZE / 2
+        self.revalidated = 0
+        self._next_circuit = 0
+        # Concurrent saves of one session must not interleave updates
+        self.lock = threading.Lock()
+
+    @property
+    def link_radius(self) -> float:
+        """Furthest a wire end can be from a device centre and still land on it."""
+        return self.max_half * math.sqrt(2) + SNAP_TOLERANCE
+
+    @property
+    def radius(self) -> float:
+        """Distance beyond which objects cannot affect each other's local checks."""
+        return max(SWITCHBOARD_CLEARANCE, OVERLAP_DISTANCE, self.link_radius)
+
+    def _neighbours(self, record: Tuple, radius: Optional[float] = None) -> Set:
+        radius = radius or self.radius
+        found = set()
+        for x, y in _points(record):
+            found |= self.grid.near(x, y, radius)
+        return found
+
+    def update(self, objects: List[Dict]):
+        """Diff objects against the previous call and recheck what changed."""
+        counts = Counter(record for record in map(parse_object, objects) if record is not None)
+        # Identical objects are told apart by occurrence number
+        keys = {(record, n): record for record, count in counts.items() for n in range(count)}
+
+        removed = [key for key in self.records if key not in keys]
+        added = [key for key in keys if key not in self.records]
+        affected = set(added)
+        # Neighbours only need expanding when some objects are left unchanged
+        expand = len(added) < len(keys)
+        dirty = set()
+
+        for key in removed:
+            record = self.records.pop(key)
+            self.grid.remove(key, _points(record))
+            self.links.pop(key, None)
+            self.issues.pop(key, None)
+            self.kinds[self._kind(record)] -= 1
+            dirty.add(self.circuit_of.pop(key, None))
+            if expand:
+                affected |= self._neighbours(record)
+
+        for key in added:
+            record = keys[key]
+            self.records[key] = record
+            self.grid.insert(key, _points(record))
+            self.kinds[self._kind(record)] += 1
+            if record[0] == DEVICE:
+                self.max_half = max(self.max_half, (record[4] - record[2]) / 2, (record[5] - record[3]) / 2)
+        if expand:
+            for key in added:
+                affected |= self._neighbours(keys[key])
+
+        affected &= self.records.keys()
+        for key in affected:
+            self._check_local(key)
+            dirty.add(self.circuit_of.get(key))
+        self.revalidated = len(affected)
+
+        # Regroup only circuits that lost, gained or relinked an object
+        seeds = set(affected)
+        for circuit_id in dirty:
+            circuit = self.circuits.pop(circuit_id, None)
+            if circuit is not None:
+                seeds.update(key for key in circuit['keys'] if key in self.records)
+        for key in seeds:
+            self.circuit_of.pop(key, None)
+        self._group(seeds)
+
+    @staticmethod
+    def _kind(record: Tuple) -> str:
+        if record[0] == DEVICE:
+            return SWITCHBOARD if record[1] in SWITCHBOARD_IDS else DEVICE
+        return EARTH if 'GROUND' in record[5].upper() else WIRE
+
+    def _check_local(self, key):
+        """Links and clearance/connectivity issues of one object against its grid neighbours."""
+        record = self.records[key]
+        links = set()
+        issues = []
+
+        if record[0] == DEVICE:
+            cx, cy = _centre(record)
+            x, y = round(record[2]), round(record[3])
+            x0, y0 = record[2] - SNAP_TOLERANCE, record[3] - SNAP_TOLERANCE
+            x1, y1 = record[4] + SNAP_TOLERANCE, record[5] + SNAP_TOLERANCE
+            switchboard = _is_switchboard(record)
+            # Only switchboards look out to the working clearance
+            radius = self.radius if switchboard else max(OVERLAP_DISTANCE, self.link_radius)
+            for other in self._neighbours(record, radius):
+                if other == key:
+                    continue
+                target = self.records[other]
+                if target[0] == WIRE:
+                    if any(x0 <= px <= x1 and y0 <= py <= y1 for px, py in _points(target)):
+                        links.add(other)
+                    continue
+                ox, oy = _centre(target)
+                distance = math.hypot(cx - ox, cy - oy)
+                # Overlaps are reported once, by the pair's lower key
+                if distance < OVERLAP_DISTANCE:
+                    if key < other:
+                        issues.append(_issue('W001', 'warning', f"Devices overlap at ({x}, {y})",
+                                             fix='Separate overlapping devices'))
+                elif distance < SWITCHBOARD_CLEARANCE and switchboard and not _is_switchboard(target):
+                    issues.append(_issue('W005', 'warning',
+                                         'Device too close to switchboard. Maintain minimum 1m working clearance',
+                                         standard='AS/NZS 3000 Clause 2.11',
+                                         fix='Move device away from switchboard'))
+            if not links:
+                issues.append(_issue('W007', 'warning', f"{record[1]} at ({x}, {y}) is not connected to any wiring",
+                                     fix='Draw wiring to the device'))
+        else:
+            dangling = False
+            candidates = self._neighbours(record, self.link_radius)
+            for px, py in _points(record):
+                attached = False
+                for other in candidates:
+                    if other == key:
+                        continue
+                    target = self.records[other]
+                    if target[0] == DEVICE:
+                        hit = (target[2] - SNAP_TOLERANCE <= px <= target[4] + SNAP_TOLERANCE
+                               and target[3] - SNAP_TOLERANCE <= py <= target[5] + SNAP_TOLERANCE)
+                    else:
+                        hit = any(math.hypot(px - ex, py - ey) <= SNAP_TOLERANCE for ex, ey in _points(target))
+                    if hit:
+                        links.add(other)
+                        attached = True
+                dangling = dangling or not attached
+            if dangling:
+                issues.append(_issue('W008', 'warning',
+                                     f"Wire end not connected at ({round(record[1])}, {round(record[2])})",
+                                     fix='Terminate the wire on a device or another wire'))
+
+        self.links[key] = links
+        if issues:
+            self.issues[key] = issues
+        else:
+            self.issues.pop(key, None)
+
+    def _group(self, seeds: Iterable[Tuple]):
+        """Connected groups of devices and wires reachable from seeds, split at switchboards."""
+        formed = []
+        for start in seeds:
+            if start in self.circuit_of or _is_switchboard(self.records[start]):
+                continue
+            circuit_id = self._next_circuit
+            self._next_circuit += 1
+            members, devices, length, fed = [start], [], 0.0, False
+            self.circuit_of[start] = circuit_id
+            stack = [start]
+            while stack:
+                key = stack.pop()
+                record = self.records[key]
+                if record[0] == DEVICE:
+                    devices.append(record)
+                else:
+                    length += math.hypot(record[3] - record[1], record[4] - record[2])
+                for other in self.links.get(key, ()):
+                    if _is_switchboard(self.records[other]):
+                        fed = True
+                    elif other not in self.circuit_of:
+                        # Links are symmetric and both ends of a changed link are rechecked,
+                        # so everything reachable here was in a dirty circuit or is new
+                        self.circuit_of[other] = circuit_id
+                        members.append(other)
+                        stack.append(other)
+            circuit = {'keys': members, 'devices': devices, 'length_meters': length / PIXELS_PER_METER, 'fed': fed}
+            self.circuits[circuit_id] = circuit
+            if devices:
+                formed.append(circuit)
+        self._size(formed)
+
+    def _size(self, circuits: List[Dict]):
+        """Loading, cable and RCD issues for newly formed circuits, sized in one batch."""
+        loads = []
+        for circuit in circuits:
+            devices = [{'type': record[1], 'load': record[6]} for record in circuit['devices']]
+            loads.append(self.calc.calculate_load(devices)['design_load_amps'])
+        sized = self.calc.size_circuits(loads, [circuit['length_meters'] for circuit in circuits])
+
+        for circuit, load, (cable, _breaker) in zip(circuits, loads, sized):
+            first = min(circuit['devices'], key=lambda record: (record[2], record[3]))
+            name = f"Circuit at ({round(first[2])}, {round(first[3])})"
+            symbol_ids = [record[1] for record in circuit['devices']]
+            outlets = sum('outlet' in symbol_id for symbol_id in symbol_ids)
+            lights = sum('light' in symbol_id for symbol_id in symbol_ids)
+            issues = []
+
+            if cable['size'] == 'ERROR':
+                issues.append(_issue('E004', 'error', f"{name}: {load:.1f}A design load exceeds every cable size",
+                                     standard='AS/NZS 3008.1.1', fix='Split the circuit'))
+            elif not cable['compliant']:
+                issues.append(_issue('W004', 'warning',
+                                     f"{name}: {cable['voltage_drop_percent']:.1f}% voltage drop over "
+                                     f"{circuit['length_meters']:.1f}m exceeds the 5% limit",
+                                     standard='AS/NZS 3000 Clause 2.2.2',
+                                     fix='Check voltage drop calculation or use larger cable'))
+            if outlets > MAX_OUTLETS_PER_CIRCUIT:
+                issues.append(_issue('W002', 'warning', f"{name}: {outlets} power outlets (max 10 recommended)",
+                                     standard='AS/NZS 3000 guidance', fix='Add additional power circuits'))
+            if lights > MAX_LIGHTS_PER_CIRCUIT:
+                issues.append(_issue('W003', 'warning', f"{name}: {lights} lighting points (max 15 recommended)",
+                                     standard='AS/NZS 3000 guidance', fix='Add additional lighting circuits'))
+
+            circuit_type = 'socket outlet' if outlets else ('lighting' if lights else 'power')
+            protected = any(record[8] or record[1] in RCD_IDS for record in circuit['devices'])
+            if not protected:
+                for location in sorted({record[7] for record in circuit['devices']}):
+                    if self.calc.check_rcd_requirement(circuit_type, location)['required']:
+                        issues.append(_issue('E003', 'error', f"{name}: RCD protection required ({location})",
+                                             standard='AS/NZS 3000 Clause 2.5.2',
+                                             fix='Add RCD or RCBO to protect the circuit'))
+                        break
+
+            circuit['name'] = name
+            circuit['issues'] = issues
+
+    def results(self) -> List[Dict]:
+        """Every current issue: cached local and circuit issues plus the drawing-wide checks."""
+        issues = [issue for object_issues in self.issues.values() for issue in object_issues]
+        has_switchboard = self.kinds[SWITCHBOARD] > 0
+        for circuit in self.circuits.values():
+            if not circuit['devices']:
+                continue
+            issues.extend(circuit['issues'])
+            if has_switchboard and not circuit['fed']:
+                issues.append(_issue('W009', 'warning', f"{circuit['name']} is not connected to a switchboard",
+                                     fix='Run the circuit back to the switchboard'))
+        if (self.kinds[DEVICE] or self.kinds[SWITCHBOARD]) and not self.kinds[EARTH]:
+            issues.append(_issue('E002', 'error', 'No earth wiring detected. All circuits must have earth conductor',
+                                 standard='AS/NZS 3000 Clause 5.4',
+                                 fix='Add earth wiring on GROUND-WIRING-GREEN layer'))
+        return issues
+
+
+class CadValidator:
+    """Validation states for recently validated sessions (LRU bounded)."""
+
+    def __init__(self, max_sessions: int = 32, cell_size: float = CELL_SIZE):
+        self.max_sessions = max(1, max_sessions)
+        self.cell_size = cell_size
+        self.calc = ElectricalCalculator()
+        self._states: "OrderedDict[str, ValidationState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, session_id: Optional[str]) -> ValidationState:
+        if not session_id:
+            return ValidationState(self.cell_size, self.calc)
+        with self._lock:
+            state = self._states.pop(session_id, None) or ValidationState(self.cell_size, self.calc)
+            self._states[session_id] = state
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+            return state
+
+    def forget(self, session_id: str):
+        """Drop a session's cached state."""
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def validate(self, cad_data: Dict, session_id: Optional[str] = None) -> Dict:
+        """Validation results for a drawing, reusing the session's previous state."""
+        state = self._state(session_id)
+        with state.lock:
+            state.update(drawing_objects(cad_data))
+            issues = state.results()
+            objects = len(state.records)
+            revalidated = state.revalidated
+
+        errors = [issue for issue in issues if issue['severity'] == 'error']
+        warnings = [issue for issue in issues if issue['severity'] == 'warning']
+        found = Counter(issue['code'] for issue in issues)
+        checks = []
+        for name, codes in CHECKS:
+            if any(found[code] for code in codes if code.startswith('E')):
+                status = 'fail'
+            elif any(found[code] for code in codes):
+                status = 'warning'
+            else:
+                status = 'pass'
+            checks.append({'check': name, 'status': status, 'issues': sum(found[code] for code in codes)})
+
+        return {
+            'valid': not errors,
+            'errors': errors,
+            'warnings': warnings,
+            'checks_performed': checks,
+            'objects_checked': objects,
+            'objects_revalidated': revalidated,
+        }
+
+
+def get_cad_validator() -> CadValidator:
+    """Get or create the CAD validator configured from CAD_VALIDATION_* env vars"""
+    global _cad_validator
+    if _cad_validator is None:
+        _cad_validator = CadValidator(
+            max_sessions=int(os.environ.get('CAD_VALIDATION_MAX_SESSIONS', '32')),
+            cell_size=float(os.environ.get('CAD_VALIDATION_CELL_SIZE', str(CELL_SIZE))),
+        )
+    return _cad_validator
@@ -0,0 +1,389 @@
+"""
+Canvas Codec - Compact binary encoding for Fabric.js canvas states and CAD sessions.
+
+Canvas states, quote canvas files and CAD session snapshots were stored as
+JSON, so every object repeated its keys ("left", "top", "stroke", ...) and
+style strings, and every coordinate was written out as decimal text. The
+encoded form is:
+
+    b'LZCV' | version byte | compression byte | compressed body
+
+and the body holds four sections, each length-prefixed with a varint:
+
+- strings: every key and string value once (interned); values refer to
+  them by index, so repeated layer names and colours cost a byte or two
+- shapes: the distinct key tuples of the dicts (one per object kind), so
+  a dict is written as its shape index followed by its values
+- floats: every float as a float64 array, byte-shuffled (all first bytes,
+  then all second bytes, ...) so the compressor sees the slowly varying
+  sign/exponent bytes together
+- values: a tagged value stream; small ints are one byte, larger ints
+  are varints under a sign tag, floats are one tag byte pointing into
+  the array
+
+The body is compressed with zlib, which every host can read. zstd is
+an explicit opt-in (compression=ZSTD) for deployments that install the
+zstandard package everywhere; such data is decoded wherever zstandard is
+importable. Decoding is lossless: decode(encode(x)) == x for
+anything json.dumps accepts (tuples come back as lists, like JSON).
+
+decode_canvas() also accepts plain JSON, so callers can switch to the
+binary form without a flag day; read_canvas_file() works on either kind of
+file and migrate_canvas_folder() converts a folder of .json files. From
+the command line:
+
+    python -m services.canvas_codec migrate data/crm/canvas_states
+"""
+
+import json
+import logging
+import os
+import sys
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LZCV'
+VERSION = 1
+CANVAS_EXTENSION = '.cvb'
+
+# Compression byte in the header
+RAW, ZLIB, ZSTD = 0, 1, 2
+ZLIB_LEVEL = 6
+DEFAULT_COMPRESSION = ZLIB
+ZSTD_LEVEL = 9
+
+# Value tags; 0x80-0xFF are the ints 0-127
+T_NULL, T_FALSE, T_TRUE, T_INT, T_NEG_INT, T_FLOAT, T_STR, T_LIST, T_DICT = range(9)
+SMALL_INT = 0x80
+
+
+class CanvasDecodeError(ValueError):
+    """Raised when encoded canvas data is truncated, corrupt or unsupported."""
+
+
+def _varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _shuffle(floats: List[float]) -> bytes:
+    if not floats:
+        return b''
+    return np.asarray(floats, dtype='<f8').view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _unshuffle(data: bytes, count: int) -> List[float]:
+    if not count:
+        return []
+    return np.frombuffer(data, dtype=np.uint8).reshape(8, count).T.copy().view('<f8').ravel().tolist()
+
+
+def is_encoded(data: bytes) -> bool:
+    """True if data starts with the canvas codec header."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def encode_canvas(value: Any, compression: Optional[int] = None) -> bytes:
+    """Encode a JSON-compatible value (canvas state, session) to compact bytes."""
+    strings: Dict[str, int] = {}
+    shapes: Dict[tuple, int] = {}
+    floats: List[float] = []
+    out = bytearray()
+    append = out.append
+
+    def string_ref(s):
+        ref = strings.get(s)
+        if ref is None:
+            ref = strings[s] = len(strings)
+        return ref
+
+    def encode(v):
+        # Ordered by how often each type shows up in Fabric.js objects
+        t = type(v)
+        if t is float:
+            append(T_FLOAT)
+            floats.append(v)
+        elif t is str:
+            append(T_STR)
+            _varint(out, string_ref(v))
+        elif t is int:
+            if 0 <= v < 0x80:
+                append(SMALL_INT | v)
+            elif v >= 0:
+                append(T_INT)
+                _varint(out, v)
+            else:
+                append(T_NEG_INT)
+                _varint(out, -v - 1)
+        elif t is dict:
+            keys = tuple(k if type(k) is str else json.dumps(k) for k in v)
+            shape = shapes.get(keys)
+            if shape is None:
+                shape = shapes[keys] = len(shapes)
+                for key in keys:
+                    string_ref(key)
+            append(T_DICT)
+            _varint(out, shape)
+            for item in v.values():
+                encode(item)
+        elif t is list or t is tuple:
+            append(T_LIST)
+            _varint(out, len(v))
+            for item in v:
+                encode(item)
+        elif v is None:
+            append(T_NULL)
+        elif v is True:
+            append(T_TRUE)
+        elif v is False:
+            append(T_FALSE)
+        elif isinstance(v, (bool, int, float, str, dict, list, tuple)):
+            # Subclasses (IntEnum, OrderedDict, ...) encode as their JSON base type
+            encode(json.loads(json.dumps(v)))
+        else:
+            raise TypeError(f"Object of type {t.__name__} is not JSON serializable")
+
+    encode(value)
+
+    body = bytearray()
+    _varint(body, len(strings))
+    for s in strings:
+        raw = s.encode('utf-8', 'surrogatepass')
+        _varint(body, len(raw))
+        body += raw
+    _varint(body, len(shapes))
+    for keys in shapes:
+        _varint(body, len(keys))
+        for key in keys:
+            _varint(body, strings[key])
+    _varint(body, len(floats))
+    body += _shuffle(floats)
+    _varint(body, len(out))
+    body += out
+
+    if compression is None:
+        compression = DEFAULT_COMPRESSION
+    if compression == ZSTD:
+        if zstandard is None:
+            raise ValueError('zstd compression requires the zstandard package')
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(bytes(body))
+    elif compression == ZLIB:
+        payload = zlib.compress(bytes(body), ZLIB_LEVEL)
+    else:
+        payload = bytes(body)
+    return MAGIC + bytes((VERSION, compression)) + payload
+
+
+def decode_canvas(data: bytes) -> Any:
+    """Decode bytes from encode_canvas(); plain JSON (bytes or str) is parsed as JSON."""
+    if isinstance(data, str):
+        return json.loads(data)
+    if not is_encoded(data):
+        return json.loads(data)
+    if len(data) < len(MAGIC) + 2 or data[len(MAGIC)] != VERSION:
+        raise CanvasDecodeError('Unsupported canvas encoding version')
+
+    compression = data[len(MAGIC) + 1]
+    payload = bytes(data[len(MAGIC) + 2:])
+    try:
+        if compression == ZSTD:
+            if zstandard is None:
+                raise CanvasDecodeError('Canvas data is zstd-compressed but zstandard is not installed')
+            body = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression == ZLIB:
+            body = zlib.decompress(payload)
+        elif compression == RAW:
+            body = payload
+        else:
+            raise CanvasDecodeError(f'Unknown canvas compression {compression}')
+        return _decode_body(body)
+    except CanvasDecodeError:
+        raise
+    except Exception as e:
+        # zlib.error, zstandard.ZstdError, IndexError from a short stream, ...
+        raise CanvasDecodeError(f'Corrupt canvas data: {e}') from e
+
+
+def _decode_body(body: bytes) -> Any:
+    pos = 0
+
+    def varint():
+        nonlocal pos
+        byte = body[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        n, shift = byte & 0x7F, 7
+        while True:
+            byte = body[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def section(size):
+        nonlocal pos
+        if pos + size > len(body):
+            raise CanvasDecodeError('Truncated canvas data')
+        chunk = body[pos:pos + size]
+        pos += size
+        return chunk
+
+    strings = []
+    for _ in range(varint()):
+        strings.append(section(varint()).decode('utf-8', 'surrogatepass'))
+    shapes = []
+    for _ in range(varint()):
+        shapes.append(tuple(strings[varint()] for _ in range(varint())))
+    count = varint()
+    floats = _unshuffle(section(count * 8), count)
+    values = section(varint())
+    pos = 0
+    next_float = 0
+
+    def decode():
+        nonlocal pos, next_float
+        tag = values[pos]
+        pos += 1
+        if tag >= SMALL_INT:
+            return tag & 0x7F
+        if tag == T_FLOAT:
+            v = floats[next_float]
+            next_float += 1
+            return v
+        if tag == T_STR:
+            return strings[value_varint()]
+        if tag == T_DICT:
+            keys = shapes[value_varint()]
+            return {key: decode() for key in keys}
+        if tag == T_LIST:
+            return [decode() for _ in range(value_varint())]
+        if tag == T_INT:
+            return value_varint()
+        if tag == T_NEG_INT:
+            return -value_varint() - 1
+        if tag == T_NULL:
+            return None
+        if tag == T_TRUE:
+            return True
+        if tag == T_FALSE:
+            return False
+        raise CanvasDecodeError(f'Unknown value tag {tag}')
+
+    def value_varint():
+        nonlocal pos
+        byte = values[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        n, shift = byte & 0x7F, 7
+        while True:
+            byte = values[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    value = decode()
+    if pos != len(values) or next_float != len(floats):
+        raise CanvasDecodeError('Trailing canvas data')
+    return value
+
+
+def read_canvas_file(path: str) -> Any:
+    """Load a canvas/session file in either the binary or the legacy JSON format."""
+    with open(path, 'rb') as f:
+        return decode_canvas(f.read())
+
+
+def write_canvas_file(path: str, value: Any, compression: Optional[int] = None) -> int:
+    """Encode value to path atomically; returns the number of bytes written."""
+    data = encode_canvas(value, compression)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def canvas_file_candidates(folder: str, filename: str) -> List[str]:
+    """Paths to try for a canvas file name: the binary file first, then the name as given."""
+    stem = os.path.splitext(filename)[0]
+    paths = [os.path.join(folder, stem + CANVAS_EXTENSION)]
+    if not filename.endswith(CANVAS_EXTENSION):
+        paths.append(os.path.join(folder, filename))
+    return paths
+
+
+def migrate_canvas_folder(folder: str, remove_json: bool = True) -> Dict:
+    """
+    Convert every <name>.json in folder to <name>.cvb
+
+    Each file is checked to decode back to the same value before the JSON
+    original is removed. Files that fail to parse are left alone.
+    """
+    converted = skipped = failed = bytes_before = bytes_after = 0
+    if not os.path.isdir(folder):
+        return {'converted': 0, 'skipped': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.name.endswith('.json') or not entry.is_file():
+            continue
+        target = os.path.join(folder, entry.name[:-len('.json')] + CANVAS_EXTENSION)
+        if os.path.exists(target):
+            skipped += 1
+            continue
+        try:
+            with open(entry.path, 'rb') as f:
+                value = json.loads(f.read())
+            data = encode_canvas(value)
+            if decode_canvas(data) != value:
+                raise CanvasDecodeError('round trip mismatch')
+        except (OSError, ValueError) as e:
+            logger.error(f"Error migrating canvas file {entry.name}: {e}")
+            failed += 1
+            continue
+        bytes_before += entry.stat().st_size
+        tmp_path = f'{target}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+        bytes_after += len(data)
+        if remove_json:
+            os.remove(entry.path)
+        converted += 1
+    return {'converted': converted, 'skipped': skipped, 'failed': failed,
+            'bytes_before': bytes_before, 'bytes_after': bytes_after}
+
+
+def _main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert JSON canvas/session files to the binary canvas format')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate = subparsers.add_parser('migrate', help='convert <name>.json files in each folder')
+    migrate.add_argument('folders', nargs='+')
+    migrate.add_argument('--keep-json', action='store_true', help='leave the JSON originals in place')
+    args = parser.parse_args(argv)
+
+    for folder in args.folders:
+        stats = migrate_canvas_folder(folder, remove_json=not args.keep_json)
+        print(f"{folder}: {stats['converted']} converted, {stats['skipped']} skipped, "
+              f"{stats['failed']} failed, {stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
@@ -7,7 +7,7 @@ All operations are logged to the event_log table for AI learning.
 import logging
 from datetime import datetime, date
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import or_, and_
 
 from database.models import (
@@ -15,6 +15,7 @@ from database.models import (
     Quote, QuoteLineItem, Communication, CalendarEvent,
     PriceClass, PriceClassItem, EventLog
 )
+from services.query_paging import fetch_page, page_result, resolve_sort, search_filter
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,35 @@ class CRMRepository:
         'metadata': 'extra_data'
     }
     
+    # API sort fields that list queries can order by in SQL
+    CUSTOMER_SORT_COLUMNS = {
+        'name': Customer.name,
+        'company': Customer.company,
+        'email': Customer.email,
+        'city': Customer.city,
+        'created_at': Customer.created_at,
+        'updated_at': Customer.updated_at,
+    }
+    PROJECT_SORT_COLUMNS = {
+        'name': Project.name,
+        'status': Project.status,
+        'start_date': Project.start_date,
+        'end_date': Project.end_date,
+        'estimated_value': Project.estimated_value,
+        'created_at': Project.created_at,
+        'updated_at': Project.updated_at,
+    }
+    QUOTE_SORT_COLUMNS = {
+        'title': Quote.title,
+        'quote_number': Quote.quote_number,
+        'status': Quote.status,
+        'total_amount': Quote.total_amount,
+        'quote_amount': Quote.total_amount,
+        'valid_until': Quote.valid_until,
+        'created_at': Quote.created_at,
+        'updated_at': Quote.updated_at,
+    }
+    
     def __init__(self, session: Session, organization_id: str, user_id: str = None):
         self.session = session
         self.organization_id = organization_id
@@ -59,15 +89,30 @@ class CRMRepository:
     # CUSTOMERS
     # =========================================================================
     
-    def list_customers(self, active_only: bool = True) -> List[Dict]:
-        """List all customers."""
+    def list_customers(self, active_only: bool = True, search: str = None,
+                       sort_by: str = None, sort_order: str = 'asc',
+                       limit: int = None, offset: int = 0, cursor: str = None,
+                       with_total: bool = False):
+        """
+        List customers, searched, sorted and paginated in SQL.
+        
+        Returns a list of dicts, or with_total=True a page dict with
+        items, total and next_cursor.
+        """
         query = self.session.query(Customer).filter(
             Customer.organization_id == self.organization_id
         )
         if active_only:
             query = query.filter(Customer.is_active == True)
-        customers = query.order_by(Customer.name).all()
-        return [c.to_dict() for c in customers]
+        if search:
+            query = query.filter(search_filter(
+                [Customer.name, Customer.company, Customer.email], search))
+        page = fetch_page(
+            query, resolve_sort(self.CUSTOMER_SORT_COLUMNS, sort_by, 'name'), Customer.id,
+            descending=(sort_order or 'asc').lower() == 'desc',
+            limit=limit, offset=offset, cursor=cursor
+        )
+        return page_result(page, with_total)
     
     def get_customer(self, customer_id: str) -> Optional[Dict]:
         """Get a customer by ID."""
@@ -172,26 +217,22 @@ class CRMRepository:
         logger.info(f"Deleted (deactivated) customer: {customer_id}")
         return True
     
-    def search_customers(self, query: str) -> List[Dict]:
-        """Search customers by name, company, or email."""
-        search = f"%{query}%"
-        customers = self.session.query(Customer).filter(
-            Customer.organization_id == self.organization_id,
-            Customer.is_active == True,
-            or_(
-                Customer.name.ilike(search),
-                Customer.company.ilike(search),
-                Customer.email.ilike(search)
-            )
-        ).all()
-        return [c.to_dict() for c in customers]
+    def search_customers(self, query: str, limit: int = 50) -> List[Dict]:
+        """Search active customers by name, company, or email, best matches first."""
+        from services.search_service import SearchService
+        return SearchService(self.session, self.organization_id).search_entity(
+            'customers', query, limit=limit
+        )
     
     # =========================================================================
     # PROJECTS
     # =========================================================================
     
-    def list_projects(self, customer_id: str = None, status: str = None) -> List[Dict]:
-        """List projects, optionally filtered by customer or status."""
+    def list_projects(self, customer_id: str = None, status: str = None,
+                      search: str = None, sort_by: str = None, sort_order: str = 'desc',
+                      limit: int = None, offset: int = 0, cursor: str = None,
+                      with_total: bool = False):
+        """List projects, optionally filtered by customer or status (see list_customers)."""
         query = self.session.query(Project).filter(
             Project.organization_id == self.organization_id
         )
@@ -199,8 +240,14 @@ class CRMRepository:
             query = query.filter(Project.customer_id == customer_id)
         if status:
             query = query.filter(Project.status == status)
-        projects = query.order_by(Project.created_at.desc()).all()
-        return [p.to_dict() for p in projects]
+        if search:
+            query = query.filter(search_filter([Project.name, Project.description], search))
+        page = fetch_page(
+            query, resolve_sort(self.PROJECT_SORT_COLUMNS, sort_by, 'created_at'), Project.id,
+            descending=(sort_order or 'desc').lower() == 'desc',
+            limit=limit, offset=offset, cursor=cursor
+        )
+        return page_result(page, with_total)
     
     def get_project(self, project_id: str) -> Optional[Dict]:
         """Get a project by ID."""
@@ -521,9 +568,14 @@ class CRMRepository:
     # =========================================================================
     
     def list_quotes(self, customer_id: str = None, project_id: str = None,
-                    status: str = None, source: str = None) -> List[Dict]:
-        """List quotes with optional filters."""
-        query = self.session.query(Quote).filter(
+                    status: str = None, source: str = None, search: str = None,
+                    sort_by: str = None, sort_order: str = 'desc',
+                    limit: int = None, offset: int = 0, cursor: str = None,
+                    with_total: bool = False):
+        """List quotes with optional filters (see list_customers)."""
+        query = self.session.query(Quote).options(
+            selectinload(Quote.line_items)
+        ).filter(
             Quote.organization_id == self.organization_id
         )
         if customer_id:
@@ -534,8 +586,15 @@ class CRMRepository:
             query = query.filter(Quote.status == status)
         if source:
             query = query.filter(Quote.source == source)
-        quotes = query.order_by(Quote.created_at.desc()).all()
-        return [q.to_dict() for q in quotes]
+        if search:
+            query = query.filter(search_filter(
+                [Quote.title, Quote.description, Quote.quote_number], search))
+        page = fetch_page(
+            query, resolve_sort(self.QUOTE_SORT_COLUMNS, sort_by, 'created_at'), Quote.id,
+            descending=(sort_order or 'desc').lower() == 'desc',
+            limit=limit, offset=offset, cursor=cursor
+        )
+        return page_result(page, with_total)
     
     def get_quote(self, quote_id: str) -> Optional[Dict]:
         """Get a quote by ID."""
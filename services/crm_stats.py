@@ -0,0 +1,308 @@
+"""
+CRM Stats Service - Aggregate statistics for dashboards and AI context.
+
+Every count and sum the stats endpoints need is computed by one UNION ALL
+of grouped queries, so a stats request is a single round-trip no matter
+how large the tables grow. The views below reshape that one result for
+each consumer:
+- dashboard_stats(): CRMDatabaseLayer.get_stats
+- v2_stats():        /api/v2/crm/stats
+- legacy_stats():    /api/crm/stats
+- business_summary(): AIContextService.get_business_summary
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from sqlalchemy import Float, case, cast, func, literal, literal_column, select, union_all
+from sqlalchemy.orm import Session
+
+from database.models import (
+    Customer, Project, Job, Quote, InventoryItem, KanbanTask, CalendarEvent
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CRMStatsService:
+    """Computes CRM statistics with grouped SQL in one round-trip."""
+
+    ACTIVE_PROJECT_STATUSES = ('pending', 'in_progress', 'planning')
+    PENDING_QUOTE_STATUSES = ('draft', 'sent')
+
+    def __init__(self, session: Session, organization_id: str):
+        self.session = session
+        self.organization_id = organization_id
+
+    # =========================================================================
+    # AGGREGATE QUERY
+    # =========================================================================
+
+    @staticmethod
+    def _sum(column):
+        """SUM as a float, or a constant 0.0 when there is nothing to sum."""
+        if column is None:
+            return cast(literal(0), Float)
+        return cast(func.coalesce(func.sum(column), 0), Float)
+
+    def _grouped(self, entity: str, model, key, amount=None, amount2=None, *filters):
+        """One UNION branch: (entity, bucket, row count, two summed amounts) per bucket."""
+        return select(
+            literal(entity).label('entity'),
+            key.label('bucket'),
+            func.count().label('n'),
+            self._sum(amount).label('amount'),
+            self._sum(amount2).label('amount2'),
+        ).where(
+            model.organization_id == self.organization_id, *filters
+        ).group_by(literal_column('bucket'))
+
+    def _counted(self, entity: str, model, *filters):
+        """One UNION branch holding a single filtered count."""
+        return select(
+            literal(entity).label('entity'),
+            literal('count').label('bucket'),
+            func.count().label('n'),
+            self._sum(None).label('amount'),
+            self._sum(None).label('amount2'),
+        ).where(model.organization_id == self.organization_id, *filters)
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Fetch every aggregate in one query.
+
+        Returns by-status counts and summed values per entity plus stock,
+        task and calendar totals; the view methods reshape this.
+        """
+        now = datetime.utcnow()
+        quantity = func.coalesce(InventoryItem.quantity, 0)
+        unit_cost = func.coalesce(func.nullif(InventoryItem.cost_price, 0), InventoryItem.unit_price, 0)
+
+        query = union_all(
+            self._grouped(
+                'customers', Customer,
+                case((Customer.is_active == False, 'inactive'), else_='active')
+            ),
+            self._grouped(
+                'projects', Project, func.coalesce(Project.status, 'unknown'),
+                Project.estimated_value, Project.actual_value
+            ),
+            self._grouped(
+                'quotes', Quote, func.coalesce(Quote.status, 'unknown'),
+                Quote.total_amount
+            ),
+            self._grouped('jobs', Job, func.coalesce(Job.status, 'unknown')),
+            self._grouped(
+                'stock', InventoryItem,
+                case((quantity <= func.coalesce(InventoryItem.reorder_level, 5), 'low'), else_='ok'),
+                quantity * unit_cost, quantity,
+                InventoryItem.is_active == True
+            ),
+            self._counted(
+                'tasks', KanbanTask,
+                KanbanTask.archived == False,
+                KanbanTask.column.in_(['todo', 'in_progress'])
+            ),
+            self._counted(
+                'events', CalendarEvent,
+                CalendarEvent.start_time >= now,
+                CalendarEvent.start_time <= now + timedelta(days=7)
+            ),
+        )
+
+        groups = {entity: {} for entity in
+                  ('customers', 'projects', 'quotes', 'jobs', 'stock', 'tasks', 'events')}
+        for row in self.session.execute(query):
+            groups[row.entity][row.bucket] = (row.n, row.amount or 0.0, row.amount2 or 0.0)
+
+        def counts(entity):
+            return {key: n for key, (n, _, _) in groups[entity].items()}
+
+        def sums(entity, column=1):
+            return {key: values[column] for key, values in groups[entity].items()}
+
+        stock = groups['stock']
+        return {
+            'customers': counts('customers'),
+            'projects': {
+                'by_status': counts('projects'),
+                'estimated_by_status': sums('projects'),
+                'actual_by_status': sums('projects', 2),
+            },
+            'quotes': {
+                'by_status': counts('quotes'),
+                'value_by_status': sums('quotes'),
+            },
+            'jobs': {'by_status': counts('jobs')},
+            'stock': {
+                'total_items': sum(n for n, _, _ in stock.values()),
+                'total_value': sum(value for _, value, _ in stock.values()),
+                'total_units': int(sum(units for _, _, units in stock.values())),
+                'low_stock_count': stock.get('low', (0, 0, 0))[0],
+            },
+            'tasks_pending': counts('tasks').get('count', 0),
+            'upcoming_events': counts('events').get('count', 0),
+        }
+
+    # =========================================================================
+    # VIEWS
+    # =========================================================================
+
+    @staticmethod
+    def _total(by_key: Dict, keys=None) -> float:
+        """Sum a by-key mapping, optionally over a subset of keys."""
+        if keys is None:
+            return sum(by_key.values())
+        return sum(by_key.get(key, 0) for key in keys)
+
+    def dashboard_stats(self) -> Dict[str, Any]:
+        """Stats in the CRMDatabaseLayer.get_stats shape."""
+        data = self.collect()
+        projects, quotes = data['projects'], data['quotes']
+        active_customers = data['customers'].get('active', 0)
+        return {
+            'customers': {
+                'total': active_customers,
+                'active': active_customers
+            },
+            'projects': {
+                'total': self._total(projects['by_status']),
+                'active': projects['by_status'].get('in_progress', 0),
+                'by_status': projects['by_status']
+            },
+            'quotes': {
+                'total': self._total(quotes['by_status']),
+                'pending': self._total(quotes['by_status'], self.PENDING_QUOTE_STATUSES),
+                'by_status': quotes['by_status']
+            },
+            'jobs': {
+                'total': self._total(data['jobs']['by_status']),
+                'by_status': data['jobs']['by_status']
+            },
+            'revenue': {
+                'total': quotes['value_by_status'].get('accepted', 0.0),
+                'pending': self._total(quotes['value_by_status'], self.PENDING_QUOTE_STATUSES)
+            },
+            'stock': {
+                'total_items': data['stock']['total_items'],
+                'total_value': data['stock']['total_value'],
+                'low_stock_count': data['stock']['low_stock_count']
+            }
+        }
+
+    def v2_stats(self) -> Dict[str, Any]:
+        """Stats in the /api/v2/crm/stats (CRMDataLayer.get_stats) shape."""
+        data = self.collect()
+        customers = data['customers']
+        projects, quotes, stock = data['projects'], data['quotes'], data['stock']
+        by_status = projects['by_status']
+        completed = by_status.get('completed', 0)
+        total_revenue = projects['actual_by_status'].get('completed', 0.0)
+        return {
+            'customers': {
+                'total': self._total(customers),
+                'active': customers.get('active', 0),
+                'inactive': customers.get('inactive', 0)
+            },
+            'projects': {
+                'total': self._total(by_status),
+                'active': self._total(by_status, self.ACTIVE_PROJECT_STATUSES),
+                'completed': completed,
+                'on_hold': by_status.get('on_hold', 0)
+            },
+            'quotes': {
+                'total': self._total(quotes['by_status']),
+                'draft': quotes['by_status'].get('draft', 0),
+                'sent': quotes['by_status'].get('sent', 0),
+                'accepted': quotes['by_status'].get('accepted', 0),
+                'rejected': quotes['by_status'].get('rejected', 0),
+                'pending_value': self._total(quotes['value_by_status'], self.PENDING_QUOTE_STATUSES)
+            },
+            'revenue': {
+                'total': total_revenue,
+                'pending': self._total(projects['estimated_by_status'], self.ACTIVE_PROJECT_STATUSES),
+                'average_project': total_revenue / completed if completed > 0 else 0
+            },
+            'stock': {
+                'total_value': stock['total_value'],
+                'total_items': stock['total_items'],
+                'total_units': stock['total_units'],
+                'low_stock': stock['low_stock_count']
+            }
+        }
+
+    def legacy_stats(self) -> Dict[str, Any]:
+        """Stats in the /api/crm/stats shape."""
+        data = self.collect()
+        projects, quotes = data['projects']['by_status'], data['quotes']
+        return {
+            'customers': {
+                'total': self._total(data['customers']),
+                'active': data['customers'].get('active', 0)
+            },
+            'projects': {
+                'total': self._total(projects),
+                'active': self._total(projects, ('active', 'in_progress')),
+                'pending': projects.get('pending', 0)
+            },
+            'quotes': {
+                'total': self._total(quotes['by_status']),
+                'pending': self._total(quotes['by_status'], self.PENDING_QUOTE_STATUSES),
+                'accepted': quotes['by_status'].get('accepted', 0),
+                'total_value': self._total(quotes['value_by_status']),
+                'pending_value': self._total(quotes['value_by_status'], self.PENDING_QUOTE_STATUSES)
+            }
+        }
+
+    def business_summary(self) -> Dict[str, Any]:
+        """Stats in the AIContextService.get_business_summary shape."""
+        data = self.collect()
+        projects, quotes = data['projects']['by_status'], data['quotes']
+        return {
+            'summary_date': datetime.utcnow().isoformat(),
+            'customers': {
+                'total': data['customers'].get('active', 0),
+            },
+            'projects': {
+                'total': self._total(projects),
+                'active': projects.get('in_progress', 0),
+            },
+            'quotes': {
+                'total': self._total(quotes['by_status']),
+                'pending': self._total(quotes['by_status'], self.PENDING_QUOTE_STATUSES),
+                'total_value': float(quotes['value_by_status'].get('accepted', 0.0)),
+                'pending_value': float(self._total(quotes['value_by_status'], self.PENDING_QUOTE_STATUSES)),
+            },
+            'inventory': {
+                'low_stock_items': data['stock']['low_stock_count'],
+            },
+            'tasks': {
+                'pending': data['tasks_pending'],
+            },
+            'calendar': {
+                'upcoming_events_7_days': data['upcoming_events'],
+            }
+        }
+
+
+def get_database_stats(view: str) -> Optional[Dict[str, Any]]:
+    """
+    Compute a stats view ('dashboard', 'v2', 'legacy' or 'summary') from the
+    database, or return None when no database is configured (JSON fallback).
+    """
+    from config import has_database
+    if not has_database():
+        return None
+
+    from database.connection import get_db_session
+    from database.seed import get_default_organization_id
+
+    views = {
+        'dashboard': CRMStatsService.dashboard_stats,
+        'v2': CRMStatsService.v2_stats,
+        'legacy': CRMStatsService.legacy_stats,
+        'summary': CRMStatsService.business_summary,
+    }
+    with get_db_session() as session:
+        return views[view](CRMStatsService(session, get_default_organization_id()))
@@ -0,0 +1,122 @@
+"""
+Floorplan Pages - Per-page analysis of multi-sheet plan sets.
+
+Architectural sets are often 5-30 pages. Each page is analysed on its own
+(with bounded concurrency, so a set finishes in about the time of its
+slowest page) and the page results are merged into a single result that
+the quote, takeoffs and mapping code can keep treating as one plan:
+
+- rooms, components, connections and circuits are concatenated and each
+  entry is tagged with its 0-based "page"
+- component ids on pages after the first are prefixed ("P2-L1") so ids
+  stay unique; connection and circuit references are remapped to match
+- other keys (scale, notes...) come from the first successful page; every
+  page's own values are kept under pages[i]["details"]
+- request_stats (bytes sent, tokens used) are summed across pages
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from services.job_queue import inherit_job_context
+
+logger = logging.getLogger(__name__)
+
+# Result keys holding per-page lists that are concatenated on merge
+LIST_KEYS = ('rooms', 'components', 'connections', 'circuits')
+
+
+def page_component_id(page_num: int, component_id):
+    """Component id made unique across pages (page 0 keeps its ids)."""
+    if page_num == 0 or not component_id:
+        return component_id
+    return f"P{page_num + 1}-{component_id}"
+
+
+def _tag_entries(key: str, entries: List, page_num: int) -> List[Dict]:
+    """Copy list entries with a page index and page-unique component ids."""
+    tagged = []
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        entry = dict(entry, page=page_num)
+        if key == 'components':
+            entry['id'] = page_component_id(page_num, entry.get('id'))
+        elif key == 'connections':
+            entry['from'] = page_component_id(page_num, entry.get('from'))
+            entry['to'] = page_component_id(page_num, entry.get('to'))
+        elif key == 'circuits' and isinstance(entry.get('components'), list):
+            entry['components'] = [page_component_id(page_num, c) for c in entry['components']]
+        tagged.append(entry)
+    return tagged
+
+
+def merge_page_results(page_results: List[Tuple[int, Dict]]) -> Dict:
+    """
+    Merge (page_num, result) pairs into one analysis result.
+
+    Failed pages are reported under "pages" without failing the set; only
+    when every page fails is the first page's error returned as-is.
+    """
+    page_results = sorted(page_results, key=lambda pr: pr[0])
+    succeeded = [(page, result) for page, result in page_results
+                 if isinstance(result, dict) and 'error' not in result]
+    if not succeeded:
+        return page_results[0][1] if page_results else {'error': 'No pages to analyze'}
+
+    merged: Dict = {key: [] for key in LIST_KEYS}
+    pages = []
+    for page_num, result in page_results:
+        if not isinstance(result, dict) or 'error' in result:
+            error = result.get('error') if isinstance(result, dict) else str(result)
+            pages.append({'page': page_num, 'error': error})
+            continue
+
+        summary = {'page': page_num}
+        for key in LIST_KEYS:
+            entries = _tag_entries(key, result.get(key), page_num)
+            merged[key].extend(entries)
+            summary[key] = len(entries)
+        summary['details'] = {k: v for k, v in result.items() if k not in LIST_KEYS}
+        pages.append(summary)
+
+        for key, value in summary['details'].items():
+            merged.setdefault(key, value)
+
+    totals: Dict = {}
+    for _, result in page_results:
+        stats = result.get('request_stats') if isinstance(result, dict) else None
+        for key, value in (stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    if totals:
+        merged['request_stats'] = totals
+
+    merged['pages'] = pages
+    merged['page_count'] = len(page_results)
+    return merged
+
+
+def analyze_pages(analyze_page: Callable[[int], Dict], page_count: int,
+                  max_workers: int = 4) -> Dict:
+    """
+    Run analyze_page(page_num) for every page and merge the results.
+
+    Pages run concurrently on up to max_workers threads; a single-page
+    document is analysed inline and returned unchanged.
+    """
+    if page_count <= 1:
+        return analyze_page(0)
+
+    def run(page_num):
+        try:
+            return page_num, analyze_page(page_num)
+        except Exception as e:
+            logger.error(f"Error analyzing page {page_num + 1}: {e}")
+            return page_num, {'error': str(e)}
+
+    workers = max(1, min(max_workers, page_count))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='page-analysis') as pool:
+        results = list(pool.map(inherit_job_context(run), range(page_count)))
+    return merge_page_results(results)
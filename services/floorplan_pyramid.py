@@ -0,0 +1,350 @@
+"""
+Floorplan Pyramids - Thumbnail, medium and tiled renditions of uploaded floorplans.
+
+The CAD editor, canvas editor and takeoffs views loaded the full raster
+of every uploaded floorplan (300 DPI for /api/cad/upload-pdf, tens of
+megapixels) even when it was shown as a thumbnail or zoomed out. Uploads
+now queue a pyramid build on a small worker pool:
+
+- thumbnail.jpg (longest edge thumbnail_edge) for list views
+- medium.jpg (longest edge medium_edge) for zoomed-out canvases
+- the full image for full zoom and exports; with an asset store this is
+  the source's content-addressed asset (no second copy), otherwise
+  full.<ext>, a copy of the source
+- optionally tiles.dzi plus tiles_files/<level>/<col>_<row>.jpg, Deep
+  Zoom tiles that viewers such as OpenSeadragon fetch per viewport
+
+A pyramid's id is the hash of the source image and the build settings,
+so its files never change and are served as immutable assets; uploading
+the same floorplan again reuses the existing pyramid. Each pyramid is
+built in a temporary directory and renamed into place with its
+manifest.json, so a pyramid directory is either complete or absent.
+PIL releases the GIL while resizing and encoding, so a thread pool is
+enough to keep builds off the request thread.
+
+At most max_pyramids are kept: serving a pyramid's files bumps its
+manifest's mtime, and each new build removes the least recently used
+ones. Uploading an evicted floorplan again simply rebuilds it.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from services.asset_store import AssetStore
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when renditions change so old pyramids are not reused
+PYRAMID_VERSION = 2
+
+MANIFEST = 'manifest.json'
+PYRAMID_ID = re.compile(r'^[0-9a-f]{64}$')
+READY, PENDING, FAILED, MISSING = 'ready', 'pending', 'failed', 'missing'
+CHUNK_SIZE = 1024 * 1024
+
+# Global pyramid builders by root folder
+_builders: Dict[str, 'FloorplanPyramids'] = {}
+_builders_lock = threading.Lock()
+
+
+def _flatten(image: 'Image.Image') -> 'Image.Image':
+    """RGB copy of an image, with transparency composited onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+class FloorplanPyramids:
+    """Builds and tracks multi-resolution renditions under one root folder."""
+
+    def __init__(self, root: str, max_workers: int = 2, thumbnail_edge: int = 256,
+                 medium_edge: int = 1600, tiles: bool = False, tile_size: int = 256,
+                 jpeg_quality: int = 85, assets: Optional[AssetStore] = None, max_pyramids: int = 0):
+        self.root = root
+        self.assets = assets
+        self.max_pyramids = max(0, max_pyramids)
+        self.max_workers = max(1, max_workers)
+        self.thumbnail_edge = thumbnail_edge
+        self.medium_edge = medium_edge
+        self.tiles = tiles
+        self.tile_size = tile_size
+        self.jpeg_quality = jpeg_quality
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evicted = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _settings(self, tiles: bool) -> Dict:
+        return {'version': PYRAMID_VERSION, 'thumbnail': self.thumbnail_edge, 'medium': self.medium_edge,
+                'tiles': self.tile_size if tiles else None, 'quality': self.jpeg_quality}
+
+    def pyramid_id(self, image_path: str, tiles: Optional[bool] = None) -> str:
+        """Hash of the source image and the build settings."""
+        tiles = self.tiles if tiles is None else tiles
+        digest = hashlib.sha256(json.dumps(self._settings(tiles), sort_keys=True).encode())
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def directory(self, pyramid_id: str) -> str:
+        return os.path.join(self.root, pyramid_id)
+
+    def manifest(self, pyramid_id: str) -> Optional[Dict]:
+        """Manifest of a finished pyramid, or None."""
+        try:
+            with open(os.path.join(self.directory(pyramid_id), MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, pyramid_id: str):
+        """Mark a pyramid as just used, so eviction keeps it longest."""
+        try:
+            os.utime(os.path.join(self.directory(pyramid_id), MANIFEST))
+        except OSError:
+            pass
+
+    def _collect(self, keep: str):
+        """Remove the least recently used pyramids beyond max_pyramids."""
+        entries = []
+        for entry in os.scandir(self.root):
+            if PYRAMID_ID.match(entry.name):
+                try:
+                    entries.append((os.stat(os.path.join(entry.path, MANIFEST)).st_mtime, entry.name))
+                except OSError:
+                    continue
+        entries.sort()
+        for _, pyramid_id in entries[:max(0, len(entries) - self.max_pyramids)]:
+            if pyramid_id == keep:
+                continue
+            # Renamed away first, so a pyramid directory is still either complete or absent
+            doomed = f'{self.directory(pyramid_id)}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                os.rename(self.directory(pyramid_id), doomed)
+            except OSError:
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            with self._lock:
+                self.evicted += 1
+
+    def status(self, pyramid_id: str) -> Dict:
+        """{'id', 'status', 'manifest' when ready, 'error' when failed}"""
+        manifest = self.manifest(pyramid_id)
+        if manifest is not None:
+            return {'id': pyramid_id, 'status': READY, 'manifest': manifest}
+        with self._lock:
+            if pyramid_id in self._pending:
+                return {'id': pyramid_id, 'status': PENDING}
+            if pyramid_id in self._errors:
+                return {'id': pyramid_id, 'status': FAILED, 'error': self._errors[pyramid_id]}
+        return {'id': pyramid_id, 'status': MISSING}
+
+    def build(self, image_path: str, tiles: Optional[bool] = None, pyramid_id: Optional[str] = None,
+              full_asset: Optional[str] = None) -> Dict:
+        """Build the pyramid for an image now (no-op if it exists); returns its manifest."""
+        if not PIL_AVAILABLE:
+            raise RuntimeError('PIL is required to build floorplan pyramids')
+        tiles = self.tiles if tiles is None else tiles
+        pyramid_id = pyramid_id or self.pyramid_id(image_path, tiles)
+        manifest = self.manifest(pyramid_id)
+        if manifest is not None:
+            return manifest
+
+        target = self.directory(pyramid_id)
+        work = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+        os.makedirs(work, exist_ok=True)
+        try:
+            manifest = self._render(image_path, work, pyramid_id, tiles, full_asset)
+            try:
+                os.rename(work, target)
+            except OSError:
+                # Built concurrently by another worker; theirs is identical
+                if self.manifest(pyramid_id) is None:
+                    raise
+                manifest = self.manifest(pyramid_id)
+        finally:
+            if os.path.exists(work):
+                shutil.rmtree(work, ignore_errors=True)
+        with self._lock:
+            self.builds += 1
+        if self.max_pyramids:
+            self._collect(keep=pyramid_id)
+        return manifest
+
+    def _save_jpeg(self, image: 'Image.Image', path: str) -> Dict:
+        image.save(path, 'JPEG', quality=self.jpeg_quality, optimize=True, progressive=True)
+        return {'file': os.path.basename(path), 'width': image.width, 'height': image.height,
+                'bytes': os.path.getsize(path)}
+
+    def _render(self, image_path: str, work: str, pyramid_id: str, tiles: bool,
+                full_asset: Optional[str] = None) -> Dict:
+        if self.assets is not None:
+            full = {'asset': full_asset or self.assets.put_file(image_path)}
+        else:
+            extension = os.path.splitext(image_path)[1].lower() or '.png'
+            shutil.copyfile(image_path, os.path.join(work, f'full{extension}'))
+            full = {'file': f'full{extension}'}
+
+        with Image.open(image_path) as source:
+            source.load()
+            image = _flatten(source)
+        width, height = image.size
+
+        # Each level is downscaled from the previous one, largest first
+        medium = image.copy()
+        medium.thumbnail((self.medium_edge, self.medium_edge), Image.LANCZOS, reducing_gap=3.0)
+        thumbnail = medium.copy()
+        thumbnail.thumbnail((self.thumbnail_edge, self.thumbnail_edge), Image.LANCZOS)
+
+        manifest = {
+            'id': pyramid_id,
+            'version': PYRAMID_VERSION,
+            'width': width,
+            'height': height,
+            'levels': {
+                'thumbnail': self._save_jpeg(thumbnail, os.path.join(work, 'thumbnail.jpg')),
+                'medium': self._save_jpeg(medium, os.path.join(work, 'medium.jpg')),
+                'full': dict(full, width=width, height=height, bytes=os.path.getsize(image_path)),
+            },
+            'tiles': self._render_tiles(image, work) if tiles else None,
+        }
+        with open(os.path.join(work, MANIFEST), 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        return manifest
+
+    def _render_tiles(self, image: 'Image.Image', work: str) -> Dict:
+        """Deep Zoom tiles: level n is the full image, each level below is half the size."""
+        size = self.tile_size
+        top_level = max(0, math.ceil(math.log2(max(image.width, image.height))))
+        tiles_dir = os.path.join(work, 'tiles_files')
+        count = 0
+        level_image = image
+        for level in range(top_level, -1, -1):
+            level_dir = os.path.join(tiles_dir, str(level))
+            os.makedirs(level_dir)
+            for col in range(math.ceil(level_image.width / size)):
+                for row in range(math.ceil(level_image.height / size)):
+                    box = (col * size, row * size, min((col + 1) * size, level_image.width),
+                           min((row + 1) * size, level_image.height))
+                    level_image.crop(box).save(os.path.join(level_dir, f'{col}_{row}.jpg'), 'JPEG',
+                                               quality=self.jpeg_quality)
+                    count += 1
+            if level:
+                level_image = level_image.resize((max(1, math.ceil(level_image.width / 2)),
+                                                  max(1, math.ceil(level_image.height / 2))), Image.BOX)
+
+        with open(os.path.join(work, 'tiles.dzi'), 'w') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                    f'TileSize="{size}" Overlap="0" Format="jpg">'
+                    f'<Size Width="{image.width}" Height="{image.height}"/></Image>\n')
+        return {'file': 'tiles.dzi', 'tile_size': size, 'levels': top_level + 1, 'count': count}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pyramid-worker')
+            return self._pool
+
+    def submit(self, image_path: str, tiles: Optional[bool] = None) -> Dict:
+        """
+        Queue a pyramid build; returns its status without waiting.
+
+        With an asset store the source is published first (which also
+        restores an evicted full image) and the status carries its name as
+        'full_asset'.
+        """
+        tiles = self.tiles if tiles is None else tiles
+        pyramid_id = self.pyramid_id(image_path, tiles)
+        full_asset = self.assets.put_file(image_path) if self.assets is not None else None
+        extra = {'full_asset': full_asset} if full_asset else {}
+        if self.manifest(pyramid_id) is not None:
+            self.touch(pyramid_id)
+            return dict(self.status(pyramid_id), **extra)
+
+        # The caller may remove or replace the source after returning, so build from
+        # its asset (content-addressed, never rewritten) or else from a copy
+        if full_asset:
+            source, staged = self.assets.path_for(full_asset), None
+        else:
+            source = staged = os.path.join(self.root,
+                                           f'{pyramid_id}.source{os.path.splitext(image_path)[1].lower()}')
+
+        def run():
+            try:
+                return self.build(source, tiles, pyramid_id, full_asset)
+            finally:
+                if staged:
+                    os.remove(staged)
+
+        pool = self._executor()
+        with self._lock:
+            if pyramid_id in self._pending:
+                return dict({'id': pyramid_id, 'status': PENDING}, **extra)
+            self._errors.pop(pyramid_id, None)
+            if staged:
+                shutil.copyfile(image_path, staged)
+            future = pool.submit(run)
+            self._pending[pyramid_id] = future
+        future.add_done_callback(lambda done: self._finished(pyramid_id, done))
+        return dict(self.status(pyramid_id), **extra)
+
+    def _finished(self, pyramid_id: str, future: Future):
+        error = future.exception()
+        with self._lock:
+            self._pending.pop(pyramid_id, None)
+            if error is not None:
+                self._errors[pyramid_id] = str(error)
+        if error is not None:
+            logger.error(f"Floorplan pyramid {pyramid_id} failed: {error}")
+
+    def wait(self, pyramid_id: str, timeout: Optional[float] = None) -> Dict:
+        """Block until a queued build finishes (or timeout); returns its status."""
+        with self._lock:
+            future = self._pending.get(pyramid_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        return self.status(pyramid_id)
+
+
+def get_floorplan_pyramids(root: str, assets: Optional[AssetStore] = None) -> FloorplanPyramids:
+    """Get or create the pyramid builder for a folder, configured from PYRAMID_* env vars"""
+    key = os.path.abspath(root)
+    with _builders_lock:
+        builder = _builders.get(key)
+        if builder is None:
+            builder = FloorplanPyramids(
+                root,
+                max_workers=int(os.environ.get('PYRAMID_MAX_WORKERS', '2')),
+                thumbnail_edge=int(os.environ.get('PYRAMID_THUMBNAIL_EDGE', '256')),
+                medium_edge=int(os.environ.get('PYRAMID_MEDIUM_EDGE', '1600')),
+                tiles=os.environ.get('PYRAMID_TILES', 'false').lower() == 'true',
+                assets=assets,
+                max_pyramids=int(os.environ.get('PYRAMID_MAX_COUNT', '500')),
+            )
+            _builders[key] = builder
+    return builder
@@ -6,9 +6,9 @@ import logging
 from datetime import datetime
 from typing import List, Optional, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
 from database.models import InventoryItem
+from services.query_paging import fetch_page, page_result, resolve_sort, search_filter
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +16,33 @@ logger = logging.getLogger(__name__)
 class InventoryRepository:
     """Repository for inventory database operations."""
     
+    # API sort fields that list queries can order by in SQL
+    SORT_COLUMNS = {
+        'name': InventoryItem.name,
+        'sku': InventoryItem.sku,
+        'category': InventoryItem.category,
+        'quantity': InventoryItem.quantity,
+        'unit_price': InventoryItem.unit_price,
+        'cost_price': InventoryItem.cost_price,
+        'created_at': InventoryItem.created_at,
+        'updated_at': InventoryItem.updated_at,
+    }
+    
     def __init__(self, session: Session, organization_id: str):
         self.session = session
         self.organization_id = organization_id
     
     def list_items(self, category: str = None, active_only: bool = True,
-                   low_stock_only: bool = False) -> List[Dict]:
-        """List inventory items with optional filters."""
+                   low_stock_only: bool = False, search: str = None,
+                   sort_by: str = None, sort_order: str = 'asc',
+                   limit: int = None, offset: int = 0, cursor: str = None,
+                   with_total: bool = False):
+        """
+        List inventory items with optional filters, sorted and paginated in SQL.
+        
+        Returns a list of dicts, or with_total=True a page dict with
+        items, total and next_cursor.
+        """
         query = self.session.query(InventoryItem).filter(
             InventoryItem.organization_id == self.organization_id
         )
@@ -32,9 +52,15 @@ class InventoryRepository:
             query = query.filter(InventoryItem.category == category)
         if low_stock_only:
             query = query.filter(InventoryItem.quantity <= InventoryItem.reorder_level)
+        if search:
+            query = query.filter(search_filter([InventoryItem.name, InventoryItem.sku], search))
         
-        items = query.order_by(InventoryItem.name).all()
-        return [item.to_dict() for item in items]
+        page = fetch_page(
+            query, resolve_sort(self.SORT_COLUMNS, sort_by, 'name'), InventoryItem.id,
+            descending=(sort_order or 'asc').lower() == 'desc',
+            limit=limit, offset=offset, cursor=cursor
+        )
+        return page_result(page, with_total)
     
     def get_item(self, item_id: str) -> Optional[Dict]:
         """Get an inventory item by ID."""
@@ -144,19 +170,12 @@ class InventoryRepository:
         ).order_by(InventoryItem.quantity).all()
         return [item.to_dict() for item in items]
     
-    def search_items(self, query: str) -> List[Dict]:
-        """Search inventory items by name, SKU, or category."""
-        search = f"%{query}%"
-        items = self.session.query(InventoryItem).filter(
-            InventoryItem.organization_id == self.organization_id,
-            InventoryItem.is_active == True,
-            or_(
-                InventoryItem.name.ilike(search),
-                InventoryItem.sku.ilike(search),
-                InventoryItem.category.ilike(search)
-            )
-        ).all()
-        return [item.to_dict() for item in items]
+    def search_items(self, query: str, limit: int = 50) -> List[Dict]:
+        """Search active inventory items by name or SKU, best matches first."""
+        from services.search_service import SearchService
+        return SearchService(self.session, self.organization_id).search_entity(
+            'inventory', query, limit=limit
+        )
     
     def get_categories(self) -> List[str]:
         """Get list of unique categories."""
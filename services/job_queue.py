@@ -0,0 +1,345 @@
+"""
+Analysis Job Queue - Runs long AI analyses off the request thread.
+
+/api/analyze and /api/ai-mapping/analyze can spend minutes in the agentic
+loop, which would block the single gunicorn worker. Those routes submit a
+job here and return its id immediately; clients poll /api/jobs/<id>.
+
+- A fixed pool of worker threads bounds how many analyses run at once
+- Job records are mirrored to JSON files so status survives a worker
+  restart and can be polled from any process sharing the jobs directory.
+  Each record names its owner (host, pid and process start time); on
+  startup, unfinished jobs whose owner has exited are marked failed,
+  while jobs still running in a live process (an old worker during a
+  graceful reload) are left to it
+- Queued jobs cancel immediately; running jobs are cancelled
+  cooperatively - long loops call job_cancelled() between steps, and any
+  result produced after cancellation is discarded
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Global queue instance
+_job_queue = None
+
+# (queue, job id) of the job running on the current worker thread
+_current = threading.local()
+
+
+class QueueFull(Exception):
+    """Raised when the queue already holds max_pending jobs."""
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Start time of a process (so a reused pid isn't mistaken for it), where /proc has it."""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+def _owner() -> Dict:
+    pid = os.getpid()
+    return {'host': socket.gethostname(), 'pid': pid, 'start': _process_start(pid)}
+
+
+def _owner_alive(owner: Optional[Dict]) -> bool:
+    """Whether the process that wrote a job record may still be running it."""
+    if not isinstance(owner, dict) or not isinstance(owner.get('pid'), int):
+        return False
+    if owner.get('host') != socket.gethostname():
+        # Processes on other hosts can't be checked from here
+        return True
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    start = _process_start(owner['pid'])
+    return start is None or owner.get('start') is None or start == owner['start']
+
+
+class JobQueue:
+    """Bounded worker pool with pollable, cancellable jobs."""
+
+    def __init__(self, jobs_dir: str, max_workers: int = 2, max_pending: int = 50,
+                 retention_seconds: float = 24 * 3600):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, tuple] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._load_existing()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job: Dict):
+        """Write a job record atomically."""
+        path = self._job_path(job['id'])
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f, default=str)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Error saving job {job['id']}: {e}")
+
+    def _load_existing(self):
+        """Reload job records; unfinished jobs whose owner has exited are failed."""
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, name), 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping unreadable job record {name}: {e}")
+                continue
+            if job.get('status') not in FINISHED_STATES:
+                if _owner_alive(job.get('owner')):
+                    # Still running elsewhere; get() reads its record from disk
+                    continue
+                job['status'] = FAILED
+                job['error'] = 'Interrupted by server restart'
+                job['finished_at'] = datetime.utcnow().isoformat()
+                job['finished_ts'] = time.time()
+                self._persist(job)
+            self.jobs[job['id']] = job
+        self._prune()
+
+    def _read_record(self, job_id: str) -> Optional[Dict]:
+        """Job record written by another process sharing jobs_dir."""
+        try:
+            uuid.UUID(job_id)
+            with open(self._job_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return None
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.get('status') in FINISHED_STATES and job.get('finished_ts', 0) < cutoff:
+                del self.jobs[job_id]
+                try:
+                    os.remove(self._job_path(job_id))
+                except OSError:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_workers(self):
+        """Start worker threads lazily, on the first submit."""
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._worker_loop, daemon=True,
+                                      name=f"analysis-worker-{len(self._workers) + 1}")
+            worker.start()
+            self._workers.append(worker)
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            task = self._tasks.pop(job_id, None)
+            if job is None or task is None or job['status'] != QUEUED:
+                return
+            job['status'] = RUNNING
+            job['started_at'] = datetime.utcnow().isoformat()
+            self._persist(job)
+
+        func, args, kwargs = task
+        _current.job = (self, job_id)
+        status, result, error, trace = COMPLETED, None, None, None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job['kind']}) failed: {e}")
+            status, error, trace = FAILED, str(e), traceback.format_exc()
+        finally:
+            _current.job = None
+
+        with self._lock:
+            if self._cancel_events[job_id].is_set():
+                status, result = CANCELLED, None
+            job['status'] = status
+            job['result'] = result
+            job['error'] = error
+            if trace is not None:
+                job['traceback'] = trace
+            job['finished_at'] = datetime.utcnow().isoformat()
+            job['finished_ts'] = time.time()
+            self._cancel_events.pop(job_id, None)
+            self._persist(job)
+        logger.info(f"Job {job_id} ({job['kind']}) {status}")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, func: Callable, *args, **kwargs) -> Dict:
+        """Queue func(*args, **kwargs); returns the public job record."""
+        with self._lock:
+            self._prune()
+            pending = sum(1 for j in self.jobs.values() if j['status'] in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                raise QueueFull(f"Analysis queue is full ({pending} jobs pending)")
+
+            job_id = str(uuid.uuid4())
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'status': QUEUED,
+                'created_at': datetime.utcnow().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'owner': _owner(),
+            }
+            self.jobs[job_id] = job
+            self._tasks[job_id] = (func, args, kwargs)
+            self._cancel_events[job_id] = threading.Event()
+            self._persist(job)
+            self._ensure_workers()
+        self._queue.put(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict]:
+        """Public view of a job, with its queue position while queued."""
+        with self._lock:
+            job = self.jobs.get(job_id) or self._read_record(job_id)
+            if job is None:
+                return None
+            view = {k: v for k, v in job.items() if k not in ('traceback', 'finished_ts', 'owner')}
+            if not include_result:
+                view.pop('result', None)
+            if job['status'] == QUEUED:
+                queued = sorted((j['created_at'], j['id']) for j in self.jobs.values()
+                                if j['status'] == QUEUED)
+                view['position'] = queued.index((job['created_at'], job_id)) + 1
+            return view
+
+    def list_jobs(self, kind: str = None) -> List[Dict]:
+        """All retained jobs, newest first, without results."""
+        with self._lock:
+            ids = [j['id'] for j in sorted(self.jobs.values(), key=lambda j: j['created_at'],
+                                           reverse=True) if kind is None or j['kind'] == kind]
+        return [job for job in (self.get(job_id, include_result=False) for job_id in ids) if job]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] == QUEUED:
+                self._tasks.pop(job_id, None)
+                self._cancel_events.pop(job_id, None)
+                job['status'] = CANCELLED
+                job['finished_at'] = datetime.utcnow().isoformat()
+                job['finished_ts'] = time.time()
+                self._persist(job)
+            elif job['status'] == RUNNING:
+                self._cancel_events[job_id].set()
+                job['cancel_requested'] = True
+                self._persist(job)
+        return self.get(job_id, include_result=False)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        """Whether cancellation was requested for a running job."""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            return event is not None and event.is_set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts by status plus pool configuration."""
+        with self._lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {
+                'by_status': counts,
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'workers_alive': sum(1 for w in self._workers if w.is_alive()),
+            }
+
+
+def job_cancelled() -> bool:
+    """True when called from a job whose cancellation has been requested."""
+    current = getattr(_current, 'job', None)
+    return current is not None and current[0].is_cancelled(current[1])
+
+
+def inherit_job_context(func: Callable) -> Callable:
+    """Wrap func so helper threads it runs on see the calling job's cancellation."""
+    current = getattr(_current, 'job', None)
+
+    def wrapper(*args, **kwargs):
+        _current.job = current
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.job = None
+    return wrapper
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the analysis job queue configured from ANALYSIS_* env vars"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            os.environ.get('ANALYSIS_JOBS_DIR', os.path.join('data', 'jobs')),
+            max_workers=int(os.environ.get('ANALYSIS_MAX_CONCURRENCY', '2')),
+            max_pending=int(os.environ.get('ANALYSIS_MAX_QUEUED', '50')),
+            retention_seconds=float(os.environ.get('ANALYSIS_JOB_RETENTION_HOURS', '24')) * 3600,
+        )
+    return _job_queue
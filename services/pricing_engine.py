@@ -0,0 +1,233 @@
+"""
+Pricing Engine - Compiled automation pricing shared by every quote path.
+
+/api/analyze, /api/generate_quote, /api/generate-final-quote and
+/api/takeoffs/export each re-read automation_data.json and priced rooms
+or symbols in their own nested loop. The pricing config is now loaded
+once (reloaded when the file's mtime or size changes) and compiled into
+flat NumPy tables:
+
+- unit_cost[type, tier] and labor_hours[type, tier], with a trailing zero
+  row and column for unknown automation types and tiers (the old loops
+  priced those at 0 through .get(..., 0))
+- a whole list of rooms is priced in one vectorized pass; takeoffs
+  symbols price the catalog once per tier and then cost one dict lookup
+  each, so only building the line-item dicts stays in Python
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Room keys priced by the floorplan analysis paths, in line-item order
+AUTOMATION_KEYS = ('lighting', 'shading', 'security_access', 'climate', 'audio')
+
+DEFAULT_LABOR_RATE = 75
+DEFAULT_MARKUP_PERCENTAGE = 20
+
+
+class PricingTables:
+    """Flat lookup tables compiled from an automation pricing config."""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        automation_types = config.get('automation_types', {}) or {}
+        self.labor_rate = config.get('labor_rate', DEFAULT_LABOR_RATE)
+        self.markup_percentage = config.get('markup_percentage', DEFAULT_MARKUP_PERCENTAGE)
+        self.company_info = config.get('company_info', {}) or {}
+
+        self.keys = list(automation_types)
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+        tiers = []
+        for automation in automation_types.values():
+            for table in ('base_cost_per_unit', 'labor_hours'):
+                for tier in (automation.get(table) or {}):
+                    if tier not in tiers:
+                        tiers.append(tier)
+        self.tier_index = {tier: i for i, tier in enumerate(tiers)}
+        self.names = [automation_types[key].get('name', key) for key in self.keys]
+
+        # Last row/column stay zero for unknown types and tiers
+        shape = (len(self.keys) + 1, len(tiers) + 1)
+        self.unit_cost = np.zeros(shape)
+        self.labor_hours = np.zeros(shape)
+        for i, key in enumerate(self.keys):
+            automation = automation_types[key]
+            for tier, value in (automation.get('base_cost_per_unit') or {}).items():
+                self.unit_cost[i, self.tier_index[tier]] = value
+            for tier, value in (automation.get('labor_hours') or {}).items():
+                self.labor_hours[i, self.tier_index[tier]] = value
+
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [automation_types, self.labor_rate], sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()
+
+    def name(self, automation_type) -> str:
+        """Display name of an automation type (the key itself if unknown)."""
+        index = self.key_index.get(automation_type)
+        return self.names[index] if index is not None else automation_type
+
+    def price(self, automation_types: Sequence, tiers: Sequence,
+              quantities: Iterable) -> Dict[str, np.ndarray]:
+        """Vectorized unit cost, labor and totals for parallel sequences."""
+        unknown_key, unknown_tier = len(self.keys), len(self.tier_index)
+        key_idx = np.fromiter((self.key_index.get(k, unknown_key) for k in automation_types),
+                              dtype=np.intp, count=len(automation_types))
+        tier_idx = np.fromiter((self.tier_index.get(t, unknown_tier) for t in tiers),
+                               dtype=np.intp, count=len(tiers))
+        quantity = np.asarray(list(quantities), dtype=float)
+
+        unit_cost = self.unit_cost[key_idx, tier_idx]
+        labor_hours = self.labor_hours[key_idx, tier_idx]
+        labor_cost = labor_hours * self.labor_rate
+        return {
+            'unit_cost': unit_cost,
+            'labor_hours': labor_hours,
+            'labor_cost': labor_cost,
+            'total': (unit_cost + labor_cost) * quantity,
+        }
+
+    def _line_items(self, lines: List[Tuple], extra_keys: Tuple[str, ...] = ()) -> List[Dict]:
+        """Price (automation_type, tier, quantity, *extra) tuples into line items."""
+        if not lines:
+            return []
+        keys, tiers, quantities = zip(*(line[:3] for line in lines))
+        priced = {name: values.tolist() for name, values in self.price(keys, tiers, quantities).items()}
+        return [
+            {
+                'automation_type': line[0],
+                'name': self.name(line[0]),
+                'quantity': line[2],
+                'tier': line[1],
+                'unit_cost': priced['unit_cost'][i],
+                'labor_hours': priced['labor_hours'][i],
+                'labor_cost': priced['labor_cost'][i],
+                'total': priced['total'][i],
+                **dict(zip(extra_keys, line[3:])),
+            }
+            for i, line in enumerate(lines)
+        ]
+
+    def price_rooms(self, rooms: List[Dict], default_tier: str = 'basic',
+                    automation_keys: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Line items for every room x automation key with a positive count.
+
+        Each room's automation entry supplies its count and tier
+        ({"count": 3, "type": "premium"}); automation_keys limits which
+        keys are priced (all of AUTOMATION_KEYS by default).
+        """
+        allowed = AUTOMATION_KEYS if automation_keys is None else set(automation_keys)
+        lines = []
+        for room in rooms or []:
+            room_name = room.get('name', 'Unknown Room')
+            for key in AUTOMATION_KEYS:
+                if key not in allowed:
+                    continue
+                automation_data = room.get(key) or {}
+                count = automation_data.get('count', 0)
+                if count > 0:
+                    lines.append((key, automation_data.get('type', default_tier), count, room_name))
+        return self._line_items(lines, ('room',))
+
+    def price_counts(self, counts: Dict, tier: str) -> List[Dict]:
+        """Line items for {automation_type: quantity} at one tier."""
+        return self._line_items([(key, tier, count) for key, count in counts.items() if count > 0])
+
+    def tier_prices(self, tier: str) -> Dict[str, Tuple[str, float, float, float]]:
+        """{automation_type: (name, unit_cost, labor_cost, unit total)} for one tier."""
+        column = self.tier_index.get(tier, len(self.tier_index))
+        unit_cost = self.unit_cost[:-1, column]
+        labor_cost = self.labor_hours[:-1, column] * self.labor_rate
+        return {
+            key: (self.names[i], unit, labor, total)
+            for i, (key, unit, labor, total) in enumerate(zip(
+                self.keys, unit_cost.tolist(), labor_cost.tolist(), (unit_cost + labor_cost).tolist()))
+        }
+
+    def price_symbols(self, symbols: List[Dict], tier: str) -> Tuple[List[Dict], List[int]]:
+        """
+        Cost items for takeoffs symbols as (flat items, item count per symbol).
+
+        A symbol is one unit of its automation_category (or type) when the
+        config prices it, plus any custom {"name", "price", "quantity"} items.
+        The tier's prices are computed once for the whole catalog, so each
+        symbol costs a single lookup; items stay in one flat list to keep
+        large takeoffs from allocating a list per symbol.
+        """
+        prices = self.tier_prices(tier)
+        items: List[Dict] = []
+        counts: List[int] = []
+        for symbol in symbols:
+            start = len(items)
+            room = symbol.get('room', 'Unassigned')
+            price = prices.get(symbol.get('automation_category') or symbol.get('type'))
+            if price is not None:
+                name, unit_cost, labor_cost, total = price
+                items.append({'type': name, 'quantity': 1, 'unit_cost': unit_cost,
+                              'labor_cost': labor_cost, 'total': total, 'room': room})
+
+            # Custom items with quantities
+            for item in symbol.get('items') or ():
+                unit_price = item.get('price', 0)
+                quantity = item.get('quantity', 1)
+                items.append({'type': item.get('name', 'Custom Item'), 'quantity': quantity,
+                              'unit_cost': unit_price, 'labor_cost': 0,
+                              'total': unit_price * quantity, 'room': room})
+            counts.append(len(items) - start)
+        return items, counts
+
+    def totals(self, items: List[Dict]) -> Tuple[float, float, float]:
+        """(subtotal, markup, grand total) for priced items."""
+        subtotal = sum(item['total'] for item in items)
+        markup = subtotal * (self.markup_percentage / 100)
+        return subtotal, markup, subtotal + markup
+
+
+class PricingEngine:
+    """Loads the pricing config file once and recompiles it when it changes."""
+
+    def __init__(self, data_file: str, default_config: Optional[Dict] = None):
+        self.data_file = data_file
+        self.default_config = default_config or {}
+        self._lock = threading.Lock()
+        self._signature = None
+        self._tables: Optional[PricingTables] = None
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.data_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def tables(self) -> PricingTables:
+        """Compiled tables for the current config file."""
+        signature = self._file_signature()
+        with self._lock:
+            if self._tables is None or signature != self._signature:
+                if signature is None:
+                    config = copy.deepcopy(self.default_config)
+                else:
+                    with open(self.data_file, 'r') as f:
+                        config = json.load(f)
+                self._tables = PricingTables(config)
+                self._signature = signature
+            return self._tables
+
+    def config(self) -> Dict:
+        """Copy of the current raw pricing config."""
+        return copy.deepcopy(self.tables().config)
+
+    def invalidate(self):
+        """Force a reload on next access (after the file is rewritten)."""
+        with self._lock:
+            self._tables = None
@@ -0,0 +1,140 @@
+"""
+Query paging helpers shared by the repositories.
+
+Builds search, sort and pagination into the SQLAlchemy query so list
+endpoints only fetch the rows for the requested page:
+- Offset pages carry their total via COUNT(*) OVER() on the same query
+- Keyset cursors page on (sort column, id) and skip the total, so deep
+  pages cost the same as the first one
+"""
+
+import base64
+import json
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_filter(columns: Sequence, search: str):
+    """Case-insensitive substring match across the given columns."""
+    pattern = f"%{escape_like(search)}%"
+    return or_(*[column.ilike(pattern, escape='\\') for column in columns])
+
+
+def encode_cursor(value: Any, row_id: str) -> str:
+    """Encode the sort value and id of the last row on a page."""
+    if isinstance(value, datetime):
+        payload = {'t': 'datetime', 'v': value.isoformat()}
+    elif isinstance(value, date):
+        payload = {'t': 'date', 'v': value.isoformat()}
+    else:
+        payload = {'v': value}
+    payload['id'] = row_id
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode a cursor into (sort value, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload.get('v')
+        if payload.get('t') == 'datetime':
+            value = datetime.fromisoformat(value)
+        elif payload.get('t') == 'date':
+            value = date.fromisoformat(value)
+        return value, payload['id']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+
+
+def _after_cursor(sort_column, id_column, value: Any, row_id: str, descending: bool):
+    """Rows that sort after (value, row_id) with NULL sort values last."""
+    if value is None:
+        # Already into the NULL tail - only the id tiebreak is left
+        beyond_id = id_column < row_id if descending else id_column > row_id
+        return and_(sort_column.is_(None), beyond_id)
+
+    if descending:
+        beyond = or_(sort_column < value, and_(sort_column == value, id_column < row_id))
+    else:
+        beyond = or_(sort_column > value, and_(sort_column == value, id_column > row_id))
+    return or_(beyond, sort_column.is_(None))
+
+
+def fetch_page(query, sort_column, id_column, descending: bool = False,
+               limit: int = None, offset: int = 0, cursor: str = None) -> Dict:
+    """
+    Run a list query with ordering and pagination applied in SQL.
+
+    Returns {'rows': [...], 'total': int or None, 'next_cursor': str or None}.
+    total comes from COUNT(*) OVER() for offset pages and is None when
+    paging by cursor, where counting would force a scan of every row.
+    """
+    if descending:
+        order = [sort_column.desc().nullslast(), id_column.desc()]
+    else:
+        order = [sort_column.asc().nullslast(), id_column.asc()]
+
+    with_total = cursor is None
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        query = query.filter(_after_cursor(sort_column, id_column, value, row_id, descending))
+        offset = 0
+
+    page_query = query
+    if with_total:
+        page_query = page_query.add_columns(func.count().over().label('total_count'))
+    page_query = page_query.order_by(*order)
+    if offset:
+        page_query = page_query.offset(offset)
+    if limit is not None:
+        # One extra row tells us whether there is a next page
+        page_query = page_query.limit(limit + 1)
+
+    results = page_query.all()
+    total = None
+    if with_total:
+        rows: List = [r[0] for r in results]
+        if results:
+            total = results[0][1]
+        elif offset:
+            # Past the last page there is no row to carry the window count
+            total = query.order_by(None).count()
+        else:
+            total = 0
+    else:
+        rows = list(results)
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return {'rows': rows, 'total': total, 'next_cursor': next_cursor}
+
+
+def resolve_sort(sort_columns: Dict[str, Any], sort_by: Optional[str],
+                 default: str) -> Any:
+    """Map an API sort field to a column, falling back to the default."""
+    return sort_columns.get(sort_by) or sort_columns[default]
+
+
+def page_result(page: Dict, with_total: bool):
+    """Serialize fetched rows; a page dict when totals were asked for, else a list."""
+    items = [row.to_dict() for row in page['rows']]
+    if not with_total:
+        return items
+    return {'items': items, 'total': page['total'], 'next_cursor': page['next_cursor']}
@@ -0,0 +1,149 @@
+"""
+Search Service - Ranked, prefix-aware search over CRM entities.
+
+One set of ranking rules across backends:
+- PostgreSQL with pg_trgm (migration 004): substring filters use the
+  trigram GIN indexes and ties are broken by similarity()
+- PostgreSQL without pg_trgm, or SQLite: same filters and prefix ranking,
+  without the similarity tiebreak
+- JSON fallback: rank_records() applies the rules to in-memory records
+
+Ranking: exact match > prefix match > word-prefix match > substring match.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session, selectinload
+
+from database.models import Customer, Project, Quote, InventoryItem
+from services.query_paging import escape_like
+
+logger = logging.getLogger(__name__)
+
+# entity -> (model, searchable columns, display column, active filter column)
+SEARCH_ENTITIES = {
+    'customers': (Customer, ('name', 'company', 'email'), 'name', 'is_active'),
+    'projects': (Project, ('name',), 'name', None),
+    'quotes': (Quote, ('title', 'quote_number'), 'title', None),
+    'inventory': (InventoryItem, ('name', 'sku'), 'name', 'is_active'),
+}
+
+# JSON fallback: entity -> (file in CRM_DATA_FOLDER, searchable fields)
+JSON_SEARCH_FILES = {
+    'customers': ('customers.json', ('name', 'company', 'email')),
+    'projects': ('projects.json', ('title', 'name')),
+    'quotes': ('quotes.json', ('title', 'quote_number')),
+    'inventory': ('inventory.json', ('name', 'sku')),
+}
+
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = 3, 2, 1, 0
+
+# Per-process cache of whether pg_trgm is installed, keyed by engine URL
+_trigram_support: Dict[str, bool] = {}
+
+
+def score_text(value: Optional[str], query: str) -> Optional[int]:
+    """Rank one field against a lowercased query; None if it doesn't match."""
+    if not value:
+        return None
+    value = str(value).lower()
+    if value == query:
+        return EXACT
+    if value.startswith(query):
+        return PREFIX
+    if f" {query}" in value:
+        return WORD_PREFIX
+    if query in value:
+        return SUBSTRING
+    return None
+
+
+def rank_records(records: Iterable[Dict], fields: Sequence[str], query: str,
+                 limit: int = None) -> List[Dict]:
+    """In-memory fallback: filter and rank dict records by the shared rules."""
+    query = (query or '').strip().lower()
+    if not query:
+        return list(records)[:limit] if limit else list(records)
+
+    scored = []
+    for position, record in enumerate(records):
+        scores = [score_text(record.get(field), query) for field in fields]
+        scores = [s for s in scores if s is not None]
+        if scores:
+            # Shorter primary values rank higher among equal scores
+            primary = str(record.get(fields[0]) or '')
+            scored.append((-max(scores), len(primary), position, record))
+    scored.sort(key=lambda entry: entry[:3])
+    ranked = [entry[3] for entry in scored]
+    return ranked[:limit] if limit else ranked
+
+
+class SearchService:
+    """Ranked search over customers, projects, quotes and inventory."""
+
+    def __init__(self, session: Session, organization_id: str):
+        self.session = session
+        self.organization_id = organization_id
+
+    def has_trigram(self) -> bool:
+        """Whether the database is PostgreSQL with pg_trgm installed."""
+        bind = self.session.get_bind()
+        if bind.dialect.name != 'postgresql':
+            return False
+        key = str(bind.url)
+        if key not in _trigram_support:
+            try:
+                installed = self.session.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).first()
+                _trigram_support[key] = installed is not None
+            except Exception as e:
+                logger.warning(f"Could not check for pg_trgm: {e}")
+                _trigram_support[key] = False
+        return _trigram_support[key]
+
+    def _rank_expression(self, columns: List, query: str):
+        """SQL CASE giving the best match class across the columns."""
+        lowered = [func.lower(column) for column in columns]
+        escaped = escape_like(query)
+        return case(
+            (or_(*[column == query for column in lowered]), EXACT),
+            (or_(*[column.ilike(f"{escaped}%", escape='\\') for column in columns]), PREFIX),
+            (or_(*[column.ilike(f"% {escaped}%", escape='\\') for column in columns]), WORD_PREFIX),
+            else_=SUBSTRING
+        )
+
+    def search_entity(self, entity: str, query: str, limit: int = 20,
+                      include_inactive: bool = False) -> List[Dict]:
+        """Ranked matches for one entity type."""
+        model, fields, display, active_field = SEARCH_ENTITIES[entity]
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+
+        columns = [getattr(model, field) for field in fields]
+        pattern = f"%{escape_like(query)}%"
+        q = self.session.query(model).filter(
+            model.organization_id == self.organization_id,
+            or_(*[column.ilike(pattern, escape='\\') for column in columns])
+        )
+        if active_field and not include_inactive:
+            q = q.filter(getattr(model, active_field) == True)
+        if model is Quote:
+            q = q.options(selectinload(Quote.line_items))
+
+        order = [self._rank_expression(columns, query).desc()]
+        if self.has_trigram():
+            similarity = [func.coalesce(func.similarity(column, query), 0) for column in columns]
+            order.append((func.greatest(*similarity) if len(similarity) > 1 else similarity[0]).desc())
+        order.extend([func.length(getattr(model, display)), getattr(model, display), model.id])
+
+        return [row.to_dict() for row in q.order_by(*order).limit(limit).all()]
+
+    def search(self, query: str, entities: Iterable[str] = None,
+               limit: int = 10) -> Dict[str, List[Dict]]:
+        """Ranked matches grouped by entity type (typeahead)."""
+        entities = [e for e in (entities or SEARCH_ENTITIES) if e in SEARCH_ENTITIES]
+        return {entity: self.search_entity(entity, query, limit=limit) for entity in entities}
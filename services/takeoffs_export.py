@@ -0,0 +1,113 @@
+"""
+Takeoffs Export - Incremental state for /api/takeoffs/export.
+
+Each export used to re-render the marked-up floorplan, re-price every
+symbol and rebuild the quote PDF even when a single symbol had moved.
+The session now keeps an "export_cache" with fingerprints of what each
+artifact was built from, so an export only redoes the parts a diff
+touches:
+
+- cost items and formatted quote rows are cached per symbol fingerprint;
+  only new or edited symbols are re-priced, in one batch through the
+  pricing engine (a pricing or tier change invalidates them all)
+- the annotated image is reused while the drawn fields of the symbols
+  and the original floorplan are unchanged; when it is redrawn, the base
+  raster and markup overlay caches still apply (see markup_renderer.py)
+- the quote PDF is reused while its rows, totals and header are unchanged
+
+The state is plain JSON so it is stored inside the session file.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from services.pricing_engine import PricingTables
+
+
+def fingerprint(value) -> str:
+    """Stable sha256 of a JSON-serializable value."""
+    payload = json.dumps(value, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def quote_row(item: Dict) -> List[str]:
+    """Formatted quote table row for a cost item."""
+    return [
+        item['type'],
+        item['room'],
+        str(item['quantity']),
+        f"${item['unit_cost']:,.2f}",
+        f"${item['labor_cost']:,.2f}",
+        f"${item['total']:,.2f}"
+    ]
+
+
+class TakeoffsExportCache:
+    """Wraps a session's export_cache dict and tracks what was reused."""
+
+    def __init__(self, state: Optional[Dict] = None):
+        state = state if isinstance(state, dict) else {}
+        self.symbols: Dict[str, Dict] = dict(state.get('symbols') or {})
+        self.pricing: Optional[str] = state.get('pricing')
+        self.artifacts: Dict[str, Dict] = dict(state.get('artifacts') or {})
+        self.recomputed = 0
+        self.reused = 0
+
+    def cost_items(self, symbols: List[Dict], pricing: PricingTables,
+                   tier: str) -> Tuple[List[Dict], List[List[str]]]:
+        """Cost items and quote rows for symbols, re-pricing only changed ones."""
+        pricing_fp = fingerprint([tier, pricing.fingerprint])
+        if pricing_fp != self.pricing:
+            self.symbols = {}
+            self.pricing = pricing_fp
+
+        keys = [fingerprint(symbol) for symbol in symbols]
+        current: Dict[str, Dict] = {}
+        changed: Dict[str, Dict] = {}
+        for key, symbol in zip(keys, symbols):
+            if key in current or key in changed:
+                continue
+            if key in self.symbols:
+                current[key] = self.symbols[key]
+            else:
+                changed[key] = symbol
+
+        # New and edited symbols are priced together in one pass
+        items, counts = pricing.price_symbols(list(changed.values()), tier)
+        start = 0
+        for key, count in zip(changed, counts):
+            symbol_items = items[start:start + count]
+            current[key] = {'items': symbol_items, 'rows': [quote_row(item) for item in symbol_items]}
+            start += count
+        self.recomputed = len(changed)
+        self.reused = len(symbols) - len(changed)
+
+        cost_items: List[Dict] = []
+        rows: List[List[str]] = []
+        for key in keys:
+            cost_items.extend(current[key]['items'])
+            rows.extend(current[key]['rows'])
+
+        # Only keep entries for the current symbol set so sessions stay small
+        self.symbols = current
+        return cost_items, rows
+
+    def artifact(self, name: str, fp: str, folder: str) -> Optional[str]:
+        """Filename of a previously built artifact if it matches fp and still exists."""
+        entry = self.artifacts.get(name)
+        if not entry or entry.get('fingerprint') != fp:
+            return None
+        filename = entry.get('filename')
+        if not filename or not os.path.isfile(os.path.join(folder, filename)):
+            return None
+        return filename
+
+    def remember(self, name: str, fp: str, filename: str):
+        """Record the artifact built for fp."""
+        self.artifacts[name] = {'fingerprint': fp, 'filename': filename}
+
+    def to_dict(self) -> Dict:
+        """JSON state to store back on the session."""
+        return {'pricing': self.pricing, 'symbols': self.symbols, 'artifacts': self.artifacts}
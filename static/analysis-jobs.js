@@ -0,0 +1,48 @@
+/**
+ * Analysis Job Polling
+ * /api/analyze and /api/ai-mapping/analyze answer 202 with a job id while
+ * the analysis runs in the background; this waits for the final result.
+ */
+
+/**
+ * Resolve an analyze response to its final payload.
+ * Responses without a job_id (manual mode, wait=true, errors) pass through.
+ */
+async function resolveAnalysisJob(data, onProgress, intervalMs = 2000) {
+    if (!data || !data.job_id) {
+        return data;
+    }
+
+    const statusUrl = data.status_url || `/api/jobs/${data.job_id}`;
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+
+        const response = await fetch(statusUrl);
+        const payload = await response.json();
+        if (!payload.success) {
+            return { success: false, error: payload.error || 'Lost track of analysis job' };
+        }
+
+        const job = payload.job;
+        if (onProgress) {
+            onProgress(job);
+        }
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            return { success: false, error: job.error || 'Analysis failed' };
+        }
+        if (job.status === 'cancelled') {
+            return { success: false, error: 'Analysis was cancelled' };
+        }
+    }
+}
+
+/**
+ * Cancel a queued or running analysis job.
+ */
+async function cancelAnalysisJob(jobId) {
+    const response = await fetch(`/api/jobs/${jobId}/cancel`, { method: 'POST' });
+    return response.json();
+}
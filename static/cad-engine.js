@@ -9,6 +9,27 @@ console.log('⚡ Initializing Electrical CAD Designer...');
 let canvas;
 let currentTool = 'select';
 let currentSession = null;
+// Last saved state; saves send only the ops that differ from it
+let savedRevision = null;
+let savedObjects = new Map(); // object id -> JSON
+let savedFields = {};
+const SAVED_PROPERTIES = ['id', 'layer', 'customType', 'symbolId'];
+
+// A medium rendition is only a view: saved sessions, sheets and undo states keep the
+// full page (a durable URL; pyramids are evicted) at the same size on the canvas
+const imageToObject = fabric.Image.prototype.toObject;
+fabric.Image.prototype.toObject = function(propertiesToInclude) {
+    const object = imageToObject.call(this, propertiesToInclude);
+    if (this.fullResolutionUrl && this.fullResolutionSize) {
+        const full = this.fullResolutionSize;
+        object.src = this.fullResolutionUrl;
+        object.scaleX *= this.width / full.width;
+        object.scaleY *= this.height / full.height;
+        object.width = full.width;
+        object.height = full.height;
+    }
+    return object;
+};
 let symbols = {};
 let layers = [];
 let isDrawing = false;
@@ -142,6 +163,11 @@ async function createNewSession() {
 
         if (data.success) {
             currentSession = data.session;
+            rememberSaved(currentSession.revision, [], {
+                project_name: currentSession.project_name,
+                metadata: currentSession.metadata,
+                layers: currentSession.layers
+            });
             console.log('✅ Session created:', currentSession.session_id);
             updateObjectCount();
         } else {
@@ -154,6 +180,126 @@ async function createNewSession() {
     }
 }
 
+function ensureObjectIds() {
+    canvas.getObjects().forEach(obj => {
+        if (!obj.id) {
+            obj.id = 'obj_' + Math.random().toString(36).slice(2, 14);
+        }
+    });
+}
+
+function sessionFields() {
+    return {
+        project_name: document.getElementById('projectName').value,
+        metadata: {
+            scale: document.getElementById('scale').value,
+            paper_size: document.getElementById('paperSize').value,
+            drawing_number: document.getElementById('drawingNumber').value,
+            revision: document.getElementById('revision').value,
+            units: 'mm'
+        },
+        layers: layers
+    };
+}
+
+function storedFields(session) {
+    return { project_name: session.project_name, metadata: session.metadata, layers: session.layers };
+}
+
+function rememberSaved(revision, objects, fields) {
+    savedRevision = revision;
+    savedObjects = new Map(objects.filter(obj => obj.id).map(obj => [obj.id, JSON.stringify(obj)]));
+    savedFields = {};
+    Object.entries(fields).forEach(([field, value]) => savedFields[field] = JSON.stringify(value));
+}
+
+// Object-level ops turning the last saved state into the current one
+function diffSession(objects, fields) {
+    const deletes = [];
+    const changes = [];
+    const current = new Set();
+
+    objects.forEach((obj, index) => {
+        current.add(obj.id);
+        const previous = savedObjects.get(obj.id);
+        if (previous === undefined) {
+            changes.push({ op: 'add', object: obj, index: index });
+        } else if (previous !== JSON.stringify(obj)) {
+            const before = JSON.parse(previous);
+            const changed = {};
+            Object.keys(obj).forEach(key => {
+                if (JSON.stringify(obj[key]) !== JSON.stringify(before[key])) changed[key] = obj[key];
+            });
+            const unset = Object.keys(before).filter(key => !(key in obj));
+            changes.push({ op: 'update', id: obj.id, changes: changed, unset: unset });
+        }
+    });
+    savedObjects.forEach((_, id) => {
+        if (!current.has(id)) deletes.push({ op: 'delete', id: id });
+    });
+    Object.entries(fields).forEach(([field, value]) => {
+        if (savedFields[field] !== JSON.stringify(value)) {
+            changes.push({ op: 'set', field: field, value: value });
+        }
+    });
+    // Z-order changes of objects that were already saved
+    const kept = objects.map(obj => obj.id).filter(id => savedObjects.has(id));
+    const before = Array.from(savedObjects.keys()).filter(id => current.has(id));
+    if (kept.some((id, index) => id !== before[index])) {
+        changes.push({ op: 'reorder', ids: objects.map(obj => obj.id) });
+    }
+    return deletes.concat(changes);
+}
+
+async function postJSON(url, body) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    return { status: response.status, data: await response.json() };
+}
+
+// Patch the session with the changes since the last save; null if there are none
+async function savePatch(objects, fields) {
+    const ops = diffSession(objects, fields);
+    if (ops.length === 0) {
+        return null;
+    }
+    const result = await postJSON('/api/cad/patch', {
+        session_id: currentSession.session_id, revision: savedRevision, ops: ops
+    });
+    if (result.data.success) {
+        console.log(`Project saved (${ops.length} changes, revision ${result.data.revision})`);
+    }
+    return result;
+}
+
+async function saveFull(canvasData, fields) {
+    return postJSON('/api/cad/save', Object.assign({ session_id: currentSession.session_id }, fields, {
+        base_revision: savedRevision,
+        objects: canvasData.objects,
+        canvas_state: canvasData
+    }));
+}
+
+// Someone else saved since our last save: put our drawing on top of theirs, or load theirs
+async function rebaseOnLatest() {
+    const response = await fetch(`/api/cad/load/${currentSession.session_id}`);
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || 'Could not reload the project');
+    }
+    const overwrite = confirm('This project was saved elsewhere since you last saved it.\n\n' +
+        'OK - save your drawing over it\nCancel - discard your changes and load the saved version');
+    if (overwrite) {
+        rememberSaved(data.session.revision, data.session.objects || [], storedFields(data.session));
+        return true;
+    }
+    await loadSession(currentSession.session_id);
+    return false;
+}
+
 async function saveProject() {
     if (!currentSession) {
         alert('No active session');
@@ -162,36 +308,43 @@ async function saveProject() {
 
     try {
         // Serialize canvas data
-        const canvasData = canvas.toJSON(['layer', 'customType', 'symbolId']);
-
-        const sessionData = {
-            session_id: currentSession.session_id,
-            project_name: document.getElementById('projectName').value,
-            metadata: {
-                scale: document.getElementById('scale').value,
-                paper_size: document.getElementById('paperSize').value,
-                drawing_number: document.getElementById('drawingNumber').value,
-                revision: document.getElementById('revision').value,
-                units: 'mm'
-            },
-            layers: layers,
-            objects: canvasData.objects,
-            canvas_state: canvasData
-        };
-
-        const response = await fetch('/api/cad/save', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(sessionData)
-        });
+        ensureObjectIds();
+        const canvasData = canvas.toJSON(SAVED_PROPERTIES);
+        const fields = sessionFields();
+
+        // Send only what changed since the last save
+        if (savedRevision !== null) {
+            let patched = await savePatch(canvasData.objects, fields);
+            if (patched && patched.status === 409) {
+                if (!await rebaseOnLatest()) return;
+                patched = await savePatch(canvasData.objects, fields);
+            }
+            if (patched === null || patched.data.success) {
+                rememberSaved(patched ? patched.data.revision : savedRevision, canvasData.objects, fields);
+                alert('✅ Project saved successfully!');
+                return;
+            }
+            if (patched.status === 409) {
+                alert('❌ The project was changed again elsewhere - please save again');
+                return;
+            }
+            // The patch was rejected: fall back to a full save
+            console.warn('Patch save failed, saving full project:', patched.data.error);
+        }
 
-        const data = await response.json();
+        let result = await saveFull(canvasData, fields);
+        if (result.status === 409 && await rebaseOnLatest()) {
+            result = await saveFull(canvasData, fields);
+        } else if (result.status === 409) {
+            return;
+        }
 
-        if (data.success) {
+        if (result.data.success) {
+            rememberSaved(result.data.revision, canvasData.objects, fields);
             alert('✅ Project saved successfully!');
             console.log('Project saved');
         } else {
-            alert('❌ Failed to save: ' + data.error);
+            alert('❌ Failed to save: ' + result.data.error);
         }
     } catch (error) {
         console.error('Save error:', error);
@@ -232,6 +385,7 @@ async function loadSession(sessionId) {
 
         if (data.success) {
             currentSession = data.session;
+            savedRevision = null;
 
             // Clear canvas
             canvas.clear();
@@ -240,8 +394,13 @@ async function loadSession(sessionId) {
             if (data.session.canvas_state) {
                 canvas.loadFromJSON(data.session.canvas_state, () => {
                     canvas.renderAll();
+                    // Saves diff against the canvas as loaded
+                    rememberSaved(data.session.revision, canvas.toJSON(SAVED_PROPERTIES).objects,
+                                  storedFields(data.session));
                     console.log('Canvas loaded');
                 });
+            } else {
+                rememberSaved(data.session.revision, [], storedFields(data.session));
             }
 
             // Load metadata
@@ -407,6 +566,7 @@ async function loadPDFToCanvas(file) {
 
                 addToUndoStack();
                 updateObjectCount();
+                useMediumRendition(img, data.pyramid, data.image_url);
             });
         } else {
             throw new Error(data.error || 'Failed to convert PDF');
@@ -417,6 +577,36 @@ async function loadPDFToCanvas(file) {
     }
 }
 
+async function useMediumRendition(img, pyramid, fullUrl) {
+    // Swap the full page for the medium rendition once its pyramid is built;
+    // the full-resolution page comes back on zoom
+    if (!await waitForPyramid(pyramid)) return;
+    if (!canvas.getObjects().includes(img) || canvas.getZoom() > 1) return;
+    const scaledWidth = img.getScaledWidth();
+    const fullSize = { width: img.width, height: img.height };
+    img.setSrc(pyramid.medium_url, () => {
+        img.scale(scaledWidth / img.width);
+        img.fullResolutionUrl = fullUrl;
+        img.fullResolutionSize = fullSize;
+        canvas.renderAll();
+    }, { crossOrigin: 'anonymous' });
+}
+
+function loadFullResolutionImages() {
+    // Swap medium renditions for the full page once zoomed past 100%
+    canvas.getObjects('image').forEach(img => {
+        const url = img.fullResolutionUrl;
+        if (!url) return;
+        img.fullResolutionUrl = null;
+        img.fullResolutionSize = null;
+        const scaledWidth = img.getScaledWidth();
+        img.setSrc(url, () => {
+            img.scale(scaledWidth / img.width);
+            canvas.renderAll();
+        });
+    });
+}
+
 // ============================================================================
 // DRAWING TOOLS
 // ============================================================================
@@ -1667,6 +1857,9 @@ function zoomIn() {
     zoomLevel = Math.min(zoomLevel * 1.2, 5);
     canvas.setZoom(zoomLevel);
     updateZoomDisplay();
+    if (zoomLevel > 1) {
+        loadFullResolutionImages();
+    }
 }
 
 function zoomOut() {
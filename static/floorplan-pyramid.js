@@ -0,0 +1,37 @@
+/**
+ * Floorplan Pyramid Polling
+ * Floorplan uploads answer with a pyramid whose thumbnail/medium renditions
+ * are built in the background; this waits for them without blocking the
+ * full image from showing.
+ */
+
+/**
+ * Resolve to true once the pyramid is built, false if it failed or timed out.
+ */
+async function waitForPyramid(pyramid, timeoutMs = 60000, intervalMs = 500) {
+    if (!pyramid || !pyramid.status_url) return false;
+    const deadline = Date.now() + timeoutMs;
+    let status = pyramid.status;
+    while (status === 'pending' && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        try {
+            const response = await fetch(pyramid.status_url);
+            status = response.ok ? (await response.json()).status : 'failed';
+        } catch (error) {
+            status = 'failed';
+        }
+    }
+    return status === 'ready';
+}
+
+/**
+ * Load an image URL, resolving to the loaded Image (or null if it fails).
+ */
+function loadPyramidImage(url) {
+    return new Promise(resolve => {
+        const img = new Image();
+        img.onload = () => resolve(img);
+        img.onerror = () => resolve(null);
+        img.src = url;
+    });
+}
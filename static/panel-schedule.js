@@ -20,6 +20,9 @@ async function generatePanelSchedule() {
 
     // Calculate electrical parameters for each circuit
     const circuitSchedule = await calculateCircuitParameters(circuits);
+    if (!circuitSchedule) {
+        return;
+    }
 
     // Generate and display panel schedule
     displayPanelSchedule(circuitSchedule);
@@ -136,64 +139,73 @@ function groupDevicesByCircuit(devices) {
 }
 
 async function calculateCircuitParameters(circuits) {
-    const schedule = [];
+    // Size every circuit in one batch request; the estimate below is only
+    // used when the server can't be reached, never for a rejected request
+    let results = null;
+    let data;
+    try {
+        const response = await fetch('/api/cad/calculate-circuit', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                circuits: circuits.map(circuit => ({
+                    devices: circuit.devices,
+                    length_meters: circuit.length_meters,
+                    circuit_type: circuit.type.toLowerCase()
+                }))
+            })
+        });
+
+        data = await response.json();
+    } catch (error) {
+        console.error('Circuit calculation error:', error);
+    }
 
-    for (let i = 0; i < circuits.length; i++) {
-        const circuit = circuits[i];
+    if (data) {
+        if (!data.success) {
+            alert(`Circuit calculation failed: ${data.error || 'unknown error'}`);
+            return null;
+        }
+        results = data.results;
+    }
 
+    return circuits.map((circuit, i) => {
         // Calculate total load
         const totalLoad = circuit.devices.reduce((sum, d) => sum + d.load_watts, 0);
         const loadAmps = totalLoad / 230;  // V = 230V
+        const result = results ? results[i] : null;
 
-        // Call backend for proper calculations
-        try {
-            const response = await fetch('/api/cad/calculate-circuit', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    devices: circuit.devices,
-                    length_meters: circuit.length_meters,
-                    circuit_type: circuit.type.toLowerCase()
-                })
-            });
-
-            const data = await response.json();
-
-            if (data.success) {
-                schedule.push({
-                    circuit_number: i + 1,
-                    description: circuit.description,
-                    type: circuit.type,
-                    device_count: circuit.devices.length,
-                    load_watts: totalLoad,
-                    load_amps: data.load.load_amps,
-                    cable_size: data.cable.size,
-                    breaker_rating: data.breaker.rating,
-                    rcd_required: data.rcd.required,
-                    voltage_drop: data.cable.voltage_drop_percent,
-                    compliant: data.compliant
-                });
-            }
-        } catch (error) {
-            console.error('Circuit calculation error:', error);
-            // Fallback to simple calculation
-            schedule.push({
+        if (result) {
+            return {
                 circuit_number: i + 1,
                 description: circuit.description,
                 type: circuit.type,
                 device_count: circuit.devices.length,
                 load_watts: totalLoad,
-                load_amps: loadAmps.toFixed(2),
-                cable_size: loadAmps > 10 ? '2.5' : '1.5',
-                breaker_rating: loadAmps > 10 ? 16 : 10,
-                rcd_required: circuit.type === 'Power Outlets',
-                voltage_drop: 'N/A',
-                compliant: true
-            });
+                load_amps: result.load.load_amps,
+                cable_size: result.cable.size,
+                breaker_rating: result.breaker.rating,
+                rcd_required: result.rcd.required,
+                voltage_drop: result.cable.voltage_drop_percent,
+                compliant: result.compliant
+            };
         }
-    }
 
-    return schedule;
+        // Server unreachable: fall back to a simple calculation
+        return {
+            circuit_number: i + 1,
+            description: circuit.description,
+            type: circuit.type,
+            device_count: circuit.devices.length,
+            load_watts: totalLoad,
+            load_amps: loadAmps.toFixed(2),
+            cable_size: loadAmps > 10 ? '2.5' : '1.5',
+            breaker_rating: loadAmps > 10 ? 16 : 10,
+            rcd_required: circuit.type === 'Power Outlets',
+            voltage_drop: 'N/A',
+            compliant: true
+        };
+    });
 }
 
 function displayPanelSchedule(schedule) {
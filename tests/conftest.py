@@ -107,3 +107,36 @@ def create_temp_directories(tmp_path):
         created_dirs[dir_name] = dir_path
 
     return created_dirs
+
+
+@pytest.fixture
+def org_id():
+    """Fixture providing the organization id seeded into db_session"""
+    import uuid
+    return str(uuid.uuid4())
+
+
+@pytest.fixture
+def db_session(org_id):
+    """Fixture providing an in-memory SQLite session with the CRM tables"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.orm import sessionmaker
+    from database.connection import Base
+    from database import models
+
+    # SQLite has no JSONB; its JSON type stores the same payloads
+    compiles(JSONB, 'sqlite')(lambda type_, compiler, **kw: 'JSON')
+
+    engine = create_engine('sqlite://')
+    tables = [models.Organization, models.Customer, models.Project, models.Job,
+              models.Technician, models.Quote, models.QuoteLineItem, models.InventoryItem,
+              models.KanbanTask, models.CalendarEvent, models.EventLog]
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in tables])
+    session = sessionmaker(bind=engine)()
+    session.add(models.Organization(id=org_id, name='Test Org', slug='test-org'))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
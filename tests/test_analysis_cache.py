@@ -0,0 +1,87 @@
+"""
+Tests for the AI analysis result cache
+"""
+import os
+import time
+
+import pytest
+
+from app.utils.analysis_cache import AnalysisCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture providing an empty cache in a temp directory"""
+    return AnalysisCache(str(tmp_path / 'cache'), ttl_seconds=3600, max_entries=3)
+
+
+@pytest.mark.unit
+class TestAnalysisCache:
+    """Tests for content-hash caching of analysis results"""
+
+    def test_key_covers_image_prompt_and_model(self):
+        """Test that changing any key input produces a different key"""
+        base = AnalysisCache.make_key('mapping', 'img', 'prompt', 'model-a')
+        assert base == AnalysisCache.make_key('mapping', 'img', 'prompt', 'model-a')
+        assert base != AnalysisCache.make_key('mapping', 'img2', 'prompt', 'model-a')
+        assert base != AnalysisCache.make_key('mapping', 'img', 'prompt + new learning', 'model-a')
+        assert base != AnalysisCache.make_key('mapping', 'img', 'prompt', 'model-b')
+        assert base != AnalysisCache.make_key('quote_analysis', 'img', 'prompt', 'model-a')
+
+    def test_hit_returns_copy_and_counts_tokens(self, cache):
+        """Test that a stored result is returned on the next lookup"""
+        key = cache.make_key('mapping', 'img', 'prompt', 'model')
+        assert cache.get(key) is None
+        assert cache.put(key, {'rooms': [{'name': 'Kitchen'}]}, tokens=1200)
+
+        hit = cache.get(key)
+        hit['rooms'].append({'name': 'mutated'})
+        assert cache.get(key) == {'rooms': [{'name': 'Kitchen'}]}
+
+        stats = cache.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['tokens_saved'] == 2400
+
+    def test_errors_not_cached(self, cache):
+        """Test that error results are never stored"""
+        key = cache.make_key('mapping', 'img', 'prompt', 'model')
+        assert not cache.put(key, {'error': 'JSON parse error'})
+        assert cache.get(key) is None
+
+    def test_ttl_expiry(self, cache):
+        """Test that entries older than the TTL are treated as misses"""
+        key = cache.make_key('mapping', 'img', 'prompt', 'model')
+        cache.put(key, {'rooms': []})
+        cache.ttl_seconds = 0
+        time.sleep(0.01)
+        assert cache.get(key) is None
+        assert cache.stats()['expired'] == 1
+
+    def test_lru_eviction(self, cache):
+        """Test that the least recently used entry is evicted over budget"""
+        keys = [cache.make_key('mapping', f'img{i}', 'prompt', 'model') for i in range(4)]
+        now = time.time()
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, {'n': i})
+            os.utime(cache._path(key), (now - 100 + i, now - 100 + i))
+        cache.get(keys[0])  # touch the oldest so keys[1] becomes LRU
+        cache.put(keys[3], {'n': 3})
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == {'n': 0}
+        assert cache.stats()['entries'] == 3
+
+    def test_disabled_cache(self, tmp_path):
+        """Test that a disabled cache never stores or returns results"""
+        cache = AnalysisCache(str(tmp_path), enabled=False)
+        key = cache.make_key('mapping', 'img', 'prompt', 'model')
+        assert not cache.put(key, {'rooms': []})
+        assert cache.get(key) is None
+
+    def test_clear(self, cache):
+        """Test that clear removes every entry"""
+        for i in range(2):
+            cache.put(cache.make_key('mapping', f'img{i}', 'p', 'm'), {'n': i})
+        assert cache.clear() == 2
+        assert cache.stats()['entries'] == 0
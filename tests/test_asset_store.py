@@ -0,0 +1,191 @@
+"""
+Tests for content-addressed assets and the /assets endpoint
+"""
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from services.asset_store import AssetStore, get_asset_store
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+@pytest.mark.unit
+class TestAssetStore:
+    """Tests for storing and resolving assets"""
+
+    def test_put_bytes(self, tmp_path):
+        """Test that content is stored once under its hash with the file extension"""
+        store = AssetStore(str(tmp_path))
+        name = store.put_bytes(PNG, 'plan.PNG')
+        assert name == hashlib.sha256(PNG).hexdigest() + '.png'
+        assert store.put_bytes(PNG, 'other.png') == name
+        with open(store.path_for(name), 'rb') as f:
+            assert f.read() == PNG
+        assert os.path.dirname(store.path_for(name)).endswith(name[:2])
+
+    def test_put_file_remembers_hash(self, tmp_path):
+        """Test that an unchanged file is not re-hashed and a rewritten one gets a new asset"""
+        store = AssetStore(str(tmp_path / 'assets'))
+        source = tmp_path / 'q1.png'
+        source.write_bytes(PNG)
+        name = store.put_file(str(source))
+        assert store.put_file(str(source)) == name and store.hashed == 1
+
+        source.write_bytes(PNG + b'edit')
+        changed = store.put_file(str(source))
+        assert changed != name and store.hashed == 2
+        with open(store.path_for(name), 'rb') as f:
+            assert f.read() == PNG
+
+    def test_malformed_names(self, tmp_path):
+        """Test that names that are not a hash never resolve to a path"""
+        store = AssetStore(str(tmp_path))
+        (tmp_path / 'secret.txt').write_text('x')
+        for name in ('../secret.txt', 'secret.txt', 'a' * 64 + '/../x', 'A' * 64, ''):
+            assert store.path_for(name) is None
+        assert store.path_for('0' * 64 + '.png') is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that outgrowing max_bytes evicts the assets used longest ago"""
+        store = AssetStore(str(tmp_path), max_bytes=2500, min_age=0)
+        names = [store.put_bytes(bytes([i]) * 1000, f'{i}.bin') for i in range(2)]
+        os.utime(store.path_for(names[0]), (1000, 1000))
+        os.utime(store.path_for(names[1]), (2000, 2000))
+        store.touch(names[0])
+
+        newest = store.put_bytes(b'\x02' * 1000, '2.bin')
+        assert store.path_for(names[1]) is None and store.evicted == 1
+        assert store.path_for(names[0]) and store.path_for(newest)
+        assert store.collect() == 2000
+
+    def test_evicted_file_republished(self, tmp_path):
+        """Test that publishing a file whose asset was evicted copies it back"""
+        store = AssetStore(str(tmp_path / 'assets'), max_bytes=1, min_age=0)
+        source = tmp_path / 'q1.png'
+        source.write_bytes(PNG)
+        name = store.put_file(str(source))
+        os.remove(store.path_for(name))
+        assert store.put_file(str(source)) == name and store.path_for(name)
+
+    def test_recent_assets_kept(self, tmp_path):
+        """Test that assets newer than min_age are not evicted even over the cap"""
+        store = AssetStore(str(tmp_path), max_bytes=1000)
+        names = [store.put_bytes(bytes([i]) * 1000, f'{i}.bin') for i in range(3)]
+        assert all(store.path_for(name) for name in names) and store.evicted == 0
+
+    def test_unknown_sendfile_mode(self, tmp_path):
+        """Test that an unsupported proxy handoff is rejected"""
+        with pytest.raises(ValueError):
+            AssetStore(str(tmp_path), sendfile='x-magic')
+
+
+@pytest.mark.integration
+class TestAssetEndpoint:
+    """Integration tests for /assets and the CRM routes that link to it"""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Create an app with the assets and extended CRM blueprints on file storage"""
+        from flask import Flask
+        from app.api.assets import assets_bp
+        from app.api.crm_extended import crm_extended_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['CRM_DATA_FOLDER'] = str(tmp_path / 'crm')
+        app.config['QUOTES_FILE'] = str(tmp_path / 'crm' / 'quotes.json')
+        app.config['ASSET_STORE_FOLDER'] = str(tmp_path / 'assets')
+        app.register_blueprint(assets_bp)
+        app.register_blueprint(crm_extended_bp)
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        """Test client for the app"""
+        return app.test_client()
+
+    @pytest.fixture
+    def asset_url(self, tmp_path):
+        """URL of a stored PNG"""
+        return '/assets/' + get_asset_store(str(tmp_path / 'assets')).put_bytes(PNG, 'plan.png')
+
+    def test_caching_headers(self, client, asset_url):
+        """Test that assets have a strong ETag and an immutable one-year Cache-Control"""
+        response = client.get(asset_url)
+        assert response.status_code == 200 and response.data == PNG
+        assert response.mimetype == 'image/png'
+        assert response.headers['ETag'] == f'"{hashlib.sha256(PNG).hexdigest()}"'
+        cache_control = response.headers['Cache-Control']
+        assert 'immutable' in cache_control and 'max-age=31536000' in cache_control and 'public' in cache_control
+
+    def test_conditional_and_range(self, client, asset_url):
+        """Test that If-None-Match gives 304 and Range gives 206 with the requested bytes"""
+        etag = client.get(asset_url).headers['ETag']
+        assert client.get(asset_url, headers={'If-None-Match': etag}).status_code == 304
+        response = client.get(asset_url, headers={'Range': 'bytes=8-15'})
+        assert response.status_code == 206 and response.data == PNG[8:16]
+        assert response.headers['Content-Range'] == f'bytes 8-15/{len(PNG)}'
+
+    def test_download_name(self, client, asset_url):
+        """Test that ?filename= serves the asset as a private attachment"""
+        response = client.get(f'{asset_url}?filename=Plan v2.png')
+        assert response.headers['Content-Disposition'].startswith('attachment')
+        assert 'Plan_v2.png' in response.headers['Content-Disposition']
+        cache_control = response.headers['Cache-Control']
+        assert 'private' in cache_control and 'public' not in cache_control and 'immutable' in cache_control
+        assert response.headers['ETag'] == client.get(asset_url).headers['ETag']
+
+    def test_proxy_handoff(self, client, asset_url, tmp_path):
+        """Test that sendfile modes hand the file to the proxy without a body"""
+        store = get_asset_store(str(tmp_path / 'assets'))
+        name = asset_url.rsplit('/', 1)[1]
+        try:
+            store.sendfile = 'x-accel-redirect'
+            response = client.get(asset_url)
+            assert response.headers['X-Accel-Redirect'] == f'/_assets/{name[:2]}/{name}'
+            assert response.data == b'' and 'immutable' in response.headers['Cache-Control']
+            assert client.get(asset_url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+            store.sendfile = 'x-sendfile'
+            assert client.get(asset_url).headers['X-Sendfile'] == store.path_for(name)
+        finally:
+            store.sendfile = ''
+
+    def test_missing_asset(self, client):
+        """Test that unknown or malformed names are 404"""
+        assert client.get('/assets/' + '0' * 64 + '.png').status_code == 404
+        assert client.get('/assets/..%2Fquotes.json').status_code == 404
+
+    def test_floorplan_urls(self, client, tmp_path):
+        """Test that the floorplan route and canvas state point at the same cacheable asset"""
+        os.makedirs(tmp_path / 'crm' / 'floorplans')
+        (tmp_path / 'crm' / 'floorplans' / 'q1.png').write_bytes(PNG)
+        (tmp_path / 'crm' / 'quotes.json').write_text(json.dumps([
+            {'id': 'q1', 'floorplan_image': '/api/crm/quotes/q1/floorplan'}]))
+
+        response = client.get('/api/crm/quotes/q1/floorplan')
+        assert response.status_code == 302 and 'no-cache' in response.headers['Cache-Control']
+        asset_url = response.headers['Location']
+        assert asset_url.startswith('/assets/')
+
+        data = client.get('/api/crm/quotes/q1/canvas-state').get_json()
+        assert data['quote']['floorplan_image'] == asset_url
+        assert client.get(asset_url).data == PNG
+
+    def test_documents(self, client, tmp_path):
+        """Test that uploaded documents get an asset URL and downloads redirect to it"""
+        os.makedirs(tmp_path / 'crm')
+        (tmp_path / 'crm' / 'quotes.json').write_text(json.dumps([{'id': 'q1'}]))
+        response = client.post('/api/crm/quotes/documents', content_type='multipart/form-data', data={
+            'quote_id': 'q1', 'documents': (io.BytesIO(b'%PDF-1.4 spec'), 'spec.pdf')})
+        doc = response.get_json()['documents'][0]
+        assert doc['asset_url'].startswith('/assets/') and doc['asset_url'].endswith('?filename=spec.pdf')
+
+        response = client.get(doc['url'])
+        assert response.status_code == 302 and response.headers['Location'] == doc['asset_url']
+        response = client.get(doc['asset_url'])
+        assert response.data == b'%PDF-1.4 spec' and response.mimetype == 'application/pdf'
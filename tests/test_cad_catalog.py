@@ -0,0 +1,133 @@
+"""
+Tests for the indexed CAD session catalog behind /api/cad/list
+"""
+import json
+import os
+
+import pytest
+
+from services.cad_catalog import CadCatalog
+
+
+def write_session(folder, session_id, name, modified, objects=0):
+    """Write a session file the way /api/cad/save does"""
+    session = {'session_id': session_id, 'project_name': name, 'created_date': '2025-01-01 00:00:00',
+               'modified_date': modified, 'objects': [{'type': 'line'}] * objects}
+    path = folder / f'{session_id}.json'
+    path.write_text(json.dumps(session))
+    return session, path
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Fixture providing a catalog over five sessions"""
+    for i in range(5):
+        write_session(tmp_path, f'cad_{i}', f'Project {i}', f'2025-06-0{i + 1} 12:00:00', objects=i * 10)
+    catalog = CadCatalog(str(tmp_path))
+    catalog.sync()
+    return catalog
+
+
+@pytest.mark.unit
+class TestCadCatalog:
+    """Tests for catalog sync, upserts and listing"""
+
+    def test_sync_reads_summaries(self, catalog):
+        """Test that sync indexes every session with its object count"""
+        page = catalog.list_sessions()
+        assert page['total'] == 5
+        assert [item['session_id'] for item in page['items']] == ['cad_4', 'cad_3', 'cad_2', 'cad_1', 'cad_0']
+        assert page['items'][0]['object_count'] == 40
+
+    def test_sync_skips_unchanged_files(self, catalog, tmp_path):
+        """Test that only new, changed or deleted files are touched on resync"""
+        assert catalog.sync() == {'read': 0, 'removed': 0, 'sessions': 5}
+        write_session(tmp_path, 'cad_1', 'Renamed', '2025-07-01 00:00:00', objects=1)
+        os.remove(tmp_path / 'cad_2.json')
+        assert catalog.sync() == {'read': 1, 'removed': 1, 'sessions': 4}
+        assert catalog.list_sessions(limit=1)['items'][0]['project_name'] == 'Renamed'
+
+    def test_upsert_avoids_reread(self, catalog, tmp_path):
+        """Test that an upsert with the file stat leaves nothing for sync to read"""
+        session, path = write_session(tmp_path, 'cad_9', 'New', '2025-08-01 00:00:00', objects=3)
+        catalog.upsert(session, os.stat(path))
+        assert catalog.list_sessions(limit=1)['items'][0]['session_id'] == 'cad_9'
+        assert catalog.sync()['read'] == 0
+
+    def test_offset_and_sort(self, catalog):
+        """Test that offset pages follow the requested sort"""
+        page = catalog.list_sessions(sort_by='object_count', descending=False, limit=2, offset=2)
+        assert [item['object_count'] for item in page['items']] == [20, 30]
+        assert page['total'] == 5
+
+    def test_cursor_pages(self, catalog):
+        """Test that cursor pages walk every session once without a total"""
+        seen, cursor = [], None
+        while True:
+            page = catalog.list_sessions(limit=2, cursor=cursor)
+            assert (page['total'] is None) == (cursor is not None)
+            seen += [item['session_id'] for item in page['items']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == ['cad_4', 'cad_3', 'cad_2', 'cad_1', 'cad_0']
+
+    def test_binary_snapshots(self, catalog, tmp_path):
+        """Test that binary snapshots are listed, and preferred to a JSON file with the same id"""
+        from services.canvas_codec import write_canvas_file
+
+        session, _ = write_session(tmp_path, 'cad_1', 'Project 1', '2025-06-02 12:00:00')
+        write_canvas_file(str(tmp_path / 'cad_1.cvb'), dict(session, project_name='Binary'))
+        assert catalog.sync() == {'read': 1, 'removed': 0, 'sessions': 5}
+        assert catalog.list_sessions(search='Binary')['items'][0]['session_id'] == 'cad_1'
+
+    def test_search(self, catalog):
+        """Test that search matches project names literally"""
+        assert catalog.list_sessions(search='Project 3')['total'] == 1
+        assert catalog.list_sessions(search='%')['total'] == 0
+
+    def test_unknown_sort_falls_back(self, catalog):
+        """Test that unsupported sort fields use modified_date"""
+        page = catalog.list_sessions(sort_by='objects; DROP TABLE sessions')
+        assert page['items'][0]['session_id'] == 'cad_4'
+
+
+@pytest.mark.integration
+class TestListEndpoint:
+    """Integration tests for /api/cad/new, /api/cad/save and /api/cad/list"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a test client with the CAD blueprint"""
+        from flask import Flask
+        from app.api.electrical_cad import electrical_cad_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['CAD_SESSIONS_FOLDER'] = str(tmp_path)
+        app.register_blueprint(electrical_cad_bp)
+        return app.test_client()
+
+    def test_new_and_save_update_listing(self, client):
+        """Test that created and saved sessions are listed without rescanning"""
+        session_id = client.post('/api/cad/new', json={'project_name': 'House'}).get_json()['session_id']
+        client.post('/api/cad/save', json={'session_id': session_id, 'project_name': 'House v2',
+                                           'objects': [{'type': 'line'}] * 3})
+        data = client.get('/api/cad/list').get_json()
+        assert data['success'] and data['total'] == 1
+        assert data['sessions'][0]['project_name'] == 'House v2'
+        assert data['sessions'][0]['object_count'] == 3
+
+    def test_paginated_listing(self, client):
+        """Test that limit returns a cursor for the next page"""
+        for name in ('A', 'B', 'C'):
+            client.post('/api/cad/new', json={'project_name': name})
+        data = client.get('/api/cad/list?limit=2&sort=project_name&order=asc').get_json()
+        assert [s['project_name'] for s in data['sessions']] == ['A', 'B']
+        data = client.get(f"/api/cad/list?limit=2&sort=project_name&order=asc&cursor={data['next_cursor']}").get_json()
+        assert [s['project_name'] for s in data['sessions']] == ['C']
+
+    def test_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected"""
+        response = client.get('/api/cad/list?limit=2&cursor=not-a-cursor')
+        assert response.status_code == 400
@@ -0,0 +1,163 @@
+"""
+Tests for binary DXF and server-side PDF/PNG CAD exports
+"""
+import io
+import struct
+
+import pytest
+from PIL import Image
+
+from app.utils.cad_renderer import CadRenderer
+from dxf_exporter import BINARY_SENTINEL, export_to_dxf
+
+
+def parse_binary(data):
+    """Decode R12 binary DXF into (group code, value) pairs"""
+    assert data.startswith(BINARY_SENTINEL)
+    tags, pos = [], len(BINARY_SENTINEL)
+    while pos < len(data):
+        code = data[pos]
+        pos += 1
+        if 10 <= code <= 59:
+            value = struct.unpack_from('<d', data, pos)[0]
+            pos += 8
+        elif 60 <= code <= 79:
+            value = struct.unpack_from('<h', data, pos)[0]
+            pos += 2
+        elif 90 <= code <= 99:
+            value = struct.unpack_from('<i', data, pos)[0]
+            pos += 4
+        else:
+            end = data.index(b'\x00', pos)
+            value = data[pos:end].decode('cp1252')
+            pos = end + 1
+        tags.append((code, value))
+    return tags
+
+
+def parse_ascii(text):
+    """Split ASCII DXF text into (group code, value) pairs"""
+    lines = text.split('\n')[:-1]
+    return [(int(lines[i]), lines[i + 1]) for i in range(0, len(lines), 2)]
+
+
+@pytest.fixture
+def cad_data():
+    """Fixture providing a CAD session with symbols, wiring and a label"""
+    objects = []
+    for i in range(20):
+        objects.append({
+            'type': 'group', 'customType': 'symbol', 'symbolId': 'power-outlet-single',
+            'left': 50 * i, 'top': 100, 'width': 20, 'height': 20, 'angle': 90 * (i % 2),
+            'layer': 'DEVICES-SYMBOLS',
+            'objects': [{'type': 'circle', 'left': -8, 'top': -8, 'radius': 8}],
+        })
+    objects.append({'type': 'line', 'x1': 0, 'y1': 0, 'x2': 1000, 'y2': 300, 'layer': 'POWER-WIRING-RED'})
+    objects.append({'type': 'text', 'left': 10, 'top': 200, 'text': 'Kitchen', 'fontSize': 20})
+    return {
+        'canvas_state': {'objects': objects},
+        'layers': [{'name': 'POWER-WIRING-RED', 'color': '#E74C3C'},
+                   {'name': 'DEVICES-SYMBOLS', 'color': '#F39C12'}],
+    }
+
+
+@pytest.fixture
+def malformed_data(cad_data):
+    """Fixture adding objects with null, text, numeric-string and NaN numbers"""
+    cad_data['canvas_state']['objects'] += [
+        {'type': 'line', 'x1': None, 'y1': '12.5', 'x2': 'abc', 'y2': float('nan')},
+        {'type': 'circle', 'left': '40', 'top': None, 'radius': 'wide'},
+        {'type': 'rect', 'left': 5, 'top': 5, 'width': None, 'height': '30'},
+        {'type': 'text', 'left': 'n/a', 'top': float('inf'), 'text': 'Hall', 'fontSize': None},
+        {'type': 'group', 'customType': 'symbol', 'symbolId': 'switch', 'left': None, 'top': '7',
+         'angle': 'x', 'objects': [{'type': 'circle', 'left': None, 'top': 0, 'radius': None}]},
+    ]
+    return cad_data
+
+
+@pytest.mark.unit
+class TestBinaryDXF:
+    """Tests for binary DXF output"""
+
+    def test_same_tags_as_ascii(self, cad_data):
+        """Test that binary and ASCII DXF encode the same tags"""
+        binary = parse_binary(export_to_dxf(cad_data, binary=True))
+        text = parse_ascii(export_to_dxf(cad_data))
+        assert len(binary) == len(text)
+        for (code, value), (text_code, text_value) in zip(binary, text):
+            assert code == text_code
+            if isinstance(value, str):
+                assert value == text_value
+            else:
+                assert value == pytest.approx(float(text_value))
+        assert binary[-1] == (0, 'EOF')
+
+    def test_malformed_numbers_match_ascii(self, malformed_data):
+        """Test that null, text and NaN numbers encode the same defaults in binary and ASCII DXF"""
+        binary = parse_binary(export_to_dxf(malformed_data, binary=True))
+        text = parse_ascii(export_to_dxf(malformed_data))
+        assert len(binary) == len(text)
+        for (code, value), (_, text_value) in zip(binary, text):
+            if not isinstance(value, str):
+                assert value == pytest.approx(float(text_value))
+        assert binary[-1] == (0, 'EOF')
+
+    def test_smaller_than_ascii(self, cad_data):
+        """Test that binary DXF is smaller than ASCII for canvas (fractional) coordinates"""
+        for i, obj in enumerate(cad_data['canvas_state']['objects']):
+            obj['left'] = obj.get('left', 0) + i / 7
+        assert len(export_to_dxf(cad_data, binary=True)) < len(export_to_dxf(cad_data).encode('utf-8'))
+
+
+@pytest.mark.unit
+class TestCadRenderer:
+    """Tests for PDF/PNG rendering and the render cache"""
+
+    def test_png_draws_layer_colors(self, cad_data, tmp_path):
+        """Test that the PNG contains the wiring and device layer colours"""
+        image = CadRenderer(str(tmp_path), max_edge=800).draw_png(cad_data)
+        assert max(image.size) <= 800
+        colors = {color for _, color in image.getcolors(maxcolors=1 << 20)}
+        assert (0xE7, 0x4C, 0x3C) in colors
+        assert (0xF3, 0x9C, 0x12) in colors
+
+    def test_pdf_uses_one_form_per_block(self, cad_data, tmp_path):
+        """Test that symbol instances are drawn from a single form XObject"""
+        buffer = io.BytesIO()
+        CadRenderer(str(tmp_path)).draw_pdf(cad_data, buffer)
+        pdf = buffer.getvalue()
+        assert pdf.startswith(b'%PDF')
+        assert pdf.count(b'/Subtype /Form') == 1
+
+    def test_malformed_numbers_drawn(self, malformed_data, tmp_path):
+        """Test that PNG and PDF rendering tolerate null, text and NaN numbers"""
+        renderer = CadRenderer(str(tmp_path), max_edge=400)
+        assert max(renderer.draw_png(malformed_data).size) <= 400
+        buffer = io.BytesIO()
+        renderer.draw_pdf(malformed_data, buffer)
+        assert buffer.getvalue().startswith(b'%PDF')
+
+    def test_render_cache(self, cad_data, tmp_path):
+        """Test that an unchanged drawing reuses the cached file"""
+        renderer = CadRenderer(str(tmp_path), max_edge=400)
+        path = renderer.render(cad_data, 'png')
+        assert renderer.render(cad_data, 'png') == path
+        assert (renderer.renders, renderer.hits) == (1, 1)
+        with Image.open(path) as image:
+            assert image.format == 'PNG'
+        cad_data['canvas_state']['objects'].pop()
+        assert renderer.render(cad_data, 'png') != path
+
+    def test_eviction(self, cad_data, tmp_path):
+        """Test that the cache keeps at most max_renders files"""
+        renderer = CadRenderer(str(tmp_path), max_renders=2, max_edge=200)
+        for fmt in ('png', 'pdf'):
+            renderer.render(cad_data, fmt)
+        cad_data['layers'] = []
+        renderer.render(cad_data, 'png')
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_unsupported_format(self, cad_data, tmp_path):
+        """Test that unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            CadRenderer(str(tmp_path)).render(cad_data, 'svg')
@@ -0,0 +1,196 @@
+"""
+Tests for revisioned CAD session patches (op log + snapshots)
+"""
+import json
+
+import pytest
+
+from services.canvas_codec import is_encoded, read_canvas_file
+from services.cad_session_store import CadSessionStore, InvalidPatch, RevisionConflict, SessionNotFound
+
+
+def line(object_id, x):
+    """A wiring line object"""
+    return {'id': object_id, 'type': 'line', 'x1': x, 'y1': 0, 'x2': x + 10, 'y2': 0, 'layer': 'POWER-WIRING-RED'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture providing a store with one three-object session at revision 0"""
+    store = CadSessionStore(str(tmp_path), snapshot_every=3)
+    store.save({'session_id': 'cad_1', 'project_name': 'House', 'objects': [line(f'o{i}', i) for i in range(3)],
+                'canvas_state': {'version': '5.3.0', 'objects': [line(f'o{i}', i) for i in range(3)]}})
+    return store
+
+
+def reopen(store):
+    """A store over the same folder with nothing cached"""
+    return CadSessionStore(store.sessions_dir, snapshot_every=store.snapshot_every)
+
+
+@pytest.mark.unit
+class TestPatches:
+    """Tests for applying object-level ops"""
+
+    def test_ops(self, store):
+        """Test that add, update, delete and set ops give the expected session"""
+        session = store.patch('cad_1', 0, [
+            {'op': 'delete', 'id': 'o0'},
+            {'op': 'update', 'id': 'o1', 'changes': {'x2': 99}, 'unset': ['layer']},
+            {'op': 'add', 'object': line('n1', 50), 'index': 0},
+            {'op': 'add', 'object': line('n2', 60)},
+            {'op': 'set', 'field': 'project_name', 'value': 'House v2'},
+        ])
+        assert session['revision'] == 1 and session['project_name'] == 'House v2'
+        assert [obj['id'] for obj in session['objects']] == ['n1', 'o1', 'o2', 'n2']
+        assert session['objects'][1]['x2'] == 99 and 'layer' not in session['objects'][1]
+        assert session['canvas_state']['objects'] == session['objects']
+
+    def test_reorder(self, store):
+        """Test that reorder sets the z-order, after deletes and adds in the same patch"""
+        session = store.patch('cad_1', 0, [
+            {'op': 'delete', 'id': 'o1'},
+            {'op': 'add', 'object': line('n1', 50)},
+            {'op': 'reorder', 'ids': ['o2', 'n1', 'o0']},
+            {'op': 'update', 'id': 'o0', 'changes': {'x1': 5}},
+        ])
+        assert [obj['id'] for obj in session['objects']] == ['o2', 'n1', 'o0']
+        assert session['objects'][2]['x1'] == 5
+        assert [obj['id'] for obj in reopen(store).load('cad_1')['objects']] == ['o2', 'n1', 'o0']
+        for ids in (['o2', 'n1'], ['o2', 'n1', 'n1'], ['o2', 'n1', 'x']):
+            with pytest.raises(InvalidPatch):
+                store.patch('cad_1', 1, [{'op': 'reorder', 'ids': ids}])
+
+    def test_full_save_base_revision(self, store):
+        """Test that a full save based on an old revision is rejected"""
+        store.patch('cad_1', 0, [{'op': 'delete', 'id': 'o0'}])
+        with pytest.raises(RevisionConflict) as conflict:
+            store.save({'session_id': 'cad_1', 'objects': []}, base_revision=0)
+        assert conflict.value.revision == 1
+        assert store.save({'session_id': 'cad_1', 'objects': []}, base_revision=1)['revision'] == 2
+
+    def test_replay_matches(self, store):
+        """Test that a fresh store replays the op log to the same session"""
+        store.patch('cad_1', 0, [{'op': 'add', 'object': line('n1', 5)}])
+        session = store.patch('cad_1', 1, [{'op': 'delete', 'id': 'o1'}])
+        assert reopen(store).load('cad_1') == session
+
+    def test_log_holds_only_ops(self, store, tmp_path):
+        """Test that a patch appends its ops instead of rewriting the snapshot"""
+        snapshot = (tmp_path / 'cad_1.cvb').read_bytes()
+        store.patch('cad_1', 0, [{'op': 'update', 'id': 'o2', 'changes': {'x1': 7}}])
+        assert (tmp_path / 'cad_1.cvb').read_bytes() == snapshot
+        [record] = [json.loads(row) for row in (tmp_path / 'cad_1.ops.jsonl').read_text().splitlines()]
+        assert record['rev'] == 1 and record['ops'][0]['changes'] == {'x1': 7}
+
+    def test_snapshot_truncates_log(self, store, tmp_path):
+        """Test that every snapshot_every patches the snapshot is rewritten and the log cleared"""
+        for revision in range(3):
+            store.patch('cad_1', revision, [{'op': 'update', 'id': 'o0', 'changes': {'x1': revision}}])
+        assert (tmp_path / 'cad_1.ops.jsonl').stat().st_size == 0
+        snapshot = read_canvas_file(str(tmp_path / 'cad_1.cvb'))
+        assert snapshot['revision'] == 3 and snapshot['objects'][0]['x1'] == 2
+
+    def test_revision_conflict(self, store):
+        """Test that a patch against an old revision is rejected"""
+        store.patch('cad_1', 0, [{'op': 'delete', 'id': 'o0'}])
+        with pytest.raises(RevisionConflict) as conflict:
+            store.patch('cad_1', 0, [{'op': 'delete', 'id': 'o1'}])
+        assert conflict.value.revision == 1
+
+    def test_invalid_patch_is_atomic(self, store):
+        """Test that a patch with a bad op changes nothing"""
+        with pytest.raises(InvalidPatch):
+            store.patch('cad_1', 0, [{'op': 'delete', 'id': 'o0'}, {'op': 'update', 'id': 'o0', 'changes': {}}])
+        with pytest.raises(InvalidPatch):
+            store.patch('cad_1', 0, [{'op': 'set', 'field': 'revision', 'value': 9}])
+        session = store.load('cad_1')
+        assert session['revision'] == 0 and len(session['objects']) == 3
+
+    def test_other_writer_forces_reload(self, store):
+        """Test that a patch from another store instance is seen instead of overwritten"""
+        reopen(store).patch('cad_1', 0, [{'op': 'delete', 'id': 'o0'}])
+        with pytest.raises(RevisionConflict):
+            store.patch('cad_1', 0, [{'op': 'delete', 'id': 'o1'}])
+        assert store.patch('cad_1', 1, [{'op': 'delete', 'id': 'o1'}])['revision'] == 2
+
+    def test_legacy_session_gets_ids(self, tmp_path):
+        """Test that sessions saved without object ids are given persistent ids"""
+        (tmp_path / 'cad_old.json').write_text(json.dumps({'session_id': 'cad_old', 'objects': [{'type': 'line'}]}))
+        object_id = CadSessionStore(str(tmp_path)).load('cad_old')['objects'][0]['id']
+        assert CadSessionStore(str(tmp_path)).load('cad_old')['objects'][0]['id'] == object_id
+
+    def test_json_snapshot_migrates(self, tmp_path):
+        """Test that a JSON snapshot with pending patches is rewritten as a binary snapshot"""
+        json_store = CadSessionStore(str(tmp_path), encoding='json')
+        json_store.save({'session_id': 'cad_2', 'objects': [line('a', 1)]})
+        json_store.patch('cad_2', 0, [{'op': 'add', 'object': line('b', 2)}])
+        session = CadSessionStore(str(tmp_path)).load('cad_2')
+        assert session['revision'] == 1 and [obj['id'] for obj in session['objects']] == ['a', 'b']
+        assert not (tmp_path / 'cad_2.json').exists()
+        assert is_encoded((tmp_path / 'cad_2.cvb').read_bytes())
+        assert (tmp_path / 'cad_2.ops.jsonl').stat().st_size == 0
+
+    def test_missing_session(self, store, tmp_path):
+        """Test that unknown sessions raise without creating files"""
+        with pytest.raises(SessionNotFound):
+            store.patch('cad_nope', 0, [])
+        assert not (tmp_path / 'cad_nope.ops.jsonl').exists()
+
+
+@pytest.mark.integration
+class TestPatchEndpoint:
+    """Integration tests for /api/cad/patch"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a test client with the CAD blueprint"""
+        from flask import Flask
+        from app.api.electrical_cad import electrical_cad_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['CAD_SESSIONS_FOLDER'] = str(tmp_path)
+        app.register_blueprint(electrical_cad_bp)
+        return app.test_client()
+
+    def test_patch_then_load(self, client):
+        """Test that patched objects are returned by load and counted by list"""
+        session = client.post('/api/cad/new', json={'project_name': 'House'}).get_json()['session']
+        response = client.post('/api/cad/patch', json={'session_id': session['session_id'], 'revision': 0,
+                                                       'ops': [{'op': 'add', 'object': line('a', 1)}]})
+        assert response.get_json()['revision'] == 1
+        loaded = client.get(f"/api/cad/load/{session['session_id']}").get_json()['session']
+        assert loaded['revision'] == 1 and loaded['objects'][0]['id'] == 'a'
+        assert client.get('/api/cad/list').get_json()['sessions'][0]['object_count'] == 1
+
+    def test_conflict_and_bad_requests(self, client):
+        """Test that stale revisions give 409 and malformed patches 400"""
+        session_id = client.post('/api/cad/new', json={}).get_json()['session_id']
+        response = client.post('/api/cad/patch', json={'session_id': session_id, 'revision': 5, 'ops': []})
+        assert response.status_code == 409 and response.get_json()['revision'] == 0
+        response = client.post('/api/cad/patch', json={'session_id': session_id, 'revision': 0,
+                                                       'ops': [{'op': 'delete', 'id': 'missing'}]})
+        assert response.status_code == 400
+        response = client.post('/api/cad/patch', json={'session_id': '../etc', 'revision': 0, 'ops': []})
+        assert response.status_code == 400
+        response = client.post('/api/cad/patch', json={'session_id': 'cad_missing', 'revision': 0, 'ops': []})
+        assert response.status_code == 404
+
+    def test_full_save_bumps_revision(self, client):
+        """Test that full saves still work and move the revision on"""
+        session_id = client.post('/api/cad/new', json={}).get_json()['session_id']
+        data = client.post('/api/cad/save', json={'session_id': session_id, 'objects': [line('a', 1)]}).get_json()
+        assert data['success'] and data['revision'] == 1
+
+    def test_stale_full_save_conflicts(self, client):
+        """Test that a full save with an old base_revision gets 409 and changes nothing"""
+        session_id = client.post('/api/cad/new', json={}).get_json()['session_id']
+        client.post('/api/cad/patch', json={'session_id': session_id, 'revision': 0,
+                                            'ops': [{'op': 'add', 'object': line('a', 1)}]})
+        response = client.post('/api/cad/save', json={'session_id': session_id, 'base_revision': 0, 'objects': []})
+        assert response.status_code == 409 and response.get_json()['revision'] == 1
+        loaded = client.get(f'/api/cad/load/{session_id}').get_json()['session']
+        assert [obj['id'] for obj in loaded['objects']] == ['a']
+        response = client.post('/api/cad/save', json={'session_id': session_id, 'base_revision': 'x'})
+        assert response.status_code == 400
@@ -0,0 +1,197 @@
+"""
+Tests for the spatially indexed, incremental CAD validation engine
+"""
+import random
+
+import pytest
+
+from services.canvas_codec import read_canvas_file
+from services.cad_validation import CadValidator, ValidationState, parse_object
+
+
+def device(symbol_id, x, y, **extra):
+    """A 20x20 symbol with its top-left corner at (x, y)"""
+    obj = {'type': 'group', 'customType': 'symbol', 'symbolId': symbol_id,
+           'left': x, 'top': y, 'width': 20, 'height': 20, 'layer': 'DEVICES-SYMBOLS'}
+    obj.update(extra)
+    return obj
+
+
+def wire(x1, y1, x2, y2, layer='POWER-WIRING-RED'):
+    """A wiring line"""
+    return {'type': 'line', 'customType': 'line', 'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'layer': layer}
+
+
+def make_objects(rows, columns):
+    """Lighting circuits of downlights 200px apart, wired in a chain per row with an earth run"""
+    objects = []
+    for row in range(rows):
+        y = row * 200
+        for column in range(columns):
+            objects.append(device('light-downlight', column * 200, y))
+            if column:
+                objects.append(wire(column * 200 - 190, y + 10, column * 200, y + 10))
+        objects.append(wire(0, y + 15, 10, y + 15, 'GROUND-WIRING-GREEN'))
+    return objects
+
+
+def codes(result):
+    """Issue codes found, errors and warnings together"""
+    return sorted(issue['code'] for issue in result['errors'] + result['warnings'])
+
+
+@pytest.fixture
+def validator():
+    """Fixture providing a fresh validator"""
+    return CadValidator()
+
+
+@pytest.mark.unit
+class TestChecks:
+    """Tests for the individual validation checks"""
+
+    def test_clean_drawing(self, validator):
+        """Test that wired, earthed lighting circuits pass"""
+        result = validator.validate({'objects': make_objects(3, 5)})
+        assert result['valid'] and codes(result) == []
+        assert {check['status'] for check in result['checks_performed']} == {'pass'}
+        assert result['objects_checked'] == 3 * 5 + 3 * 4 + 3
+
+    def test_overlap_reported_once(self, validator):
+        """Test that overlapping devices give one W001 per pair"""
+        objects = make_objects(1, 2) + [device('light-downlight', 205, 5)]
+        objects.append(wire(210, 15, 220, 15))
+        assert codes(validator.validate({'objects': objects})) == ['W001']
+
+    def test_switchboard_clearance(self, validator):
+        """Test that devices inside the 1m switchboard space are flagged"""
+        objects = [device('switchboard', 0, 0, width=60, height=80), device('light-downlight', 80, 20),
+                   wire(30, 40, 85, 30), wire(0, 10, 5, 10, 'GROUND-WIRING-GREEN')]
+        result = validator.validate({'objects': objects})
+        assert codes(result) == ['W005']
+        assert result['checks_performed'][0]['status'] == 'warning'
+
+    def test_unconnected_device_and_dangling_wire(self, validator):
+        """Test that loose devices and wire ends are reported"""
+        objects = make_objects(1, 2) + [device('light-ceiling', 1000, 1000), wire(500, 500, 600, 500)]
+        result = validator.validate({'objects': objects})
+        assert codes(result) == ['W007', 'W008']
+
+    def test_circuit_overload(self, validator):
+        """Test that a circuit beyond every cable size is an error"""
+        objects = make_objects(1, 4)
+        for obj in objects:
+            if obj.get('customType') == 'symbol':
+                obj['load'] = 20000
+        result = validator.validate({'objects': objects})
+        assert not result['valid'] and codes(result) == ['E004']
+
+    def test_rcd_required_for_outlets(self, validator):
+        """Test that outlet circuits need an RCD unless one is on the circuit"""
+        objects = [device('power-outlet-single', 0, 0), device('power-outlet-single', 200, 0),
+                   wire(10, 10, 210, 10), wire(0, 5, 5, 5, 'GROUND-WIRING-GREEN')]
+        assert codes(validator.validate({'objects': objects})) == ['E003']
+        objects[0]['rcd'] = True
+        assert codes(validator.validate({'objects': objects})) == []
+
+    def test_no_earth(self, validator):
+        """Test that devices without any earth wiring fail earthing"""
+        objects = [obj for obj in make_objects(2, 3) if obj['layer'] != 'GROUND-WIRING-GREEN']
+        assert codes(validator.validate({'objects': objects})) == ['E002']
+
+    def test_circuit_not_fed(self, validator):
+        """Test that circuits are split at the switchboard and unfed ones flagged"""
+        objects = make_objects(2, 3) + [device('switchboard', 0, -400, width=60, height=80),
+                                        wire(10, 10, 30, -330)]
+        assert codes(validator.validate({'objects': objects})) == ['W009']
+
+    def test_ignores_non_electrical_objects(self):
+        """Test that walls, text and plain lines are not parsed"""
+        assert parse_object({'type': 'line', 'layer': 'WALLS-ARCHITECTURAL', 'x1': 0, 'x2': 5}) is None
+        assert parse_object({'type': 'text', 'text': 'Kitchen'}) is None
+        assert parse_object('junk') is None
+
+
+@pytest.mark.unit
+class TestIncremental:
+    """Tests for incremental revalidation"""
+
+    def test_only_changes_rechecked(self, validator):
+        """Test that moving one device only rechecks its neighbourhood"""
+        objects = make_objects(20, 20)
+        validator.validate({'objects': objects}, 'cad_1')
+        objects[0]['left'] = 1
+        result = validator.validate({'objects': objects}, 'cad_1')
+        assert 0 < result['objects_revalidated'] < 20
+        assert validator.validate({'objects': objects}, 'cad_1')['objects_revalidated'] == 0
+
+    def test_matches_full_validation(self, validator):
+        """Test that random edits give the same results as validating from scratch"""
+        rng = random.Random(5)
+        objects = make_objects(6, 6)
+        for step in range(30):
+            action = rng.random()
+            if action < 0.4:
+                obj = rng.choice(objects)
+                if 'left' in obj:
+                    obj['left'] += rng.uniform(-120, 120)
+                else:
+                    obj['x2'] += rng.uniform(-50, 50)
+            elif action < 0.7:
+                objects.append(rng.choice([device('power-outlet-double', rng.uniform(0, 1200), rng.uniform(0, 1200)),
+                                           wire(*[rng.uniform(0, 1200) for _ in range(4)])]))
+            else:
+                objects.pop(rng.randrange(len(objects)))
+            incremental = validator.validate({'objects': objects}, 'cad_1')
+            full = CadValidator().validate({'canvas_state': {'objects': objects}})
+            assert codes(incremental) == codes(full), step
+            assert incremental['objects_checked'] == full['objects_checked']
+
+    def test_duplicate_objects(self):
+        """Test that identical objects are tracked separately"""
+        state = ValidationState()
+        state.update([device('light-downlight', 0, 0)] * 3)
+        assert len(state.records) == 3
+        state.update([device('light-downlight', 0, 0)])
+        assert len(state.records) == 1
+
+    def test_session_eviction(self):
+        """Test that at most max_sessions states are kept"""
+        validator = CadValidator(max_sessions=2)
+        for session_id in ('a', 'b', 'c'):
+            validator.validate({'objects': make_objects(1, 2)}, session_id)
+        assert list(validator._states) == ['b', 'c']
+
+
+@pytest.mark.integration
+class TestValidateEndpoint:
+    """Integration tests for /api/cad/validate and validate-on-save"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a test client with the CAD blueprint"""
+        from flask import Flask
+        from app.api.electrical_cad import electrical_cad_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['CAD_SESSIONS_FOLDER'] = str(tmp_path)
+        app.register_blueprint(electrical_cad_bp)
+        return app.test_client()
+
+    def test_validate(self, client):
+        """Test that the route reports real check results"""
+        objects = [obj for obj in make_objects(1, 3) if obj['layer'] != 'GROUND-WIRING-GREEN']
+        response = client.post('/api/cad/validate', json={'cad_data': {'objects': objects}})
+        data = response.get_json()
+        assert data['success'] and not data['valid']
+        assert [error['code'] for error in data['errors']] == ['E002']
+        assert {check['check'] for check in data['checks_performed']} >= {'Circuit loading', 'Earthing compliance'}
+
+    def test_validate_on_save(self, client, tmp_path):
+        """Test that saves can validate without storing the flag"""
+        response = client.post('/api/cad/save', json={'session_id': 'cad_v', 'validate': True,
+                                                      'objects': make_objects(2, 2)})
+        data = response.get_json()
+        assert data['success'] and data['validation']['valid']
+        assert 'validate' not in read_canvas_file(str(tmp_path / 'cad_v.cvb'))
@@ -0,0 +1,177 @@
+"""
+Tests for the compact binary canvas encoding
+"""
+import base64
+import json
+import zlib
+
+import pytest
+
+from services.canvas_codec import (
+    CanvasDecodeError, RAW, ZLIB, decode_canvas, encode_canvas, is_encoded,
+    migrate_canvas_folder, read_canvas_file
+)
+
+
+def canvas_state(count):
+    """A Fabric.js canvas state with symbols and wiring"""
+    objects = []
+    for i in range(count):
+        if i % 2:
+            objects.append({'type': 'line', 'x1': i * 1.5, 'y1': 10.25, 'x2': i * 1.5 + 60, 'y2': 10.25,
+                            'stroke': '#E74C3C', 'strokeWidth': 2, 'layer': 'POWER-WIRING-RED'})
+        else:
+            objects.append({'type': 'group', 'customType': 'symbol', 'symbolId': 'light-downlight',
+                            'left': i * 3.1, 'top': -i / 7, 'scaleX': 1, 'visible': True, 'clipPath': None,
+                            'objects': [{'type': 'circle', 'radius': 7, 'points': [{'x': 0.5, 'y': -2}]}]})
+    return {'version': '5.3.0', 'background': '#ffffff', 'objects': objects}
+
+
+@pytest.mark.unit
+class TestCanvasCodec:
+    """Tests for encode_canvas / decode_canvas"""
+
+    @pytest.mark.parametrize('value', [
+        None, True, False, 0, 127, 128, -1, -129, 2 ** 70, -2 ** 70, 0.1, -0.0, 1e308, float('inf'),
+        '', 'é ✓ 𝄞', [], {}, [1, [2, [3]]], {'a': {'b': [None, 'x', 1.5]}},
+    ])
+    def test_round_trip(self, value):
+        """Test that JSON values decode to the value that was encoded"""
+        assert decode_canvas(encode_canvas(value)) == value
+
+    def test_types_are_kept(self):
+        """Test that ints, floats and bools come back as the same types"""
+        decoded = decode_canvas(encode_canvas({'i': 1, 'f': 1.0, 'b': True}))
+        assert [type(v) for v in decoded.values()] == [int, float, bool]
+
+    def test_canvas_state_round_trip(self):
+        """Test that a canvas state round trips with key order kept"""
+        state = canvas_state(200)
+        decoded = decode_canvas(encode_canvas(state))
+        assert decoded == state
+        assert list(decoded['objects'][0]) == list(state['objects'][0])
+
+    def test_json_subclass_values(self):
+        """Test that tuples and non-string keys encode the way JSON would"""
+        value = {'pts': (1, 2), 3: 'three'}
+        assert decode_canvas(encode_canvas(value)) == json.loads(json.dumps(value))
+        with pytest.raises(TypeError):
+            encode_canvas({'when': object()})
+
+    def test_smaller_than_compressed_json(self):
+        """Test that the encoding beats the old indented JSON by an order of magnitude"""
+        state = canvas_state(2000)
+        encoded = encode_canvas(state)
+        assert is_encoded(encoded)
+        assert len(encoded) * 10 < len(json.dumps(state, indent=2))
+        assert len(encoded) < len(zlib.compress(json.dumps(state, separators=(',', ':')).encode()))
+
+    def test_uncompressed_and_zlib(self):
+        """Test that every compression choice decodes"""
+        state = canvas_state(20)
+        assert decode_canvas(encode_canvas(state, RAW)) == decode_canvas(encode_canvas(state, ZLIB)) == state
+
+    def test_default_is_zlib(self, monkeypatch):
+        """Test that zlib is written by default even where zstandard is installed"""
+        from services import canvas_codec
+        monkeypatch.setattr(canvas_codec, 'zstandard', object())
+        assert encode_canvas([1.5])[len(canvas_codec.MAGIC) + 1] == ZLIB
+
+    def test_legacy_json_accepted(self):
+        """Test that plain JSON bytes and text decode as JSON"""
+        assert decode_canvas(b'{"objects": []}') == {'objects': []}
+        assert decode_canvas('[1, 2]') == [1, 2]
+
+    def test_corrupt_data(self):
+        """Test that truncated or unknown data raises CanvasDecodeError"""
+        encoded = encode_canvas(canvas_state(20), RAW)
+        with pytest.raises(CanvasDecodeError):
+            decode_canvas(encoded[:-5])
+        with pytest.raises(CanvasDecodeError):
+            decode_canvas(encoded[:4] + b'\x09' + encoded[5:])
+        with pytest.raises(CanvasDecodeError):
+            decode_canvas(encode_canvas([1], ZLIB)[:-2])
+
+
+    def test_column_type(self):
+        """Test that the CanvasState column stores binary and reads back dicts"""
+        import sqlalchemy as sa
+        from database.models import CanvasState
+
+        engine = sa.create_engine('sqlite://')
+        table = sa.Table('quotes', sa.MetaData(), sa.Column('id', sa.Integer, primary_key=True),
+                         sa.Column('canvas_state', CanvasState))
+        table.create(engine)
+        state = canvas_state(10)
+        with engine.begin() as conn:
+            conn.execute(table.insert(), [{'id': 1, 'canvas_state': state}, {'id': 2, 'canvas_state': None}])
+            raw = conn.execute(sa.text('SELECT canvas_state FROM quotes WHERE id = 1')).scalar()
+            rows = dict(conn.execute(sa.select(table.c.id, table.c.canvas_state)).all())
+        assert is_encoded(raw)
+        assert rows == {1: state, 2: None}
+
+
+@pytest.mark.unit
+class TestMigration:
+    """Tests for converting folders of JSON canvas files"""
+
+    def test_migrate_folder(self, tmp_path):
+        """Test that JSON files become binary files and unreadable files are left alone"""
+        state = canvas_state(50)
+        (tmp_path / 'q1.json').write_text(json.dumps(state, indent=2))
+        (tmp_path / 'broken.json').write_text('{not json')
+        (tmp_path / 'cad_1.ops.jsonl').write_text('')
+        stats = migrate_canvas_folder(str(tmp_path))
+        assert (stats['converted'], stats['failed']) == (1, 1)
+        assert stats['bytes_after'] < stats['bytes_before']
+        assert not (tmp_path / 'q1.json').exists()
+        assert read_canvas_file(str(tmp_path / 'q1.cvb')) == state
+        assert (tmp_path / 'broken.json').exists() and (tmp_path / 'cad_1.ops.jsonl').exists()
+        assert migrate_canvas_folder(str(tmp_path))['converted'] == 0
+
+
+@pytest.mark.integration
+class TestQuoteCanvasState:
+    """Integration tests for quote canvas states stored in the binary format"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a test client with the extended CRM blueprint on file storage"""
+        from flask import Flask
+        from app.api.crm_extended import crm_extended_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['CRM_DATA_FOLDER'] = str(tmp_path)
+        app.config['QUOTES_FILE'] = str(tmp_path / 'quotes.json')
+        app.config['ASSET_STORE_FOLDER'] = str(tmp_path / 'assets')
+        app.register_blueprint(crm_extended_bp)
+        return app.test_client()
+
+    def test_saved_state_is_binary(self, client, tmp_path):
+        """Test that saved canvas states are binary and load back with the floorplan as a URL"""
+        state = canvas_state(10)
+        png = base64.b64encode(b'\x89PNG fake').decode()
+        quote_id = client.post('/api/crm/quotes/save-from-automation', json={
+            'title': 'House', 'canvas_state': state, 'floorplan_image': f'data:image/png;base64,{png}'
+        }).get_json()['quote_id']
+        assert is_encoded((tmp_path / 'canvas_states' / f'{quote_id}.cvb').read_bytes())
+
+        data = client.get(f'/api/crm/quotes/{quote_id}/canvas-state').get_json()
+        assert data['canvas_state'] == state
+        assert data['quote']['floorplan_image'].startswith('/assets/')
+        data = client.get(f'/api/crm/quotes/{quote_id}/canvas-state?inline_floorplan=1').get_json()
+        assert data['quote']['floorplan_image'] == f'data:image/png;base64,{png}'
+
+    def test_legacy_json_state(self, client, tmp_path):
+        """Test that JSON canvas files still load and are replaced by binary files on update"""
+        (tmp_path / 'canvas_states').mkdir()
+        (tmp_path / 'canvas_states' / 'q1.json').write_text(json.dumps(canvas_state(4), indent=2))
+        (tmp_path / 'quotes.json').write_text(json.dumps([{'id': 'q1', 'canvas_state_file': 'q1.json'}]))
+        assert client.get('/api/crm/quotes/q1/canvas-state').get_json()['canvas_state'] == canvas_state(4)
+
+        quote = client.post('/api/crm/quotes/q1/update-from-canvas',
+                            json={'canvas_state': canvas_state(6)}).get_json()['quote']
+        assert quote['canvas_state_file'] == 'q1.cvb'
+        assert not (tmp_path / 'canvas_states' / 'q1.json').exists()
+        assert client.get('/api/crm/quotes/q1/canvas-state').get_json()['canvas_state'] == canvas_state(6)
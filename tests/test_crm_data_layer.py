@@ -0,0 +1,125 @@
+"""
+Tests for the JSON-backed CRM data layer
+"""
+import json
+import os
+import pytest
+
+from crm_data_layer import CRMDataLayer, RecordIndex, get_json_cache
+
+
+@pytest.fixture
+def data_layer(tmp_path):
+    """Fixture providing a data layer on an empty temp folder"""
+    get_json_cache().invalidate()
+    return CRMDataLayer(str(tmp_path))
+
+
+@pytest.mark.unit
+class TestJSONFileCache:
+    """Tests for the mtime-validated JSON cache"""
+
+    def test_repeat_reads_hit_cache(self, data_layer):
+        """Test that a second read of an unchanged file is a cache hit"""
+        data_layer.create_customer({'name': 'Alice'})
+        before = get_json_cache().stats()['hits']
+        data_layer.get_customers()
+        data_layer.get_customers()
+        assert get_json_cache().stats()['hits'] >= before + 2
+
+    def test_external_write_invalidates(self, data_layer):
+        """Test that a file rewritten outside the data layer is re-read"""
+        data_layer.create_customer({'name': 'Alice'})
+        data_layer.get_customers()
+
+        with open(data_layer.customers_file, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 'x', 'name': 'Bob', 'created_at': ''}], f)
+        os.utime(data_layer.customers_file, ns=(1, 1))
+
+        result = data_layer.get_customers()
+        assert [c['name'] for c in result['customers']] == ['Bob']
+
+    def test_enrichment_does_not_leak_into_cache(self, data_layer):
+        """Test that list enrichment does not mutate cached records"""
+        data_layer.create_project({'title': 'Kitchen fit-out'})
+        data_layer.get_projects()
+        projects = data_layer._load_json(data_layer.projects_file)
+        assert 'customer_name' not in projects[0]
+
+    def test_updates_replace_cached_records(self, data_layer):
+        """Test that mutations copy records before changing them"""
+        item = data_layer.create_stock_item({'name': 'Relay', 'quantity': 2})['item']
+        result = data_layer.adjust_stock_quantity(item['id'], -5)
+        assert result['success'] is False
+
+        data_layer.update_stock_item(item['id'], {'quantity': 7})
+        cached = data_layer.get_stock_item(item['id'])['item']
+        assert cached['quantity'] == 7
+        assert 'adjustments' not in cached
+
+    def test_stats_shape(self, data_layer):
+        """Test that cache stats expose hit/miss counters"""
+        stats = data_layer.get_cache_stats()['cache']
+        for key in ('entries', 'hits', 'misses', 'invalidations', 'hit_rate'):
+            assert key in stats
+
+
+@pytest.mark.unit
+class TestRecordIndex:
+    """Tests for the id and secondary record indexes"""
+
+    def test_secondary_index_follows_updates(self):
+        """Test that put() moves a record between secondary buckets"""
+        index = RecordIndex([{'id': 'a', 'status': 'draft'}],
+                            {'status': lambda r: r.get('status')})
+        index.put({'id': 'a', 'status': 'sent'})
+        assert index.count('status', 'draft') == 0
+        assert index.ids_for('status', 'sent') == ['a']
+
+    def test_remove_clears_secondary(self):
+        """Test that remove() drops a record from every index"""
+        index = RecordIndex([{'id': 'a', 'status': 'draft'}],
+                            {'status': lambda r: r.get('status')})
+        assert index.remove('a')['id'] == 'a'
+        assert 'a' not in index
+        assert index.records_for('status', 'draft') == []
+
+    def test_duplicates_are_kept(self):
+        """Test that duplicate ids survive and are reported"""
+        index = RecordIndex([{'id': 'a', 'n': 1}, {'id': 'a', 'n': 2}])
+        assert index.get('a')['n'] == 1
+        assert len(index.records()) == 2
+        assert index.duplicate_ids() == ['a']
+
+
+@pytest.mark.unit
+class TestIndexedOperations:
+    """Tests for data layer operations backed by the indexes"""
+
+    def test_cascade_delete_unlinks_related(self, data_layer):
+        """Test that cascade delete clears customer_id on related records"""
+        customer = data_layer.create_customer({'name': 'Alice'})['customer']
+        project = data_layer.create_project({'title': 'Fit-out', 'customer_id': customer['id']})['project']
+        data_layer.create_quote({'title': 'Quote', 'customer_id': customer['id']})
+
+        assert data_layer.delete_customer(customer['id'])['success'] is False
+        assert data_layer.delete_customer(customer['id'], cascade=True)['success'] is True
+
+        assert data_layer.get_project(project['id'])['project']['customer_id'] is None
+        assert data_layer.get_quotes(customer_id=customer['id'])['quotes'] == []
+        assert data_layer.check_data_integrity()['healthy'] is True
+
+    def test_duplicate_email_lookup(self, data_layer):
+        """Test that duplicate emails are caught case-insensitively"""
+        data_layer.create_customer({'name': 'Alice', 'email': 'alice@example.com'})
+        result = data_layer.create_customer({'name': 'Alicia', 'email': 'ALICE@example.com'})
+        assert result['success'] is False
+
+    def test_stats_use_status_index(self, data_layer):
+        """Test that status counts reflect updates"""
+        quote = data_layer.create_quote({'title': 'Quote', 'quote_amount': 100})['quote']
+        data_layer.update_quote(quote['id'], {'status': 'sent'})
+        stats = data_layer.get_stats()['stats']['quotes']
+        assert stats['draft'] == 0
+        assert stats['sent'] == 1
+        assert stats['pending_value'] == 100
@@ -0,0 +1,87 @@
+"""
+Tests for the single-query CRM stats aggregates
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from database.models import CalendarEvent, KanbanTask
+from services.crm_repository import CRMRepository
+from services.crm_stats import CRMStatsService
+from services.inventory_repository import InventoryRepository
+
+
+@pytest.fixture
+def stats(db_session, org_id):
+    """Fixture providing a stats service over a small seeded CRM"""
+    crm = CRMRepository(db_session, org_id)
+    inventory = InventoryRepository(db_session, org_id)
+
+    alice = crm.create_customer({'name': 'Alice'})
+    crm.create_customer({'name': 'Bob'})
+    crm.delete_customer(crm.create_customer({'name': 'Gone'})['id'])
+
+    crm.create_project({'name': 'Fit-out', 'customer_id': alice['id'], 'status': 'in_progress',
+                        'estimated_value': 500})
+    done = crm.create_project({'name': 'Rewire', 'status': 'completed'})
+    crm.update_project(done['id'], {'actual_value': 1200})
+
+    for status, amount in [('draft', 100), ('sent', 250), ('accepted', 1000), ('rejected', 75)]:
+        crm.create_quote({'title': status, 'status': status, 'total_amount': amount})
+
+    crm.create_job({'title': 'Install', 'status': 'pending'})
+    inventory.create_item({'name': 'Relay', 'quantity': 2, 'reorder_level': 5,
+                           'unit_price': 10, 'cost_price': 4})
+    inventory.create_item({'name': 'Cable', 'quantity': 20, 'reorder_level': 5, 'unit_price': 3})
+
+    db_session.add(KanbanTask(organization_id=org_id, content='Order parts', column='todo'))
+    db_session.add(CalendarEvent(organization_id=org_id, title='Site visit',
+                                 start_time=datetime.utcnow() + timedelta(days=2)))
+    db_session.commit()
+    return CRMStatsService(db_session, org_id)
+
+
+@pytest.mark.unit
+class TestCRMStatsService:
+    """Tests for the aggregate stats views"""
+
+    def test_collect_is_one_query(self, stats, db_session):
+        """Test that all aggregates come back from a single statement"""
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            stats.collect()
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        assert len(statements) == 1
+
+    def test_dashboard_stats(self, stats):
+        """Test the CRMDatabaseLayer.get_stats shape"""
+        result = stats.dashboard_stats()
+        assert result['customers'] == {'total': 2, 'active': 2}
+        assert result['projects']['active'] == 1
+        assert result['quotes']['pending'] == 2
+        assert result['revenue'] == {'total': 1000, 'pending': 350}
+        assert result['jobs']['by_status'] == {'pending': 1}
+        assert result['stock'] == {'total_items': 2, 'total_value': 68, 'low_stock_count': 1}
+
+    def test_v2_stats(self, stats):
+        """Test the /api/v2/crm/stats shape"""
+        result = stats.v2_stats()
+        assert result['customers'] == {'total': 3, 'active': 2, 'inactive': 1}
+        assert result['projects']['completed'] == 1
+        assert result['revenue']['total'] == 1200
+        assert result['revenue']['pending'] == 500
+        assert result['quotes']['pending_value'] == 350
+        assert result['stock']['total_units'] == 22
+
+    def test_business_summary(self, stats):
+        """Test the AI business summary shape"""
+        result = stats.business_summary()
+        assert result['quotes']['total_value'] == 1000.0
+        assert result['inventory']['low_stock_items'] == 1
+        assert result['tasks']['pending'] == 1
+        assert result['calendar']['upcoming_events_7_days'] == 1
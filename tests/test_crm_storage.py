@@ -0,0 +1,82 @@
+"""
+Tests for the CRM JSON storage engines
+"""
+import json
+import pytest
+
+from crm_data_layer import CRMDataLayer, get_json_cache
+from crm_storage import AppendLogStorage, JSONFileStorage, get_storage_engine
+
+
+@pytest.fixture
+def log_layer(tmp_path):
+    """Fixture providing a data layer on the append-only log engine"""
+    get_json_cache().invalidate()
+    return CRMDataLayer(str(tmp_path), storage=AppendLogStorage(compact_after=5, fsync=False))
+
+
+@pytest.mark.unit
+class TestAppendLogStorage:
+    """Tests for the write-ahead log storage engine"""
+
+    def test_writes_append_without_touching_snapshot(self, log_layer):
+        """Test that single-record writes only append to the log"""
+        customer = log_layer.create_customer({'name': 'Alice'})['customer']
+        log_layer.update_customer(customer['id'], {'notes': 'VIP'})
+
+        with open(log_layer.customers_file + '.log', encoding='utf-8') as f:
+            ops = [json.loads(line)['op'] for line in f]
+        assert ops == ['put', 'put']
+        assert JSONFileStorage().load(log_layer.customers_file) == []
+
+    def test_replay_after_restart(self, log_layer, tmp_path):
+        """Test that a fresh process rebuilds state from snapshot plus log"""
+        keep = log_layer.create_customer({'name': 'Alice'})['customer']
+        drop = log_layer.create_customer({'name': 'Bob'})['customer']
+        log_layer.delete_customer(drop['id'])
+
+        get_json_cache().invalidate()
+        reopened = CRMDataLayer(str(tmp_path), storage=AppendLogStorage(fsync=False))
+        names = [c['name'] for c in reopened.get_customers()['customers']]
+        assert names == ['Alice']
+        assert reopened.get_customer(keep['id'])['success'] is True
+
+    def test_compaction_truncates_log(self, log_layer):
+        """Test that the log is folded into the snapshot after compact_after entries"""
+        for i in range(5):
+            log_layer.create_stock_item({'name': f'Item {i}'})
+
+        with open(log_layer.stock_file + '.log', encoding='utf-8') as f:
+            assert f.read() == ''
+        assert len(JSONFileStorage().load(log_layer.stock_file)) == 5
+
+    def test_torn_tail_is_discarded(self, log_layer, tmp_path):
+        """Test that a partial final line from a crash is cut off on load"""
+        log_layer.create_customer({'name': 'Alice'})
+        with open(log_layer.customers_file + '.log', 'a', encoding='utf-8') as f:
+            f.write('{"op":"put","record":{"id":"x","na')
+
+        get_json_cache().invalidate()
+        reopened = CRMDataLayer(str(tmp_path), storage=AppendLogStorage(fsync=False))
+        assert [c['name'] for c in reopened.get_customers()['customers']] == ['Alice']
+
+        reopened.create_customer({'name': 'Bob'})
+        get_json_cache().invalidate()
+        again = CRMDataLayer(str(tmp_path), storage=AppendLogStorage(fsync=False))
+        assert again.get_customers()['pagination']['total'] == 2
+
+    def test_compact_storage_endpoint_helper(self, log_layer):
+        """Test that compact_storage folds every collection"""
+        log_layer.create_quote({'title': 'Quote'})
+        result = log_layer.compact_storage()
+        assert result['success'] is True
+        assert result['engine'] == 'log'
+        assert result['compacted']['quotes.json'] == 1
+
+
+@pytest.mark.unit
+def test_get_storage_engine_defaults_to_file(monkeypatch):
+    """Test that whole-file storage stays the default engine"""
+    monkeypatch.delenv('CRM_JSON_STORAGE', raising=False)
+    assert get_storage_engine().name == 'file'
+    assert get_storage_engine('log').name == 'log'
@@ -0,0 +1,159 @@
+"""
+Tests for the streaming DXF exporter
+"""
+import io
+
+import pytest
+
+from dxf_exporter import export_to_dxf, stream_dxf, write_dxf
+
+
+def parse_tags(dxf):
+    """Split ASCII DXF text into (group code, value) pairs"""
+    lines = dxf.split('\n')
+    assert lines[-1] == ''
+    lines = lines[:-1]
+    assert len(lines) % 2 == 0
+    return [(int(lines[i]), lines[i + 1]) for i in range(0, len(lines), 2)]
+
+
+def section(tags, name):
+    """Tags between SECTION <name> and its ENDSEC"""
+    start = tags.index((2, name)) + 1
+    end = tags.index((0, 'ENDSEC'), start)
+    return tags[start:end]
+
+
+def header_point(tags, variable):
+    """(x, y) of a header point variable"""
+    i = tags.index((9, variable))
+    return float(tags[i + 1][1]), float(tags[i + 2][1])
+
+
+@pytest.fixture
+def outlet():
+    """Fixture providing a Fabric.js symbol group with child geometry"""
+    def make(left, top, **extra):
+        return {
+            'type': 'group', 'customType': 'symbol', 'symbolId': 'power-outlet-single',
+            'left': left, 'top': top, 'width': 20, 'height': 20, 'layer': 'DEVICES-SYMBOLS',
+            'objects': [
+                {'type': 'circle', 'left': -8, 'top': -8, 'radius': 8},
+                {'type': 'line', 'x1': 0, 'y1': -6, 'x2': 0, 'y2': -3},
+                {'type': 'line', 'x1': 0, 'y1': 3, 'x2': 0, 'y2': 6},
+            ],
+            **extra,
+        }
+    return make
+
+
+@pytest.fixture
+def cad_data(outlet):
+    """Fixture providing a CAD session with symbols, lines and text"""
+    objects = [outlet(100 * i, 50) for i in range(50)]
+    objects += [
+        {'type': 'line', 'x1': -10, 'y1': 0, 'x2': 400, 'y2': 300, 'layer': 'POWER-WIRING-RED'},
+        {'type': 'rect', 'left': 0, 'top': 0, 'width': 50, 'height': 40},
+        {'type': 'text', 'left': 10, 'top': 10, 'text': 'Kitchen\nLights', 'fontSize': 10},
+        {'customType': 'symbol', 'symbolId': 'loxone-extension', 'left': 0, 'top': 500},
+    ]
+    return {
+        'canvas_state': {'objects': objects},
+        'layers': [{'name': 'POWER-WIRING-RED', 'color': '#E74C3C'}],
+    }
+
+
+@pytest.mark.unit
+class TestDXFExporter:
+    """Tests for block definitions, extents and streaming"""
+
+    def test_one_block_per_symbol_type(self, cad_data):
+        """Test that each symbol type is defined once and instanced by INSERT"""
+        tags = parse_tags(export_to_dxf(cad_data))
+        blocks = section(tags, 'BLOCKS')
+        assert [value for code, value in blocks if code == 3] == ['power-outlet-single', 'loxone-extension']
+        entities = section(tags, 'ENTITIES')
+        inserts = [i for i, tag in enumerate(entities) if tag == (0, 'INSERT')]
+        assert len(inserts) == 51
+        assert entities[inserts[0] + 1] == (8, 'DEVICES-SYMBOLS')
+        assert entities[inserts[0] + 2] == (2, 'power-outlet-single')
+        # Symbol children live only in the block, not once per instance
+        assert entities.count((0, 'CIRCLE')) == 0
+        assert blocks.count((0, 'CIRCLE')) == 2
+
+    def test_block_geometry_relative_to_symbol_corner(self, cad_data):
+        """Test that group children are offset from the group centre to its corner"""
+        blocks = section(parse_tags(export_to_dxf(cad_data)), 'BLOCKS')
+        circle = blocks.index((0, 'CIRCLE'))
+        assert blocks[circle + 1] == (8, '0')
+        assert (float(blocks[circle + 2][1]), float(blocks[circle + 3][1])) == (10.0, 10.0)
+
+    def test_extents(self, cad_data):
+        """Test that $EXTMIN/$EXTMAX cover every entity and inserted block"""
+        tags = parse_tags(export_to_dxf(cad_data))
+        assert header_point(tags, '$EXTMIN') == (-10.0, 0.0)
+        # The last outlet's circle ends at x=4918; the placeholder symbol reaches y=520
+        assert header_point(tags, '$EXTMAX') == (4918.0, 520.0)
+
+    def test_empty_drawing_extents(self):
+        """Test that an empty drawing keeps the default extents"""
+        tags = parse_tags(export_to_dxf({'canvas_state': {'objects': []}}))
+        assert header_point(tags, '$EXTMAX') == (1000.0, 1000.0)
+        assert tags[-1] == (0, 'EOF')
+
+    def test_colliding_block_names(self, outlet):
+        """Test that symbol ids sanitizing to the same name still get their own blocks"""
+        tags = parse_tags(export_to_dxf({'canvas_state': {'objects': [
+            outlet(0, 0, symbolId='a b'), outlet(50, 0, symbolId='a_b', objects=[]), outlet(90, 0, symbolId='a b')]}}))
+        blocks = section(tags, 'BLOCKS')
+        assert [value for code, value in blocks if code == 3] == ['a_b', 'a_b_2']
+        inserts = [value for code, value in section(tags, 'ENTITIES') if code == 2]
+        assert inserts == ['a_b', 'a_b_2', 'a_b']
+
+    def test_missing_coordinates_tolerated(self, outlet):
+        """Test that malformed numbers take Fabric's defaults and numeric strings are parsed"""
+        tags = parse_tags(export_to_dxf({'canvas_state': {'objects': [
+            {'type': 'text', 'left': None, 'top': '5', 'text': 'Board'},
+            {'type': 'i-text', 'left': 3, 'top': 'abc', 'text': 'DB-1', 'fontSize': None},
+            {'type': 'line', 'x1': 1, 'y1': 2, 'x2': 30, 'y2': 40},
+            {'type': 'circle', 'left': 10, 'top': 10, 'radius': float('nan')},
+            outlet(None, None)]}}))
+        entities = section(tags, 'ENTITIES')
+        assert entities[:8] == [(0, 'TEXT'), (8, '0'), (10, '0'), (20, '5.0'), (30, '0.0'),
+                                (40, '12'), (1, 'Board'), (50, '0')]
+        assert (10, '3') in entities and (20, '0') in entities
+        assert entities[entities.index((0, 'CIRCLE')) + 5] == (40, '50')
+        assert header_point(tags, '$EXTMIN') == (0.0, 0.0)
+        assert header_point(tags, '$EXTMAX') == (110.0, 110.0)
+        assert tags[-1] == (0, 'EOF')
+
+    def test_text_is_single_line(self, cad_data):
+        """Test that multi-line text does not break the tag stream"""
+        tags = parse_tags(export_to_dxf(cad_data))
+        assert (1, 'Kitchen Lights') in tags
+
+    def test_insert_defaults_omitted(self, outlet):
+        """Test that unit scale and zero rotation are left to the DXF defaults"""
+        entities = section(parse_tags(export_to_dxf({'canvas_state': {'objects': [
+            outlet(0, 0), outlet(10, 10, angle=45, scaleX=2)]}})), 'ENTITIES')
+        second = entities.index((0, 'INSERT'), 1)
+        assert [code for code, _ in entities[:second]] == [0, 8, 2, 10, 20, 30]
+        assert (41, '2') in entities[second:] and (50, '45') in entities[second:]
+
+    def test_stream_matches_string(self, cad_data):
+        """Test that small chunks, file output and the full string agree"""
+        dxf = export_to_dxf(cad_data)
+        chunks = list(stream_dxf(cad_data, chunk_size=256))
+        assert len(chunks) > 1
+        assert ''.join(chunks) == dxf
+        fp = io.StringIO()
+        assert write_dxf(cad_data, fp) == len(dxf)
+        assert fp.getvalue() == dxf
+
+    def test_smaller_than_exploded_groups(self, outlet):
+        """Test that instancing shrinks the file compared with exploded geometry"""
+        symbols = [outlet(i, i) for i in range(500)]
+        exploded = [dict(symbol, customType=None) for symbol in symbols]
+        blocked = export_to_dxf({'canvas_state': {'objects': symbols}})
+        flat = export_to_dxf({'canvas_state': {'objects': exploded}})
+        assert len(blocked) < len(flat) * 0.6
@@ -0,0 +1,117 @@
+"""
+Tests for vectorized circuit schedule sizing
+"""
+import random
+
+import pytest
+
+from electrical_calculations import ElectricalCalculator, cable_tables, calculate_circuit, calculate_circuits
+
+
+@pytest.fixture
+def calc():
+    """Fixture providing a calculator"""
+    return ElectricalCalculator()
+
+
+@pytest.fixture
+def circuits():
+    """Fixture providing a mix of lighting, power and fixed-appliance circuits"""
+    rng = random.Random(7)
+    kinds = [('light', 'lighting'), ('outlet', 'power outlets'), ('oven', 'fixed appliance')]
+    result = []
+    for i in range(300):
+        device_type, circuit_type = kinds[i % 3]
+        result.append({
+            'devices': [{'type': device_type, 'load': rng.uniform(10, 4000), 'quantity': rng.randint(1, 6)}],
+            'length_meters': rng.uniform(1, 150),
+            'circuit_type': circuit_type,
+            'location': rng.choice(['kitchen', 'bedroom', 'outdoor']),
+        })
+    return result
+
+
+@pytest.mark.unit
+class TestBatchSizing:
+    """Tests that the batch path matches the per-circuit calculations"""
+
+    def test_matches_scalar_sizing(self, calc):
+        """Test that cables and breakers match size_cable/size_circuit_breaker"""
+        rng = random.Random(3)
+        loads = [rng.uniform(0, 300) for _ in range(2000)] + [0, 17.5, 24, 63, 64, 269, 269.01]
+        lengths = [rng.uniform(0, 200) for _ in loads]
+        expected = []
+        for load, length in zip(loads, lengths):
+            cable = calc.size_cable(load, length)
+            expected.append((cable, calc.size_circuit_breaker(load, cable.get('size', '2.5'))))
+        assert calc.size_circuits(loads, lengths) == expected
+
+    def test_no_cable_for_load(self, calc):
+        """Test that loads above every cable capacity report ERROR and no breaker"""
+        [(cable, breaker)] = calc.size_circuits([300], [10])
+        assert cable['size'] == 'ERROR' and not cable['compliant']
+        assert breaker['rating'] is None
+
+    def test_voltage_drop_upsizes_cable(self, calc):
+        """Test that a long run moves to the smallest size within 5% drop"""
+        selected = calc.select_cables([20, 20], [10, 120])
+        sizes = cable_tables()[0]
+        assert [sizes[i] for i in selected['index'].tolist()] == ['2.5', '10']
+        assert selected['compliant'].tolist() == [True, True]
+
+    def test_empty_batch(self, calc):
+        """Test that an empty schedule sizes to nothing"""
+        assert calc.size_circuits([], []) == []
+        assert calc.generate_circuit_schedule([]) == []
+
+    def test_calculate_circuits(self, circuits):
+        """Test that batch results equal calculate_circuit per circuit"""
+        expected = [calculate_circuit(c['devices'], c['length_meters'], c['circuit_type'], c['location'])
+                    for c in circuits]
+        assert calculate_circuits(circuits) == expected
+
+    def test_schedule(self, calc, circuits):
+        """Test that schedule rows carry the batch-selected cable and breaker"""
+        schedule = calc.generate_circuit_schedule(circuits)
+        assert [row['circuit_number'] for row in schedule] == list(range(1, 301))
+        for row, circuit in zip(schedule, circuits):
+            load = calc.calculate_load(circuit['devices'])
+            cable = calc.size_cable(load['design_load_amps'], circuit['length_meters'])
+            assert row['cable_size'] == cable['size']
+            assert row['voltage_drop_volts'] == round(cable['voltage_drop_volts'], 2)
+
+
+@pytest.mark.integration
+class TestCalculateCircuitEndpoint:
+    """Integration tests for /api/cad/calculate-circuit batch mode"""
+
+    @pytest.fixture
+    def client(self):
+        """Create a test client with the CAD blueprint"""
+        from flask import Flask
+        from app.api.electrical_cad import electrical_cad_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.register_blueprint(electrical_cad_bp)
+        return app.test_client()
+
+    def test_batch(self, client, circuits):
+        """Test that a batch request returns one result per circuit"""
+        response = client.post('/api/cad/calculate-circuit', json={'circuits': circuits[:20]})
+        data = response.get_json()
+        assert data['success'] and data['count'] == 20
+        assert data['compliant_count'] == sum(1 for result in data['results'] if result['compliant'])
+        assert data['results'][0]['cable']['size'] == calculate_circuits(circuits[:1])[0]['cable']['size']
+
+    def test_batch_requires_list(self, client):
+        """Test that a non-list circuits payload is rejected"""
+        response = client.post('/api/cad/calculate-circuit', json={'circuits': {'a': 1}})
+        assert response.status_code == 400
+
+    def test_single_circuit(self, client):
+        """Test that single-circuit requests keep their response shape"""
+        response = client.post('/api/cad/calculate-circuit',
+                               json={'devices': [{'type': 'light', 'load': 500}], 'length_meters': 15})
+        data = response.get_json()
+        assert data['success'] and data['cable']['size'] == '1.5'
@@ -0,0 +1,90 @@
+"""
+Tests for per-page analysis and merging of multi-sheet plan sets
+"""
+import threading
+import time
+
+import pytest
+
+from services.floorplan_pages import analyze_pages, merge_page_results
+
+
+def page_result(page_num):
+    """A small mapping result for one page"""
+    return {
+        'analysis': {'scale': f'1:{100 + page_num}'},
+        'rooms': [{'name': f'Room {page_num}'}],
+        'components': [{'id': 'L1', 'type': 'light'}, {'id': 'S1', 'type': 'switch'}],
+        'connections': [{'from': 'S1', 'to': 'L1'}],
+        'circuits': [{'id': 'C1', 'components': ['L1', 'S1']}],
+    }
+
+
+@pytest.mark.unit
+class TestMergePageResults:
+    """Tests for merging page results into one session"""
+
+    def test_entries_tagged_and_ids_unique(self):
+        """Test that later pages get prefixed ids and references follow"""
+        merged = merge_page_results([(1, page_result(1)), (0, page_result(0))])
+        assert [c['id'] for c in merged['components']] == ['L1', 'S1', 'P2-L1', 'P2-S1']
+        assert [c['page'] for c in merged['components']] == [0, 0, 1, 1]
+        assert merged['connections'][1] == {'from': 'P2-S1', 'to': 'P2-L1', 'page': 1}
+        assert merged['circuits'][1]['components'] == ['P2-L1', 'P2-S1']
+        assert merged['page_count'] == 2
+
+    def test_scalar_keys_from_first_page(self):
+        """Test that non-list keys come from the first page and stay per page"""
+        merged = merge_page_results([(0, page_result(0)), (1, page_result(1))])
+        assert merged['analysis'] == {'scale': '1:100'}
+        assert merged['pages'][1]['details']['analysis'] == {'scale': '1:101'}
+
+    def test_failed_pages_reported(self):
+        """Test that a failed page is listed without failing the set"""
+        merged = merge_page_results([(0, page_result(0)), (1, {'error': 'timeout'})])
+        assert len(merged['components']) == 2
+        assert merged['pages'][1] == {'page': 1, 'error': 'timeout'}
+
+    def test_all_failed_returns_error(self):
+        """Test that the first error is returned when every page fails"""
+        result = merge_page_results([(0, {'error': 'No API key found', 'fallback': True}),
+                                     (1, {'error': 'No API key found'})])
+        assert result == {'error': 'No API key found', 'fallback': True}
+
+
+@pytest.mark.unit
+class TestAnalyzePages:
+    """Tests for concurrent per-page analysis"""
+
+    def test_single_page_unchanged(self):
+        """Test that a one-page plan returns the page result as-is"""
+        assert analyze_pages(page_result, 1) == page_result(0)
+
+    def test_pages_run_concurrently(self):
+        """Test that pages overlap up to max_workers"""
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow_page(page_num):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return page_result(page_num)
+
+        merged = analyze_pages(slow_page, 6, max_workers=3)
+        assert peak[0] == 3
+        assert len(merged['rooms']) == 6
+
+    def test_page_exception_is_isolated(self):
+        """Test that an exception on one page becomes that page's error"""
+        def flaky(page_num):
+            if page_num == 1:
+                raise RuntimeError('render failed')
+            return page_result(page_num)
+
+        merged = analyze_pages(flaky, 3)
+        assert merged['pages'][1]['error'] == 'render failed'
+        assert len(merged['rooms']) == 2
@@ -0,0 +1,247 @@
+"""
+Tests for floorplan thumbnail/medium/tile pyramids and their /assets routes
+"""
+import io
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from services.asset_store import AssetStore
+from services.floorplan_pyramid import FloorplanPyramids
+
+
+def write_image(path, size=(3000, 2000), mode='RGB', color=(200, 30, 30)):
+    """Write a test floorplan raster and return its path"""
+    Image.new(mode, size, color).save(path)
+    return str(path)
+
+
+@pytest.mark.unit
+class TestFloorplanPyramids:
+    """Tests for building and tracking pyramids"""
+
+    def test_build_levels(self, tmp_path):
+        """Test that thumbnail and medium keep the aspect ratio and full is a copy of the source"""
+        source = write_image(tmp_path / 'plan.png')
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'))
+        manifest = builder.build(source)
+
+        levels = manifest['levels']
+        assert (manifest['width'], manifest['height']) == (3000, 2000)
+        assert (levels['thumbnail']['width'], levels['thumbnail']['height']) == (256, 171)
+        assert (levels['medium']['width'], levels['medium']['height']) == (1600, 1067)
+        directory = builder.directory(manifest['id'])
+        with open(os.path.join(directory, 'full.png'), 'rb') as f, open(source, 'rb') as original:
+            assert f.read() == original.read()
+        with Image.open(os.path.join(directory, 'medium.jpg')) as medium:
+            assert medium.format == 'JPEG' and medium.size == (1600, 1067)
+        assert manifest['tiles'] is None
+
+    def test_full_level_is_asset(self, tmp_path):
+        """Test that with an asset store the full level is the source's asset, not a copy"""
+        source = write_image(tmp_path / 'plan.png', size=(800, 600))
+        assets = AssetStore(str(tmp_path / 'assets'))
+        builder = FloorplanPyramids(str(tmp_path / 'assets' / 'pyramids'), assets=assets)
+        status = builder.wait(builder.submit(source)['id'], timeout=30)
+
+        full = status['manifest']['levels']['full']
+        with open(assets.path_for(full['asset']), 'rb') as f, open(source, 'rb') as original:
+            assert f.read() == original.read()
+        assert (full['width'], full['height']) == (800, 600)
+        assert sorted(os.listdir(builder.directory(status['id']))) == ['manifest.json', 'medium.jpg', 'thumbnail.jpg']
+        assert builder.submit(source)['full_asset'] == full['asset']
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that builds beyond max_pyramids remove the pyramids used longest ago"""
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'), max_pyramids=2)
+        ids = [builder.build(write_image(tmp_path / f'plan{i}.png', size=(300, 200), color=(i, 0, 0)))['id']
+               for i in range(2)]
+        for age, pyramid_id in enumerate(ids):
+            os.utime(os.path.join(builder.directory(pyramid_id), 'manifest.json'), (1000 + age, 1000 + age))
+        builder.touch(ids[0])
+
+        newest = builder.build(write_image(tmp_path / 'plan2.png', size=(300, 200), color=(2, 0, 0)))['id']
+        assert sorted(os.listdir(builder.root)) == sorted([ids[0], newest])
+        assert builder.status(ids[1])['status'] == 'missing' and builder.evicted == 1
+
+    def test_build_is_content_addressed(self, tmp_path):
+        """Test that the same image is built once and different settings get a new pyramid"""
+        source = write_image(tmp_path / 'plan.png', size=(800, 600))
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'))
+        first = builder.build(source)
+        assert builder.build(source) == first and builder.builds == 1
+
+        copy = write_image(tmp_path / 'copy.png', size=(800, 600))
+        assert builder.pyramid_id(copy) == first['id']
+        assert builder.pyramid_id(source, tiles=True) != first['id']
+        assert not [name for name in os.listdir(builder.root) if name.endswith('.tmp')]
+
+    def test_transparency_flattened(self, tmp_path):
+        """Test that transparent areas become white in the JPEG renditions"""
+        source = write_image(tmp_path / 'plan.png', size=(400, 400), mode='RGBA', color=(0, 0, 0, 0))
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'))
+        manifest = builder.build(source)
+        with Image.open(os.path.join(builder.directory(manifest['id']), 'thumbnail.jpg')) as thumbnail:
+            assert min(thumbnail.convert('L').getdata()) > 245
+
+    def test_deep_zoom_tiles(self, tmp_path):
+        """Test that every Deep Zoom level is tiled and described by tiles.dzi"""
+        source = write_image(tmp_path / 'plan.png', size=(600, 300))
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'), tiles=True)
+        manifest = builder.build(source)
+
+        directory = builder.directory(manifest['id'])
+        # 600x300 has levels 0..10; level 10 is 3x2 tiles, level 9 (300x150) 2x1, the rest one tile
+        assert manifest['tiles']['levels'] == 11
+        assert manifest['tiles']['count'] == 6 + 2 + 9
+        assert sorted(os.listdir(os.path.join(directory, 'tiles_files', '10'))) == [
+            '0_0.jpg', '0_1.jpg', '1_0.jpg', '1_1.jpg', '2_0.jpg', '2_1.jpg']
+        with Image.open(os.path.join(directory, 'tiles_files', '10', '2_1.jpg')) as tile:
+            assert tile.size == (88, 44)
+        with open(os.path.join(directory, 'tiles.dzi')) as f:
+            dzi = f.read()
+        assert 'TileSize="256"' in dzi and 'Width="600" Height="300"' in dzi
+
+    def test_submit_and_wait(self, tmp_path):
+        """Test that a submitted build finishes on the pool even if the upload is removed"""
+        source = write_image(tmp_path / 'plan.png', size=(1200, 900))
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'))
+        status = builder.submit(source)
+        os.remove(source)
+        assert status['status'] in ('pending', 'ready')
+
+        status = builder.wait(status['id'], timeout=30)
+        assert status['status'] == 'ready'
+        assert status['manifest']['levels']['medium']['width'] == 1200
+        assert sorted(os.listdir(builder.root)) == [status['id']]
+
+    def test_failed_and_missing(self, tmp_path):
+        """Test that an unreadable upload reports failed and unknown ids report missing"""
+        source = tmp_path / 'plan.png'
+        source.write_bytes(b'not an image')
+        builder = FloorplanPyramids(str(tmp_path / 'pyramids'))
+        status = builder.wait(builder.submit(str(source))['id'], timeout=30)
+        assert status['status'] == 'failed' and status['error']
+        assert builder.status('0' * 64)['status'] == 'missing'
+
+
+@pytest.mark.integration
+class TestPyramidEndpoints:
+    """Integration tests for the pyramid routes and the uploads that queue builds"""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        """Create an app with the assets, CAD and canvas blueprints on temporary folders"""
+        from flask import Flask
+        from app.api.assets import assets_bp
+        from app.api.canvas import canvas_bp
+        from app.api.electrical_cad import electrical_cad_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        for key, folder in (('UPLOAD_FOLDER', 'uploads'), ('OUTPUT_FOLDER', 'outputs'),
+                            ('CAD_SESSIONS_FOLDER', 'cad'), ('ASSET_STORE_FOLDER', 'assets')):
+            app.config[key] = str(tmp_path / folder)
+            os.makedirs(app.config[key], exist_ok=True)
+        app.register_blueprint(assets_bp)
+        app.register_blueprint(canvas_bp)
+        app.register_blueprint(electrical_cad_bp)
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        """Test client for the app"""
+        return app.test_client()
+
+    def wait_ready(self, app, pyramid):
+        """Wait for an upload's pyramid build to finish"""
+        from app.api.assets import floorplan_pyramids
+        with app.app_context():
+            return floorplan_pyramids().wait(pyramid['id'], timeout=30)
+
+    def test_canvas_upload_pyramid(self, app, client):
+        """Test that an image upload returns pyramid URLs that serve immutable renditions"""
+        image = io.BytesIO()
+        Image.new('RGB', (2400, 1200), (10, 120, 10)).save(image, 'PNG')
+        response = client.post('/api/canvas/upload', data={'floorplan': (io.BytesIO(image.getvalue()), 'plan.png')},
+                               content_type='multipart/form-data')
+        pyramid = response.get_json()['pyramid']
+        assert 'image_data' not in response.get_json()
+        assert response.get_json()['image_url'] == pyramid['full_url']
+        assert pyramid['full_url'].startswith('/assets/') and '/pyramids/' not in pyramid['full_url']
+        assert self.wait_ready(app, pyramid)['status'] == 'ready'
+
+        status = client.get(pyramid['status_url'])
+        assert status.get_json()['status'] == 'ready' and 'no-cache' in status.headers['Cache-Control']
+        assert status.get_json()['medium_url'] == pyramid['medium_url']
+
+        medium = client.get(pyramid['medium_url'])
+        assert medium.status_code == 200 and medium.mimetype == 'image/jpeg'
+        assert Image.open(io.BytesIO(medium.data)).size == (1600, 800)
+        assert 'immutable' in medium.headers['Cache-Control']
+        assert client.get(pyramid['full_url']).data == image.getvalue()
+
+        response = client.post('/api/canvas/upload?inline_image=1', content_type='multipart/form-data',
+                               data={'floorplan': (io.BytesIO(image.getvalue()), 'plan.png')})
+        assert response.get_json()['image_data'].startswith('data:image/png;base64,')
+        assert (response.get_json()['pyramid']['width'], response.get_json()['pyramid']['height']) == (2400, 1200)
+
+    def test_status_keeps_full_asset(self, app, client):
+        """Test that the status touches the full asset and drops its URL once evicted"""
+        image = io.BytesIO()
+        Image.new('RGB', (300, 200), 'green').save(image, 'PNG')
+        response = client.post('/api/canvas/upload', content_type='multipart/form-data',
+                               data={'floorplan': (io.BytesIO(image.getvalue()), 'plan.png')})
+        pyramid = response.get_json()['pyramid']
+        assert self.wait_ready(app, pyramid)['status'] == 'ready'
+        from app.api.assets import asset_store
+        with app.app_context():
+            path = asset_store().path_for(pyramid['full_url'].split('/')[-1])
+        os.utime(path, (0, 0))
+        assert client.get(pyramid['status_url']).get_json()['full_url'] == pyramid['full_url']
+        assert os.path.getmtime(path) > 0
+
+        os.remove(path)
+        assert client.get(pyramid['status_url']).get_json()['full_url'] is None
+
+    def test_same_name_uploads_kept_apart(self, app, client, tmp_path):
+        """Test that uploads sharing a file name keep their own file and pyramid"""
+        pyramids = []
+        for color in ('red', 'blue'):
+            image = io.BytesIO()
+            Image.new('RGB', (300, 200), color).save(image, 'PNG')
+            response = client.post('/api/canvas/upload', content_type='multipart/form-data',
+                                   data={'floorplan': (io.BytesIO(image.getvalue()), 'plan.png')})
+            pyramids.append(response.get_json()['pyramid'])
+        assert len(os.listdir(tmp_path / 'uploads')) == 2
+        assert pyramids[0]['id'] != pyramids[1]['id']
+        assert all(self.wait_ready(app, pyramid)['status'] == 'ready' for pyramid in pyramids)
+
+    def test_unknown_pyramid(self, client):
+        """Test that unknown or malformed pyramid ids are 404s"""
+        assert client.get('/assets/pyramids/' + '0' * 64).status_code == 404
+        assert client.get('/assets/pyramids/' + '0' * 64 + '/medium.jpg').status_code == 404
+        assert client.get('/assets/pyramids/not-an-id/medium.jpg').status_code == 404
+
+    def test_cad_pdf_upload_pyramid(self, app, client, tmp_path, monkeypatch):
+        """Test that a CAD PDF upload queues a pyramid of the rendered page"""
+        fitz = pytest.importorskip('fitz')
+        import app.utils as app_utils
+        from app.utils.pdf_raster import PageRasterizer
+        rasterizer = PageRasterizer(str(tmp_path / 'raster_cache'))
+        monkeypatch.setattr(app_utils, 'get_page_rasterizer', lambda: rasterizer)
+
+        doc = fitz.open()
+        doc.new_page(width=595, height=842)
+        pdf = doc.tobytes()
+        doc.close()
+
+        response = client.post('/api/cad/upload-pdf', data={'file': (io.BytesIO(pdf), 'plan.pdf')},
+                               content_type='multipart/form-data')
+        data = response.get_json()
+        assert data['success'] and data['pyramid']['status_url'].startswith('/assets/pyramids/')
+        manifest = self.wait_ready(app, data['pyramid'])['manifest']
+        assert max(manifest['levels']['medium']['width'], manifest['levels']['medium']['height']) == 1600
+        assert json.loads(client.get(data['pyramid']['status_url']).data)['status'] == 'ready'
@@ -0,0 +1,176 @@
+"""
+Tests for the background analysis job queue
+"""
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from services.job_queue import JobQueue, QueueFull, job_cancelled
+
+
+def wait_for(queue, job_id, states=('completed', 'failed', 'cancelled'), timeout=5):
+    """Poll a job until it reaches one of the given states"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+def dead_pid():
+    """Pid of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    """Fixture providing a single-worker queue in a temp directory"""
+    return JobQueue(str(tmp_path / 'jobs'), max_workers=1, max_pending=3)
+
+
+@pytest.mark.unit
+class TestJobQueue:
+    """Tests for submitting, polling and cancelling jobs"""
+
+    def test_submit_returns_immediately_and_completes(self, job_queue):
+        """Test that submit returns a queued job whose result can be polled"""
+        release = threading.Event()
+        job = job_queue.submit('test', lambda: release.wait(5) and {'rooms': 3})
+        assert job['status'] in ('queued', 'running')
+
+        release.set()
+        done = wait_for(job_queue, job['id'])
+        assert done['status'] == 'completed'
+        assert done['result'] == {'rooms': 3}
+
+    def test_failure_is_reported(self, job_queue):
+        """Test that an exception marks the job failed with its message"""
+        def boom():
+            raise RuntimeError('model unavailable')
+
+        job = wait_for(job_queue, job_queue.submit('test', boom)['id'])
+        assert job['status'] == 'failed'
+        assert job['error'] == 'model unavailable'
+        assert 'traceback' not in job
+
+    def test_max_concurrency_and_cancel_queued(self, job_queue):
+        """Test that extra jobs wait for a worker and can be cancelled while queued"""
+        release = threading.Event()
+        first = job_queue.submit('test', release.wait, 5)
+        wait_for(job_queue, first['id'], states=('running',))
+
+        second = job_queue.submit('test', lambda: 'ran')
+        assert job_queue.get(second['id'])['status'] == 'queued'
+        assert job_queue.get(second['id'])['position'] == 1
+
+        assert job_queue.cancel(second['id'])['status'] == 'cancelled'
+        release.set()
+        wait_for(job_queue, first['id'])
+        assert job_queue.get(second['id'])['result'] is None
+
+    def test_cancel_running_is_cooperative(self, job_queue):
+        """Test that a running job sees job_cancelled() and its result is dropped"""
+        started = threading.Event()
+
+        def loop():
+            started.set()
+            while not job_cancelled():
+                time.sleep(0.01)
+            return {'partial': True}
+
+        job = job_queue.submit('test', loop)
+        started.wait(5)
+        job_queue.cancel(job['id'])
+        done = wait_for(job_queue, job['id'])
+        assert done['status'] == 'cancelled'
+        assert done['result'] is None
+
+    def test_queue_full(self, job_queue):
+        """Test that submissions beyond max_pending are rejected"""
+        release = threading.Event()
+        for _ in range(3):
+            job_queue.submit('test', release.wait, 5)
+        with pytest.raises(QueueFull):
+            job_queue.submit('test', release.wait, 5)
+        release.set()
+
+    def test_restart_marks_unfinished_jobs_failed(self, job_queue, tmp_path):
+        """Test that jobs lost with their process are failed on reload"""
+        release = threading.Event()
+        job = job_queue.submit('test', release.wait, 5)
+        wait_for(job_queue, job['id'], states=('running',))
+
+        # Rewrite the record as if its owner had exited
+        path = tmp_path / 'jobs' / f"{job['id']}.json"
+        record = json.loads(path.read_text())
+        record['owner']['pid'] = dead_pid()
+        path.write_text(json.dumps(record))
+
+        reloaded = JobQueue(str(tmp_path / 'jobs'))
+        record = reloaded.get(job['id'])
+        assert record['status'] == 'failed'
+        assert 'restart' in record['error']
+        release.set()
+
+    def test_live_owner_jobs_left_running(self, job_queue, tmp_path):
+        """Test that a new queue leaves jobs of a live process alone and sees their results"""
+        release = threading.Event()
+        job = job_queue.submit('test', lambda: release.wait(5) and 'done')
+        wait_for(job_queue, job['id'], states=('running',))
+
+        reloaded = JobQueue(str(tmp_path / 'jobs'))
+        assert reloaded.get(job['id'])['status'] == 'running'
+        release.set()
+        wait_for(job_queue, job['id'])
+        assert reloaded.get(job['id'])['result'] == 'done'
+
+    def test_unknown_job(self, job_queue):
+        """Test that unknown or malformed ids return None"""
+        assert job_queue.get('00000000-0000-0000-0000-000000000000') is None
+        assert job_queue.get('../etc/passwd') is None
+        assert job_queue.cancel('missing') is None
+
+
+@pytest.mark.integration
+class TestQueuedUploads:
+    """Integration tests for the files queued analysis jobs read and write"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Create a test client with the quote automation blueprint on temporary folders"""
+        from flask import Flask
+        from app.api.quote_automation import quote_automation_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        for key in ('UPLOAD_FOLDER', 'OUTPUT_FOLDER'):
+            app.config[key] = str(tmp_path / key.lower())
+            (tmp_path / key.lower()).mkdir()
+        app.register_blueprint(quote_automation_bp)
+        return app.test_client()
+
+    def test_same_name_uploads_kept_apart(self, client, tmp_path):
+        """Test that two uploads with one file name keep their own upload and output files"""
+        import io
+        from PIL import Image
+
+        results = []
+        for color in ('red', 'blue'):
+            image = io.BytesIO()
+            Image.new('RGB', (40, 40), color).save(image, 'PNG')
+            response = client.post('/api/analyze?wait=true', content_type='multipart/form-data', data={
+                'floorplan': (io.BytesIO(image.getvalue()), 'plan.png'), 'manual_mode': 'true'})
+            results.append(response.get_json())
+
+        assert len(list((tmp_path / 'upload_folder').iterdir())) == 2
+        assert results[0]['quote_pdf'] != results[1]['quote_pdf']
+        assert results[0]['annotated_pdf'] != results[1]['annotated_pdf']
+        assert len(list((tmp_path / 'output_folder').iterdir())) == 4
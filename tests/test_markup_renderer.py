@@ -0,0 +1,83 @@
+"""
+Tests for the batched markup overlay renderer
+"""
+import pytest
+from PIL import Image
+
+from app.utils.markup_renderer import MarkupRenderer, style_for
+
+
+@pytest.fixture
+def mapping():
+    """Fixture providing a small mapping with mixed component styles"""
+    return {
+        'components': [
+            {'id': 'L1', 'label': 'L1', 'type': 'light', 'location': {'x': 0.2, 'y': 0.2}},
+            {'id': 'L2', 'label': 'L2', 'type': 'fixture', 'automation_category': 'lighting',
+             'location': {'x': 0.4, 'y': 0.2}},
+            {'id': 'S1', 'label': 'S1', 'type': 'switch', 'location': {'x': 0.2, 'y': 0.5}},
+            {'id': 'P1', 'label': 'Panel', 'type': 'panel', 'location': {'x': 0.8, 'y': 0.5}},
+        ],
+        'connections': [
+            {'from': 'L1', 'to': 'S1', 'type': 'control', 'circuit': 'C1'},
+            {'from': 'S1', 'to': 'P1', 'type': 'power'},
+            {'from': 'S1', 'to': 'missing'},
+        ],
+        'analysis': {'scale': '1:100'},
+    }
+
+
+@pytest.mark.unit
+class TestStyleFor:
+    """Tests for the precomputed style lookup"""
+
+    def test_rule_priority(self):
+        """Test that styles follow the original type/category precedence"""
+        assert style_for('light', 'climate') == 'lighting'
+        assert style_for('fixture', 'lighting') == 'lighting'
+        assert style_for('switch', 'shading') == 'switch'
+        assert style_for('sensor', 'security_access') == 'security'
+        assert style_for('outlet', 'outlet') == 'outlet'
+        assert style_for('unknown', 'unknown') == 'default'
+
+
+@pytest.mark.unit
+class TestMarkupRenderer:
+    """Tests for overlay drawing, caching and compositing"""
+
+    def test_overlay_is_transparent_except_markup(self, mapping):
+        """Test that the overlay only covers the drawn markup"""
+        overlay = MarkupRenderer().draw_overlay(mapping, (1000, 800))
+        assert overlay.mode == 'RGBA'
+        assert overlay.getpixel((500, 100))[3] == 0
+        # Top of the light ring at (200, 160) and the legend box
+        assert overlay.getpixel((200, 145)) == (255, 215, 0, 255)
+        assert overlay.getpixel((100, 750)) == (255, 255, 255, 255)
+
+    def test_compose_keeps_base(self, mapping):
+        """Test that compositing keeps the base raster where there is no markup"""
+        base = Image.new('RGB', (1000, 800), (10, 20, 30))
+        page = MarkupRenderer().compose(base, mapping)
+        assert page.mode == 'RGB' and page.size == base.size
+        assert page.getpixel((500, 100)) == (10, 20, 30)
+        assert page.getpixel((200, 145)) == (255, 215, 0)
+
+    def test_overlay_cached_until_edit(self, mapping, tmp_path):
+        """Test that unchanged mappings reuse the cached overlay and edits redraw it"""
+        renderer = MarkupRenderer(str(tmp_path / 'overlays'))
+        first = renderer.render_overlay(mapping, (1000, 800))
+        second = renderer.render_overlay(dict(mapping), (1000, 800))
+        assert renderer.stats()['renders'] == 1 and renderer.stats()['hits'] == 1
+        assert first.tobytes() == second.tobytes()
+
+        mapping['components'][0]['location'] = {'x': 0.3, 'y': 0.3}
+        renderer.render_overlay(mapping, (1000, 800))
+        assert renderer.stats()['renders'] == 2
+
+    def test_eviction(self, mapping, tmp_path):
+        """Test that the overlay cache is trimmed to max_overlays"""
+        overlay_dir = tmp_path / 'overlays'
+        renderer = MarkupRenderer(str(overlay_dir), max_overlays=2)
+        for size in ((400, 300), (500, 300), (600, 300)):
+            renderer.render_overlay(mapping, size)
+        assert len(list(overlay_dir.glob('*.png'))) == 2
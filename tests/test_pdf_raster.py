@@ -0,0 +1,130 @@
+"""
+Tests for the shared PDF rasterizer and its render cache
+"""
+import io
+import os
+
+import pytest
+
+fitz = pytest.importorskip('fitz')
+from PIL import Image
+
+from app.utils.pdf_raster import PageRasterizer
+
+
+def write_pdf(path, pages=2):
+    """Write a letter-size PDF with a label and a red square on each page"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Page {i + 1}")
+        page.draw_rect(fitz.Rect(100, 100, 300, 300), color=(1, 0, 0))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """Fixture providing a two-page letter-size PDF"""
+    return write_pdf(str(tmp_path / 'plan.pdf'))
+
+
+@pytest.fixture
+def rasterizer(tmp_path):
+    """Fixture providing a rasterizer with an empty cache"""
+    return PageRasterizer(str(tmp_path / 'cache'))
+
+
+@pytest.mark.unit
+class TestPageRasterizer:
+    """Tests for cached page rendering"""
+
+    def test_render_sizes(self, rasterizer, pdf_path):
+        """Test that renders have the requested DPI"""
+        img = Image.open(io.BytesIO(rasterizer.render_png(pdf_path, 0, dpi=144)))
+        assert img.size == (1224, 1584)
+        assert rasterizer.render_image(pdf_path, 1, dpi=300).size == (2550, 3300)
+
+    def test_lower_dpi_derived_from_master(self, rasterizer, pdf_path):
+        """Test that one master render serves every lower DPI"""
+        rasterizer.render_png(pdf_path, 0, dpi=144)
+        rasterizer.render_png(pdf_path, 0, dpi=72)
+        rasterizer.render_png(pdf_path, 0, dpi=300)
+        stats = rasterizer.stats()
+        assert stats['renders'] == 1
+        assert stats['derived'] == 2
+        assert stats['hits'] >= 2
+
+    def test_repeat_is_cache_hit_and_stable(self, rasterizer, pdf_path, tmp_path):
+        """Test that a re-uploaded copy of the same file reuses identical bytes"""
+        first = rasterizer.render_png(pdf_path, 0, dpi=144)
+        copy_path = str(tmp_path / 'reupload.pdf')
+        with open(pdf_path, 'rb') as src, open(copy_path, 'wb') as dst:
+            dst.write(src.read())
+        renders = rasterizer.stats()['renders']
+        assert rasterizer.render_png(copy_path, 0, dpi=144) == first
+        assert rasterizer.stats()['renders'] == renders
+
+    def test_save_png_and_page_count(self, rasterizer, pdf_path, tmp_path):
+        """Test that save_png writes the cached render and page_count reads the PDF"""
+        out = str(tmp_path / 'out.png')
+        rasterizer.save_png(pdf_path, out, 1, dpi=144)
+        assert Image.open(out).size == (1224, 1584)
+        assert rasterizer.page_count(pdf_path) == 2
+
+    def test_prerender_all_pages(self, rasterizer, pdf_path):
+        """Test that prerender fills the cache for every page"""
+        assert rasterizer.prerender(pdf_path, dpi=144) == 2
+        renders = rasterizer.stats()['renders']
+        assert renders == 2
+        rasterizer.render_png(pdf_path, 1, dpi=144)
+        assert rasterizer.stats()['renders'] == renders
+        assert rasterizer.prerender(pdf_path, dpi=144, max_pages=1) == 1
+
+    def test_prerender_pool_failure_falls_back(self, rasterizer, tmp_path, monkeypatch):
+        """Test that prerender spawns its pool and renders inline when the pool fails"""
+        from app.utils import pdf_raster
+        started = {}
+
+        def failing_pool(**kwargs):
+            started.update(kwargs)
+            raise RuntimeError('pool exploded')
+
+        monkeypatch.setattr(pdf_raster, 'ProcessPoolExecutor', failing_pool)
+        pdf_path = write_pdf(str(tmp_path / 'long.pdf'), pages=4)
+        assert rasterizer.prerender(pdf_path, dpi=144, max_workers=2) == 4
+        assert started['max_workers'] == 2
+        assert started['mp_context'].get_start_method() == 'spawn'
+        assert rasterizer.stats()['renders'] == 4
+
+    def test_prerender_few_pages_inline(self, rasterizer, pdf_path, monkeypatch):
+        """Test that fewer than two pages per worker are rendered without a pool"""
+        from app.utils import pdf_raster
+
+        started = []
+        monkeypatch.setattr(pdf_raster, 'ProcessPoolExecutor', lambda **kwargs: started.append(kwargs))
+        assert rasterizer.prerender(pdf_path, dpi=144, max_workers=2) == 2
+        assert started == []
+        assert rasterizer.stats()['renders'] == 2
+
+    def test_lru_eviction(self, tmp_path, pdf_path):
+        """Test that the cache is trimmed to max_bytes, keeping the newest render"""
+        rasterizer = PageRasterizer(str(tmp_path / 'small'), max_bytes=1)
+        rasterizer.render_png(pdf_path, 0, dpi=144)
+        files = os.listdir(str(tmp_path / 'small'))
+        assert len(files) == 1 and files[0].endswith('_144.png')
+        assert rasterizer.stats()['evictions'] >= 1
+
+    def test_eviction_skips_renders_in_use(self, tmp_path, pdf_path):
+        """Test that a render handed to a caller survives eviction until it is read"""
+        rasterizer = PageRasterizer(str(tmp_path / 'small'), max_bytes=1)
+        with rasterizer._cached(pdf_path, 0, 144) as path:
+            rasterizer.render_png(pdf_path, 1, dpi=144)
+            assert os.path.exists(path)
+            with Image.open(path) as img:
+                assert img.size == (1224, 1584)
+        # Once released it is evicted like any other render
+        assert not os.path.exists(path)
+        assert [f for f in os.listdir(str(tmp_path / 'small')) if f.endswith('.png')] == [
+            os.path.basename(path).replace('_p0_', '_p1_')]
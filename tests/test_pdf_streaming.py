@@ -0,0 +1,93 @@
+"""
+Tests for in-memory PDF export streaming
+"""
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from app.utils.image_utils import decode_data_url
+
+
+@pytest.fixture
+def png_bytes():
+    """Fixture providing a small PNG image"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (300, 200), 'blue').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def data_url(png_bytes):
+    """Fixture providing the PNG as a canvas data URL"""
+    return 'data:image/png;base64,' + base64.b64encode(png_bytes).decode('ascii')
+
+
+@pytest.mark.unit
+class TestDecodeDataUrl:
+    """Tests for base64 data URL decoding"""
+
+    def test_data_url(self, data_url, png_bytes):
+        """Test that the data URL prefix is skipped"""
+        assert decode_data_url(data_url) == png_bytes
+
+    def test_bare_base64(self, png_bytes):
+        """Test that plain base64 without a prefix decodes"""
+        assert decode_data_url(base64.b64encode(png_bytes).decode('ascii')) == png_bytes
+
+    def test_bytes_input(self, data_url, png_bytes):
+        """Test that bytes input decodes the same as str"""
+        assert decode_data_url(data_url.encode('ascii')) == png_bytes
+
+
+@pytest.mark.integration
+class TestPdfExportRoutes:
+    """Integration tests for the floorplan and editor PDF export routes"""
+
+    @pytest.fixture
+    def output_dir(self, tmp_path):
+        """Fixture providing an empty output folder"""
+        return tmp_path
+
+    @pytest.fixture
+    def client(self, output_dir):
+        """Create a test client with the export blueprints"""
+        from flask import Flask
+        from app.api.pdf_editor import pdf_editor_bp
+        from app.api.quote_automation import quote_automation_bp
+
+        app = Flask(__name__)
+        app.config['TESTING'] = True
+        app.config['OUTPUT_FOLDER'] = str(output_dir)
+        app.register_blueprint(quote_automation_bp)
+        app.register_blueprint(pdf_editor_bp)
+        return app.test_client()
+
+    def test_floorplan_pdf_in_memory(self, client, data_url, output_dir):
+        """Test that the floorplan PDF is returned without writing files"""
+        response = client.post('/api/generate-floorplan-pdf', json={
+            'image_data': data_url,
+            'project_name': 'Test',
+            'components': [{'type': 'light', 'room': 'Kitchen', 'totalPrice': 10}],
+        })
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        assert response.data.startswith(b'%PDF')
+        assert list(output_dir.iterdir()) == []
+
+    def test_editor_pdf_in_memory(self, client, data_url, output_dir):
+        """Test that the editor PDF is returned without writing files"""
+        response = client.post('/api/pdf-editor/export-pdf', json={
+            'image_data': data_url,
+            'form_name': 'My Form',
+        })
+        assert response.status_code == 200
+        assert response.data.startswith(b'%PDF')
+        assert 'My_Form_' in response.headers['Content-Disposition']
+        assert list(output_dir.iterdir()) == []
+
+    def test_missing_image(self, client):
+        """Test that a request without image data is rejected"""
+        response = client.post('/api/pdf-editor/export-pdf', json={})
+        assert response.status_code == 400
@@ -0,0 +1,53 @@
+"""
+Tests for the shared PDF styles and page templates
+"""
+import io
+
+import pytest
+from pypdf import PdfReader
+from reportlab.platypus import Paragraph, Table
+
+from app.utils.pdf_templates import TABLE_STYLES, build_pdf, get_styles, page_decorator
+
+
+def pdf_text(buffer):
+    """All text of a PDF held in a buffer"""
+    buffer.seek(0)
+    return '\n'.join(page.extract_text() for page in PdfReader(buffer).pages)
+
+
+@pytest.mark.unit
+class TestPdfTemplates:
+    """Tests for cached styles, table styles and branded footers"""
+
+    def test_styles_built_once(self):
+        """Test that the stylesheet and custom styles are shared across calls"""
+        styles = get_styles()
+        assert get_styles() is styles
+        assert styles['QuoteTitle'].fontSize == 24
+        assert styles['FloorplanTitle'].spaceAfter == 20
+        # The shared Heading1 is never mutated by the custom styles
+        assert styles['Heading1'].fontSize != 24
+
+    def test_page_decorator_cached_per_company(self):
+        """Test that footer callbacks are reused for the same company details"""
+        company = {'name': 'Test Co', 'phone': '123'}
+        assert page_decorator(company) is page_decorator(dict(company))
+        assert page_decorator(company) is not page_decorator({'name': 'Other Co'})
+
+    def test_build_pdf_with_footer(self):
+        """Test that branded PDFs carry the company line and page numbers"""
+        styles = get_styles()
+        table = Table([['Item', 'Total'], ['Lighting', '$10.00']])
+        table.setStyle(TABLE_STYLES['quote'])
+        story = [Paragraph('Test Co', styles['QuoteTitle']), table]
+
+        buffer = io.BytesIO()
+        build_pdf(buffer, story, {'name': 'Test Co', 'email': 'a@b.c'})
+        text = pdf_text(buffer)
+        assert 'Test Co  |  a@b.c' in text
+        assert 'Page 1' in text
+
+        plain = io.BytesIO()
+        build_pdf(plain, [Paragraph('Quote', styles['CrmTitle'])])
+        assert 'Page 1' not in pdf_text(plain)
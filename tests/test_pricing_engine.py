@@ -0,0 +1,97 @@
+"""
+Tests for the compiled pricing engine
+"""
+import json
+import os
+
+import pytest
+
+from services.pricing_engine import PricingEngine, PricingTables
+
+
+@pytest.fixture
+def config():
+    """Fixture providing a pricing config with two automation types"""
+    return {
+        'automation_types': {
+            'lighting': {'name': 'Lighting Control',
+                         'base_cost_per_unit': {'basic': 150.0, 'premium': 250.0},
+                         'labor_hours': {'basic': 2.0, 'premium': 3.0}},
+            'audio': {'name': 'Audio System',
+                      'base_cost_per_unit': {'basic': 350.0},
+                      'labor_hours': {'basic': 3.5}},
+        },
+        'labor_rate': 75.0,
+        'markup_percentage': 20.0,
+        'company_info': {'name': 'Test Co'},
+    }
+
+
+@pytest.mark.unit
+class TestPricingTables:
+    """Tests for vectorized pricing"""
+
+    def test_price_rooms(self, config):
+        """Test that rooms price per automation key with room tiers and defaults"""
+        rooms = [
+            {'name': 'Kitchen', 'lighting': {'count': 4, 'type': 'premium'}, 'audio': {'count': 1}},
+            {'name': 'Hall', 'lighting': {'count': 0}, 'climate': {'count': 2}},
+        ]
+        items = PricingTables(config).price_rooms(rooms, default_tier='basic')
+        assert [(i['room'], i['automation_type'], i['quantity']) for i in items] == [
+            ('Kitchen', 'lighting', 4), ('Kitchen', 'audio', 1), ('Hall', 'climate', 2)]
+        assert items[0]['total'] == (250.0 + 3.0 * 75.0) * 4
+        assert items[1]['labor_cost'] == 3.5 * 75.0
+        # Unknown automation types price at zero under their key
+        assert items[2]['name'] == 'climate' and items[2]['total'] == 0
+
+    def test_price_rooms_filtered(self, config):
+        """Test that automation_keys limits the priced keys"""
+        rooms = [{'name': 'Kitchen', 'lighting': {'count': 4}, 'audio': {'count': 1}}]
+        items = PricingTables(config).price_rooms(rooms, automation_keys=['audio'])
+        assert [i['automation_type'] for i in items] == ['audio']
+        assert PricingTables(config).price_rooms(rooms, automation_keys=[]) == []
+
+    def test_unknown_tier_prices_zero(self, config):
+        """Test that a tier missing from an automation type costs nothing"""
+        [item] = PricingTables(config).price_counts({'audio': 2}, 'premium')
+        assert (item['unit_cost'], item['total']) == (0, 0)
+
+    def test_price_symbols_and_totals(self, config):
+        """Test that symbols price one unit each plus custom items"""
+        pricing = PricingTables(config)
+        items, counts = pricing.price_symbols([
+            {'type': 'light', 'automation_category': 'lighting', 'room': 'Den'},
+            {'type': 'unknown', 'items': [{'name': 'Cable', 'price': 5, 'quantity': 3}]},
+        ], 'basic')
+        assert counts == [1, 1]
+        assert items[0] == {'type': 'Lighting Control', 'quantity': 1, 'unit_cost': 150.0,
+                            'labor_cost': 150.0, 'total': 300.0, 'room': 'Den'}
+        assert items[1]['total'] == 15
+        subtotal, markup, total = pricing.totals(items)
+        assert (subtotal, markup, total) == (315.0, 63.0, 378.0)
+
+
+@pytest.mark.unit
+class TestPricingEngine:
+    """Tests for config loading and invalidation"""
+
+    def test_reloads_on_change(self, config, tmp_path):
+        """Test that tables are cached until the config file changes"""
+        path = tmp_path / 'automation_data.json'
+        path.write_text(json.dumps(config))
+        engine = PricingEngine(str(path))
+        tables = engine.tables()
+        assert engine.tables() is tables
+
+        config['labor_rate'] = 100.0
+        path.write_text(json.dumps(config, indent=2))
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        assert engine.tables() is not tables
+        assert engine.tables().labor_rate == 100.0
+
+    def test_defaults_without_file(self, config, tmp_path):
+        """Test that the default config is used when no file exists"""
+        engine = PricingEngine(str(tmp_path / 'missing.json'), config)
+        assert engine.config() == config
+        assert engine.config() is not config
@@ -0,0 +1,72 @@
+"""
+Tests for SQL-side search, sort and pagination in the repositories
+"""
+import pytest
+
+from services.crm_repository import CRMRepository
+from services.inventory_repository import InventoryRepository
+from services.query_paging import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def repo(db_session, org_id):
+    """Fixture providing a CRM repository with a handful of customers"""
+    repository = CRMRepository(db_session, org_id)
+    for name, company in [('Alice', 'Acme'), ('bob', None), ('Carol', 'Acme 100%'),
+                          ('Dave', 'Globex'), ('Eve', 'Acme')]:
+        repository.create_customer({'name': name, 'company': company})
+    db_session.commit()
+    return repository
+
+
+@pytest.mark.unit
+class TestRepositoryPaging:
+    """Tests for pushing search/sort/limit/offset into the list queries"""
+
+    def test_offset_page_carries_total(self, repo):
+        """Test that an offset page returns only its rows plus the full count"""
+        page = repo.list_customers(sort_by='name', limit=2, offset=2, with_total=True)
+        assert [c['name'] for c in page['items']] == ['Dave', 'Eve']
+        assert page['total'] == 5
+        assert page['next_cursor'] is not None
+
+    def test_offset_past_end_still_counts(self, repo):
+        """Test that a page beyond the end reports the total"""
+        page = repo.list_customers(limit=2, offset=10, with_total=True)
+        assert page['items'] == []
+        assert page['total'] == 5
+
+    def test_search_is_literal(self, repo):
+        """Test that LIKE wildcards in the search term match literally"""
+        assert [c['name'] for c in repo.list_customers(search='acme')] == ['Alice', 'Carol', 'Eve']
+        assert [c['name'] for c in repo.list_customers(search='100%')] == ['Carol']
+        assert repo.list_customers(search='_') == []
+
+    def test_cursor_walks_every_row_once(self, repo):
+        """Test that keyset pages cover the table without gaps or repeats"""
+        seen, cursor = [], None
+        while True:
+            page = repo.list_customers(sort_by='company', sort_order='desc',
+                                       limit=2, cursor=cursor, with_total=True)
+            seen.extend(c['name'] for c in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        assert sorted(seen) == ['Alice', 'Carol', 'Dave', 'Eve', 'bob']
+        assert seen[-1] == 'bob'  # NULL company sorts last
+        assert page['total'] is None
+
+    def test_inventory_low_stock_and_sort(self, db_session, org_id):
+        """Test that inventory filters and sorts in SQL"""
+        inventory = InventoryRepository(db_session, org_id)
+        for name, qty in [('Relay', 1), ('Switch', 10), ('Cable', 2)]:
+            inventory.create_item({'name': name, 'quantity': qty, 'reorder_level': 5})
+        db_session.commit()
+        items = inventory.list_items(low_stock_only=True, sort_by='quantity', sort_order='desc')
+        assert [i['name'] for i in items] == ['Cable', 'Relay']
+
+    def test_bad_cursor_raises(self):
+        """Test that a garbled cursor is rejected"""
+        assert decode_cursor(encode_cursor(3, 'x')) == (3, 'x')
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor')
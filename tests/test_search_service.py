@@ -0,0 +1,75 @@
+"""
+Tests for ranked CRM search
+"""
+import pytest
+
+from services.crm_repository import CRMRepository
+from services.search_service import SearchService, rank_records
+
+
+@pytest.fixture
+def search(db_session, org_id):
+    """Fixture providing a search service over a few customers and quotes"""
+    crm = CRMRepository(db_session, org_id)
+    for name, company in [('Sparkford Electrical', None), ('Mark Spark', 'Volt Co'),
+                          ('Spark', None), ('Bright Sparks Pty', None), ('Unrelated', 'Acme')]:
+        crm.create_customer({'name': name, 'company': company})
+    crm.delete_customer(crm.create_customer({'name': 'Spark Old'})['id'])
+    crm.create_quote({'title': 'Switchboard upgrade', 'quote_number': 'Q-2024-001'})
+    db_session.commit()
+    return SearchService(db_session, org_id)
+
+
+@pytest.mark.unit
+class TestSearchService:
+    """Tests for SQL-side ranked search"""
+
+    def test_ranks_exact_then_prefix_then_word(self, search):
+        """Test that exact, prefix and word-prefix matches come in that order"""
+        names = [c['name'] for c in search.search_entity('customers', 'spark')]
+        assert names == ['Spark', 'Sparkford Electrical', 'Mark Spark', 'Bright Sparks Pty']
+
+    def test_inactive_excluded(self, search):
+        """Test that deactivated customers are not returned"""
+        names = [c['name'] for c in search.search_entity('customers', 'spark old')]
+        assert names == []
+
+    def test_grouped_search(self, search):
+        """Test that search() groups results by entity and honours limit"""
+        results = search.search('q-2024', entities=['quotes', 'customers'], limit=1)
+        assert [q['title'] for q in results['quotes']] == ['Switchboard upgrade']
+        assert results['customers'] == []
+        assert len(search.search('spark', limit=1)['customers']) == 1
+
+    def test_sqlite_has_no_trigram(self, search):
+        """Test that the SQLite fallback skips similarity ranking"""
+        assert search.has_trigram() is False
+
+
+@pytest.mark.unit
+def test_rank_records_fallback():
+    """Test that in-memory ranking applies the same rules"""
+    records = [{'name': 'Bright Sparks'}, {'name': 'spark'}, {'name': 'Sparkle', 'sku': 'X1'},
+               {'name': 'Other', 'sku': 'spark-9'}, {'name': 'Nothing'}]
+    ranked = rank_records(records, ('name', 'sku'), 'Spark')
+    assert [r['name'] for r in ranked] == ['spark', 'Other', 'Sparkle', 'Bright Sparks']
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize('requested, expected', [('0', 1), ('-5', 1), ('7', 7), ('5000', 100)])
+def test_search_limit_clamped(monkeypatch, requested, expected):
+    """Test that /api/crm/search passes ?limit= to the database clamped to 1..100"""
+    from flask import Flask
+    from app.api import crm_resources
+
+    class FakeLayer:
+        def search(self, query, entities=None, limit=None):
+            self.limit = limit
+            return {'success': True, 'results': {}}
+
+    layer = FakeLayer()
+    monkeypatch.setattr(crm_resources, 'get_db_layer', lambda: layer)
+    app = Flask(__name__)
+    app.register_blueprint(crm_resources.crm_resources_bp)
+    response = app.test_client().get(f'/api/crm/search?q=spark&limit={requested}')
+    assert response.status_code == 200 and layer.limit == expected
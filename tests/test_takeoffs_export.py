@@ -0,0 +1,74 @@
+"""
+Tests for incremental takeoffs export state
+"""
+import json
+
+import pytest
+
+from services.pricing_engine import PricingTables
+from services.takeoffs_export import TakeoffsExportCache, fingerprint, quote_row
+
+
+@pytest.fixture
+def pricing():
+    """Fixture providing minimal compiled pricing tables"""
+    return PricingTables({
+        'automation_types': {
+            'lighting': {'name': 'Lighting', 'base_cost_per_unit': {'basic': 100, 'premium': 200},
+                         'labor_hours': {'basic': 1, 'premium': 2}},
+        },
+        'labor_rate': 50,
+        'markup_percentage': 20,
+    })
+
+
+@pytest.fixture
+def symbols():
+    """Fixture providing takeoffs symbols with and without custom items"""
+    return [
+        {'id': 'L1', 'type': 'light', 'automation_category': 'lighting', 'room': 'Kitchen', 'x': 10},
+        {'id': 'L2', 'type': 'light', 'automation_category': 'lighting', 'x': 20,
+         'items': [{'name': 'Dimmer', 'price': 30, 'quantity': 2}]},
+    ]
+
+
+@pytest.mark.unit
+class TestTakeoffsExportCache:
+    """Tests for per-symbol cost caching and artifact reuse"""
+
+    def test_cost_items(self, symbols, pricing):
+        """Test that symbols price to automation and custom items with rows"""
+        items, rows = TakeoffsExportCache().cost_items(symbols, pricing, 'basic')
+        assert [item['total'] for item in items] == [150, 150, 60]
+        assert items[0]['room'] == 'Kitchen' and items[1]['room'] == 'Unassigned'
+        assert rows == [quote_row(item) for item in items]
+        assert rows[2] == ['Dimmer', 'Unassigned', '2', '$30.00', '$0.00', '$60.00']
+
+    def test_only_changed_symbols_recomputed(self, symbols, pricing):
+        """Test that a second export re-prices only the edited symbol"""
+        cache = TakeoffsExportCache()
+        cache.cost_items(symbols, pricing, 'basic')
+        cache = TakeoffsExportCache(json.loads(json.dumps(cache.to_dict())))
+        symbols[0] = dict(symbols[0], x=15)
+        items, _ = cache.cost_items(symbols, pricing, 'basic')
+        assert (cache.recomputed, cache.reused) == (1, 1)
+        assert len(items) == 3
+        assert len(cache.to_dict()['symbols']) == 2
+
+    def test_pricing_change_invalidates(self, symbols, pricing):
+        """Test that a tier or rate change re-prices every symbol"""
+        cache = TakeoffsExportCache()
+        cache.cost_items(symbols, pricing, 'basic')
+        items, _ = cache.cost_items(symbols, pricing, 'premium')
+        assert cache.recomputed == 2
+        assert items[0]['total'] == 300
+
+    def test_artifact_reuse(self, tmp_path):
+        """Test that artifacts are reused only for a matching fingerprint and existing file"""
+        cache = TakeoffsExportCache()
+        fp = fingerprint({'a': 1})
+        cache.remember('quote', fp, 'quote_1.pdf')
+        assert cache.artifact('quote', fp, str(tmp_path)) is None
+        (tmp_path / 'quote_1.pdf').write_bytes(b'%PDF')
+        assert cache.artifact('quote', fp, str(tmp_path)) == 'quote_1.pdf'
+        assert cache.artifact('quote', fingerprint({'a': 2}), str(tmp_path)) is None
@@ -0,0 +1,144 @@
+"""
+Tests for vision payload downscaling, encoding and tiling
+"""
+import base64
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.utils.vision_payload import (
+    FULL_PAGE,
+    encode_image,
+    merge_tile_results,
+    plan_tiles,
+    prepare_images,
+    remap_result,
+)
+
+
+@pytest.fixture
+def sheet():
+    """Fixture providing a large white sheet with black linework"""
+    img = Image.new('RGB', (6000, 4000), 'white')
+    draw = ImageDraw.Draw(img)
+    for x in range(0, 6000, 250):
+        draw.line([(x, 0), (x, 4000)], fill='black', width=3)
+    draw.rectangle([1000, 1000, 1400, 1400], outline='red', width=5)
+    return img
+
+
+@pytest.mark.unit
+class TestPrepareImages:
+    """Tests for downscaling and encoding"""
+
+    def test_downscale_to_long_edge(self, sheet):
+        """Test that the page is sent at the target long edge with size stats"""
+        [image] = prepare_images(sheet, tiling='off', max_long_edge=1568)
+        assert (image['width'], image['height']) == (1568, 1045)
+        assert image['box'] == FULL_PAGE
+        assert image['bytes'] == len(base64.b64decode(image['data']))
+        assert image['image_tokens'] == -(-1568 * 1045 // 750)
+
+    def test_smaller_than_lossless_png(self, sheet):
+        """Test that the encoded payload beats a full-size lossless PNG"""
+        buffer = io.BytesIO()
+        sheet.save(buffer, format='PNG')
+        [image] = prepare_images(sheet, tiling='off')
+        assert image['bytes'] < len(buffer.getvalue()) / 4
+
+    def test_encodings(self, sheet):
+        """Test each encoding's media type and that auto picks the smallest"""
+        small = sheet.resize((600, 400))
+        sizes = {}
+        for encoding in ('png', 'gray', 'jpeg'):
+            data, media_type = encode_image(small, encoding)
+            assert media_type == ('image/jpeg' if encoding == 'jpeg' else 'image/png')
+            sizes[encoding] = len(data)
+        auto, _ = encode_image(small, 'auto')
+        assert len(auto) == min(sizes['png'], sizes['jpeg'])
+
+    def test_small_image_not_upscaled(self):
+        """Test that images under the target are left at their size"""
+        [image] = prepare_images(Image.new('RGB', (800, 600), 'white'), tiling='auto')
+        assert (image['width'], image['height']) == (800, 600)
+
+
+@pytest.mark.unit
+class TestTiling:
+    """Tests for tiling and coordinate remapping"""
+
+    def test_plan_tiles_grid_and_cap(self):
+        """Test that huge sheets split into a capped grid whose cores cover the page"""
+        tiles = plan_tiles(9000, 6000, max_long_edge=1500, max_tiles=4, overlap=0.1)
+        assert len(tiles) == 4
+        cores = [core for _, core in tiles]
+        assert cores[0] == (0.0, 0.0, 0.5, 0.5)
+        assert tiles[0][0] == (0.0, 0.0, 0.55, 0.55)
+        assert plan_tiles(2000, 1500, max_long_edge=1568) == [(FULL_PAGE, FULL_PAGE)]
+
+    def test_auto_tiling_prepares_each_tile(self, sheet):
+        """Test that auto tiling sends one downscaled image per tile"""
+        images = prepare_images(sheet, tiling='auto', max_long_edge=1000)
+        assert len(images) == 4
+        assert all(max(image['width'], image['height']) <= 1000 for image in images)
+
+    def test_remap_result(self):
+        """Test that tile coordinates map back to page-normalized space"""
+        result = {
+            'components': [{'id': 'L1', 'location': {'x': 0.5, 'y': 0.5}}],
+            'rooms': [{'name': 'Kitchen', 'center': {'x': 0.0, 'y': 1.0},
+                       'visual_boundaries': {'x_start': 0.0, 'x_end': 1.0, 'y_start': 0.0, 'y_end': 1.0}}],
+        }
+        remapped = remap_result(result, (0.5, 0.0, 1.0, 0.5))
+        assert remapped['components'][0]['location'] == {'x': 0.75, 'y': 0.25}
+        assert remapped['rooms'][0]['center'] == {'x': 0.5, 'y': 0.5}
+        assert remapped['rooms'][0]['visual_boundaries']['x_start'] == 0.5
+        assert result['components'][0]['location'] == {'x': 0.5, 'y': 0.5}
+
+    def test_merge_tiles_dedupes_overlap(self):
+        """Test that overlap detections keep one copy and shared rooms merge"""
+        left = {'box': (0.0, 0.0, 0.55, 1.0), 'core': (0.0, 0.0, 0.5, 1.0)}
+        right = {'box': (0.45, 0.0, 1.0, 1.0), 'core': (0.5, 0.0, 1.0, 1.0)}
+        # The same switch at page x=0.48 seen by both tiles
+        left_result = {
+            'components': [{'id': 'S1', 'location': {'x': 0.48 / 0.55, 'y': 0.5}}],
+            'rooms': [{'name': 'Living', 'lighting': {'count': 2},
+                       'visual_boundaries': {'x_start': 0.5, 'x_end': 1.0, 'y_start': 0.0, 'y_end': 1.0}}],
+        }
+        right_result = {
+            'components': [{'id': 'S1', 'location': {'x': (0.48 - 0.45) / 0.55, 'y': 0.5}},
+                           {'id': 'L1', 'location': {'x': 0.5, 'y': 0.5}}],
+            'connections': [{'from': 'L1', 'to': 'S1'}],
+            'rooms': [{'name': 'living', 'lighting': {'count': 4},
+                       'visual_boundaries': {'x_start': 0.0, 'x_end': 0.5, 'y_start': 0.0, 'y_end': 1.0}}],
+        }
+        merged = merge_tile_results([(left, left_result), (right, right_result)])
+        assert [c['id'] for c in merged['components']] == ['S1', 'T2-L1']
+        assert merged['connections'] == []
+        assert len(merged['rooms']) == 1
+        room = merged['rooms'][0]
+        assert room['lighting'] == {'count': 4}
+        assert room['visual_boundaries']['x_start'] == pytest.approx(0.275)
+        assert room['visual_boundaries']['x_end'] == pytest.approx(0.725)
+
+    def test_merge_tiles_keeps_separate_same_named_rooms(self):
+        """Test that same-named rooms only merge when they overlap across the seam"""
+        left = {'box': (0.0, 0.0, 0.55, 1.0), 'core': (0.0, 0.0, 0.5, 1.0)}
+        right = {'box': (0.45, 0.0, 1.0, 1.0), 'core': (0.5, 0.0, 1.0, 1.0)}
+        left_result = {'rooms': [
+            {'name': 'Bedroom', 'visual_boundaries': {'x_start': 0.5, 'x_end': 1.0, 'y_start': 0.0, 'y_end': 0.4}},
+            {'name': 'Bedroom', 'visual_boundaries': {'x_start': 0.0, 'x_end': 0.3, 'y_start': 0.6, 'y_end': 1.0}},
+            {'name': 'Bathroom', 'center': {'x': 0.9, 'y': 0.5}},
+        ]}
+        right_result = {'rooms': [
+            {'name': 'bedroom', 'visual_boundaries': {'x_start': 0.0, 'x_end': 0.5, 'y_start': 0.0, 'y_end': 0.4}},
+            {'name': 'Bedroom', 'visual_boundaries': {'x_start': 0.5, 'x_end': 1.0, 'y_start': 0.6, 'y_end': 1.0}},
+            {'name': 'Bathroom', 'center': {'x': 0.8, 'y': 0.5}},
+        ]}
+        merged = merge_tile_results([(left, left_result), (right, right_result)])
+        names = [room['name'] for room in merged['rooms']]
+        assert names == ['Bedroom', 'Bedroom', 'Bathroom', 'Bedroom', 'Bathroom']
+        top = merged['rooms'][0]['visual_boundaries']
+        assert (top['x_start'], top['x_end']) == (pytest.approx(0.275), pytest.approx(0.725))
+        assert merged['rooms'][1]['visual_boundaries']['x_end'] == pytest.approx(0.165)